@@ -23,6 +23,9 @@ from app.models.ai_model import AIModel, AISuggestion, UserAIPreferences
 from app.models.historical_report import HistoricalReport
 from app.models.user_feedback import UserFeedback
 from app.models.report_status import ReportStatus
+from app.models.report_job import ReportJob
+from app.models.report_dispatch import ReportDispatchRun, ReportDispatchItem
+from app.models.email_outbox import EmailOutbox
 
 
 # this is the Alembic Config object, which provides access to the values within the .ini file in use.
@@ -0,0 +1,50 @@
+"""Add report_jobs table for background report generation
+
+Revision ID: 20261018_0001
+Revises: 20260421_0001
+Create Date: 2026-10-18
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261018_0001"
+down_revision = "20260421_0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'report_jobs',
+        sa.Column('id', sa.String(length=32), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('report_type', sa.String(length=20), nullable=False),
+        sa.Column('params', sa.Text(), nullable=False),
+        sa.Column('params_hash', sa.String(length=64), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='queued'),
+        sa.Column('progress', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('message', sa.String(length=255), nullable=True),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('result_path', sa.String(length=500), nullable=True),
+        sa.Column('filename', sa.String(length=255), nullable=True),
+        sa.Column('media_type', sa.String(length=100), nullable=True),
+        sa.Column('historical_report_id', sa.Integer(), nullable=True),
+        sa.Column('created_at', sa.DateTime(), nullable=False),
+        sa.Column('started_at', sa.DateTime(), nullable=True),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['historical_report_id'], ['historical_reports.id'], ondelete='SET NULL'),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    op.create_index('ix_report_jobs_user_id', 'report_jobs', ['user_id'])
+    op.create_index('ix_report_jobs_user_status_hash', 'report_jobs', ['user_id', 'status', 'params_hash'])
+    op.create_index('ix_report_jobs_status_completed', 'report_jobs', ['status', 'completed_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_report_jobs_status_completed', table_name='report_jobs')
+    op.drop_index('ix_report_jobs_user_status_hash', table_name='report_jobs')
+    op.drop_index('ix_report_jobs_user_id', table_name='report_jobs')
+    op.drop_table('report_jobs')
@@ -0,0 +1,58 @@
+"""Add report dispatch run/item tables for checkpointed bulk report emails
+
+Revision ID: 20261019_0001
+Revises: 20261018_0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261019_0001"
+down_revision = "20261018_0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'report_dispatch_runs',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('kind', sa.String(length=20), nullable=False),
+        sa.Column('period_key', sa.String(length=20), nullable=False),
+        sa.Column('period_date', sa.Date(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='running'),
+        sa.Column('total', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('sent', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('failed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('retries', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('duration_seconds', sa.Float(), nullable=True),
+        sa.Column('throughput_per_minute', sa.Float(), nullable=True),
+        sa.Column('started_at', sa.DateTime(), nullable=False),
+        sa.Column('completed_at', sa.DateTime(), nullable=True),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('kind', 'period_key', name='uq_report_dispatch_runs_kind_period')
+    )
+
+    op.create_table(
+        'report_dispatch_items',
+        sa.Column('id', sa.Integer(), nullable=False),
+        sa.Column('run_id', sa.Integer(), nullable=False),
+        sa.Column('user_id', sa.Integer(), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('error', sa.Text(), nullable=True),
+        sa.Column('sent_at', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['run_id'], ['report_dispatch_runs.id'], ondelete='CASCADE'),
+        sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id'),
+        sa.UniqueConstraint('run_id', 'user_id', name='uq_report_dispatch_items_run_user')
+    )
+
+    op.create_index('ix_report_dispatch_items_run_status', 'report_dispatch_items', ['run_id', 'status'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_report_dispatch_items_run_status', table_name='report_dispatch_items')
+    op.drop_table('report_dispatch_items')
+    op.drop_table('report_dispatch_runs')
@@ -0,0 +1,26 @@
+"""Add per-user data version and version stamps on reports
+
+Revision ID: 20261021_0001
+Revises: 20261020_0001
+Create Date: 2026-10-21
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261021_0001"
+down_revision = "20261020_0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('users', sa.Column('data_version', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('historical_reports', sa.Column('data_version', sa.Integer(), nullable=True))
+    op.add_column('report_status', sa.Column('seen_version', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('report_status', 'seen_version')
+    op.drop_column('historical_reports', 'data_version')
+    op.drop_column('users', 'data_version')
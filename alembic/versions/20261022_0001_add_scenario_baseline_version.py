@@ -0,0 +1,22 @@
+"""Add baseline data version to scenarios
+
+Revision ID: 20261022_0001
+Revises: 20261021_0001
+Create Date: 2026-10-22
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261022_0001"
+down_revision = "20261021_0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('scenarios', sa.Column('baseline_version', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('scenarios', 'baseline_version')
@@ -0,0 +1,33 @@
+"""Add persisted next due date to recurring payments
+
+Existing rows start out NULL and are filled in by the nightly due date refresh.
+
+Revision ID: 20261023_0001
+Revises: 20261022_0001
+Create Date: 2026-10-23
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261023_0001"
+down_revision = "20261022_0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('recurring_payments', sa.Column('next_due_date', sa.Date(), nullable=True))
+    op.create_index('ix_recurring_payments_next_due_date', 'recurring_payments', ['next_due_date'], unique=False)
+    op.create_index(
+        'ix_recurring_payments_user_active_due',
+        'recurring_payments',
+        ['user_id', 'is_active', 'next_due_date'],
+        unique=False
+    )
+
+
+def downgrade() -> None:
+    op.drop_index('ix_recurring_payments_user_active_due', table_name='recurring_payments')
+    op.drop_index('ix_recurring_payments_next_due_date', table_name='recurring_payments')
+    op.drop_column('recurring_payments', 'next_due_date')
@@ -0,0 +1,28 @@
+"""Store background report job file results on the job row
+
+Results were written under a per-process temp directory, which other app
+hosts consuming the shared Redis queue cannot read. Unfinished downloads of
+file jobs created before this migration are lost; they expire within a day.
+
+Revision ID: 20261024_0001
+Revises: 20261023_0001
+Create Date: 2026-10-24
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261024_0001"
+down_revision = "20261023_0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('report_jobs', sa.Column('result_data', sa.LargeBinary(), nullable=True))
+    op.drop_column('report_jobs', 'result_path')
+
+
+def downgrade() -> None:
+    op.add_column('report_jobs', sa.Column('result_path', sa.String(length=500), nullable=True))
+    op.drop_column('report_jobs', 'result_data')
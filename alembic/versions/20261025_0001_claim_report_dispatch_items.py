@@ -0,0 +1,27 @@
+"""Record when a report dispatch item was claimed by a sender
+
+Items are now moved from 'pending' to 'sending' before delivery so two
+processes resuming the same run cannot both send to a recipient. claimed_at
+lets a later run requeue items left 'sending' by a process that died.
+
+Revision ID: 20261025_0001
+Revises: 20261024_0001
+Create Date: 2026-10-25
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261025_0001"
+down_revision = "20261024_0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('report_dispatch_items', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.execute("UPDATE report_dispatch_items SET status = 'pending' WHERE status = 'sending'")
+    op.drop_column('report_dispatch_items', 'claimed_at')
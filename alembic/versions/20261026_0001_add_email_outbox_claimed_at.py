@@ -0,0 +1,26 @@
+"""Record when an outbox email was claimed by a sender
+
+Startup recovery requeued every 'sending' row, including rows another running
+app process was still delivering. claimed_at lets recovery requeue only
+claims older than the lease.
+
+Revision ID: 20261026_0001
+Revises: 20261025_0001
+Create Date: 2026-10-26
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+revision = "20261026_0001"
+down_revision = "20261025_0001"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.add_column('email_outbox', sa.Column('claimed_at', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('email_outbox', 'claimed_at')
@@ -0,0 +1,79 @@
+"""Versioned cache of closed-period analytics summaries"""
+
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.cache import CacheService, get_cache
+
+GRANULARITIES = ('week', 'month', 'year')
+
+# Summaries are only superseded when the user's data version moves on;
+# the TTL reclaims the ones orphaned by such bumps.
+CLOSED_PERIOD_TTL = 90 * 24 * 3600
+
+
+def period_bounds(granularity: str, day: date) -> Tuple[date, date]:
+    """First and last day of the week (ISO, Monday start), month or year containing day"""
+    if granularity == 'week':
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=6)
+    if granularity == 'month':
+        start = day.replace(day=1)
+        return start, (start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+    return date(day.year, 1, 1), date(day.year, 12, 31)
+
+
+def period_key(granularity: str, day: date) -> str:
+    """Stable label of the period containing day, e.g. 'week:2025-W07', 'month:2025-02', 'year:2025'"""
+    if granularity == 'week':
+        iso_year, iso_week, _ = day.isocalendar()
+        return f"week:{iso_year}-W{iso_week:02d}"
+    if granularity == 'month':
+        return f"month:{day.year}-{day.month:02d}"
+    return f"year:{day.year}"
+
+
+def split_window(granularity: str, start_date: date, end_date: date, today: date) -> List[Tuple[str, date, date, bool]]:
+    """
+    Cut [start_date, end_date] into periods
+
+    Returns:
+        (period key, first day, last day, closed) per period, oldest first. Periods the
+        window only partly covers are clipped to it; closed means fully inside the
+        window and entirely before today, i.e. safe to cache.
+    """
+    periods = []
+    day = start_date
+    while day <= end_date:
+        period_start, period_end = period_bounds(granularity, day)
+        closed = period_start >= start_date and period_end <= end_date and period_end < today
+        periods.append((period_key(granularity, day), max(period_start, start_date), min(period_end, end_date), closed))
+        day = period_end + timedelta(days=1)
+    return periods
+
+
+class PeriodSummaryCache:
+    """
+    Closed-period summaries keyed by user, period and the user's data version
+
+    Any write to the user's entries bumps ``users.data_version`` (see
+    app.services.data_version), so summaries computed from older data are simply
+    never looked up again (no delete/recompute race).
+    """
+
+    def __init__(self, cache: Optional[CacheService] = None):
+        self.cache = cache or get_cache()
+
+    @property
+    def enabled(self) -> bool:
+        return self.cache.enabled
+
+    def _summary_key(self, user_id: int, key: str, version: int) -> str:
+        return f"timeseries:{user_id}:{key}:v{version}"
+
+    def get_many(self, user_id: int, keys: List[str], version: int) -> List[Optional[Dict]]:
+        """Cached summaries of the given periods at this data version, None where missing"""
+        return self.cache.get_many([self._summary_key(user_id, key, version) for key in keys])
+
+    def store(self, user_id: int, key: str, version: int, summary: Dict[str, Any]) -> None:
+        self.cache.set(self._summary_key(user_id, key, version), summary, ttl=CLOSED_PERIOD_TTL)
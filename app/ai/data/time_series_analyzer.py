@@ -3,19 +3,178 @@
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 
-from app.models.entry import Entry
-from app.models.category import Category
+from app.core.cache import CacheService
+from app.ai.data.entry_frames import add_calendar_columns, fetch_entries_frame
+from app.ai.data.period_cache import PeriodSummaryCache, split_window
+from app.services.data_version import get_data_version
+
+
+def _stats(row: pd.Series, fields: Tuple[str, ...]) -> Dict:
+    return {field: int(row[field]) if field == 'count' else float(row[field]) for field in fields}
+
+
+def _merge_stats(stats: List[Dict]) -> Dict:
+    """Combine sum/count statistics of periods sharing an output label"""
+    if len(stats) == 1:
+        return stats[0]
+    total = sum(s['sum'] for s in stats)
+    count = sum(s['count'] for s in stats)
+    return {'sum': total, 'mean': total / count, 'count': count}
+
+
+def _multiindex_frame(label_columns: List[str], rows: List[Dict], stat_fields: Tuple[str, ...]) -> pd.DataFrame:
+    """Rebuild the reset_index()'d groupby(...).agg({'amount': [...]}) shape"""
+    columns = pd.MultiIndex.from_tuples(
+        [(label, '') for label in label_columns] + [('amount', field) for field in stat_fields]
+    )
+    data = [[row[label] for label in label_columns] + [row[field] for field in stat_fields] for row in rows]
+    frame = pd.DataFrame(data, columns=columns)
+    if 'count' in stat_fields:
+        frame[('amount', 'count')] = frame[('amount', 'count')].astype('int64')
+    return frame
 
 
 class TimeSeriesAnalyzer:
-    """Analyze financial data across different time periods"""
+    """
+    Analyze financial data across different time periods
     
-    def __init__(self, db: Session):
+    Results are assembled from per-period summaries. Closed weeks, months and years
+    (fully inside the window and before today) are cached by user, period and the
+    user's data version, so only boundary and open periods are read from entries.
+    """
+    
+    def __init__(self, db: Session, cache: Optional[CacheService] = None):
         self.db = db
+        self.period_cache = PeriodSummaryCache(cache)
+    
+    def _load_period_summaries(
+        self,
+        user_id: int,
+        granularity: str,
+        start_date,
+        end_date,
+        columns: Tuple[str, ...],
+        calendar_fields: Tuple[str, ...],
+        summarize: Callable[[pd.DataFrame], Dict[str, Dict]]
+    ) -> List[Tuple[str, Dict]]:
+        """
+        Per-period summaries covering [start_date, end_date], oldest first
+        
+        Closed periods come from the cache when stored at the user's current data version;
+        everything else is summarized from one query over the uncovered dates.
+        """
+        periods = split_window(granularity, start_date, end_date, datetime.now().date())
+        closed_keys = [key for key, _, _, closed in periods if closed]
+        
+        if self.period_cache.enabled and closed_keys:
+            version = get_data_version(self.db, user_id)
+            cached = self.period_cache.get_many(user_id, closed_keys, version)
+            summaries = {key: summary for key, summary in zip(closed_keys, cached) if summary is not None}
+        else:
+            version = None
+            summaries = {}
+        
+        missing = [(key, first, last) for key, first, last, _ in periods if key not in summaries]
+        if missing:
+            # Merge adjacent periods into as few date ranges as possible
+            ranges = []
+            for _, first, last in missing:
+                if ranges and ranges[-1][1] + timedelta(days=1) == first:
+                    ranges[-1] = (ranges[-1][0], last)
+                else:
+                    ranges.append((first, last))
+            
+            df = fetch_entries_frame(self.db, user_id, columns, date_ranges=ranges)
+            add_calendar_columns(df, *calendar_fields)
+            
+            # Assign each row to its period by the periods' first days
+            starts = np.array([np.datetime64(first) for _, first, _, _ in periods])
+            keys = np.array([key for key, _, _, _ in periods])
+            positions = np.searchsorted(starts, pd.to_datetime(df['date']).to_numpy(), side='right') - 1
+            df['period'] = keys[positions] if len(df) else pd.Series(dtype=object)
+            
+            computed = summarize(df)
+            for key, _, _ in missing:
+                summaries[key] = computed.get(key, {'entries': 0})
+                if version is not None and key in closed_keys:
+                    self.period_cache.store(user_id, key, version, summaries[key])
+        
+        return [(key, summaries[key]) for key, _, _, _ in periods]
+    
+    def _summarize_common(self, df: pd.DataFrame, expense_fields: Tuple[str, ...]) -> Dict[str, Dict]:
+        """Entry counts plus expense and income amount statistics per period"""
+        summaries = {key: {'entries': int(count)} for key, count in df.groupby('period').size().items()}
+        
+        expenses = df[df['type'] == 'expense']
+        for key, row in expenses.groupby('period')['amount'].agg(list(expense_fields)).iterrows():
+            summaries[key]['expense'] = _stats(row, expense_fields)
+        
+        income = df[df['type'] == 'income']
+        for key, row in income.groupby('period')['amount'].agg(['sum', 'mean', 'count']).iterrows():
+            summaries[key]['income'] = _stats(row, ('sum', 'mean', 'count'))
+        
+        return summaries
+    
+    def _summarize_weeks(self, df: pd.DataFrame) -> Dict[str, Dict]:
+        summaries = self._summarize_common(df, ('sum', 'mean', 'count'))
+        
+        expenses = df[df['type'] == 'expense']
+        weekday = expenses.groupby(['period', 'weekday'])['amount'].agg(['sum', 'count'])
+        for (key, day), row in weekday.iterrows():
+            summaries[key].setdefault('weekday', {})[str(day)] = [float(row['sum']), int(row['count'])]
+        
+        # ISO week number the analysis groups by
+        for key, week in df.groupby('period')['week'].first().items():
+            summaries[key]['week'] = int(week)
+        
+        return summaries
+    
+    def _summarize_months(self, df: pd.DataFrame) -> Dict[str, Dict]:
+        summaries = self._summarize_common(df, ('sum', 'mean', 'count', 'std'))
+        
+        expenses = df[df['type'] == 'expense']
+        categories = expenses.groupby(['period', 'category_name'])['amount'].sum()
+        for (key, category), total in categories.items():
+            summaries[key].setdefault('categories', {})[category] = float(total)
+        
+        # Weekend / month-phase totals used by pattern detection
+        weekend = expenses['weekday'] >= 5
+        for key, group in expenses.groupby('period'):
+            is_weekend = weekend[group.index]
+            summaries[key]['pattern'] = {
+                'weekend': [float(group.loc[is_weekend, 'amount'].sum()), int(is_weekend.sum())],
+                'weekday': [float(group.loc[~is_weekend, 'amount'].sum()), int((~is_weekend).sum())],
+                'early': float(group.loc[group['day_of_month'] <= 10, 'amount'].sum()),
+                'late': float(group.loc[group['day_of_month'] >= 21, 'amount'].sum())
+            }
+        
+        for key, year_month in df.groupby('period')['year_month'].first().items():
+            summaries[key]['year_month'] = year_month
+        
+        return summaries
+    
+    def _summarize_years(self, df: pd.DataFrame) -> Dict[str, Dict]:
+        summaries = self._summarize_common(df, ('sum', 'mean', 'count'))
+        
+        expenses = df[df['type'] == 'expense']
+        quarters = expenses.groupby(['period', 'quarter'])['amount'].agg(['sum', 'mean'])
+        for (key, quarter), row in quarters.iterrows():
+            summaries[key].setdefault('quarters', {})[str(quarter)] = [float(row['sum']), float(row['mean'])]
+        
+        for key, year in df.groupby('period')['year'].first().items():
+            summaries[key]['year'] = int(year)
+        
+        return summaries
+    
+    def _month_summaries(self, user_id: int, start_date, end_date) -> List[Tuple[str, Dict]]:
+        return self._load_period_summaries(
+            user_id, 'month', start_date, end_date,
+            ('date', 'amount', 'type', 'category_name'), ('weekday', 'day_of_month', 'year_month'),
+            self._summarize_months
+        )
     
     def get_weekly_analysis(self, user_id: int, weeks_back: int = 12) -> Dict:
         """
@@ -32,46 +191,46 @@ class TimeSeriesAnalyzer:
         end_date = datetime.now().date()
         start_date = end_date - timedelta(weeks=weeks_back)
         
-        entries = self.db.query(Entry).filter(
-            Entry.user_id == user_id,
-            Entry.date >= start_date,
-            Entry.date <= end_date
-        ).all()
+        summaries = [summary for _, summary in self._load_period_summaries(
+            user_id, 'week', start_date, end_date,
+            ('date', 'amount', 'type'), ('weekday', 'week'),
+            self._summarize_weeks
+        )]
         
-        if not entries:
+        if not any(summary['entries'] for summary in summaries):
             return {'error': 'No data available'}
         
-        # Convert to DataFrame
-        df = pd.DataFrame([{
-            'date': e.date,
-            'amount': float(e.amount),
-            'type': e.type,
-            'category_id': e.category_id,
-            'category_name': e.category.name if e.category else 'Uncategorized',
-            'weekday': e.date.weekday(),
-            'week': e.date.isocalendar()[1]
-        } for e in entries])
-        
-        # Weekly aggregations
-        weekly_spending = df[df['type'] == 'expense'].groupby('week').agg({
-            'amount': ['sum', 'mean', 'count']
-        }).reset_index()
-        
-        weekly_income = df[df['type'] == 'income'].groupby('week').agg({
-            'amount': ['sum', 'mean', 'count']
-        }).reset_index()
+        # Weekly aggregations (grouped by ISO week number)
+        def weekly_rows(kind):
+            by_week = {}
+            for summary in summaries:
+                if kind in summary:
+                    by_week.setdefault(summary['week'], []).append(summary[kind])
+            return [dict(_merge_stats(stats), week=week) for week, stats in sorted(by_week.items())]
+        
+        weekly_spending = _multiindex_frame(['week'], weekly_rows('expense'), ('sum', 'mean', 'count'))
+        weekly_income = _multiindex_frame(['week'], weekly_rows('income'), ('sum', 'mean', 'count'))
         
         # Day of week patterns
-        weekday_spending = df[df['type'] == 'expense'].groupby('weekday').agg({
-            'amount': ['sum', 'mean', 'count']
-        }).to_dict()
+        weekday_totals = {}
+        for summary in summaries:
+            for day, (total, count) in summary.get('weekday', {}).items():
+                day_total, day_count = weekday_totals.get(int(day), (0.0, 0))
+                weekday_totals[int(day)] = (day_total + total, day_count + count)
+        
+        weekday_frame = pd.DataFrame(
+            [[total, total / count, count] for total, count in (weekday_totals[day] for day in sorted(weekday_totals))],
+            index=pd.Index(sorted(weekday_totals), name='weekday'),
+            columns=pd.MultiIndex.from_tuples([('amount', 'sum'), ('amount', 'mean'), ('amount', 'count')])
+        )
+        weekday_frame[('amount', 'count')] = weekday_frame[('amount', 'count')].astype('int64')
         
         return {
             'weekly_spending': weekly_spending.to_dict('records'),
             'weekly_income': weekly_income.to_dict('records'),
-            'weekday_patterns': weekday_spending,
+            'weekday_patterns': weekday_frame.to_dict(),
             'avg_weekly_spending': weekly_spending[('amount', 'sum')].mean() if not weekly_spending.empty else 0,
-            'most_expensive_weekday': int(df[df['type'] == 'expense'].groupby('weekday')['amount'].sum().idxmax()) if len(df[df['type'] == 'expense']) > 0 else 0
+            'most_expensive_weekday': int(weekday_frame[('amount', 'sum')].idxmax()) if weekday_totals else 0
         }
     
     def get_monthly_analysis(self, user_id: int, months_back: int = 12) -> Dict:
@@ -89,38 +248,29 @@ class TimeSeriesAnalyzer:
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=months_back * 30)
         
-        entries = self.db.query(Entry).filter(
-            Entry.user_id == user_id,
-            Entry.date >= start_date,
-            Entry.date <= end_date
-        ).all()
+        summaries = [summary for _, summary in self._month_summaries(user_id, start_date, end_date)]
         
-        if not entries:
+        if not any(summary['entries'] for summary in summaries):
             return {'error': 'No data available'}
         
-        # Convert to DataFrame
-        df = pd.DataFrame([{
-            'date': e.date,
-            'amount': float(e.amount),
-            'type': e.type,
-            'category_id': e.category_id,
-            'category_name': e.category.name if e.category else 'Uncategorized',
-            'year': e.date.year,
-            'month': e.date.month,
-            'year_month': f"{e.date.year}-{e.date.month:02d}"
-        } for e in entries])
-        
         # Monthly aggregations
-        monthly_spending = df[df['type'] == 'expense'].groupby('year_month').agg({
-            'amount': ['sum', 'mean', 'count', 'std']
-        }).reset_index()
-        
-        monthly_income = df[df['type'] == 'income'].groupby('year_month').agg({
-            'amount': ['sum', 'mean', 'count']
-        }).reset_index()
+        monthly_spending = _multiindex_frame(
+            ['year_month'],
+            [dict(s['expense'], year_month=s['year_month']) for s in summaries if 'expense' in s],
+            ('sum', 'mean', 'count', 'std')
+        )
+        
+        monthly_income = _multiindex_frame(
+            ['year_month'],
+            [dict(s['income'], year_month=s['year_month']) for s in summaries if 'income' in s],
+            ('sum', 'mean', 'count')
+        )
         
         # Category trends by month
-        category_monthly = df[df['type'] == 'expense'].groupby(['year_month', 'category_name'])['amount'].sum().unstack(fill_value=0)
+        category_monthly = pd.DataFrame.from_dict(
+            {s['year_month']: s['categories'] for s in summaries if 'categories' in s}, orient='index'
+        )
+        category_monthly = category_monthly.reindex(columns=sorted(category_monthly.columns)).fillna(0)
         
         # Calculate month-over-month growth
         if not monthly_spending.empty and len(monthly_spending) > 1:
@@ -156,39 +306,31 @@ class TimeSeriesAnalyzer:
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=years_back * 365)
         
-        entries = self.db.query(Entry).filter(
-            Entry.user_id == user_id,
-            Entry.date >= start_date,
-            Entry.date <= end_date
-        ).all()
+        summaries = [summary for _, summary in self._load_period_summaries(
+            user_id, 'year', start_date, end_date,
+            ('date', 'amount', 'type'), ('year', 'quarter'),
+            self._summarize_years
+        )]
         
-        if not entries:
+        if not any(summary['entries'] for summary in summaries):
             return {'error': 'No data available'}
         
-        # Convert to DataFrame
-        df = pd.DataFrame([{
-            'date': e.date,
-            'amount': float(e.amount),
-            'type': e.type,
-            'category_id': e.category_id,
-            'category_name': e.category.name if e.category else 'Uncategorized',
-            'year': e.date.year,
-            'quarter': (e.date.month - 1) // 3 + 1
-        } for e in entries])
-        
         # Yearly aggregations
-        yearly_spending = df[df['type'] == 'expense'].groupby('year').agg({
-            'amount': ['sum', 'mean', 'count']
-        }).reset_index()
+        yearly_spending = _multiindex_frame(
+            ['year'], [dict(s['expense'], year=s['year']) for s in summaries if 'expense' in s], ('sum', 'mean', 'count')
+        )
         
-        yearly_income = df[df['type'] == 'income'].groupby('year').agg({
-            'amount': ['sum', 'mean', 'count']
-        }).reset_index()
+        yearly_income = _multiindex_frame(
+            ['year'], [dict(s['income'], year=s['year']) for s in summaries if 'income' in s], ('sum', 'mean', 'count')
+        )
         
         # Quarterly patterns
-        quarterly_spending = df[df['type'] == 'expense'].groupby(['year', 'quarter']).agg({
-            'amount': ['sum', 'mean']
-        }).reset_index()
+        quarterly_spending = _multiindex_frame(
+            ['year', 'quarter'],
+            [{'year': s['year'], 'quarter': int(quarter), 'sum': total, 'mean': mean}
+             for s in summaries for quarter, (total, mean) in sorted(s.get('quarters', {}).items())],
+            ('sum', 'mean')
+        )
         
         # Year-over-year growth
         if not yearly_spending.empty and len(yearly_spending) > 1:
@@ -226,29 +368,17 @@ class TimeSeriesAnalyzer:
         end_date = datetime.now().date()
         start_date = end_date - timedelta(days=365)
         
-        entries = self.db.query(Entry).filter(
-            Entry.user_id == user_id,
-            Entry.date >= start_date,
-            Entry.date <= end_date
-        ).all()
+        summaries = [summary for _, summary in self._month_summaries(user_id, start_date, end_date)]
         
-        if not entries:
+        if not any(summary['entries'] for summary in summaries):
             return {'patterns': [], 'insights': []}
         
-        # Convert to DataFrame
-        df = pd.DataFrame([{
-            'date': e.date,
-            'amount': float(e.amount),
-            'type': e.type,
-            'category_name': e.category.name if e.category else 'Uncategorized',
-            'weekday': e.date.weekday(),
-            'day_of_month': e.date.day
-        } for e in entries])
+        month_patterns = [summary['pattern'] for summary in summaries if 'pattern' in summary]
         
         detected_patterns = []
         
         # Pattern 1: Payday spending spike
-        if self._detect_payday_spike(df):
+        if self._detect_payday_spike(month_patterns):
             detected_patterns.append({
                 'type': 'payday_spike',
                 'description': 'Spending increases after income is received',
@@ -256,7 +386,7 @@ class TimeSeriesAnalyzer:
             })
         
         # Pattern 2: Month-end budget exhaustion
-        if self._detect_month_end_pattern(df):
+        if self._detect_month_end_pattern(month_patterns):
             detected_patterns.append({
                 'type': 'month_end_fatigue',
                 'description': 'Spending decreases at end of month',
@@ -264,8 +394,12 @@ class TimeSeriesAnalyzer:
             })
         
         # Pattern 3: Weekend overspending
-        weekend_avg = df[(df['weekday'] >= 5) & (df['type'] == 'expense')]['amount'].mean()
-        weekday_avg = df[(df['weekday'] < 5) & (df['type'] == 'expense')]['amount'].mean()
+        weekend_total = sum(p['weekend'][0] for p in month_patterns)
+        weekend_count = sum(p['weekend'][1] for p in month_patterns)
+        weekday_total = sum(p['weekday'][0] for p in month_patterns)
+        weekday_count = sum(p['weekday'][1] for p in month_patterns)
+        weekend_avg = weekend_total / weekend_count if weekend_count else np.nan
+        weekday_avg = weekday_total / weekday_count if weekday_count else np.nan
         
         if weekend_avg > weekday_avg * 1.5:
             detected_patterns.append({
@@ -279,15 +413,14 @@ class TimeSeriesAnalyzer:
             'total_patterns_found': len(detected_patterns)
         }
     
-    def _detect_payday_spike(self, df: pd.DataFrame) -> bool:
+    def _detect_payday_spike(self, month_patterns: List[Dict]) -> bool:
         """Detect if spending spikes after income"""
         # This is a simplified version - would need more sophisticated analysis
         return False
     
-    def _detect_month_end_pattern(self, df: pd.DataFrame) -> bool:
+    def _detect_month_end_pattern(self, month_patterns: List[Dict]) -> bool:
         """Detect month-end spending patterns"""
-        start_month_spending = df[(df['day_of_month'] <= 10) & (df['type'] == 'expense')]['amount'].sum()
-        end_month_spending = df[(df['day_of_month'] >= 21) & (df['type'] == 'expense')]['amount'].sum()
+        start_month_spending = sum(p['early'] for p in month_patterns)
+        end_month_spending = sum(p['late'] for p in month_patterns)
         
         return end_month_spending < start_month_spending * 0.6
-
@@ -0,0 +1,140 @@
+"""Per-request columnar snapshot of a user's recent entries"""
+
+import pandas as pd
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+from sqlalchemy.orm import Session
+from sqlalchemy import func, select
+
+from app.models.entry import Entry
+from app.ai.data.entry_frames import add_calendar_columns, read_entries_frame, select_entries
+
+
+# Widest window any insight analyzer looks at (category trends use 6 months)
+DEFAULT_WINDOW_DAYS = 180
+
+
+class UserFinancialFrame:
+    """
+    One query, one DataFrame: the entries an insights request needs, loaded once
+    and shared by every analyzer, with derived views computed lazily and memoized.
+
+    The frame holds every entry dated on or after ``start_date`` (future-dated
+    entries included, as the month-to-date totals have no upper bound), plus the
+    user's all-time entry count fetched in the same round trip.
+    """
+
+    def __init__(self, db: Session, user_id: int, days_back: int = DEFAULT_WINDOW_DAYS,
+                 today: Optional[date] = None):
+        self.db = db
+        self.user_id = user_id
+        self.today = today or datetime.now().date()
+        self.start_date = self.today - timedelta(days=days_back)
+        self._entries: Optional[pd.DataFrame] = None
+        self._total_entries: Optional[int] = None
+        self._views: Dict[Tuple, Any] = {}
+
+    # ------------------------------------------------------------------
+    # Loading
+    # ------------------------------------------------------------------
+
+    def _load(self) -> None:
+        """Fetch the window and the all-time entry count in a single statement"""
+        total_entries = select(func.count(Entry.id)).where(
+            Entry.user_id == self.user_id
+        ).scalar_subquery()
+
+        stmt = select_entries(self.user_id, start_date=self.start_date).add_columns(
+            total_entries.label('total_entries')
+        )
+        df = read_entries_frame(self.db, stmt)
+
+        if not df.empty:
+            self._total_entries = int(df['total_entries'].iat[0])
+        else:
+            # No recent activity: the count rides along with entry rows, so ask for it directly
+            self._total_entries = self.db.query(func.count(Entry.id)).filter(
+                Entry.user_id == self.user_id
+            ).scalar() or 0
+
+        df = df.drop(columns='total_entries')
+        df['categorized'] = df['category_id'] != 0
+        self._entries = add_calendar_columns(df, 'weekday', 'day_of_month', 'year_month')
+
+    @property
+    def entries(self) -> pd.DataFrame:
+        """All loaded entries (income and expense)"""
+        if self._entries is None:
+            self._load()
+        return self._entries
+
+    @property
+    def total_entries(self) -> int:
+        """All-time number of entries recorded by the user"""
+        if self._entries is None:
+            self._load()
+        return self._total_entries
+
+    def covers(self, start_date: date) -> bool:
+        """Whether a window starting at start_date can be served from this frame"""
+        return start_date >= self.start_date
+
+    # ------------------------------------------------------------------
+    # Derived views
+    # ------------------------------------------------------------------
+
+    def _memoize(self, key: Tuple, compute: Callable[[], Any]) -> Any:
+        if key not in self._views:
+            self._views[key] = compute()
+        return self._views[key]
+
+    def expenses(self, days_back: int, categorized: bool = False) -> pd.DataFrame:
+        """Expenses dated within the last days_back days (up to today)"""
+        def compute():
+            df = self.entries
+            mask = (
+                (df['type'] == 'expense') &
+                (df['date'] >= self.today - timedelta(days=days_back)) &
+                (df['date'] <= self.today)
+            )
+            if categorized:
+                mask &= df['categorized']
+            return df[mask]
+
+        return self._memoize(('expenses', days_back, categorized), compute)
+
+    def daily_totals(self, days_back: int) -> pd.Series:
+        """Total spending per calendar day that has expenses"""
+        return self._memoize(
+            ('daily_totals', days_back),
+            lambda: self.expenses(days_back).groupby('date')['amount'].sum()
+        )
+
+    def weekday_profile(self, days_back: int) -> pd.DataFrame:
+        """Transaction count and spending total per weekday (0 = Monday)"""
+        return self._memoize(
+            ('weekday_profile', days_back),
+            lambda: self.expenses(days_back).groupby('weekday')['amount'].agg(['count', 'sum'])
+        )
+
+    def monthly_by_category(self, days_back: int) -> pd.Series:
+        """Categorized spending summed per (category, month), months in calendar order"""
+        return self._memoize(
+            ('monthly_by_category', days_back),
+            lambda: self.expenses(days_back, categorized=True).groupby(['category_name', 'year_month'])['amount'].sum()
+        )
+
+    def amounts(self, entry_type: str, start_date: date, end_date: Optional[date] = None) -> pd.Series:
+        """Amounts of entry_type entries dated from start_date through end_date (open-ended if None)"""
+        def compute():
+            df = self.entries
+            mask = (df['type'] == entry_type) & (df['date'] >= start_date)
+            if end_date is not None:
+                mask &= df['date'] <= end_date
+            return df.loc[mask, 'amount']
+
+        return self._memoize(('amounts', entry_type, start_date, end_date), compute)
+
+    def total(self, entry_type: str, start_date: date, end_date: Optional[date] = None) -> float:
+        """Sum of entry_type amounts dated from start_date through end_date (open-ended if None)"""
+        return float(self.amounts(entry_type, start_date, end_date).sum())
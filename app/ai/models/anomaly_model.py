@@ -0,0 +1,451 @@
+"""Persisted Isolation Forest Model for Spending Anomaly Detection"""
+
+import io
+import json
+import joblib
+import numpy as np
+import pandas as pd
+from datetime import date, datetime
+from typing import Dict, Optional
+from sklearn.ensemble import IsolationForest
+from sklearn.preprocessing import StandardScaler
+
+
+ANOMALY_MODEL_NAME = "anomaly_v1"
+
+# Major holidays (month, day) - spending within 3 days of these is seasonally expected
+HOLIDAYS = [
+    (1, 1),   # New Year's Day
+    (2, 14),  # Valentine's Day
+    (7, 4),   # Independence Day (US)
+    (10, 31), # Halloween
+    (11, 24), # Black Friday (approximate)
+    (12, 24), # Christmas Eve
+    (12, 25), # Christmas
+    (12, 31)  # New Year's Eve
+]
+
+# Season number (0-3: winter, spring, summer, fall) indexed by month (1-12)
+SEASON_BY_MONTH = np.array([0, 0, 0, 1, 1, 1, 2, 2, 2, 3, 3, 3, 0])
+
+FEATURE_NAMES = [
+    'amount', 'amount_zscore', 'weekday', 'day_of_month', 'category_frequency',
+    'amount_vs_category_avg', 'month', 'quarter', 'is_weekend', 'near_holiday',
+    'season', 'days_since_similar'
+]
+
+
+def _average_path_length(n_samples) -> np.ndarray:
+    """Average path length of an unsuccessful BST search over n samples, c(n)"""
+    n = np.asarray(n_samples, dtype=float)
+    result = np.zeros_like(n)
+    result[n == 2] = 1.0
+    mask = n > 2
+    result[mask] = 2.0 * (np.log(n[mask] - 1.0) + np.euler_gamma) - 2.0 * (n[mask] - 1.0) / n[mask]
+    return result
+
+
+class AnomalyModel:
+    """
+    Per-user Isolation Forest anomaly model
+
+    Features:
+    - Fitted once on the user's history and persisted with its scaler
+    - Frozen feature baselines so new transactions can be scored without a refit
+    - Cached scores for the training transactions (only new or edited ones are scored)
+    - Compiled tree arrays for sub-millisecond single transaction scoring
+    """
+
+    def __init__(self):
+        self.model: Optional[IsolationForest] = None
+        self.scaler = StandardScaler()
+        self.baselines: Dict = {}
+        self.contamination = 0.1
+        self.entry_scores: Dict[int, float] = {}
+        self.entry_fingerprints = pd.Series(dtype='uint64')  # Scored inputs per entry id
+        self.last_entry_id = 0
+        self.is_trained = False
+        self.training_date: Optional[datetime] = None
+        self.n_training_samples = 0
+
+    @staticmethod
+    def build_baselines(df: pd.DataFrame) -> Dict:
+        """
+        Compute the feature baselines (global and per-category statistics)
+
+        Args:
+            df: Transactions with 'date', 'amount' and 'category_id' columns
+
+        Returns:
+            Dictionary of baseline statistics used by feature extraction
+        """
+        amount_std = df['amount'].std()
+        category_stats = df.groupby('category_id')['amount'].agg(['count', 'mean'])
+
+        return {
+            'amount_mean': float(df['amount'].mean()),
+            'amount_std': float(amount_std) if amount_std > 0 else 0.0,
+            'category_frequency': {int(k): float(v) for k, v in (category_stats['count'] / len(df)).items()},
+            'category_avg': {int(k): float(v) for k, v in category_stats['mean'].items()},
+            'category_last_date': {int(k): v for k, v in df.groupby('category_id')['date'].max().items()}
+        }
+
+    @staticmethod
+    def extract_features(df: pd.DataFrame, baselines: Dict, prior_last_dates: Optional[Dict] = None) -> np.ndarray:
+        """
+        Build the anomaly feature matrix for a batch of transactions in one vectorized pass
+
+        Args:
+            df: Transactions with 'date', 'amount' and 'category_id' columns
+            baselines: Statistics from build_baselines()
+            prior_last_dates: Optional last transaction date per category seen before this batch
+
+        Returns:
+            Feature matrix with one row per transaction (columns in FEATURE_NAMES order)
+        """
+        dates = pd.to_datetime(df['date'])
+        amounts = df['amount'].to_numpy(dtype=float)
+        categories = df['category_id']
+
+        amount_std = baselines['amount_std']
+        if amount_std > 0:
+            amount_zscore = (amounts - baselines['amount_mean']) / amount_std
+        else:
+            amount_zscore = np.zeros(len(df))
+
+        category_frequency = categories.map(baselines['category_frequency']).fillna(0.0).to_numpy(dtype=float)
+        category_avg = categories.map(baselines['category_avg']).to_numpy(dtype=float)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            amount_vs_category_avg = np.where(category_avg > 0, amounts / category_avg, 1.0)
+
+        weekday = dates.dt.weekday.to_numpy()
+        day_of_month = dates.dt.day.to_numpy()
+        month = dates.dt.month.to_numpy()
+
+        near_holiday = np.zeros(len(df), dtype=bool)
+        for holiday_month, holiday_day in HOLIDAYS:
+            near_holiday |= (month == holiday_month) & (np.abs(day_of_month - holiday_day) <= 3)
+
+        days_since_similar = AnomalyModel._days_since_similar(categories, dates, prior_last_dates)
+
+        return np.column_stack([
+            amounts,
+            amount_zscore,
+            weekday,
+            day_of_month,
+            category_frequency,
+            amount_vs_category_avg,
+            month,
+            (month - 1) // 3 + 1,
+            (weekday >= 5).astype(int),
+            near_holiday.astype(int),
+            SEASON_BY_MONTH[month],
+            days_since_similar
+        ]).astype(float)
+
+    @staticmethod
+    def _days_since_similar(categories: pd.Series, dates: pd.Series, prior_last_dates: Optional[Dict]) -> np.ndarray:
+        """Days since the previous transaction in the same category (30 if none, capped at 90)"""
+        frame = pd.DataFrame({'category_id': categories.to_numpy(), 'date': dates.to_numpy()})
+        unique = frame.drop_duplicates().sort_values(['category_id', 'date'])
+        unique['prev_date'] = unique.groupby('category_id')['date'].shift(1)
+
+        if prior_last_dates:
+            prior = pd.to_datetime(unique['category_id'].map(prior_last_dates))
+            prior = prior.where(prior < unique['date'])
+            unique['prev_date'] = pd.concat([unique['prev_date'], prior], axis=1).max(axis=1)
+
+        merged = frame.merge(unique, on=['category_id', 'date'], how='left')
+        days = (merged['date'] - merged['prev_date']).dt.days
+        return days.fillna(30).clip(upper=90).to_numpy(dtype=float)
+
+    @staticmethod
+    def fingerprint(df: pd.DataFrame) -> np.ndarray:
+        """Hash of each transaction's scored inputs (date, amount, category), to spot edited entries"""
+        days = (pd.to_datetime(df['date']) - pd.Timestamp(1970, 1, 1)).dt.days
+        inputs = pd.DataFrame({
+            'date': days.to_numpy(dtype='int64'),
+            'amount': df['amount'].to_numpy(dtype=float),
+            'category_id': df['category_id'].fillna(0).to_numpy(dtype='int64'),
+        })
+        return pd.util.hash_pandas_object(inputs, index=False).to_numpy()
+
+    def train(self, df: pd.DataFrame, contamination: float) -> Dict:
+        """
+        Fit the scaler and Isolation Forest on the user's transaction history
+
+        Args:
+            df: Transactions with 'id', 'date', 'amount' and 'category_id' columns
+            contamination: Expected proportion of anomalies
+
+        Returns:
+            Dictionary with training metadata
+        """
+        if len(df) < 10:
+            raise ValueError("Need at least 10 transactions for anomaly detection")
+
+        self.baselines = self.build_baselines(df)
+        features = self.extract_features(df, self.baselines)
+
+        self.contamination = contamination
+        self.model = IsolationForest(
+            contamination=contamination,
+            random_state=42,
+            n_estimators=100
+        )
+        self.scaler = StandardScaler()
+        features_scaled = self.scaler.fit_transform(features)
+        self.model.fit(features_scaled)
+
+        scores = self.model.decision_function(features_scaled)
+        self.entry_scores = dict(zip(df['id'].astype(int).tolist(), scores.tolist()))
+        self.entry_fingerprints = pd.Series(self.fingerprint(df), index=df['id'].astype(int).to_numpy())
+        self.last_entry_id = int(df['id'].max())
+        self.is_trained = True
+        self.training_date = datetime.utcnow()
+        self.n_training_samples = len(df)
+        self._compile_trees()
+
+        return {
+            'training_samples': self.n_training_samples,
+            'contamination': self.contamination,
+            'training_date': self.training_date.isoformat()
+        }
+
+    def _compile_trees(self):
+        """Flatten the fitted trees into padded arrays so all trees are walked together"""
+        estimators = self.model.estimators_
+        trees = [estimator.tree_ for estimator in estimators]
+        n_trees = len(trees)
+        max_nodes = max(tree.node_count for tree in trees)
+
+        self._left = np.full((n_trees, max_nodes), -1, dtype=np.intp)
+        self._right = np.full((n_trees, max_nodes), -1, dtype=np.intp)
+        self._feature = np.zeros((n_trees, max_nodes), dtype=np.intp)
+        self._threshold = np.zeros((n_trees, max_nodes))
+        self._path_length = np.zeros((n_trees, max_nodes))
+        max_depth = 0
+
+        for i, (tree, features) in enumerate(zip(trees, self.model.estimators_features_)):
+            n_nodes = tree.node_count
+            self._left[i, :n_nodes] = tree.children_left
+            self._right[i, :n_nodes] = tree.children_right
+            # Leaves have feature -2; map split features back to the full feature vector
+            self._feature[i, :n_nodes] = np.asarray(features)[np.maximum(tree.feature, 0)]
+            self._threshold[i, :n_nodes] = tree.threshold
+
+            depth = np.zeros(n_nodes)
+            level, current = 0, np.array([0])
+            while len(current):
+                depth[current] = level
+                children = np.concatenate([tree.children_left[current], tree.children_right[current]])
+                current = children[children != -1]
+                level += 1
+            max_depth = max(max_depth, level)
+
+            self._path_length[i, :n_nodes] = depth + _average_path_length(tree.n_node_samples)
+
+        self._max_depth = max_depth
+        self._tree_index = np.arange(n_trees)[:, None]
+        self._denominator = n_trees * _average_path_length([self.model.max_samples_])[0]
+
+    def decision_function(self, features: np.ndarray) -> np.ndarray:
+        """
+        Isolation Forest decision scores (negative = anomaly) from raw features
+
+        Equivalent to IsolationForest.decision_function on the scaled features,
+        but walks all trees at once instead of calling into each estimator.
+        """
+        X = self.scaler.transform(features).astype(np.float32)
+        rows = np.arange(X.shape[0])[None, :]
+        trees = self._tree_index
+        node = np.zeros((len(self._left), X.shape[0]), dtype=np.intp)
+
+        for _ in range(self._max_depth):
+            left = self._left[trees, node]
+            is_leaf = left == -1
+            if is_leaf.all():
+                break
+            go_left = X[rows, self._feature[trees, node]] <= self._threshold[trees, node]
+            node = np.where(is_leaf, node, np.where(go_left, left, self._right[trees, node]))
+
+        depths = self._path_length[trees, node].sum(axis=0)
+        if self._denominator > 0:
+            scores = 2 ** (-depths / self._denominator)
+        else:
+            scores = np.ones_like(depths)
+        return -scores - self.model.offset_
+
+    def score_entries(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Decision scores for a batch of transactions
+
+        Transactions seen at training time reuse their stored score unless
+        their date, amount or category was edited since; only new and edited
+        transactions are featurized and scored.
+        """
+        ids = df['id'].astype(int)
+        scores = ids.map(self.entry_scores).to_numpy(dtype=float)
+        edited = self.entry_fingerprints.reindex(ids, fill_value=0).to_numpy() != self.fingerprint(df)
+        scores[edited] = np.nan
+        new_mask = np.isnan(scores)
+
+        if new_mask.any():
+            features = self.extract_features(
+                df.loc[new_mask], self.baselines, self.baselines['category_last_date']
+            )
+            scores[new_mask] = self.decision_function(features)
+
+        return scores
+
+    def score_transaction(self, trans_date: date, amount: float, category_id: int) -> float:
+        """
+        Score a single new transaction without pandas (entry-creation fast path)
+
+        Args:
+            trans_date: Transaction date
+            amount: Transaction amount
+            category_id: Category ID (0 for uncategorized)
+
+        Returns:
+            Decision score (negative = anomaly)
+        """
+        baselines = self.baselines
+        amount_std = baselines['amount_std']
+        amount_zscore = (amount - baselines['amount_mean']) / amount_std if amount_std > 0 else 0.0
+
+        category_avg = baselines['category_avg'].get(category_id, 0.0)
+        last_date = baselines['category_last_date'].get(category_id)
+        if last_date is not None and last_date < trans_date:
+            days_since_similar = (trans_date - last_date).days
+        else:
+            days_since_similar = 30
+
+        weekday = trans_date.weekday()
+        month = trans_date.month
+        near_holiday = any(
+            month == holiday_month and abs(trans_date.day - holiday_day) <= 3
+            for holiday_month, holiday_day in HOLIDAYS
+        )
+
+        features = np.array([[
+            amount,
+            amount_zscore,
+            weekday,
+            trans_date.day,
+            baselines['category_frequency'].get(category_id, 0.0),
+            amount / category_avg if category_avg > 0 else 1.0,
+            month,
+            (month - 1) // 3 + 1,
+            1 if weekday >= 5 else 0,
+            1 if near_holiday else 0,
+            SEASON_BY_MONTH[month],
+            min(days_since_similar, 90)
+        ]], dtype=float)
+
+        return float(self.decision_function(features)[0])
+
+    def save_model_to_db(self, user_id: int, db) -> bytes:
+        """
+        Save trained model to database as serialized bytes
+
+        Args:
+            user_id: User ID
+            db: Database session
+
+        Returns:
+            Serialized model as bytes
+        """
+        from app.models.ai_model import AIModel
+
+        model_data = {
+            'model': self.model,
+            'scaler': self.scaler,
+            'baselines': self.baselines,
+            'contamination': self.contamination,
+            'entry_scores': self.entry_scores,
+            'entry_fingerprints': self.entry_fingerprints,
+            'last_entry_id': self.last_entry_id,
+            'training_date': self.training_date,
+            'n_training_samples': self.n_training_samples
+        }
+
+        buffer = io.BytesIO()
+        joblib.dump(model_data, buffer)
+        model_blob = buffer.getvalue()
+
+        # Refresh metadata is kept outside the blob so staleness checks don't deserialize it
+        model_parameters = json.dumps({
+            'contamination': self.contamination,
+            'last_entry_id': self.last_entry_id
+        })
+
+        ai_model = db.query(AIModel).filter(
+            AIModel.user_id == user_id,
+            AIModel.model_name == ANOMALY_MODEL_NAME
+        ).first()
+
+        if ai_model:
+            ai_model.model_blob = model_blob
+            ai_model.model_parameters = model_parameters
+            ai_model.training_data_count = self.n_training_samples
+            ai_model.last_trained = self.training_date
+            ai_model.is_active = True
+        else:
+            ai_model = AIModel(
+                user_id=user_id,
+                model_name=ANOMALY_MODEL_NAME,
+                model_type="anomaly_detection",
+                model_blob=model_blob,
+                model_parameters=model_parameters,
+                training_data_count=self.n_training_samples,
+                last_trained=self.training_date,
+                is_active=True
+            )
+            db.add(ai_model)
+
+        db.commit()
+        return model_blob
+
+    def load_model_from_db(self, user_id: int, db) -> bool:
+        """
+        Load trained model from database
+
+        Args:
+            user_id: User ID
+            db: Database session
+
+        Returns:
+            True if model loaded successfully, False otherwise
+        """
+        from app.models.ai_model import AIModel
+
+        try:
+            ai_model = db.query(AIModel).filter(
+                AIModel.user_id == user_id,
+                AIModel.model_name == ANOMALY_MODEL_NAME,
+                AIModel.is_active == True
+            ).first()
+
+            if not ai_model or not ai_model.model_blob:
+                return False
+
+            model_data = joblib.load(io.BytesIO(ai_model.model_blob))
+
+            self.model = model_data['model']
+            self.scaler = model_data['scaler']
+            self.baselines = model_data['baselines']
+            self.contamination = model_data.get('contamination', 0.1)
+            self.entry_scores = model_data.get('entry_scores', {})
+            # Models saved before fingerprints existed rescore every transaction
+            self.entry_fingerprints = model_data.get('entry_fingerprints', pd.Series(dtype='uint64'))
+            self.last_entry_id = model_data.get('last_entry_id', 0)
+            self.training_date = ai_model.last_trained
+            self.n_training_samples = model_data.get('n_training_samples', 0)
+            self.is_trained = True
+            self._compile_trees()
+            return True
+
+        except Exception as e:
+            print(f"❌ Error loading anomaly model from database: {e}")
+            return False
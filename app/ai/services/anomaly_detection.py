@@ -1,18 +1,56 @@
 """Anomaly Detection Service for Unusual Spending Patterns"""
 
+import json
+import threading
 import pandas as pd
 import numpy as np
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
 from sqlalchemy import func
-from sklearn.ensemble import IsolationForest
 from sklearn.preprocessing import StandardScaler
 import warnings
 warnings.filterwarnings('ignore')
 
 from app.models.entry import Entry
 from app.models.category import Category
+from app.models.ai_model import AIModel, AISuggestion, UserAIPreferences
+from app.ai.models.anomaly_model import AnomalyModel, ANOMALY_MODEL_NAME, HOLIDAYS
+from app.ai.data.entry_frames import add_calendar_columns, fetch_entries_frame
+from app.ai.data.user_financial_frame import UserFinancialFrame
+
+# Refit a user's anomaly model once this many expenses were added since training
+REFRESH_AFTER_NEW_ENTRIES = 25
+
+# History window the persisted model is fitted on (covers every detection window)
+TRAINING_WINDOW_DAYS = 365
+
+# Columns of the expense frame every detector works from
+EXPENSE_COLUMNS = ['id', 'date', 'amount', 'category_id', 'category_name', 'note', 'weekday', 'day_of_month']
+
+# Loaded models kept in memory; the least recently used is dropped beyond this
+MAX_LOADED_MODELS = 128
+
+# Loaded models keyed by user_id (LRU order), reused across requests until the model is retrained
+_loaded_models: "OrderedDict[int, AnomalyModel]" = OrderedDict()
+_loaded_models_lock = threading.Lock()
+
+
+def _cached_model(user_id: int) -> Optional[AnomalyModel]:
+    with _loaded_models_lock:
+        model = _loaded_models.get(user_id)
+        if model is not None:
+            _loaded_models.move_to_end(user_id)
+        return model
+
+
+def _cache_model(user_id: int, model: AnomalyModel) -> None:
+    with _loaded_models_lock:
+        _loaded_models[user_id] = model
+        _loaded_models.move_to_end(user_id)
+        while len(_loaded_models) > MAX_LOADED_MODELS:
+            _loaded_models.popitem(last=False)
 
 
 class AnomalyDetectionService:
@@ -20,95 +58,81 @@ class AnomalyDetectionService:
 
     def __init__(self, db: Session):
         self.db = db
-        self.model = None  # Will be created with adaptive contamination
+        self.model = None  # Loaded from the user's persisted anomaly model
         self.scaler = StandardScaler()
         self.is_trained = False
 
         # Seasonal awareness: major holidays (month-day)
-        self.holidays = [
-            (1, 1),   # New Year's Day
-            (2, 14),  # Valentine's Day
-            (7, 4),   # Independence Day (US)
-            (10, 31), # Halloween
-            (11, 24), # Black Friday (approximate)
-            (12, 24), # Christmas Eve
-            (12, 25), # Christmas
-            (12, 31)  # New Year's Eve
-        ]
+        self.holidays = HOLIDAYS
+
+    def _load_expenses(self, user_id: int, days_back: int,
+                       frame: Optional[UserFinancialFrame] = None) -> pd.DataFrame:
+        """
+        Expenses from the last days_back days as a DataFrame
 
-    def detect_spending_anomalies(self, user_id: int, days_back: int = 90) -> Dict:
+        Args:
+            user_id: User ID
+            days_back: Number of days to load
+            frame: Already-loaded entries to reuse when they cover the window
+
+        Returns:
+            DataFrame with id, date, amount, category_id, category_name, note, weekday, day_of_month
+        """
+        end_date = datetime.now().date()
+        start_date = end_date - timedelta(days=days_back)
+
+        if frame is not None and frame.covers(start_date):
+            return frame.expenses(days_back)[EXPENSE_COLUMNS].reset_index(drop=True)
+
+        df = fetch_entries_frame(
+            self.db, user_id, ('id', 'date', 'amount', 'category_id', 'category_name', 'note'),
+            start_date=start_date, end_date=end_date, entry_type='expense'
+        )
+        return add_calendar_columns(df, 'weekday', 'day_of_month')
+
+    def detect_spending_anomalies(self, user_id: int, days_back: int = 90,
+                                  frame: Optional[UserFinancialFrame] = None) -> Dict:
         """
         Detect unusual spending patterns in recent transactions
 
         Args:
             user_id: User ID
             days_back: Number of days to analyze
+            frame: Already-loaded entries to reuse instead of querying
 
         Returns:
             Dictionary with detected anomalies
         """
         try:
             # Get transactions
-            end_date = datetime.now().date()
-            start_date = end_date - timedelta(days=days_back)
+            df = self._load_expenses(user_id, days_back, frame)
 
-            entries = self.db.query(Entry).filter(
-                Entry.user_id == user_id,
-                Entry.type == 'expense',
-                Entry.date >= start_date,
-                Entry.date <= end_date
-            ).all()
-
-            if len(entries) < 10:
+            if len(df) < 10:
                 return {
                     'success': False,
                     'message': 'Need at least 10 transactions for anomaly detection',
                     'min_transactions_needed': 10,
-                    'current_transactions': len(entries)
+                    'current_transactions': len(df)
                 }
 
-            # Convert to DataFrame
-            df = pd.DataFrame([{
-                'id': e.id,
-                'date': e.date,
-                'amount': float(e.amount),
-                'category_id': e.category_id if e.category_id else 0,
-                'category_name': e.category.name if e.category else 'Uncategorized',
-                'note': e.note or '',
-                'weekday': e.date.weekday(),
-                'day_of_month': e.date.day
-            } for e in entries])
-
-            # Extract features for anomaly detection
-            features = self._extract_anomaly_features(df, user_id)
-
-            if features is None or len(features) < 10:
+            # Score against the user's persisted model (refitted only when stale)
+            anomaly_model = self.get_user_model(user_id)
+
+            if anomaly_model is None:
                 return {
                     'success': False,
                     'message': 'Insufficient data for anomaly detection'
                 }
 
-            # Calculate adaptive contamination rate based on historical data
-            contamination_rate = self._calculate_adaptive_contamination(df)
-
-            # Create model with adaptive contamination
-            self.model = IsolationForest(
-                contamination=contamination_rate,
-                random_state=42,
-                n_estimators=100
-            )
-
-            # Scale features
-            features_scaled = self.scaler.fit_transform(features)
+            self.model = anomaly_model.model
+            self.scaler = anomaly_model.scaler
+            self.is_trained = True
 
-            # Fit model and detect anomalies
-            self.model.fit(features_scaled)
-            anomaly_predictions = self.model.predict(features_scaled)
-            anomaly_scores = self.model.decision_function(features_scaled)
+            anomaly_scores = anomaly_model.score_entries(df)
 
             # Add predictions to DataFrame
             df['anomaly_score'] = anomaly_scores
-            df['is_anomaly'] = anomaly_predictions == -1
+            df['is_anomaly'] = anomaly_scores < 0
 
             # Get anomalous transactions
             anomalies = df[df['is_anomaly']].copy()
@@ -122,21 +146,23 @@ class AnomalyDetectionService:
                     'message': 'No unusual spending patterns detected. Great job!'
                 }
 
-            # Analyze each anomaly
-            anomaly_details = []
-            for idx, row in anomalies.iterrows():
-                explanation = self._explain_anomaly(row, df)
-
-                anomaly_details.append({
-                    'entry_id': int(row['id']),
-                    'date': row['date'].isoformat(),
-                    'amount': round(float(row['amount']), 2),
-                    'category': row['category_name'],
-                    'note': row['note'],
-                    'anomaly_score': round(float(row['anomaly_score']), 3),
-                    'severity': self._get_severity_level(row['anomaly_score']),
-                    'explanation': explanation
-                })
+            # Explain all anomalies in one pass over shared baselines
+            explanations = self._explain_anomalies(anomalies, df)
+            severities = self._get_severity_levels(anomalies['anomaly_score'].to_numpy())
+
+            anomaly_details = [{
+                'entry_id': int(entry_id),
+                'date': trans_date.isoformat(),
+                'amount': round(float(amount), 2),
+                'category': category_name,
+                'note': note,
+                'anomaly_score': round(float(score), 3),
+                'severity': severity,
+                'explanation': explanation
+            } for entry_id, trans_date, amount, category_name, note, score, severity, explanation in zip(
+                anomalies['id'], anomalies['date'], anomalies['amount'], anomalies['category_name'],
+                anomalies['note'], anomalies['anomaly_score'], severities, explanations
+            )]
 
             # Sort by severity (most severe first)
             anomaly_details.sort(key=lambda x: x['anomaly_score'])
@@ -158,6 +184,141 @@ class AnomalyDetectionService:
                 'error': str(e)
             }
 
+    def get_user_model(self, user_id: int, refresh_if_stale: bool = True) -> Optional[AnomalyModel]:
+        """
+        Get the user's persisted anomaly model
+
+        Args:
+            user_id: User ID
+            refresh_if_stale: Refit the model when it is missing or stale
+
+        Returns:
+            Trained AnomalyModel, or None if there is not enough data
+        """
+        metadata = self.db.query(AIModel.last_trained, AIModel.model_parameters).filter(
+            AIModel.user_id == user_id,
+            AIModel.model_name == ANOMALY_MODEL_NAME,
+            AIModel.is_active == True
+        ).first()
+
+        if refresh_if_stale and (metadata is None or self.is_model_stale(user_id, metadata)):
+            return self.refresh_user_model(user_id)
+
+        if metadata is None:
+            return None
+
+        cached = _cached_model(user_id)
+        if cached is not None and cached.training_date == metadata.last_trained:
+            return cached
+
+        anomaly_model = AnomalyModel()
+        if not anomaly_model.load_model_from_db(user_id, self.db):
+            return None
+
+        _cache_model(user_id, anomaly_model)
+        return anomaly_model
+
+    def is_model_stale(self, user_id: int, metadata) -> bool:
+        """
+        Check if a persisted model needs refitting
+
+        A model is stale once it is older than the user's retrain frequency
+        or REFRESH_AFTER_NEW_ENTRIES expenses were added since it was trained.
+        """
+        if not metadata.last_trained:
+            return True
+
+        preferences = self.db.query(UserAIPreferences).filter(
+            UserAIPreferences.user_id == user_id
+        ).first()
+        retrain_frequency_days = preferences.retrain_frequency_days if preferences else 7
+
+        if datetime.utcnow() - metadata.last_trained >= timedelta(days=retrain_frequency_days):
+            return True
+
+        parameters = json.loads(metadata.model_parameters or '{}')
+        new_entries = self.db.query(func.count(Entry.id)).filter(
+            Entry.user_id == user_id,
+            Entry.type == 'expense',
+            Entry.id > parameters.get('last_entry_id', 0)
+        ).scalar() or 0
+
+        return new_entries >= REFRESH_AFTER_NEW_ENTRIES
+
+    def refresh_user_model(self, user_id: int) -> Optional[AnomalyModel]:
+        """
+        Refit and persist the user's anomaly model on their recent history
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            Freshly trained AnomalyModel, or None if there is not enough data
+        """
+        start_date = datetime.now().date() - timedelta(days=TRAINING_WINDOW_DAYS)
+
+        df = fetch_entries_frame(
+            self.db, user_id, ('id', 'date', 'amount', 'category_id'),
+            start_date=start_date, entry_type='expense'
+        )
+
+        if len(df) < 10:
+            return None
+
+        anomaly_model = AnomalyModel()
+        anomaly_model.train(df, self._calculate_adaptive_contamination(df))
+        anomaly_model.save_model_to_db(user_id, self.db)
+
+        _cache_model(user_id, anomaly_model)
+        return anomaly_model
+
+    def score_new_entry(self, entry: Entry) -> Optional[Dict]:
+        """
+        Flag a just-created expense against the user's persisted model
+
+        Never refits: the entry is scored with the frozen baselines and compiled
+        trees, and anomalies are recorded as 'anomaly' AI suggestions.
+
+        Args:
+            entry: Newly created entry
+
+        Returns:
+            Anomaly details if the entry is unusual, None otherwise
+        """
+        if entry.type != 'expense':
+            return None
+
+        try:
+            anomaly_model = self.get_user_model(entry.user_id, refresh_if_stale=False)
+            if anomaly_model is None:
+                return None
+
+            score = anomaly_model.score_transaction(entry.date, float(entry.amount), entry.category_id or 0)
+            if score >= 0:
+                return None
+
+            anomaly = {
+                'entry_id': entry.id,
+                'anomaly_score': round(score, 3),
+                'severity': self._get_severity_level(score)
+            }
+
+            self.db.add(AISuggestion(
+                user_id=entry.user_id,
+                entry_id=entry.id,
+                suggestion_type='anomaly',
+                # Scaled so the 'high' severity threshold (-0.5) maps to full confidence
+                confidence_score=round(min(1.0, -score / 0.5), 2),
+                suggestion_data=json.dumps(anomaly)
+            ))
+            self.db.commit()
+
+            return anomaly
+
+        except Exception as e:
+            print(f"Error scoring new entry for anomalies: {e}")
+            return None
+
     def _calculate_adaptive_contamination(self, df: pd.DataFrame) -> float:
         """
         Calculate adaptive contamination rate based on spending variance
@@ -203,60 +364,7 @@ class AnomalyDetectionService:
     def _extract_anomaly_features(self, df: pd.DataFrame, user_id: int) -> Optional[np.ndarray]:
         """Extract enhanced features for anomaly detection with seasonal awareness"""
         try:
-            features_list = []
-
-            for idx, row in df.iterrows():
-                # Original features
-                amount = row['amount']
-                amount_zscore = (amount - df['amount'].mean()) / df['amount'].std() if df['amount'].std() > 0 else 0
-                weekday = row['weekday']
-                day_of_month = row['day_of_month']
-
-                category_counts = df['category_id'].value_counts()
-                category_frequency = category_counts.get(row['category_id'], 0) / len(df)
-
-                category_avg = df[df['category_id'] == row['category_id']]['amount'].mean()
-                amount_vs_category_avg = amount / category_avg if category_avg > 0 else 1
-
-                # NEW SEASONAL FEATURES
-                # Feature 7: Month (1-12) - seasonal patterns
-                month = row['date'].month
-
-                # Feature 8: Quarter (1-4)
-                quarter = (month - 1) // 3 + 1
-
-                # Feature 9: Is weekend (0 or 1)
-                is_weekend = 1 if weekday >= 5 else 0
-
-                # Feature 10: Near holiday (0 or 1)
-                near_holiday = 1 if self._is_near_holiday(row['date']) else 0
-
-                # Feature 11: Season (0-3: winter, spring, summer, fall)
-                season = self._get_season(month)
-
-                # Feature 12: Days since similar transaction
-                same_category_dates = df[df['category_id'] == row['category_id']]['date']
-                if len(same_category_dates) > 1:
-                    days_since_similar = (row['date'] - same_category_dates[same_category_dates < row['date']].max()).days if len(same_category_dates[same_category_dates < row['date']]) > 0 else 30
-                else:
-                    days_since_similar = 30
-
-                features_list.append([
-                    amount,
-                    amount_zscore,
-                    weekday,
-                    day_of_month,
-                    category_frequency,
-                    amount_vs_category_avg,
-                    month,
-                    quarter,
-                    is_weekend,
-                    near_holiday,
-                    season,
-                    min(days_since_similar, 90)  # Cap at 90 days
-                ])
-
-            return np.array(features_list)
+            return AnomalyModel.extract_features(df, AnomalyModel.build_baselines(df))
 
         except Exception as e:
             print(f"Error extracting features: {e}")
@@ -264,68 +372,79 @@ class AnomalyDetectionService:
 
     def _explain_anomaly(self, transaction: pd.Series, all_transactions: pd.DataFrame) -> str:
         """Generate enhanced human-readable explanation with seasonal context"""
-        explanations = []
-        amount = transaction['amount']
-        trans_date = transaction['date']
-
-        # Check if amount is unusually high
-        mean_amount = all_transactions['amount'].mean()
-        std_amount = all_transactions['amount'].std()
-        z_score = (amount - mean_amount) / std_amount if std_amount > 0 else 0
-
-        if z_score > 2:
-            times_higher = amount / mean_amount
-            explanations.append(f"Amount is {times_higher:.1f}x higher than your average transaction")
-
-        # Check against category average
-        same_category = all_transactions[all_transactions['category_id'] == transaction['category_id']]
-        if len(same_category) > 1:
-            category_avg = same_category['amount'].mean()
-            category_std = same_category['amount'].std()
-
-            if category_std > 0:
-                category_z = (amount - category_avg) / category_std
-                if category_z > 2:
-                    explanations.append(f"Unusually high for '{transaction['category_name']}' category")
-
-        # Check transaction frequency for this amount range
-        amount_range = (amount * 0.8, amount * 1.2)
-        similar_amounts = all_transactions[
-            (all_transactions['amount'] >= amount_range[0]) &
-            (all_transactions['amount'] <= amount_range[1])
-        ]
-
-        if len(similar_amounts) <= 2:
-            explanations.append("Rare transaction amount for you")
-
-        # ENHANCED: Seasonal context
-        if self._is_near_holiday(trans_date):
-            explanations.append("Near a major holiday (higher spending expected)")
-
-        # ENHANCED: Weekend spending pattern
-        if trans_date.weekday() >= 5:
-            weekend_avg = all_transactions[all_transactions['weekday'] >= 5]['amount'].mean()
-            if weekend_avg > 0 and amount > weekend_avg * 1.5:
-                explanations.append("Significantly higher than your typical weekend spending")
+        return self._explain_anomalies(transaction.to_frame().T, all_transactions)[0]
 
-        # ENHANCED: Month comparison
-        same_month = all_transactions[all_transactions['date'].apply(lambda d: d.month) == trans_date.month]
-        if len(same_month) > 3:
-            month_avg = same_month['amount'].mean()
-            if amount > month_avg * 1.8:
-                month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
-                explanations.append(f"Unusually high for {month_names[trans_date.month - 1]}")
+    def _explain_anomalies(self, anomalies: pd.DataFrame, all_transactions: pd.DataFrame) -> List[str]:
+        """
+        Generate human-readable explanations for all anomalies in one vectorized pass
 
-        # Check timing patterns
-        same_weekday = all_transactions[all_transactions['weekday'] == transaction['weekday']]
-        if len(same_weekday) < len(all_transactions) * 0.1:
-            weekday_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
-            explanations.append(f"Unusual spending on {weekday_names[transaction['weekday']]}")
+        Baselines (overall and per-category mean/std, amount distribution,
+        weekday/weekend and month profiles) are computed once over all
+        transactions and broadcast onto the anomalies.
+        """
+        amounts = anomalies['amount'].to_numpy(dtype=float)
+        months = pd.to_datetime(anomalies['date']).dt.month.to_numpy()
+        weekdays = anomalies['weekday'].to_numpy(dtype=int)
+        category_ids = anomalies['category_id'].to_numpy()
+        category_names = anomalies['category_name'].to_numpy()
+
+        all_amounts = all_transactions['amount']
+        mean_amount = all_amounts.mean()
+        std_amount = all_amounts.std()
+
+        # Shared baselines
+        category_stats = all_amounts.groupby(all_transactions['category_id']).agg(['count', 'mean', 'std'])
+        category_stats = category_stats.reindex(category_ids)
+        all_months = pd.to_datetime(all_transactions['date']).dt.month.to_numpy()
+        month_stats = all_amounts.groupby(all_months).agg(['count', 'mean']).reindex(months)
+        weekday_counts = all_transactions['weekday'].value_counts().reindex(weekdays, fill_value=0).to_numpy()
+        weekend_avg = all_amounts[all_transactions['weekday'] >= 5].mean()
+        sorted_amounts = np.sort(all_amounts.to_numpy(dtype=float))
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            z_scores = (amounts - mean_amount) / std_amount if std_amount > 0 else np.zeros(len(amounts))
+            category_std = category_stats['std'].to_numpy(dtype=float)
+            category_z = (amounts - category_stats['mean'].to_numpy(dtype=float)) / category_std
+
+        similar_counts = (
+            np.searchsorted(sorted_amounts, amounts * 1.2, side='right')
+            - np.searchsorted(sorted_amounts, amounts * 0.8, side='left')
+        )
+        day_of_month = pd.to_datetime(anomalies['date']).dt.day.to_numpy()
+        near_holiday = np.zeros(len(amounts), dtype=bool)
+        for holiday_month, holiday_day in self.holidays:
+            near_holiday |= (months == holiday_month) & (np.abs(day_of_month - holiday_day) <= 3)
+
+        month_names = ['Jan', 'Feb', 'Mar', 'Apr', 'May', 'Jun', 'Jul', 'Aug', 'Sep', 'Oct', 'Nov', 'Dec']
+        weekday_names = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+        # Each check yields a boolean mask over the anomalies and a message builder
+        checks = [
+            (z_scores > 2,
+             lambda i: f"Amount is {amounts[i] / mean_amount:.1f}x higher than your average transaction"),
+            ((category_stats['count'].to_numpy() > 1) & (category_std > 0) & (category_z > 2),
+             lambda i: f"Unusually high for '{category_names[i]}' category"),
+            (similar_counts <= 2,
+             lambda i: "Rare transaction amount for you"),
+            (near_holiday,
+             lambda i: "Near a major holiday (higher spending expected)"),
+            ((weekdays >= 5) & (weekend_avg > 0) & (amounts > weekend_avg * 1.5),
+             lambda i: "Significantly higher than your typical weekend spending"),
+            ((month_stats['count'].to_numpy() > 3) & (amounts > month_stats['mean'].to_numpy() * 1.8),
+             lambda i: f"Unusually high for {month_names[months[i] - 1]}"),
+            (weekday_counts < len(all_transactions) * 0.1,
+             lambda i: f"Unusual spending on {weekday_names[weekdays[i]]}"),
+        ]
 
-        if not explanations:
-            explanations.append("Multiple factors contribute to this unusual pattern")
+        explanations = [[] for _ in range(len(amounts))]
+        for mask, message in checks:
+            for i in np.flatnonzero(mask):
+                explanations[i].append(message(i))
 
-        return '; '.join(explanations)
+        return [
+            '; '.join(parts) if parts else "Multiple factors contribute to this unusual pattern"
+            for parts in explanations
+        ]
 
     def _get_severity_level(self, anomaly_score: float) -> str:
         """Determine severity level based on anomaly score"""
@@ -337,6 +456,10 @@ class AnomalyDetectionService:
         else:
             return 'low'
 
+    def _get_severity_levels(self, anomaly_scores: np.ndarray) -> np.ndarray:
+        """Vectorized _get_severity_level for an array of anomaly scores"""
+        return np.select([anomaly_scores < -0.5, anomaly_scores < -0.2], ['high', 'medium'], default='low')
+
     def _generate_anomaly_summary(self, anomalies: pd.DataFrame, all_transactions: pd.DataFrame) -> Dict:
         """Generate summary statistics about detected anomalies"""
         total_anomaly_amount = anomalies['amount'].sum()
@@ -380,13 +503,10 @@ class AnomalyDetectionService:
             end_date = datetime.now().date()
             start_date = end_date - timedelta(days=90)
 
-            entries = self.db.query(Entry).filter(
-                Entry.user_id == user_id,
-                Entry.category_id == category_id,
-                Entry.type == 'expense',
-                Entry.date >= start_date,
-                Entry.date <= end_date
-            ).all()
+            entries = fetch_entries_frame(
+                self.db, user_id, ('id', 'date', 'amount', 'note'),
+                start_date=start_date, end_date=end_date, entry_type='expense', category_id=category_id
+            )
 
             if len(entries) < 5:
                 return {
@@ -396,34 +516,30 @@ class AnomalyDetectionService:
                 }
 
             # Calculate statistics
-            amounts = [float(e.amount) for e in entries]
+            amounts = entries['amount'].to_numpy()
             mean_amount = np.mean(amounts)
             std_amount = np.std(amounts)
             median_amount = np.median(amounts)
 
             # Detect outliers using IQR method
-            q1 = np.percentile(amounts, 25)
-            q3 = np.percentile(amounts, 75)
+            q1, q3 = np.percentile(amounts, [25, 75])
             iqr = q3 - q1
             lower_bound = q1 - 1.5 * iqr
             upper_bound = q3 + 1.5 * iqr
 
             # Find anomalies
-            anomalies = []
-            for entry in entries:
-                amount = float(entry.amount)
-                if amount < lower_bound or amount > upper_bound:
-                    z_score = (amount - mean_amount) / std_amount if std_amount > 0 else 0
-
-                    anomalies.append({
-                        'entry_id': entry.id,
-                        'date': entry.date.isoformat(),
-                        'amount': round(amount, 2),
-                        'note': entry.note or '',
-                        'z_score': round(float(z_score), 2),
-                        'deviation_from_mean': round(float(amount - mean_amount), 2),
-                        'explanation': f"Amount is {abs(z_score):.1f} standard deviations from average"
-                    })
+            outliers = np.flatnonzero((amounts < lower_bound) | (amounts > upper_bound))
+            z_scores = (amounts - mean_amount) / std_amount if std_amount > 0 else np.zeros(len(amounts))
+
+            anomalies = [{
+                'entry_id': int(entries['id'].iat[i]),
+                'date': entries['date'].iat[i].isoformat(),
+                'amount': round(float(amounts[i]), 2),
+                'note': entries['note'].iat[i],
+                'z_score': round(float(z_scores[i]), 2),
+                'deviation_from_mean': round(float(amounts[i] - mean_amount), 2),
+                'explanation': f"Amount is {abs(z_scores[i]):.1f} standard deviations from average"
+            } for i in outliers]
 
             return {
                 'success': True,
@@ -451,43 +567,27 @@ class AnomalyDetectionService:
                 'error': str(e)
             }
 
-    def detect_recurring_anomalies(self, user_id: int) -> Dict:
+    def detect_recurring_anomalies(self, user_id: int, frame: Optional[UserFinancialFrame] = None) -> Dict:
         """
         Detect recurring transactions that have unusual amounts
 
         Args:
             user_id: User ID
+            frame: Already-loaded entries to reuse instead of querying
 
         Returns:
             Dictionary with recurring anomalies
         """
         try:
             # Get last 6 months of data
-            end_date = datetime.now().date()
-            start_date = end_date - timedelta(days=180)
-
-            entries = self.db.query(Entry).filter(
-                Entry.user_id == user_id,
-                Entry.type == 'expense',
-                Entry.date >= start_date,
-                Entry.date <= end_date
-            ).all()
+            df = self._load_expenses(user_id, 180, frame)
 
-            if len(entries) < 20:
+            if len(df) < 20:
                 return {
                     'success': False,
                     'message': 'Need at least 20 transactions to detect recurring anomalies'
                 }
 
-            # Group by note/description to find recurring transactions
-            df = pd.DataFrame([{
-                'id': e.id,
-                'date': e.date,
-                'amount': float(e.amount),
-                'note': e.note or '',
-                'category_name': e.category.name if e.category else 'Uncategorized'
-            } for e in entries])
-
             # Find transactions with same note that appear multiple times
             note_counts = df['note'].value_counts()
             recurring_notes = note_counts[note_counts >= 3].index.tolist()
@@ -499,42 +599,53 @@ class AnomalyDetectionService:
                     'message': 'No recurring transactions with anomalies detected'
                 }
 
+            # Per-note amount statistics, computed once for all recurring patterns
+            grouped = df.groupby('note', sort=False)
+            note_stats = pd.DataFrame({
+                'typical_amount': grouped['amount'].mean(),
+                'amount_variance': grouped['amount'].std(ddof=0),
+                'occurrences': grouped.size(),
+                'category': grouped['category_name'].first()
+            }).loc[recurring_notes]
+
+            # Only meaningful notes with more than 20% variance
+            note_stats = note_stats[
+                (note_stats.index.str.strip().str.len() >= 3) &
+                (note_stats['amount_variance'] > note_stats['typical_amount'] * 0.2)
+            ]
+
+            # Broadcast the statistics back onto transactions and flag outliers in one pass
+            candidates = df.join(note_stats[['typical_amount', 'amount_variance']], on='note', how='inner')
+            std_amounts = candidates['amount_variance'].to_numpy()
+            with np.errstate(divide='ignore', invalid='ignore'):
+                z_scores = np.where(
+                    std_amounts > 0,
+                    np.abs((candidates['amount'].to_numpy() - candidates['typical_amount'].to_numpy()) / std_amounts),
+                    0
+                )
+            flagged = {note: rows for note, rows in candidates[z_scores > 1.5].groupby('note', sort=False)}
+
             recurring_anomalies = []
 
-            for note in recurring_notes:
-                if not note or len(note.strip()) < 3:
+            for note, stats in note_stats.iterrows():
+                if note not in flagged:
                     continue
 
-                transactions = df[df['note'] == note]
-                amounts = transactions['amount'].values
-
-                # Check for amount variance
-                mean_amount = np.mean(amounts)
-                std_amount = np.std(amounts)
-
-                if std_amount > mean_amount * 0.2:  # More than 20% variance
-                    # Find which transactions are anomalous
-                    anomalous_transactions = []
-                    for idx, row in transactions.iterrows():
-                        z_score = abs((row['amount'] - mean_amount) / std_amount) if std_amount > 0 else 0
-                        if z_score > 1.5:
-                            anomalous_transactions.append({
-                                'entry_id': int(row['id']),
-                                'date': row['date'].isoformat(),
-                                'amount': round(float(row['amount']), 2),
-                                'expected_amount': round(float(mean_amount), 2),
-                                'difference': round(float(row['amount'] - mean_amount), 2)
-                            })
-
-                    if anomalous_transactions:
-                        recurring_anomalies.append({
-                            'recurring_transaction': note,
-                            'category': transactions.iloc[0]['category_name'],
-                            'typical_amount': round(float(mean_amount), 2),
-                            'amount_variance': round(float(std_amount), 2),
-                            'occurrences': len(transactions),
-                            'anomalous_occurrences': anomalous_transactions
-                        })
+                rows = flagged[note]
+                recurring_anomalies.append({
+                    'recurring_transaction': note,
+                    'category': stats['category'],
+                    'typical_amount': round(float(stats['typical_amount']), 2),
+                    'amount_variance': round(float(stats['amount_variance']), 2),
+                    'occurrences': int(stats['occurrences']),
+                    'anomalous_occurrences': [{
+                        'entry_id': int(entry_id),
+                        'date': trans_date.isoformat(),
+                        'amount': round(float(amount), 2),
+                        'expected_amount': round(float(stats['typical_amount']), 2),
+                        'difference': round(float(amount - stats['typical_amount']), 2)
+                    } for entry_id, trans_date, amount in zip(rows['id'], rows['date'], rows['amount'])]
+                })
 
             return {
                 'success': True,
@@ -550,20 +661,21 @@ class AnomalyDetectionService:
                 'error': str(e)
             }
 
-    def get_anomaly_insights(self, user_id: int) -> Dict:
+    def get_anomaly_insights(self, user_id: int, frame: Optional[UserFinancialFrame] = None) -> Dict:
         """
         Get comprehensive anomaly insights and recommendations
 
         Args:
             user_id: User ID
+            frame: Already-loaded entries to reuse instead of querying
 
         Returns:
             Dictionary with insights and recommendations
         """
         try:
             # Run all anomaly detection methods
-            general_anomalies = self.detect_spending_anomalies(user_id, days_back=30)
-            recurring_anomalies = self.detect_recurring_anomalies(user_id)
+            general_anomalies = self.detect_spending_anomalies(user_id, days_back=30, frame=frame)
+            recurring_anomalies = self.detect_recurring_anomalies(user_id, frame=frame)
 
             insights = []
             recommendations = []
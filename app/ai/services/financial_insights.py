@@ -5,11 +5,8 @@ import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
 from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from collections import defaultdict
 
-from app.models.entry import Entry
-from app.models.category import Category
+from app.ai.data.user_financial_frame import UserFinancialFrame
 from app.ai.services.prediction_service import PredictionService
 from app.ai.services.anomaly_detection import AnomalyDetectionService
 
@@ -21,6 +18,14 @@ class FinancialInsightsService:
         self.db = db
         self.prediction_service = PredictionService(db)
         self.anomaly_service = AnomalyDetectionService(db)
+        self._frames: Dict[int, UserFinancialFrame] = {}
+        self._budget_health: Dict[int, Dict] = {}
+
+    def _get_frame(self, user_id: int) -> UserFinancialFrame:
+        """Entries shared by every analyzer in this request, loaded on first use"""
+        if user_id not in self._frames:
+            self._frames[user_id] = UserFinancialFrame(self.db, user_id)
+        return self._frames[user_id]
 
     def get_comprehensive_insights(self, user_id: int) -> Dict:
         """
@@ -56,38 +61,25 @@ class FinancialInsightsService:
 
     def _analyze_spending_patterns(self, user_id: int) -> Dict:
         """Analyze user's spending patterns and habits"""
-        # Get last 3 months of data
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=90)
-
-        entries = self.db.query(Entry).filter(
-            Entry.user_id == user_id,
-            Entry.type == 'expense',
-            Entry.date >= start_date,
-            Entry.date <= end_date
-        ).all()
-
-        if not entries:
+        # Last 3 months of data
+        frame = self._get_frame(user_id)
+        df = frame.expenses(90)
+
+        if df.empty:
             return {'message': 'Not enough data for analysis'}
 
-        df = pd.DataFrame([{
-            'amount': float(e.amount),
-            'date': e.date,
-            'weekday': e.date.weekday(),
-            'day_of_month': e.date.day,
-            'hour': e.date.hour if hasattr(e, 'created_at') else 12,
-            'category': e.category.name if e.category else 'Uncategorized'
-        } for e in entries])
+        weekday_profile = frame.weekday_profile(90)
+        daily_spending = frame.daily_totals(90)
 
         # Analyze patterns
         patterns = {
-            'most_active_day': self._get_weekday_name(df.groupby('weekday')['amount'].count().idxmax()),
-            'highest_spending_day': self._get_weekday_name(df.groupby('weekday')['amount'].sum().idxmax()),
+            'most_active_day': self._get_weekday_name(weekday_profile['count'].idxmax()),
+            'highest_spending_day': self._get_weekday_name(weekday_profile['sum'].idxmax()),
             'average_transaction': round(float(df['amount'].mean()), 2),
             'largest_transaction': round(float(df['amount'].max()), 2),
-            'total_transactions': len(entries),
-            'avg_daily_spending': round(float(df.groupby('date')['amount'].sum().mean()), 2),
-            'spending_consistency': self._calculate_consistency(df)
+            'total_transactions': len(df),
+            'avg_daily_spending': round(float(daily_spending.mean()), 2),
+            'spending_consistency': self._calculate_consistency(daily_spending)
         }
 
         # Month phases (beginning, middle, end)
@@ -111,36 +103,25 @@ class FinancialInsightsService:
         """Identify opportunities to save money"""
         opportunities = []
 
-        # Get last 90 days
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=90)
+        # Last 90 days
+        df = self._get_frame(user_id).expenses(90, categorized=True)
 
-        entries = self.db.query(Entry).filter(
-            Entry.user_id == user_id,
-            Entry.type == 'expense',
-            Entry.date >= start_date,
-            Entry.date <= end_date,
-            Entry.category_id.isnot(None)
-        ).all()
-
-        if len(entries) < 20:
+        if len(df) < 20:
             return opportunities
 
-        # Analyze by category
-        category_spending = defaultdict(list)
-        for entry in entries:
-            category_spending[entry.category.name].append(float(entry.amount))
+        # Analyze by category, in order of first appearance
+        category_stats = df.groupby('category_name', sort=False)['amount'].agg(['sum', 'count'])
 
-        for category, amounts in category_spending.items():
-            if len(amounts) < 5:
+        for category, total, count in zip(category_stats.index, category_stats['sum'], category_stats['count']):
+            if count < 5:
                 continue
 
-            total = sum(amounts)
-            avg = total / len(amounts)
+            total = float(total)
+            avg = total / count
             monthly_avg = total / 3  # 3 months of data
 
             # High volume category
-            if monthly_avg > 200 and len(amounts) > 10:
+            if monthly_avg > 200 and count > 10:
                 potential_saving = monthly_avg * 0.15  # 15% reduction
                 opportunities.append({
                     'type': 'high_volume_category',
@@ -152,8 +133,8 @@ class FinancialInsightsService:
                 })
 
             # Frequent small purchases
-            if len(amounts) > 15 and avg < 30:
-                monthly_count = len(amounts) / 3
+            if count > 15 and avg < 30:
+                monthly_count = count / 3
                 if monthly_count > 8:  # More than 8 transactions per month
                     opportunities.append({
                         'type': 'frequent_small_purchases',
@@ -170,39 +151,23 @@ class FinancialInsightsService:
 
     def _assess_budget_health(self, user_id: int) -> Dict:
         """Assess overall budget health"""
-        # Get current month data
-        now = datetime.now()
-        month_start = now.replace(day=1).date()
-
-        current_month_expenses = self.db.query(func.sum(Entry.amount)).filter(
-            Entry.user_id == user_id,
-            Entry.type == 'expense',
-            Entry.date >= month_start
-        ).scalar() or 0
-
-        current_month_income = self.db.query(func.sum(Entry.amount)).filter(
-            Entry.user_id == user_id,
-            Entry.type == 'income',
-            Entry.date >= month_start
-        ).scalar() or 0
-
-        # Get previous month data
+        # Recommendations, achievements and alerts all build on this; compute it once
+        if user_id in self._budget_health:
+            return self._budget_health[user_id]
+
+        frame = self._get_frame(user_id)
+
+        # Current month data
+        month_start = frame.today.replace(day=1)
+        current_month_expenses = frame.total('expense', month_start)
+        current_month_income = frame.total('income', month_start)
+
+        # Previous month data
         prev_month_start = (month_start - timedelta(days=1)).replace(day=1)
         prev_month_end = month_start - timedelta(days=1)
 
-        prev_month_expenses = self.db.query(func.sum(Entry.amount)).filter(
-            Entry.user_id == user_id,
-            Entry.type == 'expense',
-            Entry.date >= prev_month_start,
-            Entry.date <= prev_month_end
-        ).scalar() or 0
-
-        prev_month_income = self.db.query(func.sum(Entry.amount)).filter(
-            Entry.user_id == user_id,
-            Entry.type == 'income',
-            Entry.date >= prev_month_start,
-            Entry.date <= prev_month_end
-        ).scalar() or 0
+        prev_month_expenses = frame.total('expense', prev_month_start, prev_month_end)
+        prev_month_income = frame.total('income', prev_month_start, prev_month_end)
 
         # Calculate health metrics
         current_savings_rate = ((current_month_income - current_month_expenses) / current_month_income * 100) if current_month_income > 0 else 0
@@ -242,7 +207,7 @@ class FinancialInsightsService:
             status = 'poor'
             status_message = 'Your budget health requires immediate action'
 
-        return {
+        self._budget_health[user_id] = {
             'health_score': round(health_score, 1),
             'status': status,
             'status_message': status_message,
@@ -252,36 +217,24 @@ class FinancialInsightsService:
             'current_month_expense': round(float(current_month_expenses), 2),
             'current_month_income': round(float(current_month_income), 2)
         }
+        return self._budget_health[user_id]
 
     def _analyze_category_trends(self, user_id: int) -> List[Dict]:
         """Analyze spending trends by category"""
-        # Get last 6 months of data
-        end_date = datetime.now().date()
-        start_date = end_date - timedelta(days=180)
-
-        entries = self.db.query(Entry).filter(
-            Entry.user_id == user_id,
-            Entry.type == 'expense',
-            Entry.date >= start_date,
-            Entry.date <= end_date,
-            Entry.category_id.isnot(None)
-        ).all()
-
-        if not entries:
+        # Last 6 months of data
+        frame = self._get_frame(user_id)
+        df = frame.expenses(180, categorized=True)
+
+        if df.empty:
             return []
 
-        # Group by category and month
-        df = pd.DataFrame([{
-            'category': e.category.name,
-            'amount': float(e.amount),
-            'month': f"{e.date.year}-{e.date.month:02d}"
-        } for e in entries])
+        # Spending per category and month
+        monthly_by_category = frame.monthly_by_category(180)
 
         category_trends = []
 
-        for category in df['category'].unique():
-            cat_data = df[df['category'] == category]
-            monthly_spending = cat_data.groupby('month')['amount'].sum()
+        for category in df['category_name'].unique():
+            monthly_spending = monthly_by_category.loc[category]
 
             if len(monthly_spending) < 2:
                 continue
@@ -354,7 +307,7 @@ class FinancialInsightsService:
             })
 
         # Check for anomalies
-        anomaly_insights = self.anomaly_service.get_anomaly_insights(user_id)
+        anomaly_insights = self.anomaly_service.get_anomaly_insights(user_id, frame=self._get_frame(user_id))
         if anomaly_insights.get('success') and len(anomaly_insights.get('insights', [])) > 0:
             recommendations.append({
                 'type': 'anomaly_review',
@@ -417,7 +370,7 @@ class FinancialInsightsService:
             })
 
         # Consistent tracking
-        total_entries = self.db.query(Entry).filter(Entry.user_id == user_id).count()
+        total_entries = self._get_frame(user_id).total_entries
         if total_entries > 50:
             achievements.append({
                 'type': 'consistency',
@@ -464,7 +417,7 @@ class FinancialInsightsService:
             })
 
         # Get prediction
-        prediction = self.prediction_service.predict_budget_status(user_id)
+        prediction = self.prediction_service.predict_budget_status(user_id, frame=self._get_frame(user_id))
         if prediction.get('success') and prediction.get('status') == 'over_budget':
             alerts.append({
                 'type': 'warning',
@@ -476,9 +429,8 @@ class FinancialInsightsService:
 
         return alerts
 
-    def _calculate_consistency(self, df: pd.DataFrame) -> str:
-        """Calculate spending consistency"""
-        daily_spending = df.groupby('date')['amount'].sum()
+    def _calculate_consistency(self, daily_spending: pd.Series) -> str:
+        """Calculate spending consistency from per-day spending totals"""
         std_dev = daily_spending.std()
         mean = daily_spending.mean()
 
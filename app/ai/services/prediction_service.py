@@ -13,6 +13,8 @@ warnings.filterwarnings('ignore')
 
 from app.models.entry import Entry
 from app.models.category import Category
+from app.ai.data.entry_frames import add_calendar_columns, fetch_entries_frame
+from app.ai.data.user_financial_frame import UserFinancialFrame
 
 
 class PredictionService:
@@ -39,29 +41,20 @@ class PredictionService:
             end_date = datetime.now().date()
             start_date = end_date - timedelta(days=180)
 
-            entries = self.db.query(Entry).filter(
-                Entry.user_id == user_id,
-                Entry.type == 'expense',
-                Entry.date >= start_date,
-                Entry.date <= end_date
-            ).all()
+            df = fetch_entries_frame(
+                self.db, user_id, ('date', 'amount'),
+                start_date=start_date, end_date=end_date, entry_type='expense'
+            )
 
-            if len(entries) < 10:
+            if len(df) < 10:
                 return {
                     'success': False,
                     'message': 'Not enough historical data for prediction. Need at least 10 expense entries.',
                     'min_entries_needed': 10,
-                    'current_entries': len(entries)
+                    'current_entries': len(df)
                 }
 
-            # Convert to DataFrame
-            df = pd.DataFrame([{
-                'date': e.date,
-                'amount': float(e.amount),
-                'year': e.date.year,
-                'month': e.date.month,
-                'year_month': f"{e.date.year}-{e.date.month:02d}"
-            } for e in entries])
+            add_calendar_columns(df, 'year', 'month', 'year_month')
 
             # Aggregate by month
             monthly_spending = df.groupby('year_month')['amount'].sum().reset_index()
@@ -154,13 +147,10 @@ class PredictionService:
             end_date = datetime.now().date()
             start_date = end_date - timedelta(days=90)
 
-            entries = self.db.query(Entry).filter(
-                Entry.user_id == user_id,
-                Entry.type == 'expense',
-                Entry.category_id == category_id,
-                Entry.date >= start_date,
-                Entry.date <= end_date
-            ).all()
+            entries = fetch_entries_frame(
+                self.db, user_id, ('amount',),
+                start_date=start_date, end_date=end_date, entry_type='expense', category_id=category_id
+            )
 
             if len(entries) < 5:
                 return {
@@ -170,7 +160,7 @@ class PredictionService:
                 }
 
             # Calculate simple statistics
-            amounts = [float(e.amount) for e in entries]
+            amounts = entries['amount'].to_numpy()
             avg_amount = np.mean(amounts)
             std_amount = np.std(amounts)
 
@@ -224,25 +214,18 @@ class PredictionService:
             end_date = datetime.now().date()
             start_date = end_date - timedelta(days=180)
 
-            entries = self.db.query(Entry).filter(
-                Entry.user_id == user_id,
-                Entry.date >= start_date,
-                Entry.date <= end_date
-            ).all()
+            df = fetch_entries_frame(
+                self.db, user_id, ('date', 'amount', 'type'),
+                start_date=start_date, end_date=end_date
+            )
 
-            if len(entries) < 10:
+            if len(df) < 10:
                 return {
                     'success': False,
                     'message': 'Need at least 10 entries for cash flow prediction'
                 }
 
-            # Convert to DataFrame
-            df = pd.DataFrame([{
-                'date': e.date,
-                'amount': float(e.amount),
-                'type': e.type,
-                'year_month': f"{e.date.year}-{e.date.month:02d}"
-            } for e in entries])
+            add_calendar_columns(df, 'year_month')
 
             # Separate income and expenses
             income_df = df[df['type'] == 'income'].groupby('year_month')['amount'].sum()
@@ -307,12 +290,13 @@ class PredictionService:
                 'error': str(e)
             }
 
-    def predict_budget_status(self, user_id: int) -> Dict:
+    def predict_budget_status(self, user_id: int, frame: Optional[UserFinancialFrame] = None) -> Dict:
         """
         Predict if user will stay within budget for current month
 
         Args:
             user_id: User ID
+            frame: Already-loaded entries to reuse instead of querying
 
         Returns:
             Dictionary with budget forecast
@@ -324,22 +308,28 @@ class PredictionService:
             month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
             today = now.date()
 
-            # Get spending so far this month
-            current_month_entries = self.db.query(Entry).filter(
-                Entry.user_id == user_id,
-                Entry.type == 'expense',
-                Entry.date >= month_start,
-                Entry.date <= today
-            ).all()
+            prev_month_start = (month_start - timedelta(days=1)).replace(day=1)
+            prev_month_end = month_start - timedelta(days=1)
 
-            if not current_month_entries:
+            # Get spending so far this month and over the previous month
+            if frame is not None and frame.covers(prev_month_start):
+                current_month_amounts = frame.amounts('expense', month_start, today).tolist()
+                prev_month_amounts = frame.amounts('expense', prev_month_start, prev_month_end).tolist()
+            else:
+                current_month_amounts = fetch_entries_frame(
+                    self.db, user_id, ('amount',),
+                    start_date=month_start, end_date=today, entry_type='expense'
+                )['amount'].tolist()
+                prev_month_amounts = None
+
+            if not current_month_amounts:
                 return {
                     'success': False,
                     'message': 'No spending data for current month'
                 }
 
             # Calculate current spending
-            current_spending = sum(float(e.amount) for e in current_month_entries)
+            current_spending = sum(current_month_amounts)
 
             # Calculate daily average so far
             days_elapsed = (today - month_start).days + 1
@@ -352,17 +342,13 @@ class PredictionService:
             predicted_month_total = current_spending + (daily_avg * days_remaining)
 
             # Get previous month's spending for comparison
-            prev_month_start = (month_start - timedelta(days=1)).replace(day=1)
-            prev_month_end = month_start - timedelta(days=1)
-
-            prev_month_entries = self.db.query(Entry).filter(
-                Entry.user_id == user_id,
-                Entry.type == 'expense',
-                Entry.date >= prev_month_start,
-                Entry.date <= prev_month_end
-            ).all()
+            if prev_month_amounts is None:
+                prev_month_amounts = fetch_entries_frame(
+                    self.db, user_id, ('amount',),
+                    start_date=prev_month_start, end_date=prev_month_end, entry_type='expense'
+                )['amount'].tolist()
 
-            prev_month_total = sum(float(e.amount) for e in prev_month_entries) if prev_month_entries else predicted_month_total
+            prev_month_total = sum(prev_month_amounts) if prev_month_amounts else predicted_month_total
 
             # Calculate if on track
             expected_spending_by_now = prev_month_total * (days_elapsed / ((month_end - month_start).days + 1))
@@ -426,25 +412,19 @@ class PredictionService:
             end_date = datetime.now().date()
             start_date = end_date - timedelta(days=months_back * 30)
 
-            entries = self.db.query(Entry).filter(
-                Entry.user_id == user_id,
-                Entry.type == 'expense',
-                Entry.date >= start_date,
-                Entry.date <= end_date
-            ).all()
+            df = fetch_entries_frame(
+                self.db, user_id, ('date', 'amount'),
+                start_date=start_date, end_date=end_date, entry_type='expense'
+            )
 
-            if len(entries) < 5:
+            if len(df) < 5:
                 return {
                     'success': False,
                     'message': 'Not enough historical data for visualization'
                 }
 
-            # Convert to DataFrame and aggregate by month
-            df = pd.DataFrame([{
-                'date': e.date,
-                'amount': float(e.amount),
-                'year_month': f"{e.date.year}-{e.date.month:02d}"
-            } for e in entries])
+            # Aggregate by month
+            add_calendar_columns(df, 'year_month')
 
             monthly_spending = df.groupby('year_month')['amount'].sum().reset_index()
             monthly_spending.columns = ['month', 'actual']
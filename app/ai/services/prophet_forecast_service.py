@@ -29,6 +29,7 @@ except ImportError:
 from app.models.entry import Entry
 from app.models.category import Category
 from app.models.recurring_payment import RecurringPayment, RecurrenceFrequency
+from app.ai.data.entry_frames import fetch_entries_frame
 
 
 class ProphetForecastService:
@@ -204,26 +205,21 @@ class ProphetForecastService:
             end_date = datetime.now().date()
             start_date = end_date - timedelta(days=180)  # 6 months history
 
-            entries = self.db.query(Entry).filter(
-                Entry.user_id == user_id,
-                Entry.type == 'expense',
-                Entry.date >= start_date,
-                Entry.date <= end_date
-            ).all()
+            df = fetch_entries_frame(
+                self.db, user_id, ('date', 'amount'),
+                start_date=start_date, end_date=end_date, entry_type='expense'
+            )
 
-            if len(entries) < 30:
+            if len(df) < 30:
                 return {
                     'success': False,
                     'message': 'Need at least 30 days of data for Prophet forecasting',
                     'min_days_needed': 30,
-                    'current_days': len(set(e.date for e in entries))
+                    'current_days': int(df['date'].nunique())
                 }
 
             # Prepare data in Prophet format (ds, y)
-            df = pd.DataFrame([{
-                'ds': e.date,
-                'y': float(e.amount)
-            } for e in entries])
+            df.columns = ['ds', 'y']
 
             # Aggregate by day
             daily_spending = df.groupby('ds')['y'].sum().reset_index()
@@ -420,15 +416,12 @@ class ProphetForecastService:
             end_date = datetime.now().date()
             start_date = end_date - timedelta(days=180)
 
-            entries = self.db.query(Entry).filter(
-                Entry.user_id == user_id,
-                Entry.type == 'expense',
-                Entry.category_id == category_id,
-                Entry.date >= start_date,
-                Entry.date <= end_date
-            ).all()
+            df = fetch_entries_frame(
+                self.db, user_id, ('date', 'amount'),
+                start_date=start_date, end_date=end_date, entry_type='expense', category_id=category_id
+            )
 
-            if len(entries) < 20:
+            if len(df) < 20:
                 return {
                     'success': False,
                     'message': f'Need at least 20 transactions in {category.name} for forecasting',
@@ -436,10 +429,7 @@ class ProphetForecastService:
                 }
 
             # Prepare data
-            df = pd.DataFrame([{
-                'ds': e.date,
-                'y': float(e.amount)
-            } for e in entries])
+            df.columns = ['ds', 'y']
 
             # Aggregate by week (more stable for categories)
             df['week'] = pd.to_datetime(df['ds']).dt.to_period('W').apply(lambda r: r.start_time)
@@ -557,24 +547,19 @@ class ProphetForecastService:
             end_date = datetime.now().date()
             start_date = end_date - timedelta(days=365)
 
-            entries = self.db.query(Entry).filter(
-                Entry.user_id == user_id,
-                Entry.type == 'expense',
-                Entry.date >= start_date,
-                Entry.date <= end_date
-            ).all()
+            df = fetch_entries_frame(
+                self.db, user_id, ('date', 'amount'),
+                start_date=start_date, end_date=end_date, entry_type='expense'
+            )
 
-            if len(entries) < 90:
+            if len(df) < 90:
                 return {
                     'success': False,
                     'message': 'Need at least 90 days of data for seasonal analysis'
                 }
 
             # Prepare data
-            df = pd.DataFrame([{
-                'ds': e.date,
-                'y': float(e.amount)
-            } for e in entries])
+            df.columns = ['ds', 'y']
 
             daily_spending = df.groupby('ds')['y'].sum().reset_index()
 
@@ -81,7 +81,7 @@ def get_bill_reminders(
     """
     Get reminders for bills due in the next N days
 
-    Returns urgent and upcoming bill reminders with predictions
+    Returns urgent and upcoming reminders for the user's recurring payments
     """
     service = BudgetIntelligenceService(db)
     return {
@@ -124,6 +124,7 @@ def get_subscription_summary(
 @router.get("/duplicates")
 def find_duplicate_transactions(
     days_window: int = Query(30, description="Number of days to look back for duplicates"),
+    fuzzy: bool = Query(False, description="Also match similar merchant notes across categories"),
     user: User = Depends(current_user),
     db: Session = Depends(get_db)
 ):
@@ -135,9 +136,10 @@ def find_duplicate_transactions(
     - Same category
     - Same or similar dates (within 2 days)
     - Similar notes
+    - With fuzzy: same amount in another category with a note naming the same merchant
     """
     service = BudgetIntelligenceService(db)
     return {
-        "duplicates": service.find_duplicate_transactions(user.id, days_window),
+        "duplicates": service.find_duplicate_transactions(user.id, days_window, fuzzy_notes=fuzzy),
         "days_analyzed": days_window
     }
@@ -74,13 +74,8 @@ def calendar_view(
         month=display_month
     )
 
-    # Get month summary
-    month_summary = calendar_service.get_month_summary(
-        db=db,
-        user_id=user.id,
-        year=display_year,
-        month=display_month
-    )
+    # Month summary comes from the same day aggregates
+    month_summary = calendar_data['summary']
 
     # Get available months for navigation
     available_months = calendar_service.get_available_months(
@@ -220,13 +215,8 @@ def get_month_data_api(
         month=month
     )
 
-    # Get month summary
-    month_summary = calendar_service.get_month_summary(
-        db=db,
-        user_id=user.id,
-        year=year,
-        month=month
-    )
+    # Month summary comes from the same day aggregates
+    month_summary = calendar_data['summary']
 
     today = date.today()
 
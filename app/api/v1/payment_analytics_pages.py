@@ -59,17 +59,14 @@ def payment_analytics_dashboard(
         months_back = 12
         period = "12months"
 
-    # Get all analytics data
-    payment_statistics = analytics_service.get_payment_statistics(user.id)
-    payment_trends = analytics_service.get_payment_trends(user.id, months=months_back)
-    recurring_vs_onetime = analytics_service.get_recurring_vs_onetime_breakdown(
-        user.id, start_date=start_date, end_date=end_date
-    )
-    payment_reliability = analytics_service.get_payment_reliability_by_bill(user.id)
-    cost_projection = analytics_service.get_monthly_cost_projection(user.id)
-    category_breakdown = analytics_service.get_category_spending_breakdown(
-        user.id, start_date=start_date, end_date=end_date
-    )
+    # Get all analytics data (one shared occurrence dataset)
+    dashboard = analytics_service.get_dashboard(user.id, start_date, end_date, months=months_back)
+    payment_statistics = dashboard['payment_statistics']
+    payment_trends = dashboard['payment_trends']
+    recurring_vs_onetime = dashboard['recurring_vs_onetime']
+    payment_reliability = dashboard['payment_reliability']
+    cost_projection = dashboard['cost_projection']
+    category_breakdown = dashboard['category_breakdown']
 
     # Get currency formatter
     format_currency = _get_currency_formatter(db, user.id)
@@ -17,6 +17,7 @@ from app.models.user import User
 from app.models.category import Category
 from app.models.receipt import Receipt
 from app.services.user_preferences import user_preferences_service
+from app.services.budget_intelligence_service import BudgetIntelligenceService
 from app.core.currency import CURRENCIES
 from app.templates import render
 
@@ -227,6 +228,7 @@ class SplitRequest(BaseModel):
     date: str                       # YYYY-MM-DD
     currency_code: str
     items: List[SplitItem]
+    skip_duplicates: bool = False   # leave out items already recorded (e.g. a receipt split twice)
 
 
 @router.post("/split")
@@ -235,7 +237,11 @@ async def split_receipt(
     user: User = Depends(current_user),
     db: Session = Depends(get_db),
 ):
-    """Create one expense entry per line item."""
+    """Create one expense entry per line item.
+
+    With skip_duplicates, items matching an existing entry are not created but
+    returned in skipped_duplicates, to be resent without the flag if wanted.
+    """
     from app.models.entry import Entry
     from datetime import date as date_type
 
@@ -247,9 +253,26 @@ async def split_receipt(
     except ValueError:
         raise HTTPException(status_code=400, detail="Invalid date format. Use YYYY-MM-DD.")
 
+    items = [item for item in body.items if item.amount > 0]
+    duplicate_of = [None] * len(items)
+    if body.skip_duplicates:
+        duplicate_of = BudgetIntelligenceService(db).find_import_duplicates(user.id, [
+            {
+                "type": "expense",
+                "amount": round(item.amount, 2),
+                "category_id": item.category_id or None,
+                "date": entry_date,
+                "note": item.description[:255],
+            }
+            for item in items
+        ])
+
     created_ids = []
-    for item in body.items:
-        if item.amount <= 0:
+    skipped = []
+    for item, existing_id in zip(items, duplicate_of):
+        if existing_id is not None:
+            skipped.append({"description": item.description, "amount": item.amount,
+                            "category_id": item.category_id, "duplicate_of": existing_id})
             continue
         entry = Entry(
             user_id=user.id,
@@ -265,6 +288,10 @@ async def split_receipt(
         created_ids.append(entry.id)
 
     if not created_ids:
+        if skipped:
+            # Skipped items are returned so the client can offer to add them anyway
+            return JSONResponse({"detail": "All items duplicate existing entries.", "created": 0, "entry_ids": [],
+                                 "skipped_duplicates": skipped}, status_code=409)
         raise HTTPException(status_code=400, detail="All items had zero or negative amounts.")
 
     # Link receipt to first entry if provided
@@ -276,4 +303,4 @@ async def split_receipt(
             receipt.entry_id = created_ids[0]
 
     db.commit()
-    return JSONResponse({"created": len(created_ids), "entry_ids": created_ids})
+    return JSONResponse({"created": len(created_ids), "entry_ids": created_ids, "skipped_duplicates": skipped})
@@ -100,7 +100,7 @@ def create_recurring_payment(
     )
 
     # Calculate next due date
-    next_due = service.calculate_next_due_date(payment)
+    next_due = service.get_next_due_date(payment)
 
     return {
         "id": payment.id,
@@ -132,7 +132,7 @@ def get_all_recurring_payments(
 
     result = []
     for payment in payments:
-        next_due = service.calculate_next_due_date(payment)
+        next_due = service.get_next_due_date(payment)
         result.append({
             "id": payment.id,
             "name": payment.name,
@@ -155,6 +155,19 @@ def get_all_recurring_payments(
     return {"payments": result, "count": len(result)}
 
 
+@router.get("/suggestions")
+def get_recurring_payment_suggestions(
+    user: User = Depends(current_user),
+    db: Session = Depends(get_db)
+):
+    """
+    Suggest recurring payments detected from the user's spending patterns
+    """
+    service = RecurringPaymentService(db)
+    suggestions = service.suggest_recurring_payments(user.id)
+    return {"suggestions": suggestions, "count": len(suggestions)}
+
+
 @router.get("/{payment_id}")
 def get_recurring_payment(
     payment_id: int,
@@ -172,7 +185,7 @@ def get_recurring_payment(
     if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
 
-    next_due = service.calculate_next_due_date(payment)
+    next_due = service.get_next_due_date(payment)
 
     return {
         "id": payment.id,
@@ -236,7 +249,7 @@ def update_recurring_payment(
     if not payment:
         raise HTTPException(status_code=404, detail="Payment not found")
 
-    next_due = service.calculate_next_due_date(payment)
+    next_due = service.get_next_due_date(payment)
 
     return {
         "id": payment.id,
@@ -419,7 +432,7 @@ async def run_auto_add_now(
 
     for payment in payments:
         is_due = report_scheduler._is_payment_due_today(payment, today)
-        next_due = service.calculate_next_due_date(payment)
+        next_due = service.get_next_due_date(payment)
 
         info = {
             "id": payment.id,
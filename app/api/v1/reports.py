@@ -1,19 +1,34 @@
 """
 Reports API endpoints for Excel and PDF export functionality
 """
+import asyncio
+import json
 from datetime import date
-from typing import Optional
-from fastapi import APIRouter, Depends, Query, Response
-from fastapi.responses import StreamingResponse
+from typing import Any, Dict, Optional
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.deps import current_user
 from app.db.session import get_db
+from app.models.report_job import ReportJob
+from app.services.bulk_export import BulkExportService, PYARROW_AVAILABLE
 from app.services.excel_export import ExcelExportService
 from app.services.pdf_export import PDFExportService
+from app.services.historical_report_service import HistoricalReportService
+from app.services.report_jobs import report_filename, report_job_service
 
 router = APIRouter(prefix="/reports", tags=["reports"])
 
+# PDF reports listing more entries than this are generated as background jobs
+PDF_BACKGROUND_THRESHOLD = 2000
+
+# Report job server-sent events: status poll interval and keep-alive period (seconds)
+JOB_EVENTS_POLL_INTERVAL = 0.5
+JOB_EVENTS_KEEPALIVE = 15.0
+
 
 @router.get("/excel/entries")
 async def export_entries_excel(
@@ -43,9 +58,9 @@ async def export_entries_excel(
         except ValueError:
             category_id = None
     
-    # Generate Excel report
+    # Generate Excel report (write-only workbook, streamed back in blocks)
     excel_service = ExcelExportService()
-    excel_buffer = await excel_service.export_entries_to_excel(
+    excel_stream = await excel_service.stream_entries_to_excel(
         db=db,
         user_id=user.id,
         start_date=start_date,
@@ -68,7 +83,7 @@ async def export_entries_excel(
     filename = "_".join(filename_parts) + ".xlsx"
     
     return StreamingResponse(
-        content=excel_buffer,
+        content=excel_stream,
         media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
@@ -123,11 +138,16 @@ async def export_financial_pdf(
     end: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
     category: Optional[str] = Query(None, description="Category ID"),
     report_type: str = Query("all", description="Report type: all, income, or expense"),
+    background: bool = Query(False, description="Generate as a background job and return a download link"),
     user=Depends(current_user),
     db: Session = Depends(get_db),
 ):
     """
     Export comprehensive financial report to PDF with charts
+
+    Reports over PDF_BACKGROUND_THRESHOLD entries (or with background=true) are
+    generated as a background job: the response is 202 with the job's status and
+    download URLs instead of the PDF itself.
     """
     # Parse date parameters
     start_date = None
@@ -145,19 +165,171 @@ async def export_financial_pdf(
         except ValueError:
             category_id = None
     
-    # Generate PDF report
     pdf_service = PDFExportService()
-    pdf_buffer = await pdf_service.export_financial_report_to_pdf(
-        db=db,
-        user_id=user.id,
+    report_filters = dict(
         start_date=start_date,
         end_date=end_date,
         category_id=category_id,
         report_type=report_type
     )
+    params = {
+        "start": start_date.isoformat() if start_date else None,
+        "end": end_date.isoformat() if end_date else None,
+        "category_id": category_id,
+        "report_type": report_type,
+    }
     
-    # Generate filename
-    filename_parts = ["financial_report"]
+    if background or pdf_service.count_report_entries(db, user.id, **report_filters) > PDF_BACKGROUND_THRESHOLD:
+        return _submit_report_job(db, user.id, "pdf", params)
+    
+    # Generate PDF report
+    pdf_buffer = await pdf_service.export_financial_report_to_pdf(db=db, user_id=user.id, **report_filters)
+    
+    filename = report_filename("financial_report", params, ".pdf")
+    
+    return StreamingResponse(
+        content=pdf_buffer,
+        media_type="application/pdf",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+class ReportJobRequest(BaseModel):
+    report_type: str  # 'pdf', 'excel', 'weekly', 'monthly', 'annual'
+    params: Dict[str, Any] = {}
+
+
+def _submit_report_job(db: Session, user_id: int, report_type: str, params: Dict[str, Any]) -> JSONResponse:
+    """Queue a report job; 202 with the job (new or deduplicated), 400/429 when refused"""
+    result = report_job_service.submit(db, user_id, report_type, params)
+    if not result["success"]:
+        raise HTTPException(status_code=429 if result["reason"] == "limit" else 400, detail=result["error"])
+    
+    content = report_job_service.describe(result["job"])
+    content["deduplicated"] = result["deduplicated"]
+    return JSONResponse(status_code=202, content=content)
+
+
+@router.post("/jobs")
+async def create_report_job(
+    request: ReportJobRequest,
+    user=Depends(current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Queue any report for background generation; poll status_url or follow events_url
+    """
+    return _submit_report_job(db, user.id, request.report_type, request.params)
+
+
+@router.get("/jobs/{job_id}")
+async def get_report_job(
+    job_id: str,
+    user=Depends(current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Status and progress of a background report job
+    """
+    job = report_job_service.get_job(db, job_id, user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    
+    return report_job_service.describe(job)
+
+
+@router.get("/jobs/{job_id}/events")
+async def report_job_events(
+    job_id: str,
+    user=Depends(current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Server-sent events with the job's status whenever its progress changes, until it finishes
+    """
+    if not report_job_service.get_job(db, job_id, user.id):
+        raise HTTPException(status_code=404, detail="Report job not found")
+    
+    # The request session closes before the stream starts; poll with a session of our own
+    bind = db.get_bind()
+    
+    def read_status():
+        with Session(bind=bind) as poll_db:
+            job = poll_db.get(ReportJob, job_id)
+            return report_job_service.describe(job) if job else None
+    
+    async def events():
+        last = None
+        idle = 0.0
+        while True:
+            status = await run_in_threadpool(read_status)
+            if status is None:
+                return
+            if status != last:
+                yield f"event: {status['status']}\ndata: {json.dumps(status)}\n\n"
+                last = status
+                idle = 0.0
+            elif idle >= JOB_EVENTS_KEEPALIVE:
+                yield ": keep-alive\n\n"
+                idle = 0.0
+            if status["status"] in ("completed", "failed"):
+                return
+            await asyncio.sleep(JOB_EVENTS_POLL_INTERVAL)
+            idle += JOB_EVENTS_POLL_INTERVAL
+    
+    return StreamingResponse(
+        content=events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.get("/jobs/{job_id}/download")
+async def download_report_job(
+    job_id: str,
+    user=Depends(current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Result of a completed background report job: the file, or the report as JSON
+    """
+    job = report_job_service.get_job(db, job_id, user.id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Report job not found")
+    if job.status != "completed":
+        raise HTTPException(status_code=409, detail=f"Report job is {job.status}")
+    
+    if job.result_data:
+        return StreamingResponse(
+            content=report_job_service.iter_result_file(job),
+            media_type=job.media_type,
+            headers={"Content-Disposition": f"attachment; filename={job.filename}"}
+        )
+    
+    report = HistoricalReportService(db).get_report_by_id(user.id, job.historical_report_id) \
+        if job.historical_report_id else None
+    if report is None:
+        raise HTTPException(status_code=410, detail="Report is no longer available")
+    return report
+
+
+def _parse_export_filters(start: Optional[str], end: Optional[str], category: Optional[str]):
+    """Parse the shared start/end/category query parameters of the bulk exports"""
+    start_date = date.fromisoformat(start) if start else None
+    end_date = date.fromisoformat(end) if end else None
+    
+    category_id = None
+    if category and category.strip():
+        try:
+            category_id = int(category)
+        except ValueError:
+            category_id = None
+    
+    return start_date, end_date, category_id
+
+
+def _export_filename(start_date, end_date, category_id, report_type: str, extension: str) -> str:
+    filename_parts = ["entries"]
     if start_date:
         filename_parts.append(f"from_{start_date.strftime('%Y%m%d')}")
     if end_date:
@@ -167,10 +339,61 @@ async def export_financial_pdf(
     if report_type != "all":
         filename_parts.append(report_type)
     
-    filename = "_".join(filename_parts) + ".pdf"
+    return "_".join(filename_parts) + extension
+
+
+@router.get("/export.csv")
+async def export_entries_csv(
+    start: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    category: Optional[str] = Query(None, description="Category ID"),
+    report_type: str = Query("all", description="Report type: all, income, or expense"),
+    user=Depends(current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Stream all matching entries as CSV (rows are written as they are read)
+    """
+    start_date, end_date, category_id = _parse_export_filters(start, end, category)
+    
+    export_service = BulkExportService()
+    user_currency = export_service.user_preferences_service.get_user_currency(db, user.id)
+    query = export_service.build_query(user.id, start_date, end_date, category_id, report_type)
+    
+    filename = _export_filename(start_date, end_date, category_id, report_type, ".csv")
     
     return StreamingResponse(
-        content=pdf_buffer,
-        media_type="application/pdf",
+        content=export_service.stream_csv(db, query, user_currency),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={filename}"}
+    )
+
+
+@router.get("/export.parquet")
+async def export_entries_parquet(
+    start: Optional[str] = Query(None, description="Start date (YYYY-MM-DD)"),
+    end: Optional[str] = Query(None, description="End date (YYYY-MM-DD)"),
+    category: Optional[str] = Query(None, description="Category ID"),
+    report_type: str = Query("all", description="Report type: all, income, or expense"),
+    user=Depends(current_user),
+    db: Session = Depends(get_db),
+):
+    """
+    Stream all matching entries as Parquet (one row group per chunk read)
+    """
+    if not PYARROW_AVAILABLE:
+        raise HTTPException(status_code=503, detail="Parquet export is not available on this server")
+    
+    start_date, end_date, category_id = _parse_export_filters(start, end, category)
+    
+    export_service = BulkExportService()
+    user_currency = export_service.user_preferences_service.get_user_currency(db, user.id)
+    query = export_service.build_query(user.id, start_date, end_date, category_id, report_type)
+    
+    filename = _export_filename(start_date, end_date, category_id, report_type, ".parquet")
+    
+    return StreamingResponse(
+        content=export_service.stream_parquet(db, query, user_currency),
+        media_type="application/vnd.apache.parquet",
         headers={"Content-Disposition": f"attachment; filename={filename}"}
     )
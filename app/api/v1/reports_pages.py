@@ -49,24 +49,11 @@ async def weekly_reports_page(
                     "request": request
                 })
 
-        # Generate current weekly report (without income)
+        # Current weekly report (without income), regenerated only when the data changed
         report_service = WeeklyReportService(db)
-        report = report_service.generate_weekly_report(user.id, show_income=False)
-
-        # Save to historical reports
-        from datetime import datetime
-        period_str = datetime.strptime(report['period']['start'], '%Y-%m-%d').strftime('%Y-W%W')
-        period_start = datetime.strptime(report['period']['start'], '%Y-%m-%d').date()
-        period_end = datetime.strptime(report['period']['end'], '%Y-%m-%d').date()
-
-        historical_service.save_report(
-            user_id=user.id,
-            report_type='weekly',
-            report_period=period_str,
-            period_start=period_start,
-            period_end=period_end,
-            report_data=report,
-            currency_code=report.get('currency', 'USD')
+        report = historical_service.get_or_generate_current(
+            user.id, 'weekly', lambda: report_service.generate_weekly_report(user.id, show_income=False),
+            params={'show_income': False}
         )
 
         return render(request, "reports/weekly.html", {
@@ -111,23 +98,10 @@ async def monthly_reports_page(
                     "request": request
                 })
 
-        # Generate current monthly report (with income)
+        # Current monthly report (with income), regenerated only when the data changed
         report_service = MonthlyReportService(db)
-        report = report_service.generate_monthly_report(user.id)
-
-        # Save to historical reports
-        period_str = f"{report['period']['year']}-{report['period']['month']:02d}"
-        period_start = datetime.strptime(report['period']['start'], '%Y-%m-%d').date()
-        period_end = datetime.strptime(report['period']['end'], '%Y-%m-%d').date()
-
-        historical_service.save_report(
-            user_id=user.id,
-            report_type='monthly',
-            report_period=period_str,
-            period_start=period_start,
-            period_end=period_end,
-            report_data=report,
-            currency_code=report.get('currency', 'USD')
+        report = historical_service.get_or_generate_current(
+            user.id, 'monthly', lambda: report_service.generate_monthly_report(user.id)
         )
 
         return render(request, "reports/monthly.html", {
@@ -159,7 +133,7 @@ async def annual_reports_page(
 ):
     """Comprehensive annual reports page with advanced analytics"""
     try:
-        from app.services.annual_reports import get_comprehensive_annual_report
+        from app.services.annual_reports import build_annual_report
         from app.services.user_preferences import user_preferences_service
         from app.core.currency import currency_service
 
@@ -202,35 +176,10 @@ async def annual_reports_page(
             return currency_service.format_amount(amount, currency_code)
 
         # Generate comprehensive annual report
-        report_data = get_comprehensive_annual_report(db, user.id, current_year)
-
-        # Create report structure
-        annual_report = {
-            'period': {
-                'start': date(current_year, 1, 1).isoformat(),
-                'end': date(current_year, 12, 31).isoformat(),
-                'year': current_year
-            },
-            'currency': currency_code,
-            'summary': report_data['summary'],
-            'year_over_year': report_data['year_over_year'],
-            'monthly_breakdown': report_data['monthly_breakdown'],
-            'seasonal_analysis': report_data['seasonal_analysis'],
-            'category_analysis': report_data['category_analysis'],
-            'achievements': report_data['achievements'],
-            'generated_at': datetime.utcnow().isoformat()
-        }
+        annual_report = build_annual_report(db, user.id, current_year, currency_code)
 
         # Save to historical reports
-        historical_service.save_report(
-            user_id=user.id,
-            report_type='annual',
-            report_period=period_str,
-            period_start=date(current_year, 1, 1),
-            period_end=date(current_year, 12, 31),
-            report_data=annual_report,
-            currency_code=currency_code
-        )
+        historical_service.save_generated_report(user.id, 'annual', annual_report)
 
         return render(request, "reports/annual.html", {
             "user": user,
@@ -300,10 +249,11 @@ async def email_weekly_report(
     await email_service.send_weekly_report_email(
         user.email,
         user.full_name or "User",
-        report
+        report,
+        db=db
     )
     
-    return {"success": True, "message": "Weekly report email sent successfully"}
+    return {"success": True, "message": "Weekly report email queued for delivery"}
 
 
 @router.post("/monthly/email")
@@ -321,10 +271,11 @@ async def email_monthly_report(
     await email_service.send_monthly_report_email(
         user.email,
         user.full_name or "User",
-        report
+        report,
+        db=db
     )
     
-    return {"success": True, "message": "Monthly report email sent successfully"}
+    return {"success": True, "message": "Monthly report email queued for delivery"}
 
 
 @router.get("/api/schedule")
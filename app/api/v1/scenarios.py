@@ -48,6 +48,7 @@ class ScenarioUpdate(BaseModel):
     description: Optional[str] = None
     is_favorite: Optional[bool] = None
     is_active: Optional[bool] = None
+    parameters: Optional[Dict[str, Any]] = None
 
 
 class ScenarioCompare(BaseModel):
@@ -173,15 +174,16 @@ def update_scenario(
     db: Session = Depends(get_db)
 ):
     """
-    Update a scenario's metadata
+    Update a scenario's metadata or parameters
 
     Can update:
     - name
     - description
     - is_favorite
     - is_active
+    - parameters (the outcome is re-projected)
 
-    Cannot update scenario_type or parameters (create new scenario instead).
+    Cannot update scenario_type (create new scenario instead).
     """
     service = ScenarioService(db)
 
@@ -10,6 +10,7 @@ from app.deps import current_user
 from app.db.session import get_db
 from app.templates import render
 from app.services.weekly_report_service import WeeklyReportService
+from app.services.historical_report_service import HistoricalReportService
 from app.services.gamification.level_service import LevelService
 from app.services.email import email_service
 from app.models.weekly_report import WeeklyReport, UserReportPreferences
@@ -217,10 +218,13 @@ async def update_report_preferences(
 
 def _get_or_generate_report(db: Session, user_id: int) -> dict:
     """Get existing report or generate new one"""
-    # Always generate fresh report to ensure latest code changes are applied
-    # This prevents cached reports with old currency symbols from being displayed
+    # The stored snapshot is reused only while the user's data version is unchanged;
+    # currency changes bump the version, so no stale symbols are served
     report_service = WeeklyReportService(db)
-    report = report_service.generate_weekly_report(user_id, show_income=False)
+    report = HistoricalReportService(db).get_or_generate_current(
+        user_id, 'weekly', lambda: report_service.generate_weekly_report(user_id, show_income=False),
+        params={'show_income': False}
+    )
     
     # Save to database
     _save_report(db, user_id, report)
@@ -164,6 +164,52 @@ class CacheService:
             logger.error(f"Cache set error for key {key}: {e}")
             return False
 
+    def get_many(self, keys: List[str]) -> List[Optional[Any]]:
+        """
+        Get several values from cache in one round trip
+
+        Args:
+            keys: Cache keys
+
+        Returns:
+            Cached values (deserialized from JSON) in key order, None for misses
+        """
+        if not keys or not self.enabled or not self.redis_client:
+            return [None] * len(keys)
+
+        try:
+            values = []
+            for key, value in zip(keys, self.redis_client.mget(keys)):
+                try:
+                    values.append(json.loads(value) if value is not None else None)
+                except json.JSONDecodeError:
+                    logger.error(f"Failed to deserialize cached value for key: {key}")
+                    values.append(None)
+            return values
+
+        except Exception as e:
+            logger.error(f"Cache get_many error: {e}")
+            return [None] * len(keys)
+
+    def incr(self, key: str) -> Optional[int]:
+        """
+        Atomically increment an integer counter
+
+        Args:
+            key: Counter key (created at 0 if missing)
+
+        Returns:
+            New counter value, or None if unavailable
+        """
+        if not self.enabled or not self.redis_client:
+            return None
+
+        try:
+            return self.redis_client.incr(key)
+        except Exception as e:
+            logger.error(f"Cache incr error for key {key}: {e}")
+            return None
+
     def delete(self, key: str) -> bool:
         """
         Delete key from cache
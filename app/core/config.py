@@ -64,6 +64,12 @@ class Settings(BaseSettings):
     # Alternative SMTP settings for fallback (Google SMTP with SSL)
     SMTP_SERVER_ALT: str = "smtp.gmail.com"  # Alternative server
     SMTP_PORT_ALT: int = 465  # SSL port
+
+    # Pooled SMTP delivery: persistent authenticated connections per server
+    SMTP_START_TLS: bool = True  # Upgrade the primary server connection with STARTTLS
+    SMTP_POOL_SIZE: int = 4
+    SMTP_MAX_MESSAGES_PER_CONNECTION: int = 100  # Reconnect after this many messages
+    SMTP_IDLE_TIMEOUT: int = 60  # Seconds before an idle connection is replaced
     
     # Resend settings for production (when SMTP is blocked)
     RESEND_FROM_EMAIL: str = "info@yourbudgetpulse.online"
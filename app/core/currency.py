@@ -1,4 +1,4 @@
-from typing import Dict, Optional
+from typing import Dict, Iterable, List, Optional, Sequence
 import httpx
 from decimal import Decimal
 from app.core.config import settings
@@ -90,7 +90,68 @@ class CurrencyService:
             return amount
         
         rates = await self.get_exchange_rates()
+        return self._convert_with_rates(amount, from_currency, to_currency, rates)
+    
+    async def convert_amounts(self, amounts: Sequence, from_currencies: Sequence[str], to_currency: str,
+                              rates: Optional[Dict[str, float]] = None) -> List[float]:
+        """
+        Convert many amounts like convert_amount, fetching exchange rates at most once
+
+        Chunked callers (streamed exports) pass the same rates dict to every call:
+        an empty one is filled on the first foreign amount, so rates are fetched
+        at most once overall.
+        """
+        converted = []
+        for amount, from_currency in zip(amounts, from_currencies):
+            if amount is None:
+                converted.append(0.0)
+                continue
+            
+            try:
+                amount = float(amount)
+            except (TypeError, ValueError):
+                converted.append(0.0)
+                continue
+            
+            if from_currency == to_currency:
+                converted.append(amount)
+                continue
+            
+            if not rates:
+                fetched = await self.get_exchange_rates()
+                if rates is None:
+                    rates = fetched
+                else:
+                    rates.update(fetched)
+            converted.append(self._convert_with_rates(amount, from_currency, to_currency, rates))
+        
+        return converted
+    
+    async def conversion_rates(self, from_currencies: Iterable[str], to_currency: str,
+                               rates: Optional[Dict[str, float]] = None) -> Dict[str, float]:
+        """
+        Multiplier from each distinct currency to to_currency, for vectorized conversion
+        
+        Rates are fetched at most once and shared through the rates dict, as in
+        convert_amounts: amount * multiplier equals convert_amount(amount, ...).
+        """
+        multipliers = {}
+        for from_currency in set(from_currencies):
+            if from_currency == to_currency:
+                multipliers[from_currency] = 1.0
+                continue
+            
+            if not rates:
+                fetched = await self.get_exchange_rates()
+                if rates is None:
+                    rates = fetched
+                else:
+                    rates.update(fetched)
+            multipliers[from_currency] = self._convert_with_rates(1.0, from_currency, to_currency, rates)
         
+        return multipliers
+    
+    def _convert_with_rates(self, amount: float, from_currency: str, to_currency: str, rates: Dict[str, float]) -> float:
         # Convert to base currency (USD) first, then to target currency
         if from_currency != self.base_currency:
             from_rate = rates.get(from_currency, 1.0)
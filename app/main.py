@@ -74,6 +74,14 @@ from app.models.achievement import Achievement, UserAchievement, Badge, UserBadg
 from app.models.financial_health_score import FinancialHealthScore  # Phase 1.2
 from app.models.split_expense import SplitContact, SplitExpense, SplitParticipant  # Phase 31
 from app.models.receipt import Receipt  # Phase A - Receipt Persistence
+from app.models.report_job import ReportJob
+from app.models.report_dispatch import ReportDispatchRun, ReportDispatchItem
+from app.models.email_outbox import EmailOutbox
+from app.services import data_version
+
+# Writes to entries, categories and preferences bump users.data_version (report
+# snapshots and cached period summaries are keyed off it)
+data_version.register_listeners()
 
 app = FastAPI(title="Expense Manager Web")
 
@@ -233,6 +241,25 @@ async def startup_event():
             report_scheduler.start()
             logger.info(f"Report scheduler started (ENV: {settings.ENV})")
 
+        # Background report jobs left queued by a restart
+        try:
+            from app.services.report_jobs import report_job_service
+            requeued = report_job_service.recover()
+            if requeued:
+                logger.info(f"Requeued {requeued} background report jobs")
+        except Exception as job_exc:
+            logger.warning(f"Report job recovery failed: {job_exc}")
+
+        # Background delivery of queued emails, including any a restart left mid-send
+        try:
+            from app.services.email_outbox import email_outbox_sender
+            requeued = email_outbox_sender.recover()
+            if requeued:
+                logger.info(f"Requeued {requeued} outbox emails")
+            email_outbox_sender.start()
+        except Exception as outbox_exc:
+            logger.warning(f"Email outbox sender failed to start: {outbox_exc}")
+
         # Phase F – Telegram Bot
         if settings.TELEGRAM_BOT_TOKEN:
             try:
@@ -273,6 +300,23 @@ async def shutdown_event():
     except Exception:
         pass
 
+    # Email outbox sender and pooled SMTP connections
+    try:
+        from app.services.email_outbox import email_outbox_sender
+        from app.services.email import email_service
+        await email_outbox_sender.stop()
+        await email_service.close()
+    except Exception as e:
+        logger.warning(f"Error stopping email delivery: {e}")
+
+    # Background report workers, PDF chart and email render worker processes
+    from app.services.report_jobs import report_job_service
+    from app.services.report_charts import shutdown_chart_pool
+    from app.services.report_dispatch import shutdown_render_pool
+    report_job_service.shutdown()
+    shutdown_chart_pool()
+    shutdown_render_pool()
+
 # Serve static files
 app.mount("/static", StaticFiles(directory="static"), name="static")
 
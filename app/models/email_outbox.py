@@ -0,0 +1,38 @@
+"""
+Email Outbox Model
+
+Emails queued for background delivery. Rows survive restarts, so a queued
+email is delivered (or retried) even if the process sending it goes away.
+"""
+
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, Text, Index
+from app.db.base import Base
+
+
+class EmailOutbox(Base):
+    """An email waiting for, or done with, background delivery"""
+    __tablename__ = "email_outbox"
+
+    id = Column(Integer, primary_key=True)
+    to_email = Column(String(255), nullable=False)
+    subject = Column(String(500), nullable=False)
+    html_content = Column(Text, nullable=False)
+    text_content = Column(Text, nullable=True)
+
+    status = Column(String(20), nullable=False, default='pending')  # 'pending', 'sending', 'sent', 'failed'
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text, nullable=True)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    claimed_at = Column(DateTime, nullable=True)  # When a sender took the row; stale claims are requeued
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        # The sender claims due pending rows
+        Index('ix_email_outbox_status_next_attempt', 'status', 'next_attempt_at'),
+    )
+
+    def __repr__(self):
+        return f"<EmailOutbox(id={self.id}, to={self.to_email}, status={self.status})>"
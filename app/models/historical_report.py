@@ -45,6 +45,7 @@ class HistoricalReport(Base):
     # Metadata
     currency_code = Column(String(3), default='USD')
     generated_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    data_version = Column(Integer, nullable=True)  # User data version the report was built from
 
     # Relationships
     user = relationship("User", back_populates="historical_reports")
@@ -33,6 +33,8 @@ class RecurringPayment(Base):
     __table_args__ = (
         # Composite index: active recurring payments lookup per user
         Index('ix_recurring_payments_user_active', 'user_id', 'is_active'),
+        # Composite index: "due in the next N days" range scans per user
+        Index('ix_recurring_payments_user_active_due', 'user_id', 'is_active', 'next_due_date'),
     )
 
     id: Mapped[int] = mapped_column(primary_key=True)
@@ -50,6 +52,7 @@ class RecurringPayment(Base):
     due_day: Mapped[int] = mapped_column(Integer)  # Day of month (1-31) for monthly/quarterly/annually, or day of week (0-6) for weekly
     start_date: Mapped[date] = mapped_column(Date)  # When this payment started
     end_date: Mapped[date | None] = mapped_column(Date, nullable=True)  # Optional end date
+    next_due_date: Mapped[date | None] = mapped_column(Date, nullable=True, index=True)  # Next unsettled due date (None once ended)
 
     # Status
     is_active: Mapped[bool] = mapped_column(Boolean, default=True)  # User can pause/resume
@@ -0,0 +1,68 @@
+"""
+Report Dispatch Models
+
+Checkpointed progress of scheduled bulk report emails: one run per report
+kind and period, with one item per recipient so an interrupted run resumes
+where it stopped instead of starting over.
+"""
+
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, Date, DateTime, ForeignKey, Text, Float, Index, UniqueConstraint
+from sqlalchemy.orm import relationship
+from app.db.base import Base
+
+
+class ReportDispatchRun(Base):
+    """A bulk send of one report kind for one period, with throughput metrics"""
+    __tablename__ = "report_dispatch_runs"
+
+    id = Column(Integer, primary_key=True)
+    kind = Column(String(20), nullable=False)  # 'weekly', 'monthly'
+    period_key = Column(String(20), nullable=False)  # '2024-W10', '2024-03'
+    period_date = Column(Date, nullable=False)  # Week end (weekly) or first day of the month (monthly)
+    status = Column(String(20), nullable=False, default='running')  # 'running', 'completed'
+
+    # Metrics
+    total = Column(Integer, nullable=False, default=0)
+    sent = Column(Integer, nullable=False, default=0)
+    failed = Column(Integer, nullable=False, default=0)
+    retries = Column(Integer, nullable=False, default=0)
+    duration_seconds = Column(Float, nullable=True)  # Sum over every attempt at this run
+    throughput_per_minute = Column(Float, nullable=True)
+
+    started_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    completed_at = Column(DateTime, nullable=True)
+
+    items = relationship("ReportDispatchItem", back_populates="run", cascade="all, delete-orphan")
+
+    __table_args__ = (
+        UniqueConstraint('kind', 'period_key', name='uq_report_dispatch_runs_kind_period'),
+    )
+
+    def __repr__(self):
+        return f"<ReportDispatchRun(id={self.id}, kind={self.kind}, period={self.period_key}, status={self.status})>"
+
+
+class ReportDispatchItem(Base):
+    """Delivery state of one recipient within a dispatch run (the checkpoint)"""
+    __tablename__ = "report_dispatch_items"
+
+    id = Column(Integer, primary_key=True)
+    run_id = Column(Integer, ForeignKey("report_dispatch_runs.id", ondelete="CASCADE"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False)
+    status = Column(String(20), nullable=False, default='pending')  # 'pending', 'sending', 'sent', 'failed'
+    attempts = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True)
+    claimed_at = Column(DateTime, nullable=True)  # When a sender took the item; stale claims are requeued
+    sent_at = Column(DateTime, nullable=True)
+
+    run = relationship("ReportDispatchRun", back_populates="items")
+
+    __table_args__ = (
+        UniqueConstraint('run_id', 'user_id', name='uq_report_dispatch_items_run_user'),
+        # Resume scans for the recipients still pending in a run
+        Index('ix_report_dispatch_items_run_status', 'run_id', 'status'),
+    )
+
+    def __repr__(self):
+        return f"<ReportDispatchItem(run_id={self.run_id}, user_id={self.user_id}, status={self.status})>"
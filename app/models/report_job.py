@@ -0,0 +1,58 @@
+"""
+Report Job Model
+
+Tracks reports generated in the background: their parameters, progress and
+where the finished result is stored.
+"""
+
+from datetime import datetime
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, Text, Index, LargeBinary
+from sqlalchemy.orm import relationship
+from app.db.base import Base
+
+
+class ReportJob(Base):
+    """
+    A background report generation request
+
+    Results are either a file (PDF / Excel), stored gzip-compressed in
+    result_data, or a report saved to historical_reports (weekly / monthly / annual).
+    """
+    __tablename__ = "report_jobs"
+
+    id = Column(String(32), primary_key=True)  # uuid4 hex
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), nullable=False, index=True)
+
+    # What to generate
+    report_type = Column(String(20), nullable=False)  # 'pdf', 'excel', 'weekly', 'monthly', 'annual'
+    params = Column(Text, nullable=False)  # JSON parameters
+    params_hash = Column(String(64), nullable=False)  # Identical requests share a hash
+
+    # Progress
+    status = Column(String(20), nullable=False, default='queued')  # 'queued', 'running', 'completed', 'failed'
+    progress = Column(Integer, nullable=False, default=0)  # 0-100
+    message = Column(String(255), nullable=True)
+    error = Column(Text, nullable=True)
+
+    # Result
+    result_data = Column(LargeBinary, nullable=True)  # Gzip-compressed file result
+    filename = Column(String(255), nullable=True)
+    media_type = Column(String(100), nullable=True)
+    historical_report_id = Column(Integer, ForeignKey("historical_reports.id", ondelete="SET NULL"), nullable=True)
+
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    started_at = Column(DateTime, nullable=True)
+    completed_at = Column(DateTime, nullable=True)
+
+    # Relationships
+    user = relationship("User")
+
+    __table_args__ = (
+        # Dedup lookups and the per-user active job count
+        Index('ix_report_jobs_user_status_hash', 'user_id', 'status', 'params_hash'),
+        # Expired result purge
+        Index('ix_report_jobs_status_completed', 'status', 'completed_at'),
+    )
+
+    def __repr__(self):
+        return f"<ReportJob(id={self.id}, user_id={self.user_id}, type={self.report_type}, status={self.status})>"
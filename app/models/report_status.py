@@ -14,6 +14,7 @@ class ReportStatus(Base):
     report_period = Column(String(50), nullable=False)  # 'current', '2024-10', etc.
     is_new = Column(Boolean, default=True, nullable=False)
     last_viewed = Column(DateTime(timezone=True), nullable=True)
+    seen_version = Column(Integer, nullable=True)  # User data version when last viewed
     last_updated = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
     
     # Relationship
@@ -81,6 +81,9 @@ class Scenario(Base):
     # Comparison baseline (current state for comparison)
     baseline_data = Column(JSON, nullable=True)
 
+    # User data version the baseline was computed from (stale once the user's data changes)
+    baseline_version = Column(Integer, nullable=True)
+
     # Status
     is_active = Column(Boolean, default=True)
     is_favorite = Column(Boolean, default=False)
@@ -106,6 +109,7 @@ class Scenario(Base):
             'parameters': self.parameters,
             'projected_outcome': self.projected_outcome,
             'baseline_data': self.baseline_data,
+            'baseline_version': self.baseline_version,
             'is_active': self.is_active,
             'is_favorite': self.is_favorite,
             'created_at': self.created_at.isoformat() if self.created_at else None,
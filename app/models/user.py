@@ -27,6 +27,10 @@ class User(Base):
     password_reset_token: Mapped[str | None] = mapped_column(String(255), nullable=True)
     password_reset_expires: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
 
+    # Bumped on every write to entries, categories or currency preferences
+    # (see app/services/data_version.py); generated reports are stamped with it
+    data_version: Mapped[int] = mapped_column(Integer, default=0, server_default='0')
+
     # Timestamps
     created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(UTC).replace(tzinfo=None))
 
@@ -5,16 +5,21 @@ Provides comprehensive annual financial analysis and insights
 
 from datetime import date, datetime
 from typing import Dict, List, Optional
-from sqlalchemy import func, extract
+from sqlalchemy import extract
 from sqlalchemy.orm import Session
-from decimal import Decimal
 
-from app.models.entry import Entry, EntryType
-from app.models.category import Category
 from app.models.financial_goal import FinancialGoal, GoalStatus
+from app.services.period_reports import MONTH, SEASON, SEASONS, PeriodFrame, load_period_frame
 
 
-def get_annual_summary(db: Session, user_id: int, year: int) -> Dict:
+def _year_frame(db: Session, user_id: int, year: int, frame: Optional[PeriodFrame]) -> PeriodFrame:
+    """Reuse a frame that covers the year, or fetch one"""
+    if frame is not None and frame.start <= date(year, 1, 1) and frame.end >= date(year, 12, 31):
+        return frame
+    return load_period_frame(db, user_id, date(year, 1, 1), date(year, 12, 31))
+
+
+def get_annual_summary(db: Session, user_id: int, year: int, frame: Optional[PeriodFrame] = None) -> Dict:
     """
     Get comprehensive annual financial summary with all metrics
 
@@ -22,18 +27,16 @@ def get_annual_summary(db: Session, user_id: int, year: int) -> Dict:
         db: Database session
         user_id: User ID
         year: Year to analyze
+        frame: Already loaded period frame covering the year
 
     Returns:
         Dict containing annual summary data
     """
-    # Get all entries for the year
-    entries = db.query(Entry).filter(
-        Entry.user_id == user_id,
-        extract('year', Entry.date) == year
-    ).all()
-
-    total_income = sum(float(e.amount) for e in entries if e.type == EntryType.INCOME)
-    total_expense = sum(float(e.amount) for e in entries if e.type == EntryType.EXPENSE)
+    frame = _year_frame(db, user_id, year, frame)
+    in_year = frame.mask(date(year, 1, 1), date(year, 12, 31))
+
+    total_income = frame.total(in_year & frame.is_income)
+    total_expense = frame.total(in_year & frame.is_expense)
     balance = total_income - total_expense
     savings_rate = (balance / total_income * 100) if total_income > 0 else 0
 
@@ -43,13 +46,13 @@ def get_annual_summary(db: Session, user_id: int, year: int) -> Dict:
         'total_expense': round(total_expense, 2),
         'balance': round(balance, 2),
         'savings_rate': round(savings_rate, 2),
-        'entry_count': len(entries),
-        'income_count': sum(1 for e in entries if e.type == EntryType.INCOME),
-        'expense_count': sum(1 for e in entries if e.type == EntryType.EXPENSE)
+        'entry_count': frame.count(in_year),
+        'income_count': frame.count(in_year & frame.is_income),
+        'expense_count': frame.count(in_year & frame.is_expense)
     }
 
 
-def get_year_over_year_comparison(db: Session, user_id: int, year: int) -> Dict:
+def get_year_over_year_comparison(db: Session, user_id: int, year: int, frame: Optional[PeriodFrame] = None) -> Dict:
     """
     Compare current year with previous years
 
@@ -57,12 +60,15 @@ def get_year_over_year_comparison(db: Session, user_id: int, year: int) -> Dict:
         db: Database session
         user_id: User ID
         year: Current year to compare
+        frame: Already loaded period frame covering both years
 
     Returns:
         Dict with year-over-year comparison data
     """
-    current_year = get_annual_summary(db, user_id, year)
-    previous_year = get_annual_summary(db, user_id, year - 1)
+    if frame is None or frame.start > date(year - 1, 1, 1) or frame.end < date(year, 12, 31):
+        frame = load_period_frame(db, user_id, date(year - 1, 1, 1), date(year, 12, 31))
+    current_year = get_annual_summary(db, user_id, year, frame)
+    previous_year = get_annual_summary(db, user_id, year - 1, frame)
 
     # Calculate changes
     income_change = current_year['total_income'] - previous_year['total_income']
@@ -95,7 +101,7 @@ def get_year_over_year_comparison(db: Session, user_id: int, year: int) -> Dict:
     }
 
 
-def get_monthly_breakdown(db: Session, user_id: int, year: int) -> Dict:
+def get_monthly_breakdown(db: Session, user_id: int, year: int, frame: Optional[PeriodFrame] = None) -> Dict:
     """
     Get monthly breakdown of income and expenses for the year
 
@@ -103,21 +109,18 @@ def get_monthly_breakdown(db: Session, user_id: int, year: int) -> Dict:
         db: Database session
         user_id: User ID
         year: Year to analyze
+        frame: Already loaded period frame covering the year
 
     Returns:
         Dict with monthly data
     """
+    frame = _year_frame(db, user_id, year, frame)
+    buckets = frame.totals(MONTH, date(year, 1, 1), date(year, 12, 31))
     monthly_data = {}
 
     for month in range(1, 13):
-        entries = db.query(Entry).filter(
-            Entry.user_id == user_id,
-            extract('year', Entry.date) == year,
-            extract('month', Entry.date) == month
-        ).all()
-
-        income = sum(float(e.amount) for e in entries if e.type == EntryType.INCOME)
-        expense = sum(float(e.amount) for e in entries if e.type == EntryType.EXPENSE)
+        income = buckets['income'][month - 1].item()
+        expense = buckets['expense'][month - 1].item()
         balance = income - expense
 
         month_name = date(year, month, 1).strftime('%B')
@@ -129,13 +132,13 @@ def get_monthly_breakdown(db: Session, user_id: int, year: int) -> Dict:
             'expense': round(expense, 2),
             'balance': round(balance, 2),
             'savings_rate': round((balance / income * 100) if income > 0 else 0, 2),
-            'entry_count': len(entries)
+            'entry_count': int(buckets['count'][month - 1])
         }
 
     return monthly_data
 
 
-def get_seasonal_analysis(db: Session, user_id: int, year: int) -> Dict:
+def get_seasonal_analysis(db: Session, user_id: int, year: int, frame: Optional[PeriodFrame] = None) -> Dict:
     """
     Analyze spending patterns by season (quarters)
 
@@ -143,35 +146,25 @@ def get_seasonal_analysis(db: Session, user_id: int, year: int) -> Dict:
         db: Database session
         user_id: User ID
         year: Year to analyze
+        frame: Already loaded period frame covering the year
 
     Returns:
         Dict with seasonal analysis
     """
-    seasons = {
-        'Q1': {'months': [1, 2, 3], 'name': 'Q1 (Jan-Mar)'},
-        'Q2': {'months': [4, 5, 6], 'name': 'Q2 (Apr-Jun)'},
-        'Q3': {'months': [7, 8, 9], 'name': 'Q3 (Jul-Sep)'},
-        'Q4': {'months': [10, 11, 12], 'name': 'Q4 (Oct-Dec)'}
-    }
-
+    frame = _year_frame(db, user_id, year, frame)
+    buckets = frame.totals(SEASON, date(year, 1, 1), date(year, 12, 31))
     seasonal_data = {}
 
-    for quarter, info in seasons.items():
-        entries = db.query(Entry).filter(
-            Entry.user_id == user_id,
-            extract('year', Entry.date) == year,
-            extract('month', Entry.date).in_(info['months'])
-        ).all()
-
-        income = sum(float(e.amount) for e in entries if e.type == EntryType.INCOME)
-        expense = sum(float(e.amount) for e in entries if e.type == EntryType.EXPENSE)
+    for index, (quarter, info) in enumerate(SEASONS.items()):
+        income = buckets['income'][index].item()
+        expense = buckets['expense'][index].item()
 
         seasonal_data[quarter] = {
             'name': info['name'],
             'income': round(income, 2),
             'expense': round(expense, 2),
             'balance': round(income - expense, 2),
-            'entry_count': len(entries)
+            'entry_count': int(buckets['count'][index])
         }
 
     # Find highest and lowest spending quarters
@@ -184,7 +177,7 @@ def get_seasonal_analysis(db: Session, user_id: int, year: int) -> Dict:
     }
 
 
-def get_category_analysis(db: Session, user_id: int, year: int) -> Dict:
+def get_category_analysis(db: Session, user_id: int, year: int, frame: Optional[PeriodFrame] = None) -> Dict:
     """
     Analyze spending by category for the year
 
@@ -192,39 +185,31 @@ def get_category_analysis(db: Session, user_id: int, year: int) -> Dict:
         db: Database session
         user_id: User ID
         year: Year to analyze
+        frame: Already loaded period frame covering the year
 
     Returns:
         Dict with category breakdown
     """
-    # Get all expenses for the year grouped by category
-    results = db.query(
-        Category.name,
-        func.sum(Entry.amount).label('total'),
-        func.count(Entry.id).label('count')
-    ).join(
-        Entry, Entry.category_id == Category.id
-    ).filter(
-        Entry.user_id == user_id,
-        Entry.type == EntryType.EXPENSE,
-        extract('year', Entry.date) == year
-    ).group_by(
-        Category.name
-    ).order_by(
-        func.sum(Entry.amount).desc()
-    ).all()
-
-    total_expense = sum(float(r.total) for r in results)
+    # All expenses for the year grouped by category, largest first
+    frame = _year_frame(db, user_id, year, frame)
+    results = sorted(
+        frame.category_totals(date(year, 1, 1), date(year, 12, 31)),
+        key=lambda result: result[1],
+        reverse=True
+    )
+
+    total_expense = sum(float(total) for _, total, _ in results)
 
     categories = []
-    for result in results:
-        amount = float(result.total)
+    for name, total, count in results:
+        amount = float(total)
         percentage = (amount / total_expense * 100) if total_expense > 0 else 0
 
         categories.append({
-            'name': result.name,
+            'name': name,
             'amount': round(amount, 2),
             'percentage': round(percentage, 2),
-            'count': result.count
+            'count': count
         })
 
     # Get top 10 categories
@@ -238,7 +223,7 @@ def get_category_analysis(db: Session, user_id: int, year: int) -> Dict:
     }
 
 
-def get_annual_achievements(db: Session, user_id: int, year: int) -> Dict:
+def get_annual_achievements(db: Session, user_id: int, year: int, frame: Optional[PeriodFrame] = None) -> Dict:
     """
     Calculate financial achievements and milestones for the year
 
@@ -246,11 +231,13 @@ def get_annual_achievements(db: Session, user_id: int, year: int) -> Dict:
         db: Database session
         user_id: User ID
         year: Year to analyze
+        frame: Already loaded period frame covering the year
 
     Returns:
         Dict with achievements
     """
-    monthly_data = get_monthly_breakdown(db, user_id, year)
+    frame = _year_frame(db, user_id, year, frame)
+    monthly_data = get_monthly_breakdown(db, user_id, year, frame)
 
     # Find best saving month
     months_with_data = [m for m in monthly_data.values() if m['balance'] > 0]
@@ -264,10 +251,7 @@ def get_annual_achievements(db: Session, user_id: int, year: int) -> Dict:
     lowest_expense_month = min(months_with_expenses, key=lambda x: x['expense']) if months_with_expenses else None
 
     # Count days with entries
-    entries = db.query(func.count(func.distinct(Entry.date))).filter(
-        Entry.user_id == user_id,
-        extract('year', Entry.date) == year
-    ).scalar()
+    entries = frame.days_with_entries(date(year, 1, 1), date(year, 12, 31))
 
     # Get completed goals for the year
     completed_goals = db.query(FinancialGoal).filter(
@@ -309,11 +293,46 @@ def get_comprehensive_annual_report(db: Session, user_id: int, year: int) -> Dic
     Returns:
         Dict with complete annual report
     """
+    # One grouped fetch of this year and the previous one drives every section
+    frame = load_period_frame(db, user_id, date(year - 1, 1, 1), date(year, 12, 31))
+
+    return {
+        'summary': get_annual_summary(db, user_id, year, frame),
+        'year_over_year': get_year_over_year_comparison(db, user_id, year, frame),
+        'monthly_breakdown': get_monthly_breakdown(db, user_id, year, frame),
+        'seasonal_analysis': get_seasonal_analysis(db, user_id, year, frame),
+        'category_analysis': get_category_analysis(db, user_id, year, frame),
+        'achievements': get_annual_achievements(db, user_id, year, frame)
+    }
+
+
+def build_annual_report(db: Session, user_id: int, year: int, currency_code: str) -> Dict:
+    """
+    Comprehensive annual report with its period and currency, as shown and stored
+
+    Args:
+        db: Database session
+        user_id: User ID
+        year: Year to analyze
+        currency_code: User's currency
+
+    Returns:
+        Dict with the annual report
+    """
+    report_data = get_comprehensive_annual_report(db, user_id, year)
+
     return {
-        'summary': get_annual_summary(db, user_id, year),
-        'year_over_year': get_year_over_year_comparison(db, user_id, year),
-        'monthly_breakdown': get_monthly_breakdown(db, user_id, year),
-        'seasonal_analysis': get_seasonal_analysis(db, user_id, year),
-        'category_analysis': get_category_analysis(db, user_id, year),
-        'achievements': get_annual_achievements(db, user_id, year)
+        'period': {
+            'start': date(year, 1, 1).isoformat(),
+            'end': date(year, 12, 31).isoformat(),
+            'year': year
+        },
+        'currency': currency_code,
+        'summary': report_data['summary'],
+        'year_over_year': report_data['year_over_year'],
+        'monthly_breakdown': report_data['monthly_breakdown'],
+        'seasonal_analysis': report_data['seasonal_analysis'],
+        'category_analysis': report_data['category_analysis'],
+        'achievements': report_data['achievements'],
+        'generated_at': datetime.utcnow().isoformat()
     }
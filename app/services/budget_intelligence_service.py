@@ -19,15 +19,24 @@ import numpy as np
 from app.models.entry import Entry
 from app.models.category import Category
 from app.core.logging_config import get_logger
+from app.ai.data.entry_frames import fetch_entries_frame
+from app.core.cache import CacheService, get_cache
+from app.services.data_version import get_data_version
+from app.services.duplicate_detection import DATE_WINDOW_DAYS, DuplicateIndex, EntryRow, group_duplicates
+from app.services.recurring_detection import LOOKBACK_DAYS as RECURRING_LOOKBACK_DAYS, PERIODS_PER_YEAR, detect_recurring
 
 logger = get_logger(__name__)
 
+# Detected recurring bills depend on the day, so a cached result is useful for a day at most
+RECURRING_CACHE_TTL = 24 * 3600
+
 
 class BudgetIntelligenceService:
     """Service for intelligent budget analysis and recommendations"""
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, cache: Optional[CacheService] = None):
         self.db = db
+        self.cache = cache or get_cache()
 
         # Seasonal adjustment factors (multipliers for different months)
         # Based on typical spending patterns: holidays, back-to-school, etc.
@@ -234,110 +243,66 @@ class BudgetIntelligenceService:
         """
         Detect recurring bills by analyzing entry patterns
 
+        Results are cached per user, day and data version, so any entry write
+        invalidates them.
+
         Args:
             user_id: User ID
 
         Returns:
             List of detected recurring bills
         """
-        # Look at last 6 months
-        six_months_ago = datetime.now() - timedelta(days=180)
-
-        # Get all expenses
-        entries = self.db.query(Entry).filter(
-            and_(
-                Entry.user_id == user_id,
-                Entry.type == 'expense',
-                Entry.date >= six_months_ago
-            )
-        ).order_by(Entry.date).all()
-
-        # Group by category and similar amounts
-        potential_bills = defaultdict(list)
-
-        for entry in entries:
-            # Create a key based on category and similar amount (rounded to nearest 5)
-            rounded_amount = round(entry.amount / 5) * 5
-            key = f"{entry.category_id}_{rounded_amount}"
-            potential_bills[key].append(entry)
-
-        recurring_bills = []
-
-        for key, bill_entries in potential_bills.items():
-            if len(bill_entries) >= 3:  # At least 3 occurrences
-                # Calculate average interval between bills
-                intervals = []
-                for i in range(1, len(bill_entries)):
-                    days_diff = (bill_entries[i].date - bill_entries[i-1].date).days
-                    intervals.append(days_diff)
-
-                if intervals:
-                    avg_interval = statistics.mean(intervals)
-                    std_interval = statistics.stdev(intervals) if len(intervals) > 1 else 0
-
-                    # Check if intervals are consistent
-                    is_monthly = 25 <= avg_interval <= 35 and std_interval < 10
-                    is_weekly = 5 <= avg_interval <= 9 and std_interval < 3
-                    is_biweekly = 12 <= avg_interval <= 16 and std_interval < 5
-
-                    if is_monthly or is_weekly or is_biweekly:
-                        frequency = 'monthly' if is_monthly else ('weekly' if is_weekly else 'biweekly')
-
-                        # Predict next occurrence
-                        last_entry = bill_entries[-1]
-                        next_due_date = last_entry.date + timedelta(days=int(avg_interval))
-                        days_until_due = (next_due_date - datetime.now().date()).days
-
-                        # Get category name
-                        category_name = 'Uncategorized'
-                        if last_entry.category:
-                            category_name = last_entry.category.name
-
-                        # Use note from first entry or category name
-                        description = bill_entries[0].note or category_name
-
-                        recurring_bills.append({
-                            'description': description,
-                            'category_id': bill_entries[0].category_id,
-                            'category_name': category_name,
-                            'avg_amount': round(statistics.mean([e.amount for e in bill_entries]), 2),
-                            'frequency': frequency,
-                            'avg_interval_days': round(avg_interval, 1),
-                            'occurrences': len(bill_entries),
-                            'last_date': last_entry.date.isoformat(),
-                            'predicted_next_date': next_due_date.isoformat(),
-                            'days_until_due': days_until_due,
-                            'confidence': 'high' if std_interval < 3 else 'medium'
-                        })
-
-        # Sort by next due date
-        recurring_bills.sort(key=lambda x: x['days_until_due'])
+        today = datetime.now().date()
+        cache_key = f"recurring_bills:{user_id}:{today.isoformat()}:v{get_data_version(self.db, user_id)}"
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        expenses = fetch_entries_frame(
+            self.db, user_id, ('date', 'amount', 'category_id', 'category_name', 'note'),
+            start_date=today - timedelta(days=RECURRING_LOOKBACK_DAYS), entry_type='expense'
+        )
+        recurring_bills = detect_recurring(expenses, today)
 
+        self.cache.set(cache_key, recurring_bills, ttl=RECURRING_CACHE_TTL)
         return recurring_bills
 
     def get_upcoming_bill_reminders(self, user_id: int, days_ahead: int = 7) -> List[Dict]:
         """
-        Get reminders for bills due in the next N days
+        Get reminders for the user's recurring payments due in the next N days
+
+        Read from the persisted next due dates with one range scan; due dates
+        that passed since the nightly refresh are advanced first.
 
         Args:
             user_id: User ID
             days_ahead: Number of days to look ahead
 
         Returns:
-            List of upcoming bill reminders
+            List of upcoming bill reminders, soonest first
         """
-        recurring_bills = self.detect_recurring_bills(user_id)
+        from app.services.recurring_payment_service import RecurringPaymentService
 
-        reminders = []
-        for bill in recurring_bills:
-            if 0 <= bill['days_until_due'] <= days_ahead:
-                urgency = 'urgent' if bill['days_until_due'] <= 2 else 'upcoming'
+        today = datetime.now().date()
+        payment_service = RecurringPaymentService(self.db)
+        payment_service.refresh_next_due_dates(today, user_id=user_id)
 
-                reminders.append({
-                    **bill,
-                    'urgency': urgency,
-                    'reminder_message': f"{bill['description']} is due in {bill['days_until_due']} days"
-                })
+        reminders = []
+        for payment in payment_service.get_upcoming_payments(days_ahead, user_id=user_id, today=today):
+            days_until_due = (payment.next_due_date - today).days
+            reminders.append({
+                'recurring_payment_id': payment.id,
+                'description': payment.name,
+                'category_id': payment.category_id,
+                'category_name': payment.category.name if payment.category else 'Uncategorized',
+                'amount': float(payment.amount),
+                'currency_code': payment.currency_code,
+                'frequency': payment.frequency.value,
+                'predicted_next_date': payment.next_due_date.isoformat(),
+                'days_until_due': days_until_due,
+                'urgency': 'urgent' if days_until_due <= 2 else 'upcoming',
+                'reminder_message': f"{payment.name} is due in {days_until_due} days"
+            })
 
         return reminders
 
@@ -374,11 +339,12 @@ class BudgetIntelligenceService:
 
             # Also consider monthly recurring charges as potential subscriptions
             if bill['frequency'] == 'monthly' or is_subscription:
-                annual_cost = bill['avg_amount'] * (12 if bill['frequency'] == 'monthly' else 52 if bill['frequency'] == 'weekly' else 26)
+                annual_cost = bill['avg_amount'] * PERIODS_PER_YEAR[bill['frequency']]
 
                 subscriptions.append({
                     **bill,
                     'annual_cost': round(annual_cost, 2),
+                    'monthly_cost': round(annual_cost / 12, 2),
                     'type': 'subscription',
                     'is_confirmed': is_subscription
                 })
@@ -400,12 +366,7 @@ class BudgetIntelligenceService:
         """
         subscriptions = self.detect_subscriptions(user_id)
 
-        total_monthly = sum(
-            s['avg_amount'] if s['frequency'] == 'monthly' else
-            s['avg_amount'] * 4 if s['frequency'] == 'weekly' else
-            s['avg_amount'] * 2
-            for s in subscriptions
-        )
+        total_monthly = sum(s['monthly_cost'] for s in subscriptions)
 
         total_annual = sum(s['annual_cost'] for s in subscriptions)
 
@@ -419,85 +380,66 @@ class BudgetIntelligenceService:
 
     # ==================== DUPLICATE TRANSACTION DETECTION ====================
 
-    def find_duplicate_transactions(self, user_id: int, days_window: int = 30) -> List[Dict]:
+    def find_duplicate_transactions(self, user_id: int, days_window: int = 30,
+                                    fuzzy_notes: bool = False) -> List[Dict]:
         """
         Find potential duplicate entries
 
         Args:
             user_id: User ID
             days_window: Number of days to look back
+            fuzzy_notes: Also report near-duplicates: same type and amount in
+                different categories with notes naming the same merchant
 
         Returns:
             List of potential duplicate groups
         """
-        cutoff_date = datetime.now() - timedelta(days=days_window)
+        cutoff_date = (datetime.now() - timedelta(days=days_window)).date()
+        return group_duplicates(self._duplicate_rows(user_id, Entry.date >= cutoff_date), fuzzy_notes=fuzzy_notes)
 
-        # Get recent entries
-        entries = self.db.query(Entry).filter(
-            and_(
-                Entry.user_id == user_id,
-                Entry.date >= cutoff_date
-            )
-        ).order_by(desc(Entry.date)).all()
+    def find_import_duplicates(self, user_id: int, candidates: List[Dict],
+                               fuzzy_notes: bool = False) -> List[Optional[int]]:
+        """
+        Check entries about to be imported against the user's existing entries
 
-        duplicates = []
-        checked = set()
+        Args:
+            user_id: User ID
+            candidates: Entries to insert, as dicts with type, amount, category_id, date and note
+            fuzzy_notes: Treat similar (not only equal) merchant notes as duplicates
 
-        for i, entry1 in enumerate(entries):
-            if entry1.id in checked:
-                continue
+        Returns:
+            Per candidate, the ID of the existing entry it duplicates, or None
+        """
+        if not candidates:
+            return []
 
-            potential_duplicates = []
-
-            for entry2 in entries[i+1:]:
-                if entry2.id in checked:
-                    continue
-
-                # Check for duplicates
-                same_amount = abs(entry1.amount - entry2.amount) < 0.01
-                same_category = entry1.category_id == entry2.category_id
-                same_type = entry1.type == entry2.type
-                date_diff = abs((entry1.date - entry2.date).days)
-                within_date_range = date_diff <= 2
-
-                # Check note similarity
-                notes_similar = False
-                if entry1.note and entry2.note:
-                    notes_similar = entry1.note.lower().strip() == entry2.note.lower().strip()
-                elif not entry1.note and not entry2.note:
-                    notes_similar = True
-
-                if same_amount and same_category and same_type and within_date_range:
-                    confidence = 'high' if notes_similar and date_diff == 0 else 'medium'
-
-                    if not potential_duplicates:
-                        potential_duplicates.append({
-                            'id': entry1.id,
-                            'amount': entry1.amount,
-                            'category': entry1.category.name if entry1.category else 'Uncategorized',
-                            'date': entry1.date.isoformat(),
-                            'notes': entry1.note or '',
-                            'type': entry1.type
-                        })
-
-                    potential_duplicates.append({
-                        'id': entry2.id,
-                        'amount': entry2.amount,
-                        'category': entry2.category.name if entry2.category else 'Uncategorized',
-                        'date': entry2.date.isoformat(),
-                        'notes': entry2.note or '',
-                        'type': entry2.type
-                    })
-                    checked.add(entry2.id)
-
-            if len(potential_duplicates) > 1:
-                duplicates.append({
-                    'group_id': f"dup_{entry1.id}",
-                    'entries': potential_duplicates,
-                    'count': len(potential_duplicates),
-                    'confidence': confidence,
-                    'total_amount': sum(e['amount'] for e in potential_duplicates)
-                })
-                checked.add(entry1.id)
+        rows = [
+            EntryRow(None, c['type'], c['amount'], c.get('category_id'), c['date'], c.get('note'))
+            for c in candidates
+        ]
+        window = timedelta(days=DATE_WINDOW_DAYS)
+        existing = self._duplicate_rows(
+            user_id,
+            Entry.date >= min(row.date for row in rows) - window,
+            Entry.date <= max(row.date for row in rows) + window,
+            Entry.type.in_({row.type for row in rows}),
+            Entry.amount.in_(sorted({round(float(row.amount), 2) for row in rows}))
+        )
 
-        return duplicates
+        index = DuplicateIndex(existing, fuzzy_notes=fuzzy_notes)
+        matches = []
+        for row in rows:
+            match = index.find(row)
+            matches.append(match.id if match else None)
+        return matches
+
+    def _duplicate_rows(self, user_id: int, *criteria) -> List[EntryRow]:
+        """Entry fields for duplicate detection, with category names joined in (no lazy loads)"""
+        rows = self.db.query(
+            Entry.id, Entry.type, Entry.amount, Entry.category_id, Entry.date, Entry.note, Category.name
+        ).outerjoin(
+            Category, Category.id == Entry.category_id
+        ).filter(
+            Entry.user_id == user_id, *criteria
+        ).all()
+        return [EntryRow(*row) for row in rows]
@@ -0,0 +1,191 @@
+"""
+Bulk data export (CSV / Parquet) streamed straight from the database
+"""
+import io
+import logging
+from datetime import date
+from typing import AsyncIterator, Dict, Optional
+
+import pandas as pd
+from sqlalchemy import Float, Select, cast, func, select
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app.models.entry import Entry
+from app.models.category import Category
+from app.core.currency import CurrencyService
+from app.services.user_preferences import UserPreferencesService
+
+logger = logging.getLogger(__name__)
+
+# Try to import pyarrow, but make it optional (only Parquet export needs it)
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+    logger.warning("pyarrow not installed. Parquet export disabled. Install with: pip install pyarrow")
+
+# Rows fetched per round trip from the server-side cursor (one CSV chunk / Parquet row group)
+EXPORT_CHUNK_SIZE = 10000
+
+EXPORT_COLUMNS = [
+    'id', 'date', 'type', 'category', 'description', 'note',
+    'amount', 'currency_code', 'amount_converted'
+]
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object collecting bytes until the stream drains them"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks = []
+        return data
+
+
+class BulkExportService:
+    def __init__(self):
+        self.currency_service = CurrencyService()
+        self.user_preferences_service = UserPreferencesService()
+
+    def build_query(
+        self,
+        user_id: int,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        category_id: Optional[int] = None,
+        report_type: str = "all"
+    ) -> Select:
+        """
+        SELECT of the exported entry columns in date order
+
+        Uncategorized entries are included (with an empty category), unlike the Excel report.
+        """
+        query = (
+            select(
+                Entry.id,
+                Entry.date,
+                Entry.type,
+                func.coalesce(Category.name, '').label('category'),
+                func.coalesce(Entry.description, '').label('description'),
+                func.coalesce(Entry.note, '').label('note'),
+                cast(Entry.amount, Float).label('amount'),
+                Entry.currency_code
+            )
+            .select_from(Entry)
+            .outerjoin(Category, Entry.category_id == Category.id)
+            .where(Entry.user_id == user_id)
+        )
+
+        if start_date:
+            query = query.where(Entry.date >= start_date)
+        if end_date:
+            query = query.where(Entry.date <= end_date)
+        if category_id:
+            query = query.where(Entry.category_id == category_id)
+        if report_type in ["income", "expense"]:
+            query = query.where(Entry.type == report_type)
+
+        return query.order_by(Entry.date, Entry.id)
+
+    async def _convert(self, frame: pd.DataFrame, user_currency: str, rates: Dict) -> pd.DataFrame:
+        """Add amount_converted to a chunk; rates is shared by the export's chunks"""
+        multipliers = await self.currency_service.conversion_rates(
+            frame['currency_code'].unique(), user_currency, rates
+        )
+        # Rounded to cents like the Excel/PDF reports
+        frame['amount_converted'] = (
+            frame['amount'].fillna(0.0) * frame['currency_code'].map(multipliers)
+        ).round(2)
+        return frame
+
+    async def _frames(self, db: Session, query: Select, user_currency: str) -> AsyncIterator[pd.DataFrame]:
+        """
+        Converted DataFrame chunks read from a server-side cursor
+
+        Uses its own session on the request session's engine: the request-scoped
+        session is closed as soon as the endpoint returns, before the body streams.
+        Blocking fetches run in the threadpool so the event loop stays free.
+        """
+        rates = {}
+        with Session(bind=db.get_bind()) as stream_db:
+            result = await run_in_threadpool(
+                stream_db.execute, query, execution_options={"yield_per": EXPORT_CHUNK_SIZE}
+            )
+            columns = list(result.keys())
+            chunks = result.partitions()
+            while True:
+                rows = await run_in_threadpool(next, chunks, None)
+                if not rows:
+                    break
+                frame = pd.DataFrame.from_records(rows, columns=columns)
+                yield await self._convert(frame, user_currency, rates)
+
+    async def stream_csv(self, db: Session, query: Select, user_currency: str) -> AsyncIterator[bytes]:
+        """
+        Stream entries as UTF-8 CSV, the header first and then one block per chunk
+
+        Amounts are written with two decimals; amount_converted is in user_currency.
+        """
+        yield (",".join(EXPORT_COLUMNS) + "\n").encode()
+
+        async for frame in self._frames(db, query, user_currency):
+            yield frame[EXPORT_COLUMNS].to_csv(
+                index=False, header=False, float_format="%.2f", lineterminator="\n"
+            ).encode()
+
+    async def stream_parquet(self, db: Session, query: Select, user_currency: str) -> AsyncIterator[bytes]:
+        """
+        Stream entries as a Parquet file, one row group per chunk
+
+        Bytes are yielded as each row group is flushed; the footer follows the last one.
+        """
+        if not PYARROW_AVAILABLE:
+            raise RuntimeError("Parquet export requires pyarrow")
+
+        schema = pa.schema([
+            ('id', pa.int64()),
+            ('date', pa.date32()),
+            ('type', pa.string()),
+            ('category', pa.string()),
+            ('description', pa.string()),
+            ('note', pa.string()),
+            ('amount', pa.float64()),
+            ('currency_code', pa.string()),
+            ('amount_converted', pa.float64()),
+        ])
+
+        sink = _ChunkSink()
+        writer = pq.ParquetWriter(sink, schema, compression='snappy')
+        try:
+            header = sink.drain()
+            if header:
+                yield header
+
+            async for frame in self._frames(db, query, user_currency):
+                writer.write_table(pa.Table.from_pandas(frame[EXPORT_COLUMNS], schema=schema, preserve_index=False))
+                yield sink.drain()
+        finally:
+            writer.close()
+
+        yield sink.drain()
+
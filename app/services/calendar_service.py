@@ -3,138 +3,186 @@ Calendar service for aggregating financial entries by date and showing upcoming
 """
 
 from datetime import date, datetime, timedelta
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from sqlalchemy import func, extract
-from sqlalchemy.orm import Session
+from sqlalchemy.orm import Session, joinedload
 
+from app.core.cache import CacheService, get_cache
 from app.models.entry import Entry, EntryType
 from app.models.category import Category
+from app.models.recurring_payment import RecurringPayment
+from app.services.data_version import get_data_version
 from app.services.recurring_payment_service import RecurringPaymentService
 
+# Cached months are keyed by data version, so the TTL only bounds memory
+CALENDAR_CACHE_TTL = 24 * 3600
 
-def get_calendar_data(
+
+def _month_bounds(year: int, month: int) -> Tuple[date, date]:
+    """First and last day of a month"""
+    first_day = date(year, month, 1)
+    if month == 12:
+        last_day = date(year + 1, 1, 1) - timedelta(days=1)
+    else:
+        last_day = date(year, month + 1, 1) - timedelta(days=1)
+    return first_day, last_day
+
+
+def _shift_month(year: int, month: int, months: int) -> Tuple[int, int]:
+    index = year * 12 + month - 1 + months
+    return index // 12, index % 12 + 1
+
+
+def _category_icon(entry_type: str) -> str:
+    # Categories don't have icons, use a generic icon based on type
+    return '💰' if entry_type == EntryType.INCOME else '💸'
+
+
+def _day_cells(db: Session, user_id: int, first_day: date, last_day: date) -> Dict[str, Dict[str, Dict]]:
+    """
+    Day cells of every month between first_day and last_day, from one grouped query
+
+    Returns:
+        {'YYYY-MM': {'YYYY-MM-DD': cell}} where a cell has the day's totals and
+        one item per type and category, largest first
+    """
+    rows = db.query(
+        Entry.date, Entry.type, Entry.category_id, Category.name,
+        func.sum(Entry.amount), func.count(Entry.id)
+    ).outerjoin(
+        Category, Entry.category_id == Category.id
+    ).filter(
+        Entry.user_id == user_id,
+        Entry.date >= first_day,
+        Entry.date <= last_day
+    ).group_by(Entry.date, Entry.type, Entry.category_id, Category.name).all()
+
+    months: Dict[str, Dict[str, Dict]] = {}
+    for entry_date, entry_type, category_id, category_name, total, count in rows:
+        cell = months.setdefault(entry_date.strftime('%Y-%m'), {}).setdefault(entry_date.isoformat(), {
+            'income_total': 0.0,
+            'expense_total': 0.0,
+            'net': 0.0,
+            'entry_count': 0,
+            'entries': []
+        })
+        amount = float(total)
+        if entry_type == EntryType.INCOME:
+            cell['income_total'] += amount
+        else:
+            cell['expense_total'] += amount
+        cell['entry_count'] += count
+        cell['entries'].append({
+            'type': entry_type,
+            'amount': round(amount, 2),
+            'category_id': category_id,
+            'category_name': category_name or 'Uncategorized',
+            'category_icon': _category_icon(entry_type),
+            'count': count,
+        })
+
+    # Round all monetary values to 2 decimal places
+    for cells in months.values():
+        for cell in cells.values():
+            cell['income_total'] = round(cell['income_total'], 2)
+            cell['expense_total'] = round(cell['expense_total'], 2)
+            cell['net'] = round(cell['income_total'] - cell['expense_total'], 2)
+            cell['entries'].sort(key=lambda item: -item['amount'])
+
+    return months
+
+
+def get_month_cells(
     db: Session,
     user_id: int,
     year: int,
-    month: int
-) -> Dict:
+    month: int,
+    cache: Optional[CacheService] = None
+) -> Dict[str, Dict]:
     """
-    Get calendar data for a specific month and year.
+    Aggregated day cells of a month, by ISO date
 
-    Returns aggregated entry data for each day in the month:
-    - Total income for each day
-    - Total expenses for each day
-    - Net balance for each day
-    - Entry count
-    - List of entries with category info
+    Cells are cached per data version. On a miss the previous and next months
+    are aggregated in the same query and cached too, so navigating to an
+    adjacent month is served from the cache.
 
     Args:
         db: Database session
-        user_id: User ID to filter entries
-        year: Year (e.g., 2025)
+        user_id: User ID
+        year: Year
         month: Month (1-12)
+        cache: Cache to use (default: the shared cache)
 
     Returns:
-        Dict with year, month, and dates data
+        Dict of day cells for the days that have entries
     """
+    cache = cache or get_cache()
+    version = get_data_version(db, user_id)
 
-    # Get first and last day of month
-    first_day = date(year, month, 1)
-
-    # Calculate last day of month
-    if month == 12:
-        last_day = date(year + 1, 1, 1) - timedelta(days=1)
-    else:
-        last_day = date(year, month + 1, 1) - timedelta(days=1)
-
-    # Query all entries for this month
-    entries = db.query(Entry).filter(
-        Entry.user_id == user_id,
-        Entry.date >= first_day,
-        Entry.date <= last_day
-    ).order_by(Entry.date.desc(), Entry.id.desc()).all()
+    def cache_key(y: int, m: int) -> str:
+        return f"calendar_month:{user_id}:{y:04d}-{m:02d}:v{version}"
 
-    # Aggregate entries by date
-    dates_data = {}
+    cached = cache.get(cache_key(year, month))
+    if cached is not None:
+        return cached
 
-    for entry in entries:
-        entry_date = entry.date.isoformat()
-
-        # Initialize date if not exists
-        if entry_date not in dates_data:
-            dates_data[entry_date] = {
-                'income_total': 0.0,
-                'expense_total': 0.0,
-                'net': 0.0,
-                'entry_count': 0,
-                'entries': []
-            }
+    if not cache.enabled:
+        return _day_cells(db, user_id, *_month_bounds(year, month)).get(f"{year:04d}-{month:02d}", {})
 
-        # Get category info
-        category_name = entry.category.name if entry.category else 'Uncategorized'
-        # Categories don't have icons, use a generic icon based on type
-        if entry.type == EntryType.INCOME:
-            category_icon = '💰'
-        else:
-            category_icon = '💸'
+    window = [_shift_month(year, month, offset) for offset in (-1, 0, 1)]
+    months = _day_cells(db, user_id, _month_bounds(*window[0])[0], _month_bounds(*window[-1])[1])
+    for y, m in window:
+        cache.set(cache_key(y, m), months.get(f"{y:04d}-{m:02d}", {}), ttl=CALENDAR_CACHE_TTL)
+    return months.get(f"{year:04d}-{month:02d}", {})
 
-        # Add to appropriate total
-        amount = float(entry.amount)
-        if entry.type == EntryType.INCOME:
-            dates_data[entry_date]['income_total'] += amount
-        else:
-            dates_data[entry_date]['expense_total'] += amount
 
-        # Update net (income - expense)
-        dates_data[entry_date]['net'] = (
-            dates_data[entry_date]['income_total'] -
-            dates_data[entry_date]['expense_total']
-        )
+def _summarize(cells: Dict[str, Dict]) -> Dict:
+    total_income = sum(cell['income_total'] for cell in cells.values())
+    total_expense = sum(cell['expense_total'] for cell in cells.values())
+    return {
+        'total_income': round(total_income, 2),
+        'total_expense': round(total_expense, 2),
+        'net': round(total_income - total_expense, 2),
+        'entry_count': sum(cell['entry_count'] for cell in cells.values())
+    }
 
-        # Increment count
-        dates_data[entry_date]['entry_count'] += 1
 
-        # Add entry details
-        dates_data[entry_date]['entries'].append({
-            'id': entry.id,
-            'type': entry.type,
-            'amount': amount,
-            'currency_code': entry.currency_code,
-            'category_name': category_name,
-            'category_icon': category_icon,
-            'note': entry.note,
-            'description': entry.description,
-        })
+def get_bill_occurrences(
+    db: Session,
+    user_id: int,
+    first_day: date,
+    last_day: date
+) -> Dict[str, List[Dict]]:
+    """
+    Projected due dates of active recurring payments between two dates
 
-    # Round all monetary values to 2 decimal places
-    for date_key in dates_data:
-        dates_data[date_key]['income_total'] = round(dates_data[date_key]['income_total'], 2)
-        dates_data[date_key]['expense_total'] = round(dates_data[date_key]['expense_total'], 2)
-        dates_data[date_key]['net'] = round(dates_data[date_key]['net'], 2)
+    Args:
+        db: Database session
+        user_id: User ID
+        first_day: First day of the range
+        last_day: Last day of the range
 
-    # Add upcoming bills & subscriptions to calendar
+    Returns:
+        Bill items by ISO date
+    """
     recurring_service = RecurringPaymentService(db)
-    payments = recurring_service.get_user_recurring_payments(user_id, include_inactive=False)
+    payments = db.query(RecurringPayment).options(joinedload(RecurringPayment.category)).filter(
+        RecurringPayment.user_id == user_id,
+        RecurringPayment.is_active == True,
+        RecurringPayment.start_date <= last_day
+    ).all()
 
+    bills: Dict[str, List[Dict]] = {}
     for payment in payments:
-        next_due = recurring_service.calculate_next_due_date(payment, first_day)
-
-        # If due date falls within this month, add it to the calendar
-        if next_due and first_day <= next_due <= last_day:
-            due_date_str = next_due.isoformat()
-
-            # Initialize date if not exists
-            if due_date_str not in dates_data:
-                dates_data[due_date_str] = {
-                    'income_total': 0.0,
-                    'expense_total': 0.0,
-                    'net': 0.0,
-                    'entry_count': 0,
-                    'entries': []
-                }
+        after = first_day - timedelta(days=1)
+        while True:
+            next_due = recurring_service.calculate_next_due_date(payment, after)
+            if not next_due or next_due <= after or next_due > last_day:
+                break
+            after = next_due
 
             # Add bill/subscription as a special entry type
-            dates_data[due_date_str]['entries'].append({
+            bills.setdefault(next_due.isoformat(), []).append({
                 'id': f'bill_{payment.id}',
                 'type': 'bill',  # Special type for bills
                 'amount': float(payment.amount),
@@ -147,13 +195,63 @@ def get_calendar_data(
                 'frequency': payment.frequency.value
             })
 
+    return bills
+
+
+def get_calendar_data(
+    db: Session,
+    user_id: int,
+    year: int,
+    month: int,
+    cache: Optional[CacheService] = None
+) -> Dict:
+    """
+    Get calendar data for a specific month and year.
+
+    Returns aggregated entry data for each day in the month:
+    - Total income for each day
+    - Total expenses for each day
+    - Net balance for each day
+    - Entry count
+    - Totals per type and category (individual entries are loaded per day
+      by get_date_entries when a day is opened)
+    - Projected bills & subscriptions due that day
+
+    Args:
+        db: Database session
+        user_id: User ID to filter entries
+        year: Year (e.g., 2025)
+        month: Month (1-12)
+        cache: Cache to use (default: the shared cache)
+
+    Returns:
+        Dict with year, month, dates data and the month summary
+    """
+    first_day, last_day = _month_bounds(year, month)
+    cells = get_month_cells(db, user_id, year, month, cache=cache)
+
+    # Copy cells so bills never leak into cached data
+    dates_data = {day: {**cell, 'entries': list(cell['entries'])} for day, cell in cells.items()}
+
+    # Add upcoming bills & subscriptions to calendar
+    for due_date_str, bills in get_bill_occurrences(db, user_id, first_day, last_day).items():
+        cell = dates_data.setdefault(due_date_str, {
+            'income_total': 0.0,
+            'expense_total': 0.0,
+            'net': 0.0,
+            'entry_count': 0,
+            'entries': []
+        })
+        cell['entries'].extend(bills)
+
     return {
         'year': year,
         'month': month,
         'month_name': first_day.strftime('%B'),
         'first_day': first_day.isoformat(),
         'last_day': last_day.isoformat(),
-        'dates': dates_data
+        'dates': dates_data,
+        'summary': _summarize(cells)
     }
 
 
@@ -161,7 +259,8 @@ def get_month_summary(
     db: Session,
     user_id: int,
     year: int,
-    month: int
+    month: int,
+    cache: Optional[CacheService] = None
 ) -> Dict:
     """
     Get summary statistics for a specific month.
@@ -171,41 +270,12 @@ def get_month_summary(
         user_id: User ID
         year: Year
         month: Month (1-12)
+        cache: Cache to use (default: the shared cache)
 
     Returns:
         Dict with total income, expenses, and net for the month
     """
-
-    # Get first and last day of month
-    first_day = date(year, month, 1)
-    if month == 12:
-        last_day = date(year + 1, 1, 1) - timedelta(days=1)
-    else:
-        last_day = date(year, month + 1, 1) - timedelta(days=1)
-
-    # Get all entries for the month
-    entries = db.query(Entry).filter(
-        Entry.user_id == user_id,
-        Entry.date >= first_day,
-        Entry.date <= last_day
-    ).all()
-
-    total_income = 0.0
-    total_expense = 0.0
-
-    for entry in entries:
-        amount = float(entry.amount)
-        if entry.type == EntryType.INCOME:
-            total_income += amount
-        else:
-            total_expense += amount
-
-    return {
-        'total_income': round(total_income, 2),
-        'total_expense': round(total_expense, 2),
-        'net': round(total_income - total_expense, 2),
-        'entry_count': len(entries)
-    }
+    return _summarize(get_month_cells(db, user_id, year, month, cache=cache))
 
 
 def get_available_months(
@@ -270,7 +340,12 @@ def get_date_entries(
     """
 
     # Query entries for this date
-    entries = db.query(Entry).filter(
+    entries = db.query(
+        Entry.id, Entry.type, Entry.amount, Entry.currency_code, Entry.category_id,
+        Category.name.label('category_name'), Entry.note, Entry.description, Entry.date
+    ).outerjoin(
+        Category, Entry.category_id == Category.id
+    ).filter(
         Entry.user_id == user_id,
         Entry.date == target_date
     ).order_by(Entry.id.desc()).all()
@@ -283,12 +358,8 @@ def get_date_entries(
         amount = float(entry.amount)
 
         # Get category info
-        category_name = entry.category.name if entry.category else 'Uncategorized'
-        # Categories don't have icons, use a generic icon based on type
-        if entry.type == EntryType.INCOME:
-            category_icon = '💰'
-        else:
-            category_icon = '💸'
+        category_name = entry.category_name or 'Uncategorized'
+        category_icon = _category_icon(entry.type)
 
         # Calculate totals
         if entry.type == EntryType.INCOME:
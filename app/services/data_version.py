@@ -0,0 +1,83 @@
+"""
+Per-user data version
+
+Every user has a monotonically increasing ``users.data_version`` that is bumped
+in the same transaction as any write to the data reports are built from
+(entries, categories and currency preferences). Generated reports are stamped
+with the version they were built from, so a stored report is current exactly
+when its version still matches the user's, and "has anything changed since the
+user last looked" is a comparison instead of a write per report.
+"""
+
+import logging
+from itertools import chain
+from typing import Iterable, Set
+
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+
+from app.models.category import Category
+from app.models.entry import Entry
+from app.models.user import User
+from app.models.user_preferences import UserPreferences
+
+logger = logging.getLogger(__name__)
+
+# Models whose rows feed generated reports
+VERSIONED_MODELS = (Entry, Category, UserPreferences)
+
+
+def get_data_version(db: Session, user_id: int) -> int:
+    """Current data version of a user (0 if never written)"""
+    return db.query(User.data_version).filter(User.id == user_id).scalar() or 0
+
+
+def bump_data_version(db: Session, user_ids: Iterable[int]) -> None:
+    """
+    Atomically increment the data version of the given users
+
+    The increment runs in the caller's transaction, so it becomes visible
+    together with the writes that caused it (or not at all on rollback).
+
+    Args:
+        db: Database session
+        user_ids: Users whose data changed
+    """
+    user_ids = sorted({user_id for user_id in user_ids if user_id is not None})
+    if not user_ids:
+        return
+
+    db.connection().execute(
+        update(User.__table__)
+        .where(User.__table__.c.id.in_(user_ids))
+        .values(data_version=User.__table__.c.data_version + 1)
+    )
+
+    # Loaded users must not keep serving the pre-bump value
+    for obj in db.identity_map.values():
+        if isinstance(obj, User) and obj.id in user_ids:
+            db.expire(obj, ['data_version'])
+
+
+def _bump_written_users(session: Session, flush_context) -> None:
+    written: Set[int] = set()
+    for obj in chain(session.new, session.deleted):
+        if isinstance(obj, VERSIONED_MODELS):
+            written.add(obj.user_id)
+    for obj in session.dirty:
+        if isinstance(obj, VERSIONED_MODELS) and session.is_modified(obj, include_collections=False):
+            written.add(obj.user_id)
+
+    bump_data_version(session, written)
+
+
+
+def register_listeners() -> None:
+    """
+    Make any ORM write to a versioned model (service, API, scheduler, receipts)
+    bump its owner's version as part of the same flush
+
+    Called once at application startup; safe to call again.
+    """
+    if not event.contains(Session, 'after_flush', _bump_written_users):
+        event.listen(Session, 'after_flush', _bump_written_users)
@@ -0,0 +1,251 @@
+"""
+Duplicate transaction detection
+
+Entries are bucketed by (type, category_id, amount in cents) and sorted by date
+inside each bucket, so duplicates are found with a sliding date window over
+each bucket instead of comparing every pair of entries.
+
+Optional near-duplicate matching pairs entries with the same type and amount
+across categories when their notes describe the same merchant: notes are
+reduced to a normalized merchant key and compared with MinHash signatures of
+the key's character shingles.
+"""
+
+import re
+import zlib
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# Two entries this many days apart (or closer) can be duplicates
+DATE_WINDOW_DAYS = 2
+
+# Estimated Jaccard similarity of merchant keys above which notes match
+NOTE_SIMILARITY_THRESHOLD = 0.6
+
+MINHASH_PERMUTATIONS = 64
+_MERSENNE_PRIME = (1 << 61) - 1
+_rng = np.random.default_rng(20261021)
+_PERM_A = _rng.integers(1, _MERSENNE_PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+_PERM_B = _rng.integers(0, _MERSENNE_PRIME, size=MINHASH_PERMUTATIONS, dtype=np.uint64)
+
+# Bank/POS noise that differs between two records of the same purchase
+_NOISE_WORDS = {
+    'pos', 'purchase', 'payment', 'card', 'debit', 'credit', 'visa', 'mastercard', 'ref', 'txn',
+    'transaction', 'online', 'www', 'com', 'inc', 'ltd', 'llc', 'the',
+}
+_NON_LETTERS = re.compile(r'[^a-z]+')
+
+
+class EntryRow:
+    """The fields duplicate detection needs from an entry"""
+    __slots__ = ('id', 'type', 'amount', 'category_id', 'date', 'note', 'category_name', 'amount_cents')
+
+    def __init__(self, id: Optional[int], type: str, amount: float, category_id: Optional[int], date: date,
+                 note: Optional[str] = None, category_name: Optional[str] = None):
+        self.id = id
+        self.type = type
+        self.amount = amount
+        self.category_id = category_id
+        self.date = date
+        self.note = note
+        self.category_name = category_name
+        self.amount_cents = int(round(amount * 100))
+
+    @property
+    def bucket(self) -> Tuple[str, Optional[int], int]:
+        return self.type, self.category_id, self.amount_cents
+
+
+def merchant_key(note: Optional[str]) -> str:
+    """Normalized merchant key of a note: lowercase words without digits, punctuation or POS noise"""
+    if not note:
+        return ''
+    words = _NON_LETTERS.sub(' ', note.lower()).split()
+    return ' '.join(word for word in words if word not in _NOISE_WORDS and len(word) > 1)
+
+
+def minhash_signature(key: str) -> Optional[np.ndarray]:
+    """MinHash signature of the character 3-gram shingles of a merchant key (None when empty)"""
+    if not key:
+        return None
+    padded = f" {key} "
+    shingles = {padded[i:i + 3] for i in range(max(len(padded) - 2, 1))}
+    hashes = np.fromiter((zlib.crc32(s.encode()) for s in shingles), dtype=np.uint64, count=len(shingles))
+    permuted = (hashes[:, None] * _PERM_A + _PERM_B) % _MERSENNE_PRIME
+    return permuted.min(axis=0)
+
+
+def note_similarity(sig_a: Optional[np.ndarray], sig_b: Optional[np.ndarray]) -> float:
+    """Estimated Jaccard similarity of two signatures (0 when either note is empty)"""
+    if sig_a is None or sig_b is None:
+        return 0.0
+    return float(np.mean(sig_a == sig_b))
+
+
+def _notes_match(a: EntryRow, b: EntryRow) -> bool:
+    """Exact note comparison of the original detector: equal after trimming, or both empty"""
+    if a.note and b.note:
+        return a.note.lower().strip() == b.note.lower().strip()
+    return not a.note and not b.note
+
+
+def _entry_dict(row: EntryRow) -> Dict:
+    return {
+        'id': row.id,
+        'amount': row.amount,
+        'category': row.category_name or 'Uncategorized',
+        'date': row.date.isoformat(),
+        'notes': row.note or '',
+        'type': row.type,
+    }
+
+
+def _group(anchor: EntryRow, members: List[EntryRow], confidence: str) -> Dict:
+    rows = [anchor] + members
+    return {
+        'group_id': f"dup_{anchor.id}",
+        'entries': [_entry_dict(row) for row in rows],
+        'count': len(rows),
+        'confidence': confidence,
+        'total_amount': sum(row.amount for row in rows),
+    }
+
+
+def _sorted_newest_first(rows: Iterable[EntryRow]) -> List[EntryRow]:
+    return sorted(rows, key=lambda row: (row.date, row.id or 0), reverse=True)
+
+
+def group_duplicates(rows: Sequence[EntryRow], window_days: int = DATE_WINDOW_DAYS,
+                     fuzzy_notes: bool = False,
+                     similarity_threshold: float = NOTE_SIMILARITY_THRESHOLD) -> List[Dict]:
+    """
+    Group potential duplicates
+
+    Each group is anchored at its newest entry and holds the older entries of the
+    same bucket within window_days of it. Groups are 'high' confidence when every
+    member is on the anchor's date with a matching note, 'medium' otherwise, and
+    'low' for fuzzy near-duplicates across categories.
+
+    Args:
+        rows: Entries to scan
+        window_days: Maximum date distance between an anchor and its duplicates
+        fuzzy_notes: Also pair same-type, same-amount entries in different categories
+            whose notes name the same merchant
+        similarity_threshold: Minimum estimated note similarity for fuzzy matches
+
+    Returns:
+        Duplicate groups, newest anchor first
+    """
+    buckets: Dict[Tuple, List[EntryRow]] = defaultdict(list)
+    for row in rows:
+        buckets[row.bucket].append(row)
+
+    groups = []
+    grouped = set()
+    for bucket in buckets.values():
+        if len(bucket) < 2:
+            continue
+        bucket = _sorted_newest_first(bucket)
+        for i, anchor in enumerate(bucket):
+            if id(anchor) in grouped:
+                continue
+            members = []
+            for j in range(i + 1, len(bucket)):
+                other = bucket[j]
+                if (anchor.date - other.date).days > window_days:
+                    break
+                if id(other) not in grouped:
+                    members.append(other)
+            if not members:
+                continue
+
+            grouped.add(id(anchor))
+            grouped.update(id(member) for member in members)
+            high = all(m.date == anchor.date and _notes_match(anchor, m) for m in members)
+            groups.append((anchor, members, 'high' if high else 'medium'))
+
+    if fuzzy_notes:
+        groups.extend(_near_duplicate_groups(rows, grouped, window_days, similarity_threshold))
+
+    groups.sort(key=lambda g: (g[0].date, g[0].id or 0), reverse=True)
+    return [_group(anchor, members, confidence) for anchor, members, confidence in groups]
+
+
+def _near_duplicate_groups(rows: Sequence[EntryRow], grouped: set, window_days: int,
+                           threshold: float) -> List[Tuple[EntryRow, List[EntryRow], str]]:
+    """Same type and amount, different categories, similar merchant notes"""
+    buckets: Dict[Tuple[str, int], List[EntryRow]] = defaultdict(list)
+    for row in rows:
+        if id(row) not in grouped and row.note:
+            buckets[(row.type, row.amount_cents)].append(row)
+
+    signatures: Dict[int, Optional[np.ndarray]] = {}
+
+    def signature(row: EntryRow) -> Optional[np.ndarray]:
+        if id(row) not in signatures:
+            signatures[id(row)] = minhash_signature(merchant_key(row.note))
+        return signatures[id(row)]
+
+    groups = []
+    for bucket in buckets.values():
+        if len(bucket) < 2:
+            continue
+        bucket = _sorted_newest_first(bucket)
+        for i, anchor in enumerate(bucket):
+            if id(anchor) in grouped:
+                continue
+            members = []
+            for j in range(i + 1, len(bucket)):
+                other = bucket[j]
+                if (anchor.date - other.date).days > window_days:
+                    break
+                if id(other) in grouped or other.category_id == anchor.category_id:
+                    continue
+                if note_similarity(signature(anchor), signature(other)) >= threshold:
+                    members.append(other)
+            if members:
+                grouped.add(id(anchor))
+                grouped.update(id(member) for member in members)
+                groups.append((anchor, members, 'low'))
+    return groups
+
+
+class DuplicateIndex:
+    """
+    Existing entries indexed by bucket, for checking new entries before insert
+
+    A candidate is a duplicate of an indexed entry in the same bucket within the
+    date window whose merchant key is equal (or, with fuzzy_notes, similar).
+    """
+
+    def __init__(self, rows: Iterable[EntryRow], window_days: int = DATE_WINDOW_DAYS,
+                 fuzzy_notes: bool = False, similarity_threshold: float = NOTE_SIMILARITY_THRESHOLD):
+        self.window_days = window_days
+        self.fuzzy_notes = fuzzy_notes
+        self.similarity_threshold = similarity_threshold
+        self._buckets: Dict[Tuple, List[Tuple[EntryRow, str]]] = defaultdict(list)
+        for row in rows:
+            self.add(row)
+
+    def add(self, row: EntryRow) -> None:
+        """Index an entry (e.g. one accepted earlier in the same import)"""
+        self._buckets[row.bucket].append((row, merchant_key(row.note)))
+
+    def find(self, candidate: EntryRow) -> Optional[EntryRow]:
+        """Indexed entry the candidate duplicates, or None"""
+        key = merchant_key(candidate.note)
+        signature = None
+        for row, row_key in self._buckets.get(candidate.bucket, ()):
+            if abs((row.date - candidate.date).days) > self.window_days:
+                continue
+            if row_key == key:
+                return row
+            if self.fuzzy_notes and key and row_key:
+                if signature is None:
+                    signature = minhash_signature(key)
+                if note_similarity(signature, minhash_signature(row_key)) >= self.similarity_threshold:
+                    return row
+        return None
@@ -0,0 +1,265 @@
+"""
+Durable email outbox
+
+Emails queued with enqueue_email() are stored in email_outbox and delivered by
+EmailOutboxSender, a background task that claims due rows in batches and sends
+them concurrently through EmailService (and so through its pooled SMTP
+connections). Failed deliveries are retried with exponential backoff; rows left
+mid-send by a stopped process are picked up again once their claim is older
+than the lease.
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.logging_config import get_logger
+from app.db.session import SessionLocal
+from app.models.email_outbox import EmailOutbox
+
+logger = get_logger(__name__)
+
+OUTBOX_BATCH_SIZE = 50
+OUTBOX_POLL_INTERVAL = 5.0  # seconds between checks when the outbox is idle
+OUTBOX_MAX_ATTEMPTS = 5
+OUTBOX_RETRY_BASE_DELAY = 30  # seconds, doubled after every failed attempt
+OUTBOX_CLAIM_LEASE = 600  # seconds a claimed row may stay 'sending' before it is requeued
+
+
+def enqueue_email(db: Session, to_email: str, subject: str, html_content: str,
+                  text_content: Optional[str] = None) -> EmailOutbox:
+    """
+    Store an email for background delivery
+
+    Args:
+        db: Database session; the row is committed before returning
+        to_email: Recipient address
+        subject: Email subject
+        html_content: HTML body
+        text_content: Optional plain-text body
+
+    Returns:
+        The queued outbox row
+    """
+    item = EmailOutbox(
+        to_email=to_email,
+        subject=subject,
+        html_content=html_content,
+        text_content=text_content,
+        status='pending',
+        next_attempt_at=datetime.utcnow()
+    )
+    db.add(item)
+    db.commit()
+    email_outbox_sender.wake()
+    return item
+
+
+async def _send_with_email_service(item: Dict) -> bool:
+    from app.services.email import email_service
+
+    return await email_service.send_email(item['to_email'], item['subject'], item['html_content'],
+                                          item['text_content'])
+
+
+class EmailOutboxSender:
+    """Background delivery of queued emails"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        send: Callable[[Dict], Awaitable[bool]] = _send_with_email_service,
+        batch_size: int = OUTBOX_BATCH_SIZE,
+        concurrency: int = settings.SMTP_POOL_SIZE,
+        max_attempts: int = OUTBOX_MAX_ATTEMPTS,
+        retry_delay: float = OUTBOX_RETRY_BASE_DELAY,
+        poll_interval: float = OUTBOX_POLL_INTERVAL,
+        claim_lease: float = OUTBOX_CLAIM_LEASE
+    ):
+        self.session_factory = session_factory
+        self.send = send
+        self.batch_size = batch_size
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self.claim_lease = claim_lease
+        self._task: Optional[asyncio.Task] = None
+        self._wakeup: Optional[asyncio.Event] = None
+
+    def start(self):
+        """Start the background sender on the running event loop"""
+        if self._task is not None and not self._task.done():
+            return
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        """Stop the background sender"""
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def wake(self):
+        """Check the outbox now instead of at the next poll"""
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def recover(self) -> int:
+        """
+        Return rows left in 'sending' by a stopped process to the queue
+
+        Only claims older than the lease are requeued, so rows another running
+        process is still delivering are left alone.
+
+        Returns:
+            Number of rows requeued
+        """
+        db = self.session_factory()
+        try:
+            stale = datetime.utcnow() - timedelta(seconds=self.claim_lease)
+            result = db.execute(
+                update(EmailOutbox).where(
+                    EmailOutbox.status == 'sending',
+                    or_(EmailOutbox.claimed_at.is_(None), EmailOutbox.claimed_at < stale)
+                ).values(status='pending', claimed_at=None)
+            )
+            db.commit()
+            return result.rowcount
+        finally:
+            db.close()
+
+    async def run_once(self) -> Dict[str, int]:
+        """
+        Claim one batch of due emails and deliver it
+
+        Returns:
+            Counts for the batch: claimed, sent, retrying, failed
+        """
+        # Database work runs in a worker thread so the event loop stays free
+        items = await asyncio.to_thread(self._claim_batch)
+        counts = {'claimed': len(items), 'sent': 0, 'retrying': 0, 'failed': 0}
+        if not items:
+            return counts
+
+        slots = asyncio.Semaphore(self.concurrency)
+
+        async def deliver(item: Dict):
+            async with slots:
+                try:
+                    return bool(await self.send(item)), None
+                except Exception as e:
+                    return False, str(e)
+
+        results = await asyncio.gather(*[deliver(item) for item in items])
+        recorded = await asyncio.to_thread(self._record_results, items, results)
+        for outcome, count in recorded.items():
+            counts[outcome] += count
+        return counts
+
+    async def drain(self) -> Dict[str, int]:
+        """Deliver batches until nothing is due"""
+        totals = {'claimed': 0, 'sent': 0, 'retrying': 0, 'failed': 0}
+        while True:
+            counts = await self.run_once()
+            if not counts['claimed']:
+                return totals
+            for key, value in counts.items():
+                totals[key] += value
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            try:
+                counts = await self.run_once()
+                if counts['claimed']:
+                    logger.info(f"Email outbox: {counts['sent']} sent, {counts['retrying']} retrying, "
+                                f"{counts['failed']} failed")
+                if counts['claimed'] == self.batch_size:
+                    continue
+                # Idle: pick up rows abandoned by a process that stopped mid-send
+                if not counts['claimed'] and await asyncio.to_thread(self.recover):
+                    continue
+            except Exception as e:
+                logger.error(f"Email outbox batch failed: {e}", exc_info=True)
+
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    def _claim_batch(self) -> List[Dict]:
+        db = self.session_factory()
+        try:
+            # SKIP LOCKED lets several app processes share the outbox (no-op on SQLite)
+            ids = list(db.execute(
+                select(EmailOutbox.id).where(
+                    EmailOutbox.status == 'pending',
+                    EmailOutbox.next_attempt_at <= datetime.utcnow()
+                ).order_by(EmailOutbox.id).limit(self.batch_size).with_for_update(skip_locked=True)
+            ).scalars())
+            if not ids:
+                db.commit()
+                return []
+
+            db.execute(
+                update(EmailOutbox).where(EmailOutbox.id.in_(ids)).values(
+                    status='sending', attempts=EmailOutbox.attempts + 1, claimed_at=datetime.utcnow()
+                )
+            )
+            rows = db.execute(
+                select(EmailOutbox.id, EmailOutbox.to_email, EmailOutbox.subject, EmailOutbox.html_content,
+                       EmailOutbox.text_content, EmailOutbox.attempts).where(EmailOutbox.id.in_(ids))
+            ).mappings().all()
+            db.commit()
+            return [dict(row) for row in rows]
+        finally:
+            db.close()
+
+    def _record_results(self, items: List[Dict], results: List) -> Dict[str, int]:
+        counts = {'sent': 0, 'retrying': 0, 'failed': 0}
+        now = datetime.utcnow()
+        sent_ids = []
+
+        db = self.session_factory()
+        try:
+            for item, (delivered, error) in zip(items, results):
+                if delivered:
+                    sent_ids.append(item['id'])
+                    continue
+
+                values = {'last_error': error or "Email delivery failed"}
+                if item['attempts'] >= self.max_attempts:
+                    values['status'] = 'failed'
+                    counts['failed'] += 1
+                else:
+                    values['status'] = 'pending'
+                    values['next_attempt_at'] = now + timedelta(
+                        seconds=self.retry_delay * 2 ** (item['attempts'] - 1)
+                    )
+                    counts['retrying'] += 1
+                db.execute(update(EmailOutbox).where(EmailOutbox.id == item['id']).values(**values))
+
+            if sent_ids:
+                db.execute(
+                    update(EmailOutbox).where(EmailOutbox.id.in_(sent_ids)).values(
+                        status='sent', sent_at=now, last_error=None
+                    )
+                )
+                counts['sent'] = len(sent_ids)
+            db.commit()
+            return counts
+        finally:
+            db.close()
+
+
+# Global sender instance
+email_outbox_sender = EmailOutboxSender()
@@ -0,0 +1,209 @@
+"""
+Email templates
+
+Email bodies are Jinja2 templates in app/templates/emails, compiled once per
+process (with a bytecode cache on disk, so new processes skip parsing) and kept
+in memory. Static sections such as the style block and footers are rendered
+once per locale and currency and reused as pre-rendered fragments. Every
+render is timed.
+
+The build_* functions return (subject, html, text) and are plain module-level
+functions, so batch senders can run them in a process pool.
+"""
+import os
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from typing import Any, Callable, Dict, Tuple
+
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, pass_context, select_autoescape
+from markupsafe import Markup
+
+from app.core.config import settings
+from app.core.currency import CURRENCIES
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+EMAIL_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'templates', 'emails')
+BYTECODE_CACHE_DIR = os.path.join(tempfile.gettempdir(), 'budget-pulse-email-templates')
+
+DEFAULT_LOCALE = 'en'
+
+RenderedEmail = Tuple[str, str, str]  # subject, html, text
+
+
+@lru_cache(maxsize=None)
+def currency_formatter(currency_code: str) -> Callable[[float], str]:
+    """Amount formatter for report emails, built once per currency"""
+    currency_info = CURRENCIES.get(currency_code, CURRENCIES['USD'])
+    symbol = currency_info['symbol']
+    if currency_info.get('position', 'before') == 'before':
+        return lambda amount: f"{symbol}{amount:.2f}"
+    return lambda amount: f"{amount:.2f}{symbol}"
+
+
+@pass_context
+def _money(context, amount) -> str:
+    return currency_formatter(context.get('currency', 'USD'))(amount)
+
+
+class EmailTemplateRenderer:
+    """Precompiled email templates with cached static fragments and render timings"""
+
+    def __init__(self, template_dir: str = EMAIL_TEMPLATE_DIR, bytecode_cache_dir: str = BYTECODE_CACHE_DIR,
+                 base_url: str = settings.BASE_URL):
+        os.makedirs(bytecode_cache_dir, exist_ok=True)
+        self.env = Environment(
+            loader=FileSystemLoader(template_dir),
+            autoescape=select_autoescape(['html']),
+            bytecode_cache=FileSystemBytecodeCache(bytecode_cache_dir),
+            auto_reload=False,
+            cache_size=-1,
+            trim_blocks=True,
+            lstrip_blocks=True
+        )
+        self.env.filters['money'] = _money
+        self.env.globals['fragment'] = self._fragment
+        self.env.globals['base_url'] = base_url
+
+        self._lock = threading.Lock()
+        self._fragments: Dict[Tuple, Markup] = {}
+        self.timings: Dict[str, Dict[str, float]] = {}
+
+        # Compile everything up front so no send pays for parsing
+        self._templates = {name: self.env.get_template(name) for name in self.env.list_templates()}
+
+    def render(self, name: str, context: Dict[str, Any], locale: str = DEFAULT_LOCALE,
+               currency: str = 'USD') -> str:
+        """
+        Render one email template
+
+        Args:
+            name: Template file name, e.g. 'weekly_report.html'
+            context: Template variables
+            locale: Locale of the recipient (keys the fragment cache)
+            currency: Currency amounts are formatted in
+
+        Returns:
+            Rendered template
+        """
+        start = time.perf_counter()
+        result = self._templates[name].render(context, locale=locale, currency=currency)
+        self._record(name, time.perf_counter() - start)
+        return result
+
+    def render_stats(self) -> Dict[str, Dict[str, float]]:
+        """Renders, average and slowest render time (ms) per template"""
+        with self._lock:
+            return {
+                name: {
+                    'count': t['count'],
+                    'avg_ms': round(t['total_ms'] / t['count'], 3),
+                    'max_ms': round(t['max_ms'], 3),
+                }
+                for name, t in self.timings.items()
+            }
+
+    @pass_context
+    def _fragment(self, context, name: str, **params) -> Markup:
+        """Static section, rendered once per locale, currency and parameters"""
+        locale = context.get('locale', DEFAULT_LOCALE)
+        currency = context.get('currency', 'USD')
+        key = (name, locale, currency, tuple(sorted(params.items())))
+        fragment = self._fragments.get(key)
+        if fragment is None:
+            fragment = Markup(self._templates[f"fragments/{name}"].render(params, locale=locale, currency=currency))
+            with self._lock:
+                self._fragments[key] = fragment
+        return fragment
+
+    def _record(self, name: str, seconds: float):
+        ms = seconds * 1000
+        with self._lock:
+            t = self.timings.setdefault(name, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            t['count'] += 1
+            t['total_ms'] += ms
+            t['max_ms'] = max(t['max_ms'], ms)
+        logger.debug(f"Rendered email template {name} in {ms:.2f}ms")
+
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+
+def get_email_renderer() -> EmailTemplateRenderer:
+    """Process-wide renderer, created on first use (also inside pool workers)"""
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = EmailTemplateRenderer()
+        return _renderer
+
+
+def _render_pair(name: str, context: Dict[str, Any], currency: str = 'USD') -> Tuple[str, str]:
+    renderer = get_email_renderer()
+    return (renderer.render(f"{name}.html", context, currency=currency),
+            renderer.render(f"{name}.txt", context, currency=currency))
+
+
+def build_weekly_report_email(user_name: str, report: Dict) -> RenderedEmail:
+    """Subject, HTML and text of the weekly report email"""
+    html, text = _render_pair('weekly_report', {
+        'user_name': user_name,
+        'period': report['period'],
+        'summary': report['summary'],
+        'insights': report['insights'],
+        'achievements': report['achievements'],
+        'recommendations': report['recommendations'],
+    }, report.get('currency', 'USD'))
+    return f"Your Weekly Financial Report - Week of {report['period']['start']}", html, text
+
+
+def build_monthly_report_email(user_name: str, report: Dict) -> RenderedEmail:
+    """Subject, HTML and text of the monthly report email"""
+    period = report['period']
+    html, text = _render_pair('monthly_report', {
+        'user_name': user_name,
+        'period': period,
+        'summary': report['summary'],
+        'insights': report['insights'],
+        'achievements': report['achievements'],
+        'recommendations': report['recommendations'],
+    }, report.get('currency', 'USD'))
+    return f"Your Monthly Financial Report - {period['month_name']} {period['year']}", html, text
+
+
+def build_annual_report_email(user_name: str, report: Dict) -> RenderedEmail:
+    """Subject, HTML and text of the annual report email"""
+    html, text = _render_pair('annual_report', {
+        'user_name': user_name,
+        'period': report['period'],
+        'summary': report['summary'],
+    }, report.get('currency', 'USD'))
+    return f"Your Annual Financial Report - {report['period']['year']}", html, text
+
+
+def build_confirmation_email(confirmation_url: str) -> RenderedEmail:
+    """Subject, HTML and text of the email address confirmation"""
+    html, text = _render_pair('confirmation', {'confirmation_url': confirmation_url})
+    return "Confirm Your Email - Budget Pulse", html, text
+
+
+def build_password_reset_email(reset_url: str) -> RenderedEmail:
+    """Subject, HTML and text of the password reset email"""
+    html, text = _render_pair('password_reset', {'reset_url': reset_url})
+    return "Reset Your Password - Budget Pulse", html, text
+
+
+REPORT_EMAIL_BUILDERS: Dict[str, Callable[[str, Dict], RenderedEmail]] = {
+    'weekly': build_weekly_report_email,
+    'monthly': build_monthly_report_email,
+    'annual': build_annual_report_email,
+}
+
+
+def build_report_email(kind: str, user_name: str, report: Dict) -> RenderedEmail:
+    """Report email of the given kind ('weekly', 'monthly', 'annual'); picklable for process pools"""
+    return REPORT_EMAIL_BUILDERS[kind](user_name, report)
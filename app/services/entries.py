@@ -18,7 +18,8 @@ from app.core.currency import currency_service
 from app.core.parsers import parse_date as parse_date_util, parse_category_id as parse_category_id_util
 from app.core.pagination import calculate_pagination_info as calculate_pagination_info_util
 from app.services.user_preferences import user_preferences_service
-from app.services.report_status_service import ReportStatusService
+from app.ai.services.anomaly_detection import AnomalyDetectionService
+from app.services.payment_history_service import PaymentHistoryService
 
 
 class EntriesService:
@@ -312,9 +313,11 @@ class EntriesService:
         db.commit()
         db.refresh(entry)
 
-        # Mark all reports as new when a new entry is created
-        status_service = ReportStatusService(db)
-        status_service.mark_all_reports_as_new(user_id)
+        # Flag unusual expenses against the user's persisted anomaly model (no refit)
+        AnomalyDetectionService(db).score_new_entry(entry)
+
+        # Suggest links to the user's recurring payments for just this entry
+        PaymentHistoryService(db).match_new_entry(entry)
 
         return entry
 
@@ -2,18 +2,61 @@
 Excel Export Service for generating detailed financial reports
 """
 import io
+import tempfile
 from datetime import date, datetime
-from typing import List, Optional
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
 from openpyxl.utils import get_column_letter
+from sqlalchemy import Select, select
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 
 from app.models.entry import Entry
 from app.models.category import Category
 from app.core.currency import CurrencyService
 from app.services.user_preferences import UserPreferencesService
 
+# Rows fetched per round trip from the server-side cursor
+EXPORT_CHUNK_SIZE = 5000
+
+# Leading data rows used to size columns (write-only sheets need widths up front)
+WIDTH_SAMPLE_ROWS = 1000
+
+# Streamed exports stay in memory up to this size, then spill to a temporary file
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+STREAM_BLOCK_SIZE = 64 * 1024
+
+
+def _styled_cell(ws, value, **styles) -> WriteOnlyCell:
+    cell = WriteOnlyCell(ws, value=value)
+    for name, style in styles.items():
+        setattr(cell, name, style)
+    return cell
+
+
+def _column_widths(rows: List[List[Any]], columns: int, max_width: int) -> List[int]:
+    """Width per column from the longest rendered value in rows, capped at max_width"""
+    widths = [0] * columns
+    for row in rows:
+        for index, value in enumerate(row[:columns]):
+            if value is not None:
+                widths[index] = max(widths[index], len(str(value)))
+    return [min(width + 2, max_width) for width in widths]
+
+
+def _iter_file(file: BinaryIO, block_size: int) -> Iterator[bytes]:
+    """Yield a file in blocks and close it once consumed (or abandoned)"""
+    try:
+        while True:
+            block = file.read(block_size)
+            if not block:
+                break
+            yield block
+    finally:
+        file.close()
+
 
 class ExcelExportService:
     def __init__(self):
@@ -43,168 +86,241 @@ class ExcelExportService:
         Returns:
             BytesIO object containing the Excel file
         """
-        # Get user currency
-        user_currency = self.user_preferences_service.get_user_currency(db, user_id)
+        excel_buffer = io.BytesIO()
+        await self._write_in_threadpool(
+            excel_buffer, db, user_id, start_date, end_date, category_id, report_type
+        )
+        excel_buffer.seek(0)
         
-        # Build query
-        query = db.query(Entry).filter(Entry.user_id == user_id)
+        return excel_buffer
+    
+    async def stream_entries_to_excel(
+        self,
+        db: Session,
+        user_id: int,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        category_id: Optional[int] = None,
+        report_type: str = "all"
+    ) -> Iterator[bytes]:
+        """
+        Build the entries workbook into a spooled temporary file and stream it back
+        
+        The workbook is written before this returns (so the session is not used while
+        the response streams); the file spills to disk past SPOOL_MAX_BYTES.
+        
+        Returns:
+            Iterator of byte blocks suitable for StreamingResponse
+        """
+        spool = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES)
+        try:
+            await self._write_in_threadpool(
+                spool, db, user_id, start_date, end_date, category_id, report_type
+            )
+        except Exception:
+            spool.close()
+            raise
+        
+        spool.seek(0)
+        return _iter_file(spool, STREAM_BLOCK_SIZE)
+    
+    def _entries_query(
+        self,
+        user_id: int,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        category_id: Optional[int] = None,
+        report_type: str = "all"
+    ) -> Select:
+        """Exported entry columns (no ORM objects), newest first"""
+        query = (
+            select(
+                Entry.date, Entry.type, Category.name, Entry.description,
+                Entry.amount, Entry.currency_code, Entry.note
+            )
+            .join(Category, Entry.category_id == Category.id)
+            .where(Entry.user_id == user_id)
+        )
         
         # Apply date filters
         if start_date:
-            query = query.filter(Entry.date >= start_date)
+            query = query.where(Entry.date >= start_date)
         if end_date:
-            query = query.filter(Entry.date <= end_date)
+            query = query.where(Entry.date <= end_date)
         
         # Apply category filter
         if category_id:
-            query = query.filter(Entry.category_id == category_id)
+            query = query.where(Entry.category_id == category_id)
         
         # Apply type filter
         if report_type in ["income", "expense"]:
-            query = query.filter(Entry.type == report_type)
+            query = query.where(Entry.type == report_type)
         
-        # Get entries with category information
-        entries = query.join(Category, Entry.category_id == Category.id).order_by(Entry.date.desc()).all()
-        
-        # Create workbook
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Financial Report"
+        return query.order_by(Entry.date.desc(), Entry.id.desc())
+    
+    async def _write_in_threadpool(
+        self,
+        output: BinaryIO,
+        db: Session,
+        user_id: int,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        category_id: Optional[int] = None,
+        report_type: str = "all"
+    ) -> None:
+        """
+        Resolve the export's conversion rates, then write the workbook in the threadpool
         
-        # Define styles
-        header_font = Font(bold=True, color="FFFFFF")
-        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
-        border = Border(
-            left=Side(style='thin'),
-            right=Side(style='thin'),
-            top=Side(style='thin'),
-            bottom=Side(style='thin')
+        The cursor reads, row appends and save are all blocking, so they stay off the
+        event loop; only the exchange-rate lookup is awaited here.
+        """
+        def currencies():
+            user_currency = self.user_preferences_service.get_user_currency(db, user_id)
+            query = self._entries_query(user_id, start_date, end_date, category_id, report_type)
+            codes = db.execute(query.with_only_columns(Entry.currency_code).distinct().order_by(None)).scalars()
+            return user_currency, list(codes)
+        
+        user_currency, codes = await run_in_threadpool(currencies)
+        multipliers = await self.currency_service.conversion_rates(codes, user_currency)
+        await run_in_threadpool(
+            self.write_entries_workbook, output, db, user_id, user_currency, multipliers,
+            start_date, end_date, category_id, report_type
         )
-        center_alignment = Alignment(horizontal="center", vertical="center")
+    
+    def write_entries_workbook(
+        self,
+        output: BinaryIO,
+        db: Session,
+        user_id: int,
+        user_currency: str,
+        multipliers: Dict[str, float],
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        category_id: Optional[int] = None,
+        report_type: str = "all"
+    ) -> None:
+        """
+        Write the entries report as a write-only workbook into a binary file object
         
-        # Add title and metadata
-        ws['A1'] = "Financial Report"
-        ws['A1'].font = Font(bold=True, size=16)
-        ws.merge_cells('A1:H1')
+        Rows are read from a server-side cursor in EXPORT_CHUNK_SIZE chunks and appended
+        straight to the sheet, so memory stays flat regardless of the number of entries.
+        Column widths are sized from the first WIDTH_SAMPLE_ROWS rows, since write-only
+        sheets need them before any row is written. Blocking; call it from a worker thread.
         
-        # Add report information
-        row = 3
-        ws[f'A{row}'] = "Report Generated:"
-        ws[f'B{row}'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-        row += 1
+        Args:
+            multipliers: Conversion multiplier to user_currency per currency code
+                (CurrencyService.conversion_rates)
+        """
+        query = self._entries_query(user_id, start_date, end_date, category_id, report_type)
         
-        ws[f'A{row}'] = "Date Range:"
+        # Report information
         if start_date and end_date:
-            ws[f'B{row}'] = f"{start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}"
+            date_range = f"{start_date.strftime('%Y-%m-%d')} to {end_date.strftime('%Y-%m-%d')}"
         elif start_date:
-            ws[f'B{row}'] = f"From {start_date.strftime('%Y-%m-%d')}"
+            date_range = f"From {start_date.strftime('%Y-%m-%d')}"
         elif end_date:
-            ws[f'B{row}'] = f"Until {end_date.strftime('%Y-%m-%d')}"
+            date_range = f"Until {end_date.strftime('%Y-%m-%d')}"
         else:
-            ws[f'B{row}'] = "All time"
-        row += 1
+            date_range = "All time"
         
-        ws[f'A{row}'] = "Category:"
         if category_id:
             category = db.query(Category).filter(Category.id == category_id).first()
-            ws[f'B{row}'] = category.name if category else "Unknown"
+            category_label = category.name if category else "Unknown"
         else:
-            ws[f'B{row}'] = "All Categories"
-        row += 1
-        
-        ws[f'A{row}'] = "Type:"
-        ws[f'B{row}'] = report_type.title() if report_type != "all" else "All Types"
-        row += 1
-        
-        ws[f'A{row}'] = "Currency:"
-        ws[f'B{row}'] = user_currency
-        row += 2
+            category_label = "All Categories"
+        
+        info_rows = [
+            ["Report Generated:", datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
+            ["Date Range:", date_range],
+            ["Category:", category_label],
+            ["Type:", report_type.title() if report_type != "all" else "All Types"],
+            ["Currency:", user_currency],
+        ]
         
-        # Add headers
         headers = [
             "Date", "Type", "Category", "Description", 
             "Amount (Original)", "Currency", "Amount (Converted)", "Notes"
         ]
         
-        for col, header in enumerate(headers, 1):
-            cell = ws.cell(row=row, column=col, value=header)
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = center_alignment
-            cell.border = border
+        # Server-side cursor, fetched EXPORT_CHUNK_SIZE rows at a time
+        chunks = db.execute(query, execution_options={"yield_per": EXPORT_CHUNK_SIZE}).partitions()
         
-        row += 1
+        def to_rows(chunk):
+            rows = []
+            for entry_date, entry_type, category_name, description, amount, currency_code, note in chunk:
+                converted_amount = float(amount or 0) * multipliers.get(currency_code, 1.0)
+                rows.append([
+                    entry_date.strftime("%Y-%m-%d"), entry_type.title(), category_name, description,
+                    amount, currency_code, converted_amount, note or ""
+                ])
+            return rows
         
-        # Add data rows
-        total_income = 0
-        total_expense = 0
+        first_chunk = to_rows(next(chunks, []))
         
-        for entry in entries:
-            # Convert amount to user currency
-            converted_amount = await self.currency_service.convert_amount(
-                entry.amount, entry.currency_code, user_currency
-            )
-            
-            # Add row data
-            ws.cell(row=row, column=1, value=entry.date.strftime("%Y-%m-%d"))
-            ws.cell(row=row, column=2, value=entry.type.title())
-            ws.cell(row=row, column=3, value=entry.category.name)
-            ws.cell(row=row, column=4, value=entry.description)
-            ws.cell(row=row, column=5, value=entry.amount)
-            ws.cell(row=row, column=6, value=entry.currency_code)
-            ws.cell(row=row, column=7, value=round(converted_amount, 2))
-            ws.cell(row=row, column=8, value=entry.note or "")
-            
-            # Apply borders to all cells in the row
-            for col in range(1, 9):
-                ws.cell(row=row, column=col).border = border
-            
-            # Sum totals
-            if entry.type.lower() == "income":
-                total_income += converted_amount
-            else:
-                total_expense += converted_amount
-            
-            row += 1
+        # Create workbook
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Financial Report")
         
-        # Add summary section
-        row += 1
-        ws.cell(row=row, column=1, value="SUMMARY").font = Font(bold=True, size=14)
-        row += 1
+        # Column widths from the fixed cells and a sample of data rows
+        sample = [["Financial Report"], *info_rows, headers, ["Total Income:"], ["Total Expense:"], ["Net Balance:"]]
+        sample.extend(first_chunk[:WIDTH_SAMPLE_ROWS])
+        for column, width in enumerate(_column_widths(sample, len(headers), 50), 1):
+            ws.column_dimensions[get_column_letter(column)].width = width
         
-        ws.cell(row=row, column=1, value="Total Income:")
-        ws.cell(row=row, column=2, value=round(total_income, 2))
-        ws.cell(row=row, column=3, value=user_currency)
-        row += 1
+        # Define styles
+        header_font = Font(bold=True, color="FFFFFF")
+        header_fill = PatternFill(start_color="366092", end_color="366092", fill_type="solid")
+        border = Border(
+            left=Side(style='thin'),
+            right=Side(style='thin'),
+            top=Side(style='thin'),
+            bottom=Side(style='thin')
+        )
+        center_alignment = Alignment(horizontal="center", vertical="center")
         
-        ws.cell(row=row, column=1, value="Total Expense:")
-        ws.cell(row=row, column=2, value=round(total_expense, 2))
-        ws.cell(row=row, column=3, value=user_currency)
-        row += 1
+        # Data cells share one registered style instead of hashing a Border per cell
+        wb.add_named_style(NamedStyle(name="entry_cell", border=border))
         
-        ws.cell(row=row, column=1, value="Net Balance:")
-        ws.cell(row=row, column=2, value=round(total_income - total_expense, 2))
-        ws.cell(row=row, column=3, value=user_currency)
+        # Add title and metadata
+        ws.append([_styled_cell(ws, "Financial Report", font=Font(bold=True, size=16))])
+        ws.merged_cells.add('A1:H1')
+        ws.append([])
+        for info_row in info_rows:
+            ws.append(info_row)
+        ws.append([])
         
-        # Auto-adjust column widths
-        for column in ws.columns:
-            max_length = 0
-            column_letter = get_column_letter(column[0].column)
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = min(max_length + 2, 50)
-            ws.column_dimensions[column_letter].width = adjusted_width
+        # Add headers
+        ws.append([
+            _styled_cell(ws, header, font=header_font, fill=header_fill, alignment=center_alignment, border=border)
+            for header in headers
+        ])
         
-        # Save to BytesIO
-        excel_buffer = io.BytesIO()
-        wb.save(excel_buffer)
-        excel_buffer.seek(0)
+        # Add data rows
+        total_income = 0
+        total_expense = 0
         
-        return excel_buffer
+        rows = first_chunk
+        while rows:
+            for values in rows:
+                converted_amount = values[6]
+                values[6] = round(converted_amount, 2)
+                ws.append([_styled_cell(ws, value, style="entry_cell") for value in values])
+                
+                # Sum totals
+                if values[1] == "Income":
+                    total_income += converted_amount
+                else:
+                    total_expense += converted_amount
+            rows = to_rows(next(chunks, []))
+        
+        # Add summary section
+        ws.append([])
+        ws.append([_styled_cell(ws, "SUMMARY", font=Font(bold=True, size=14))])
+        ws.append(["Total Income:", round(total_income, 2), user_currency])
+        ws.append(["Total Expense:", round(total_expense, 2), user_currency])
+        ws.append(["Net Balance:", round(total_income - total_expense, 2), user_currency])
+        
+        wb.save(output)
     
     async def export_category_summary_to_excel(
         self,
@@ -2,12 +2,15 @@
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_, or_
+from sqlalchemy import func, and_, or_, insert
 
 from app.models.financial_goal import FinancialGoal, GoalProgressLog, GoalType, GoalStatus
 from app.models.entry import Entry
 from app.models.category import Category
 
+# Users whose goals the nightly refresh recomputes per batch
+GOAL_REFRESH_CHUNK_SIZE = 500
+
 
 class GoalService:
     """Service for managing financial goals and tracking progress"""
@@ -221,57 +224,180 @@ class GoalService:
             FinancialGoal.status == GoalStatus.ACTIVE
         ).all()
 
-        updated_goals = []
+        logs = []
+        updated_goals = self._apply_spending_totals([user_id], spending_goals, datetime.utcnow(), logs)
+
+        if updated_goals:
+            self._insert_progress_logs(logs)
+            self.db.commit()
+
+        return updated_goals
+
+    def refresh_goals(self, user_ids: List[int]) -> Dict[str, List[FinancialGoal]]:
+        """
+        Recompute spending limit goals and fail overdue goals for a batch of users
+
+        Active goals are loaded in one query and the spending of every
+        spending limit goal window in one grouped query; progress logs are
+        bulk-inserted and everything is committed once.
+
+        Args:
+            user_ids: Users whose active goals to refresh
+
+        Returns:
+            Dict with the goals still 'active' afterwards, the 'updated'
+            spending limit goals and the 'failed' goals
+        """
+        goals = self.db.query(FinancialGoal).filter(
+            FinancialGoal.user_id.in_(user_ids),
+            FinancialGoal.status == GoalStatus.ACTIVE
+        ).order_by(FinancialGoal.user_id, FinancialGoal.created_at.desc()).all()
+
         now = datetime.utcnow()
+        logs = []
+        spending_goals = [g for g in goals if g.goal_type == GoalType.SPENDING_LIMIT]
+        updated_goals = self._apply_spending_totals(user_ids, spending_goals, now, logs)
+        self._apply_overdue(goals, now, logs)
+        result = {
+            'active': [g for g in goals if g.status == GoalStatus.ACTIVE],
+            'updated': updated_goals,
+            'failed': [g for g in goals if g.status == GoalStatus.FAILED],
+        }
+
+        if logs:
+            self._insert_progress_logs(logs)
+            self.db.commit()
+
+        return result
+
+    def refresh_all_goals(self, chunk_size: int = GOAL_REFRESH_CHUNK_SIZE) -> Dict[str, int]:
+        """
+        Refresh the active goals of every user, chunk_size users at a time
+
+        Args:
+            chunk_size: Users refreshed (and committed) per batch
+
+        Returns:
+            Counts of users, updated goals, failed goals and failed batches
+        """
+        totals = {'users': 0, 'updated': 0, 'failed': 0, 'errors': 0}
+        last_user_id = 0
+
+        while True:
+            user_ids = [row[0] for row in self.db.query(FinancialGoal.user_id).filter(
+                FinancialGoal.status == GoalStatus.ACTIVE,
+                FinancialGoal.user_id > last_user_id
+            ).distinct().order_by(FinancialGoal.user_id).limit(chunk_size)]
+            if not user_ids:
+                break
+
+            try:
+                result = self.refresh_goals(user_ids)
+                totals['updated'] += len(result['updated'])
+                totals['failed'] += len(result['failed'])
+            except Exception as e:
+                print(f"❌ Error refreshing goals for users {user_ids[0]}-{user_ids[-1]}: {e}")
+                self.db.rollback()
+                totals['errors'] += 1
+
+            totals['users'] += len(user_ids)
+            last_user_id = user_ids[-1]
+            # Keep the identity map from growing across chunks
+            self.db.expunge_all()
+
+        return totals
+
+    def _spending_totals(self, user_ids: List[int]) -> Dict[int, float]:
+        """Expense totals of every active spending limit goal window, by goal id"""
+        in_window = and_(
+            Entry.user_id == FinancialGoal.user_id,
+            Entry.type == "expense",
+            or_(FinancialGoal.category_id.is_(None), Entry.category_id == FinancialGoal.category_id),
+            or_(FinancialGoal.start_date.is_(None), Entry.date >= func.date(FinancialGoal.start_date)),
+            or_(FinancialGoal.target_date.is_(None), Entry.date <= func.date(FinancialGoal.target_date))
+        )
+        rows = self.db.query(FinancialGoal.id, func.sum(Entry.amount)).join(Entry, in_window).filter(
+            FinancialGoal.user_id.in_(user_ids),
+            FinancialGoal.goal_type == GoalType.SPENDING_LIMIT,
+            FinancialGoal.status == GoalStatus.ACTIVE
+        ).group_by(FinancialGoal.id).all()
+        return {goal_id: total for goal_id, total in rows}
+
+    def _apply_spending_totals(
+        self,
+        user_ids: List[int],
+        spending_goals: List[FinancialGoal],
+        now: datetime,
+        logs: List[Dict]
+    ) -> List[FinancialGoal]:
+        """Set spending limit goals to their actual spending, failing exceeded ones"""
+        if not spending_goals:
+            return []
+
+        totals = self._spending_totals(user_ids)
+        updated_goals = []
 
         for goal in spending_goals:
-            # Calculate current spending for the category
-            query = self.db.query(func.sum(Entry.amount)).filter(
-                Entry.user_id == user_id,
-                Entry.type == "expense"
-            )
+            current_spending = totals.get(goal.id) or 0
+            if current_spending == goal.current_amount:
+                continue
 
-            # Filter by category if specified
-            if goal.category_id:
-                query = query.filter(Entry.category_id == goal.category_id)
+            previous_amount = goal.current_amount
+            goal.current_amount = current_spending
+            self._update_progress_percentage(goal)
 
-            # Filter by goal timeline
-            if goal.start_date:
-                query = query.filter(Entry.date >= goal.start_date)
-            if goal.target_date:
-                query = query.filter(Entry.date <= goal.target_date)
-
-            current_spending = query.scalar() or 0
-
-            # Update goal progress
-            if current_spending != goal.current_amount:
-                previous_amount = goal.current_amount
-                goal.current_amount = current_spending
-                self._update_progress_percentage(goal)
-
-                # Check if exceeded limit
-                if current_spending > goal.target_amount and goal.status == GoalStatus.ACTIVE:
-                    goal.status = GoalStatus.FAILED
-                    goal.completed_date = now
-
-                goal.updated_at = now
-                updated_goals.append(goal)
-
-                # Log progress
-                self._log_progress(
-                    goal.id,
-                    previous_amount,
-                    current_spending,
-                    current_spending - previous_amount,
-                    "Automatic update from transactions",
-                    is_manual=False
-                )
+            # Check if exceeded limit
+            if current_spending > goal.target_amount:
+                goal.status = GoalStatus.FAILED
+                goal.completed_date = now
 
-        if updated_goals:
-            self.db.commit()
+            goal.updated_at = now
+            updated_goals.append(goal)
+            logs.append(self._progress_row(
+                goal.id, previous_amount, current_spending, current_spending - previous_amount,
+                "Automatic update from transactions", now
+            ))
 
         return updated_goals
 
+    def _apply_overdue(self, goals: List[FinancialGoal], now: datetime, logs: List[Dict]) -> List[FinancialGoal]:
+        """Fail active goals whose target date passed before they were reached"""
+        failed_goals = []
+        for goal in goals:
+            if (goal.status != GoalStatus.ACTIVE or goal.target_date is None or goal.target_date >= now
+                    or goal.current_amount >= goal.target_amount):
+                continue
+
+            goal.status = GoalStatus.FAILED
+            goal.completed_date = now
+            goal.updated_at = now
+            failed_goals.append(goal)
+            logs.append(self._progress_row(
+                goal.id, float(goal.current_amount), float(goal.current_amount), 0,
+                f"Goal marked as failed - deadline passed ({goal.target_date.strftime('%Y-%m-%d')})", now
+            ))
+
+        return failed_goals
+
+    @staticmethod
+    def _progress_row(goal_id: int, previous_amount: float, new_amount: float, change_amount: float,
+                      note: str, recorded_at: datetime) -> Dict:
+        """An automatic progress log, as a row for _insert_progress_logs"""
+        return {
+            'goal_id': goal_id,
+            'previous_amount': previous_amount,
+            'new_amount': new_amount,
+            'change_amount': change_amount,
+            'note': note,
+            'is_manual': False,
+            'recorded_at': recorded_at,
+        }
+
+    def _insert_progress_logs(self, rows: List[Dict]):
+        """Bulk-insert progress log rows (commit happens in calling function)"""
+        if rows:
+            self.db.execute(insert(GoalProgressLog), rows)
+
     def _update_progress_percentage(self, goal: FinancialGoal):
         """Calculate and update progress percentage"""
         if goal.target_amount > 0:
@@ -314,24 +440,11 @@ class GoalService:
             FinancialGoal.current_amount < FinancialGoal.target_amount
         ).all()
 
-        failed_goals = []
-        for goal in overdue_goals:
-            goal.status = GoalStatus.FAILED
-            goal.completed_date = now
-            goal.updated_at = now
-            failed_goals.append(goal)
-
-            # Log the failure
-            self._log_progress(
-                goal.id,
-                float(goal.current_amount),
-                float(goal.current_amount),
-                0,
-                f"Goal marked as failed - deadline passed ({goal.target_date.strftime('%Y-%m-%d')})",
-                is_manual=False
-            )
+        logs = []
+        failed_goals = self._apply_overdue(overdue_goals, now, logs)
 
         if failed_goals:
+            self._insert_progress_logs(logs)
             self.db.commit()
 
         return failed_goals
@@ -369,8 +482,8 @@ class GoalService:
         return goal
 
     def get_goals_summary_for_dashboard(self, user_id: int) -> Dict:
-        """Get a summary of goals for dashboard widget"""
-        active_goals = self.get_user_goals(user_id, status=GoalStatus.ACTIVE)
+        """Get a summary of goals for dashboard widget, refreshing them first"""
+        active_goals = self.refresh_goals([user_id])['active']
 
         if not active_goals:
             return {
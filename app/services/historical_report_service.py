@@ -5,12 +5,13 @@ Manages saving and retrieving historical financial reports.
 """
 
 import json
-from datetime import date, datetime
-from typing import Dict, List, Optional
+from datetime import date, datetime, timedelta
+from typing import Callable, Dict, List, Optional
 from sqlalchemy.orm import Session
 from sqlalchemy import and_, desc
 
 from app.models.historical_report import HistoricalReport
+from app.services.data_version import get_data_version
 
 
 class HistoricalReportService:
@@ -27,7 +28,8 @@ class HistoricalReportService:
         period_start: date,
         period_end: date,
         report_data: Dict,
-        currency_code: str = 'USD'
+        currency_code: str = 'USD',
+        data_version: Optional[int] = None
     ) -> HistoricalReport:
         """
         Save a generated report to historical storage
@@ -40,6 +42,7 @@ class HistoricalReportService:
             period_end: End date of report period
             report_data: Complete report data dictionary
             currency_code: Currency used in report
+            data_version: User data version the report was built from
 
         Returns:
             HistoricalReport object
@@ -71,6 +74,7 @@ class HistoricalReportService:
             existing.generated_at = datetime.utcnow()
             existing.period_start = period_start
             existing.period_end = period_end
+            existing.data_version = data_version
             self.db.commit()
             self.db.refresh(existing)
             return existing
@@ -87,13 +91,134 @@ class HistoricalReportService:
                 total_expenses=total_expenses,
                 net_savings=net_savings,
                 transaction_count=transaction_count,
-                currency_code=currency_code
+                currency_code=currency_code,
+                data_version=data_version
             )
             self.db.add(report)
             self.db.commit()
             self.db.refresh(report)
             return report
 
+    @staticmethod
+    def period_key(report_type: str, report: Dict) -> str:
+        """Period identifier of a generated report ('2024-W45', '2024-10', '2024')"""
+        if report_type == 'weekly':
+            return datetime.strptime(report['period']['start'], '%Y-%m-%d').date().strftime('%Y-W%W')
+        if report_type == 'monthly':
+            return f"{report['period']['year']}-{report['period']['month']:02d}"
+        return str(report['period']['year'])
+
+    @staticmethod
+    def current_period_key(report_type: str, today: Optional[date] = None) -> str:
+        """Period identifier of the weekly, monthly or annual report covering today"""
+        today = today or date.today()
+        if report_type == 'weekly':
+            return (today - timedelta(days=today.weekday())).strftime('%Y-W%W')
+        if report_type == 'monthly':
+            return f"{today.year}-{today.month:02d}"
+        return str(today.year)
+
+    def save_generated_report(self, user_id: int, report_type: str, report: Dict,
+                              data_version: Optional[int] = None) -> HistoricalReport:
+        """
+        Save a freshly generated weekly, monthly or annual report under its period
+
+        Args:
+            user_id: User ID
+            report_type: Type of report ('weekly', 'monthly', 'annual')
+            report: Report dictionary as returned by the report generators
+            data_version: User data version read before generating the report
+                (defaults to the current one)
+
+        Returns:
+            HistoricalReport object
+        """
+        if data_version is None:
+            data_version = get_data_version(self.db, user_id)
+
+        return self.save_report(
+            user_id=user_id,
+            report_type=report_type,
+            report_period=self.period_key(report_type, report),
+            period_start=datetime.strptime(report['period']['start'], '%Y-%m-%d').date(),
+            period_end=datetime.strptime(report['period']['end'], '%Y-%m-%d').date(),
+            report_data=report,
+            currency_code=report.get('currency', 'USD'),
+            data_version=data_version
+        )
+
+    def get_snapshot(self, user_id: int, report_type: str, report_period: str,
+                     data_version: int, params: Optional[Dict] = None) -> Optional[Dict]:
+        """
+        Stored report for a period, if it is still what generating it now would return
+
+        A snapshot is current when it was built from the user's current data version
+        with the same report options, and either its period had already ended or it
+        was generated today (open periods also depend on the date, e.g. days elapsed
+        in the month).
+
+        Args:
+            user_id: User ID
+            report_type: Type of report ('weekly', 'monthly', 'annual')
+            report_period: Period identifier
+            data_version: Current data version of the user
+            params: Report options the snapshot must have been generated with,
+                as recorded in the report (e.g. {'show_income': False})
+
+        Returns:
+            Report data dictionary or None if there is no current snapshot
+        """
+        report = self.db.query(HistoricalReport).filter(
+            and_(
+                HistoricalReport.user_id == user_id,
+                HistoricalReport.report_type == report_type,
+                HistoricalReport.report_period == report_period,
+                HistoricalReport.data_version == data_version
+            )
+        ).first()
+
+        if report is None:
+            return None
+
+        generated_on = report.generated_at.date()
+        if report.period_end >= generated_on and generated_on != datetime.utcnow().date():
+            return None
+
+        data = json.loads(report.report_data)
+        # The row is shared by every variant of the period (e.g. a background job
+        # generating the weekly report with income), so only serve matching options
+        if any(data.get(key) != value for key, value in (params or {}).items()):
+            return None
+
+        return data
+
+    def get_or_generate_current(self, user_id: int, report_type: str, generate: Callable[[], Dict],
+                                params: Optional[Dict] = None) -> Dict:
+        """
+        Report for the current period, served from its snapshot while the data is unchanged
+
+        Args:
+            user_id: User ID
+            report_type: Type of report ('weekly', 'monthly', 'annual')
+            generate: Builds the report when there is no current snapshot
+            params: Report options generate() uses, as recorded in the report
+
+        Returns:
+            Report data dictionary
+        """
+        # Read before generating: a write racing the generation leaves an older
+        # stamp behind, so the next view regenerates instead of trusting it.
+        data_version = get_data_version(self.db, user_id)
+
+        snapshot = self.get_snapshot(user_id, report_type, self.current_period_key(report_type), data_version,
+                                     params)
+        if snapshot is not None:
+            return snapshot
+
+        report = generate()
+        self.save_generated_report(user_id, report_type, report, data_version=data_version)
+        return report
+
     def get_report(
         self,
         user_id: int,
@@ -130,6 +255,34 @@ class HistoricalReportService:
             return data
         return None
 
+    def get_report_by_id(self, user_id: int, report_id: int) -> Optional[Dict]:
+        """
+        Retrieve a historical report by ID
+
+        Args:
+            user_id: User ID (for security)
+            report_id: Report ID
+
+        Returns:
+            Report data dictionary or None if not found
+        """
+        report = self.db.query(HistoricalReport).filter(
+            and_(
+                HistoricalReport.id == report_id,
+                HistoricalReport.user_id == user_id
+            )
+        ).first()
+
+        if report:
+            data = json.loads(report.report_data)
+            data['_metadata'] = {
+                'generated_at': report.generated_at.isoformat(),
+                'is_historical': True,
+                'report_id': report.id
+            }
+            return data
+        return None
+
     def list_reports(
         self,
         user_id: int,
@@ -3,12 +3,10 @@
 from datetime import date, datetime, timedelta
 from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func, and_
 
-from app.models.entry import Entry
 from app.models.user_preferences import UserPreferences
-from app.models.category import Category
 from app.core.currency import CurrencyService
+from app.services.period_reports import PeriodFrame, load_period_frame
 
 
 class MonthlyReportService:
@@ -51,6 +49,10 @@ class MonthlyReportService:
         user_prefs = self.db.query(UserPreferences).filter(UserPreferences.user_id == user_id).first()
         user_currency = user_prefs.currency_code if user_prefs and user_prefs.currency_code else 'USD'
         
+        # One grouped fetch covers the month, the previous month and the
+        # trailing 30 days used by achievements and recommendations
+        frame = load_period_frame(self.db, user_id, min(prev_month_start, month_start - timedelta(days=30)), month_end)
+        
         # Generate report components (monthly reports show income)
         report = {
             'period': {
@@ -61,41 +63,31 @@ class MonthlyReportService:
                 'month_name': month_start.strftime('%B')
             },
             'currency': user_currency,
-            'summary': self._generate_summary(user_id, month_start, month_end, prev_month_start, prev_month_end),
-            'category_analysis': self._analyze_categories(user_id, month_start, month_end, prev_month_start, prev_month_end),
-            'daily_breakdown': self._daily_breakdown(user_id, month_start, month_end),
-            'insights': self._generate_insights(user_id, month_start, month_end, prev_month_start, prev_month_end),
-            'achievements': self._detect_achievements(user_id, month_start, month_end),
-            'recommendations': self._generate_recommendations(user_id, month_start, month_end),
+            'summary': self._generate_summary(frame, month_start, month_end, prev_month_start, prev_month_end),
+            'category_analysis': self._analyze_categories(frame, month_start, month_end, prev_month_start, prev_month_end),
+            'daily_breakdown': self._daily_breakdown(frame, month_start, month_end),
+            'insights': self._generate_insights(frame, month_start, month_end, prev_month_start, prev_month_end),
+            'achievements': self._detect_achievements(frame, month_start, month_end),
+            'recommendations': self._generate_recommendations(frame, month_start, month_end),
             'show_income': True,  # Monthly reports always show income
             'generated_at': datetime.utcnow().isoformat()
         }
         
         return report
     
-    def _generate_summary(self, user_id: int, month_start: date, month_end: date,
+    def _generate_summary(self, frame: PeriodFrame, month_start: date, month_end: date,
                          prev_month_start: date, prev_month_end: date) -> Dict:
         """Generate month summary with comparisons"""
-        # Current month data
-        current_month = self.db.query(Entry).filter(
-            Entry.user_id == user_id,
-            Entry.date >= month_start,
-            Entry.date <= month_end
-        ).all()
-        
-        # Previous month data
-        prev_month = self.db.query(Entry).filter(
-            Entry.user_id == user_id,
-            Entry.date >= prev_month_start,
-            Entry.date <= prev_month_end
-        ).all()
+        current_month = frame.mask(month_start, month_end)
+        prev_month = frame.mask(prev_month_start, prev_month_end)
         
         # Calculate totals
-        current_expenses = sum(float(e.amount) for e in current_month if e.type == 'expense')
-        current_income = sum(float(e.amount) for e in current_month if e.type == 'income')
+        current_expenses = frame.total(current_month & frame.is_expense)
+        current_income = frame.total(current_month & frame.is_income)
         
-        prev_expenses = sum(float(e.amount) for e in prev_month if e.type == 'expense')
-        prev_income = sum(float(e.amount) for e in prev_month if e.type == 'income')
+        prev_expenses = frame.total(prev_month & frame.is_expense)
+        prev_income = frame.total(prev_month & frame.is_income)
+        expense_count = frame.count(current_month & frame.is_expense)
         
         # Calculate changes
         expense_change = ((current_expenses - prev_expenses) / prev_expenses * 100) if prev_expenses > 0 else 0
@@ -114,8 +106,8 @@ class MonthlyReportService:
             'total_income': current_income,
             'net_savings': current_net,
             'savings_rate': savings_rate,
-            'transaction_count': len(current_month),
-            'avg_transaction': current_expenses / len([e for e in current_month if e.type == 'expense']) if any(e.type == 'expense' for e in current_month) else 0,
+            'transaction_count': frame.count(current_month),
+            'avg_transaction': current_expenses / expense_count if expense_count else 0,
             'show_income': True,
             'comparison': {
                 'expense_change_pct': expense_change,
@@ -128,49 +120,30 @@ class MonthlyReportService:
             }
         }
     
-    def _analyze_categories(self, user_id: int, month_start: date, month_end: date,
+    def _analyze_categories(self, frame: PeriodFrame, month_start: date, month_end: date,
                            prev_month_start: date, prev_month_end: date) -> Dict:
         """Analyze spending by category with comparisons"""
-        # Current month by category
-        current_categories = self.db.query(
-            Category.name,
-            func.sum(Entry.amount).label('total'),
-            func.count(Entry.id).label('count')
-        ).join(Entry, Category.id == Entry.category_id).filter(
-            Entry.user_id == user_id,
-            Entry.date >= month_start,
-            Entry.date <= month_end,
-            Entry.type == 'expense'
-        ).group_by(Category.name).all()
-        
-        # Previous month by category
-        prev_categories = self.db.query(
-            Category.name,
-            func.sum(Entry.amount).label('total')
-        ).join(Entry, Category.id == Entry.category_id).filter(
-            Entry.user_id == user_id,
-            Entry.date >= prev_month_start,
-            Entry.date <= prev_month_end,
-            Entry.type == 'expense'
-        ).group_by(Category.name).all()
+        # Expense totals by category, ordered by name
+        current_categories = frame.category_totals(month_start, month_end)
+        prev_categories = frame.category_totals(prev_month_start, prev_month_end)
         
         # Convert to dictionaries for easier comparison
-        prev_dict = {cat.name: float(cat.total) for cat in prev_categories}
+        prev_dict = {name: float(total) for name, total, _ in prev_categories}
         
         # Analyze changes
         increased_spending = []
         decreased_spending = []
         new_spending = []
         
-        for cat in current_categories:
-            amount = float(cat.total)
-            prev_amount = prev_dict.get(cat.name, 0)
+        for name, total, count in current_categories:
+            amount = float(total)
+            prev_amount = prev_dict.get(name, 0)
             
             if prev_amount == 0:
                 new_spending.append({
-                    'category': cat.name,
+                    'category': name,
                     'amount': amount,
-                    'count': cat.count
+                    'count': count
                 })
             else:
                 change_pct = ((amount - prev_amount) / prev_amount * 100)
@@ -178,14 +151,14 @@ class MonthlyReportService:
                 
                 if change_pct > 10:
                     increased_spending.append({
-                        'name': cat.name,
+                        'name': name,
                         'amount': amount,
                         'change_pct': change_pct,
                         'change_amount': change_amount
                     })
                 elif change_pct < -10:
                     decreased_spending.append({
-                        'name': cat.name,
+                        'name': name,
                         'amount': amount,
                         'change_pct': change_pct,
                         'change_amount': change_amount
@@ -198,11 +171,11 @@ class MonthlyReportService:
         # Top spending category
         top_category = None
         if current_categories:
-            top_cat = max(current_categories, key=lambda x: x.total)
+            top_name, top_total, top_count = max(current_categories, key=lambda x: x[1])
             top_category = {
-                'name': top_cat.name,
-                'amount': float(top_cat.total),
-                'count': top_cat.count
+                'name': top_name,
+                'amount': float(top_total),
+                'count': top_count
             }
         
         return {
@@ -213,41 +186,17 @@ class MonthlyReportService:
             'total_categories': len(current_categories)
         }
     
-    def _daily_breakdown(self, user_id: int, month_start: date, month_end: date) -> List[Dict]:
+    def _daily_breakdown(self, frame: PeriodFrame, month_start: date, month_end: date) -> List[Dict]:
         """Get daily breakdown for the month"""
-        daily_data = []
-        current_date = month_start
-        
-        while current_date <= month_end:
-            day_entries = self.db.query(Entry).filter(
-                Entry.user_id == user_id,
-                Entry.date == current_date
-            ).all()
-            
-            expenses = sum(float(e.amount) for e in day_entries if e.type == 'expense')
-            income = sum(float(e.amount) for e in day_entries if e.type == 'income')
-            
-            daily_data.append({
-                'date': current_date.isoformat(),
-                'day_name': current_date.strftime('%A'),
-                'expenses': expenses,
-                'income': income,
-                'net': income - expenses,
-                'transaction_count': len(day_entries),
-                'is_weekend': current_date.weekday() >= 5
-            })
-            
-            current_date += timedelta(days=1)
-        
-        return daily_data
+        return frame.daily_breakdown(month_start, month_end)
     
-    def _generate_insights(self, user_id: int, month_start: date, month_end: date,
+    def _generate_insights(self, frame: PeriodFrame, month_start: date, month_end: date,
                           prev_month_start: date, prev_month_end: date) -> List[str]:
         """Generate natural language insights for monthly report"""
         insights = []
         
-        summary = self._generate_summary(user_id, month_start, month_end, prev_month_start, prev_month_end)
-        category_analysis = self._analyze_categories(user_id, month_start, month_end, prev_month_start, prev_month_end)
+        summary = self._generate_summary(frame, month_start, month_end, prev_month_start, prev_month_end)
+        category_analysis = self._analyze_categories(frame, month_start, month_end, prev_month_start, prev_month_end)
         
         # Expense trend insight
         expense_change = summary['comparison']['expense_change_pct']
@@ -290,11 +239,11 @@ class MonthlyReportService:
         
         return insights
     
-    def _detect_achievements(self, user_id: int, month_start: date, month_end: date) -> List[Dict]:
+    def _detect_achievements(self, frame: PeriodFrame, month_start: date, month_end: date) -> List[Dict]:
         """Detect monthly achievements"""
         achievements = []
         
-        summary = self._generate_summary(user_id, month_start, month_end, 
+        summary = self._generate_summary(frame, month_start, month_end, 
                                        month_start - timedelta(days=30), month_start - timedelta(days=1))
         
         # Savings achievement
@@ -325,13 +274,13 @@ class MonthlyReportService:
         
         return achievements
     
-    def _generate_recommendations(self, user_id: int, month_start: date, month_end: date) -> List[Dict]:
+    def _generate_recommendations(self, frame: PeriodFrame, month_start: date, month_end: date) -> List[Dict]:
         """Generate monthly recommendations"""
         recommendations = []
         
-        summary = self._generate_summary(user_id, month_start, month_end, 
+        summary = self._generate_summary(frame, month_start, month_end, 
                                        month_start - timedelta(days=30), month_start - timedelta(days=1))
-        category_analysis = self._analyze_categories(user_id, month_start, month_end,
+        category_analysis = self._analyze_categories(frame, month_start, month_end,
                                                    month_start - timedelta(days=30), month_start - timedelta(days=1))
         
         # Savings recommendations
@@ -1,22 +1,33 @@
 """
 Payment Analytics Service - Comprehensive payment trends and statistics
+
+All occurrence-based analytics are computed from one dataset per user: each
+occurrence joined with its bill and linked entry, loaded in a single query and
+shared by every method of the service instance, so the analytics dashboard
+takes a constant number of queries however many payments it covers.
 """
 
+from collections import defaultdict
 from datetime import date, datetime, timedelta
 from typing import Dict, List, Any, Optional
-from sqlalchemy import func, extract
-from sqlalchemy.orm import Session
+from sqlalchemy import func
+from sqlalchemy.orm import Session, joinedload
 
 from app.models.recurring_payment import RecurringPayment
 from app.models.payment_history import PaymentOccurrence
 from app.models.entry import Entry
 
+# Categories have no icon of their own
+CATEGORY_ICON = '📄'
+
 
 class PaymentAnalyticsService:
     """Service for analyzing payment patterns and trends."""
 
     def __init__(self, db: Session):
         self.db = db
+        self._occurrences: Dict[int, List] = {}
+        self._payments: Dict[int, List[RecurringPayment]] = {}
 
     # ------------------------------------------------------------------
     # Helpers
@@ -44,6 +55,81 @@ class PaymentAnalyticsService:
 
         return "pending"
 
+    def _occurrence_rows(self, user_id: int) -> List:
+        """
+        All of the user's occurrences with their bill and linked entry columns
+
+        Loaded once per service instance; rows carry the occurrence status
+        flags plus amount_due (the bill amount), category_id, entry_amount and
+        entry_date (None when the occurrence has no linked entry).
+        """
+        if user_id not in self._occurrences:
+            self._occurrences[user_id] = self.db.query(
+                PaymentOccurrence.id,
+                PaymentOccurrence.recurring_payment_id,
+                PaymentOccurrence.scheduled_date,
+                PaymentOccurrence.actual_date,
+                PaymentOccurrence.is_paid,
+                PaymentOccurrence.is_skipped,
+                PaymentOccurrence.is_late,
+                PaymentOccurrence.linked_entry_id,
+                RecurringPayment.amount.label('amount_due'),
+                RecurringPayment.category_id,
+                Entry.amount.label('entry_amount'),
+                Entry.date.label('entry_date')
+            ).join(
+                RecurringPayment, PaymentOccurrence.recurring_payment_id == RecurringPayment.id
+            ).outerjoin(
+                Entry, Entry.id == PaymentOccurrence.linked_entry_id
+            ).filter(
+                RecurringPayment.user_id == user_id
+            ).order_by(PaymentOccurrence.id).all()
+        return self._occurrences[user_id]
+
+    def _payment_rows(self, user_id: int) -> List[RecurringPayment]:
+        """The user's recurring payments with their categories, loaded once per service instance"""
+        if user_id not in self._payments:
+            self._payments[user_id] = self.db.query(RecurringPayment).options(
+                joinedload(RecurringPayment.category)
+            ).filter(
+                RecurringPayment.user_id == user_id
+            ).order_by(RecurringPayment.id).all()
+        return self._payments[user_id]
+
+    def get_dashboard(
+        self,
+        user_id: int,
+        start_date: date,
+        end_date: date,
+        months: int = 12
+    ) -> Dict[str, Any]:
+        """
+        Every section of the payment analytics dashboard in three queries.
+
+        Args:
+            user_id: User ID
+            start_date: Start of the spending breakdowns
+            end_date: End of the spending breakdowns
+            months: Number of months of payment trends
+
+        Returns:
+            Dictionary with payment_statistics, payment_trends,
+            recurring_vs_onetime, payment_reliability, cost_projection and
+            category_breakdown
+        """
+        return {
+            'payment_statistics': self.get_payment_statistics(user_id),
+            'payment_trends': self.get_payment_trends(user_id, months=months),
+            'recurring_vs_onetime': self.get_recurring_vs_onetime_breakdown(
+                user_id, start_date=start_date, end_date=end_date
+            ),
+            'payment_reliability': self.get_payment_reliability_by_bill(user_id),
+            'cost_projection': self.get_monthly_cost_projection(user_id),
+            'category_breakdown': self.get_category_spending_breakdown(
+                user_id, start_date=start_date, end_date=end_date
+            ),
+        }
+
     def get_payment_statistics(self, user_id: int) -> Dict[str, Any]:
         """
         Get overall payment statistics including reliability metrics.
@@ -51,12 +137,7 @@ class PaymentAnalyticsService:
         Returns:
             Dictionary with on-time rate, late payments, total paid, etc.
         """
-        # Get all payment occurrences
-        occurrences = self.db.query(PaymentOccurrence).join(
-            RecurringPayment
-        ).filter(
-            RecurringPayment.user_id == user_id
-        ).all()
+        occurrences = self._occurrence_rows(user_id)
 
         if not occurrences:
             return {
@@ -83,16 +164,14 @@ class PaymentAnalyticsService:
             if status in status_counts:
                 status_counts[status] += 1
 
-            if occ.linked_entry_id:
-                entry = self.db.query(Entry).filter(Entry.id == occ.linked_entry_id).first()
-                if entry:
-                    total_paid += float(entry.amount)
+            if occ.entry_amount is not None:
+                total_paid += float(occ.entry_amount)
 
-                    # Calculate days late if applicable
-                    if status == 'late' and entry.date and occ.scheduled_date:
-                        days_late = (entry.date - occ.scheduled_date).days
-                        if days_late > 0:
-                            late_days_list.append(days_late)
+                # Calculate days late if applicable
+                if status == 'late' and occ.entry_date and occ.scheduled_date:
+                    days_late = (occ.entry_date - occ.scheduled_date).days
+                    if days_late > 0:
+                        late_days_list.append(days_late)
 
         average_days_late = sum(late_days_list) / len(late_days_list) if late_days_list else 0.0
 
@@ -121,52 +200,29 @@ class PaymentAnalyticsService:
         """
         start_date = date.today() - timedelta(days=months * 30)
 
-        # Get occurrences grouped by month
-        occurrences = self.db.query(
-            extract('year', PaymentOccurrence.scheduled_date).label('year'),
-            extract('month', PaymentOccurrence.scheduled_date).label('month'),
-            func.count(PaymentOccurrence.id).label('count'),
-            func.sum(RecurringPayment.amount).label('total_due')
-        ).join(
-            RecurringPayment
-        ).filter(
-            RecurringPayment.user_id == user_id,
-            PaymentOccurrence.scheduled_date >= start_date
-        ).group_by(
-            extract('year', PaymentOccurrence.scheduled_date),
-            extract('month', PaymentOccurrence.scheduled_date)
-        ).order_by(
-            extract('year', PaymentOccurrence.scheduled_date),
-            extract('month', PaymentOccurrence.scheduled_date)
-        ).all()
-
-        # Calculate actual paid amounts by month
-        paid_by_month = {}
-        for occ in self.db.query(PaymentOccurrence).join(RecurringPayment).filter(
-            RecurringPayment.user_id == user_id,
-            PaymentOccurrence.scheduled_date >= start_date,
-            PaymentOccurrence.linked_entry_id.isnot(None)
-        ).all():
-            entry = self.db.query(Entry).filter(Entry.id == occ.linked_entry_id).first()
-            if entry and entry.date:
-                key = (entry.date.year, entry.date.month)
-                if key not in paid_by_month:
-                    paid_by_month[key] = 0.0
-                paid_by_month[key] += float(entry.amount)
+        # Group occurrences by scheduled month, and linked payments by the month they were paid
+        due_by_month = defaultdict(lambda: [0, 0.0])
+        paid_by_month = defaultdict(float)
+        for occ in self._occurrence_rows(user_id):
+            if occ.scheduled_date < start_date:
+                continue
+            month_due = due_by_month[(occ.scheduled_date.year, occ.scheduled_date.month)]
+            month_due[0] += 1
+            month_due[1] += float(occ.amount_due or 0)
+            if occ.linked_entry_id and occ.entry_date:
+                paid_by_month[(occ.entry_date.year, occ.entry_date.month)] += float(occ.entry_amount)
 
         # Build monthly trends
         trends = []
-        for row in occurrences:
-            year = int(row.year)
-            month = int(row.month)
+        for (year, month), (count, total_due) in sorted(due_by_month.items()):
             month_name = datetime(year, month, 1).strftime('%B %Y')
 
             trends.append({
                 'year': year,
                 'month': month,
                 'month_name': month_name,
-                'occurrence_count': row.count,
-                'total_due': float(row.total_due) if row.total_due else 0.0,
+                'occurrence_count': count,
+                'total_due': total_due,
                 'total_paid': paid_by_month.get((year, month), 0.0)
             })
 
@@ -190,35 +246,28 @@ class PaymentAnalyticsService:
             start_date = end_date - timedelta(days=365)
 
         # Get total from recurring payments (linked entries)
-        recurring_total = 0.0
-        occurrences = self.db.query(PaymentOccurrence).join(
-            RecurringPayment
+        recurring_total = sum(
+            float(occ.entry_amount) for occ in self._occurrence_rows(user_id)
+            if occ.entry_amount is not None and start_date <= occ.scheduled_date <= end_date
+        )
+
+        # Get total from one-time expenses (entries not linked to a payment in the period)
+        linked_entry_ids = self.db.query(PaymentOccurrence.linked_entry_id).join(
+            RecurringPayment, PaymentOccurrence.recurring_payment_id == RecurringPayment.id
         ).filter(
             RecurringPayment.user_id == user_id,
             PaymentOccurrence.scheduled_date >= start_date,
             PaymentOccurrence.scheduled_date <= end_date,
             PaymentOccurrence.linked_entry_id.isnot(None)
-        ).all()
-
-        for occ in occurrences:
-            entry = self.db.query(Entry).filter(Entry.id == occ.linked_entry_id).first()
-            if entry:
-                recurring_total += float(entry.amount)
-
-        # Get linked entry IDs to exclude from one-time calculation
-        linked_entry_ids = [occ.linked_entry_id for occ in occurrences if occ.linked_entry_id]
-
-        # Get total from one-time expenses (entries not linked to recurring payments)
+        )
         onetime_query = self.db.query(func.sum(Entry.amount)).filter(
             Entry.user_id == user_id,
             Entry.date >= start_date,
             Entry.date <= end_date,
-            Entry.type == 'expense'
+            Entry.type == 'expense',
+            Entry.id.notin_(linked_entry_ids)
         )
 
-        if linked_entry_ids:
-            onetime_query = onetime_query.filter(Entry.id.notin_(linked_entry_ids))
-
         onetime_total = float(onetime_query.scalar() or 0.0)
 
         total = recurring_total + onetime_total
@@ -240,15 +289,13 @@ class PaymentAnalyticsService:
         Returns:
             List of bills with their reliability statistics
         """
-        recurring_payments = self.db.query(RecurringPayment).filter(
-            RecurringPayment.user_id == user_id
-        ).all()
+        occurrences_by_payment = defaultdict(list)
+        for occ in self._occurrence_rows(user_id):
+            occurrences_by_payment[occ.recurring_payment_id].append(occ)
 
         results = []
-        for payment in recurring_payments:
-            occurrences = self.db.query(PaymentOccurrence).filter(
-                PaymentOccurrence.recurring_payment_id == payment.id
-            ).all()
+        for payment in self._payment_rows(user_id):
+            occurrences = occurrences_by_payment.get(payment.id)
 
             if not occurrences:
                 continue
@@ -267,7 +314,7 @@ class PaymentAnalyticsService:
                 'amount': float(payment.amount),
                 'frequency': payment.frequency.value,
                 'category_name': payment.category.name if payment.category else 'Uncategorized',
-                'category_icon': payment.category.icon if payment.category else '📄',
+                'category_icon': CATEGORY_ICON,
                 'total_occurrences': total,
                 'on_time_count': status_counts["on_time"],
                 'late_count': status_counts["late"],
@@ -288,10 +335,7 @@ class PaymentAnalyticsService:
         Returns:
             Dictionary with projected monthly and annual costs
         """
-        active_payments = self.db.query(RecurringPayment).filter(
-            RecurringPayment.user_id == user_id,
-            RecurringPayment.is_active.is_(True)
-        ).all()
+        active_payments = [payment for payment in self._payment_rows(user_id) if payment.is_active]
 
         monthly_total = 0.0
         by_frequency = {
@@ -347,39 +391,29 @@ class PaymentAnalyticsService:
         if not start_date:
             start_date = end_date - timedelta(days=365)
 
-        # Get all paid occurrences in date range
-        occurrences = self.db.query(PaymentOccurrence).join(
-            RecurringPayment
-        ).filter(
-            RecurringPayment.user_id == user_id,
-            PaymentOccurrence.scheduled_date >= start_date,
-            PaymentOccurrence.scheduled_date <= end_date,
-            PaymentOccurrence.linked_entry_id.isnot(None)
-        ).all()
+        payments = {payment.id: payment for payment in self._payment_rows(user_id)}
 
-        # Group by category
+        # Group linked payments in the date range by bill category
         category_totals = {}
-        for occ in occurrences:
-            entry = self.db.query(Entry).filter(Entry.id == occ.linked_entry_id).first()
-            if entry:
-                payment = occ.recurring_payment
-                category_id = payment.category_id
-                category_name = payment.category.name if payment.category else 'Uncategorized'
-                category_icon = payment.category.icon if payment.category else '📄'
-
-                key = (category_id, category_name, category_icon)
-                if key not in category_totals:
-                    category_totals[key] = 0.0
-                category_totals[key] += float(entry.amount)
+        for occ in self._occurrence_rows(user_id):
+            if occ.entry_amount is None or not (start_date <= occ.scheduled_date <= end_date):
+                continue
+            category = payments[occ.recurring_payment_id].category
+            category_name = category.name if category else 'Uncategorized'
+
+            key = (occ.category_id, category_name)
+            if key not in category_totals:
+                category_totals[key] = 0.0
+            category_totals[key] += float(occ.entry_amount)
 
         # Convert to list
         total_spending = sum(category_totals.values())
         results = []
-        for (cat_id, cat_name, cat_icon), amount in category_totals.items():
+        for (cat_id, cat_name), amount in category_totals.items():
             results.append({
                 'category_id': cat_id,
                 'category_name': cat_name,
-                'category_icon': cat_icon,
+                'category_icon': CATEGORY_ICON,
                 'total_spent': amount,
                 'percentage': (amount / total_spending * 100) if total_spending > 0 else 0.0
             })
@@ -9,12 +9,15 @@ from typing import List, Dict, Optional
 from decimal import Decimal
 import json
 from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_, func
+from sqlalchemy import and_, or_, func, insert
 
 from app.models.payment_history import PaymentOccurrence, PaymentLinkSuggestion
 from app.models.recurring_payment import RecurringPayment
 from app.models.entry import Entry, EntryType
 from app.services.recurring_payment_service import RecurringPaymentService
+from app.services.payment_matching import (
+    EntryIndex, AMOUNT_WEIGHT, CATEGORY_WEIGHT, DATE_WEIGHT, NOTE_WEIGHT, MIN_LINK_SCORE, DUE_DATE_WINDOW_DAYS
+)
 
 
 class PaymentHistoryService:
@@ -55,6 +58,14 @@ class PaymentHistoryService:
         Returns:
             PaymentOccurrence instance
         """
+        payment = self.db.query(RecurringPayment).filter(
+            RecurringPayment.id == recurring_payment_id,
+            RecurringPayment.user_id == user_id
+        ).first()
+
+        if not payment:
+            raise ValueError("Recurring payment not found")
+
         is_late = actual_date > scheduled_date
 
         occurrence = PaymentOccurrence(
@@ -74,6 +85,7 @@ class PaymentHistoryService:
         )
 
         self.db.add(occurrence)
+        self.recurring_service.settle_next_due_date(payment, scheduled_date)
         self.db.commit()
         self.db.refresh(occurrence)
 
@@ -121,6 +133,7 @@ class PaymentHistoryService:
         )
 
         self.db.add(occurrence)
+        self.recurring_service.settle_next_due_date(payment, scheduled_date)
         self.db.commit()
         self.db.refresh(occurrence)
 
@@ -261,7 +274,8 @@ class PaymentHistoryService:
     def generate_link_suggestions(
         self,
         user_id: int,
-        days_back: int = 30
+        days_back: int = 30,
+        entry_ids: Optional[List[int]] = None
     ) -> int:
         """
         Generate auto-linking suggestions by analyzing recent entries.
@@ -272,9 +286,15 @@ class PaymentHistoryService:
         - Category match
         - Description keywords
 
+        Unlinked entries are indexed by amount, category and date, so each
+        payment only scores the entries that can reach the confidence
+        threshold. Existing suggestion pairs are loaded once and new
+        suggestions are bulk-inserted.
+
         Args:
             user_id: User ID
             days_back: How many days back to analyze
+            entry_ids: Only match these entries (e.g. just-created ones)
 
         Returns:
             Number of suggestions created
@@ -286,52 +306,91 @@ class PaymentHistoryService:
             RecurringPayment.user_id == user_id,
             RecurringPayment.is_active == True
         ).all()
+        payments = [payment for payment in payments if payment.amount and payment.amount > 0]
+        if not payments:
+            return 0
 
         # Get unlinked expense entries
-        unlinked_entries = self.db.query(Entry).filter(
+        query = self.db.query(Entry.id, Entry.amount, Entry.category_id, Entry.date, Entry.note).filter(
             Entry.user_id == user_id,
             Entry.type == EntryType.EXPENSE,
             Entry.date >= start_date,
             ~Entry.id.in_(
                 self.db.query(PaymentOccurrence.linked_entry_id).filter(
+                    PaymentOccurrence.user_id == user_id,
                     PaymentOccurrence.linked_entry_id.isnot(None)
                 )
             )
-        ).all()
-
-        suggestions_created = 0
-
+        )
+        if entry_ids is not None:
+            if not entry_ids:
+                return 0
+            query = query.filter(Entry.id.in_(entry_ids))
+        index = EntryIndex(query.all())
+        if not len(index):
+            return 0
+
+        existing_query = self.db.query(
+            PaymentLinkSuggestion.recurring_payment_id, PaymentLinkSuggestion.entry_id
+        ).filter(PaymentLinkSuggestion.user_id == user_id)
+        if entry_ids is not None:
+            existing_query = existing_query.filter(PaymentLinkSuggestion.entry_id.in_(entry_ids))
+        existing = set(existing_query.all())
+
+        suggestions = []
         for payment in payments:
-            for entry in unlinked_entries:
-                # Check if suggestion already exists
-                existing = self.db.query(PaymentLinkSuggestion).filter(
-                    PaymentLinkSuggestion.recurring_payment_id == payment.id,
-                    PaymentLinkSuggestion.entry_id == entry.id
-                ).first()
-
-                if existing:
+            # The next due date depends only on the entry date
+            next_due_by_date = {
+                day: self.recurring_service.calculate_next_due_date(payment, day) for day in index.dates
+            }
+            near_due = [
+                day for day, next_due in next_due_by_date.items()
+                if next_due and abs((day - next_due).days) <= DUE_DATE_WINDOW_DAYS
+            ]
+
+            for entry in index.candidates(float(payment.amount), payment.category_id, near_due):
+                if (payment.id, entry.id) in existing:
                     continue
 
                 # Calculate match score and reason
-                score, reason = self._calculate_match_score(payment, entry)
+                score, reason = self._score_match(payment, entry, next_due_by_date[entry.date], MIN_LINK_SCORE)
 
                 # Only create suggestion if confidence is high enough
-                if score >= 0.6:  # 60% confidence threshold
-                    suggestion = PaymentLinkSuggestion(
-                        user_id=user_id,
-                        recurring_payment_id=payment.id,
-                        entry_id=entry.id,
-                        confidence_score=Decimal(str(score)),
-                        match_reason=json.dumps(reason),
-                        is_dismissed=False,
-                        is_accepted=False
-                    )
-
-                    self.db.add(suggestion)
-                    suggestions_created += 1
-
+                if score >= MIN_LINK_SCORE:
+                    suggestions.append({
+                        'user_id': user_id,
+                        'recurring_payment_id': payment.id,
+                        'entry_id': entry.id,
+                        'confidence_score': Decimal(str(score)),
+                        'match_reason': json.dumps(reason),
+                        'is_dismissed': False,
+                        'is_accepted': False
+                    })
+
+        if suggestions:
+            self.db.execute(insert(PaymentLinkSuggestion), suggestions)
         self.db.commit()
-        return suggestions_created
+        return len(suggestions)
+
+    def match_new_entry(self, entry: Entry) -> int:
+        """
+        Suggest recurring payment links for a just-created expense
+
+        Args:
+            entry: Newly created entry
+
+        Returns:
+            Number of suggestions created
+        """
+        if entry.type != EntryType.EXPENSE:
+            return 0
+
+        try:
+            return self.generate_link_suggestions(entry.user_id, entry_ids=[entry.id])
+        except Exception as e:
+            self.db.rollback()
+            print(f"Error matching new entry to recurring payments: {e}")
+            return 0
 
     def _calculate_match_score(
         self,
@@ -344,36 +403,56 @@ class PaymentHistoryService:
         Returns:
             Tuple of (confidence_score, match_reasons)
         """
-        score = 0.0
-        reasons = []
+        next_due = self.recurring_service.calculate_next_due_date(payment, entry.date)
+        return self._score_match(payment, entry, next_due)
 
-        # Amount similarity (40% weight)
-        amount_diff = abs(float(payment.amount) - float(entry.amount))
-        amount_similarity = max(0, 1 - (amount_diff / float(payment.amount)))
-        score += amount_similarity * 0.4
+    def _score_match(
+        self,
+        payment: RecurringPayment,
+        entry,
+        next_due: Optional[date],
+        min_score: float = 0.0
+    ) -> tuple[float, Optional[Dict]]:
+        """
+        Match score of an entry against a payment whose next due date after the entry is known
 
-        if amount_similarity > 0.9:
-            reasons.append(f"Amount matches closely (${entry.amount})")
-        elif amount_similarity > 0.7:
-            reasons.append(f"Amount is similar (${entry.amount})")
+        Match reasons are only built for scores of at least min_score (None otherwise).
+        """
+        # Amount similarity (40% weight)
+        payment_amount = float(payment.amount)
+        amount_diff = abs(payment_amount - float(entry.amount))
+        amount_similarity = max(0, 1 - (amount_diff / payment_amount))
+        score = amount_similarity * AMOUNT_WEIGHT
 
         # Category match (30% weight)
-        if entry.category_id == payment.category_id:
-            score += 0.3
-            reasons.append("Category matches")
+        category_match = entry.category_id == payment.category_id
+        if category_match:
+            score += CATEGORY_WEIGHT
 
         # Date proximity to due date (20% weight)
-        next_due = self.recurring_service.calculate_next_due_date(payment, entry.date)
-        if next_due:
-            days_diff = abs((entry.date - next_due).days)
-            if days_diff <= 3:
-                date_score = 1.0 - (days_diff / 7)
-                score += date_score * 0.2
-                reasons.append(f"Date is {days_diff} days from due date")
+        days_diff = abs((entry.date - next_due).days) if next_due else None
+        if days_diff is not None and days_diff <= DUE_DATE_WINDOW_DAYS:
+            date_score = 1.0 - (days_diff / 7)
+            score += date_score * DATE_WEIGHT
 
         # Description/note match (10% weight)
-        if entry.note and payment.name.lower() in entry.note.lower():
-            score += 0.1
+        note_match = bool(entry.note) and payment.name.lower() in entry.note.lower()
+        if note_match:
+            score += NOTE_WEIGHT
+
+        if score < min_score:
+            return min(score, 1.0), None
+
+        reasons = []
+        if amount_similarity > 0.9:
+            reasons.append(f"Amount matches closely (${entry.amount})")
+        elif amount_similarity > 0.7:
+            reasons.append(f"Amount is similar (${entry.amount})")
+        if category_match:
+            reasons.append("Category matches")
+        if days_diff is not None and days_diff <= DUE_DATE_WINDOW_DAYS:
+            reasons.append(f"Date is {days_diff} days from due date")
+        if note_match:
             reasons.append("Description contains payment name")
 
         return min(score, 1.0), {
@@ -0,0 +1,110 @@
+"""
+Candidate lookup for payment link suggestions
+
+A suggestion needs a match score of at least MIN_LINK_SCORE, where the amount
+similarity weighs 0.4, a category match 0.3, a due date within three days 0.2
+and the payment name in the note 0.1. That bounds which entries can qualify:
+
+- without a category match, only entries near a due date whose amount is
+  within 25% of the payment's
+- with a category match but no nearby due date, amounts within 50%
+- with a category match and a nearby due date, any amount
+
+Unlinked entries are indexed by date and by category, each sorted by amount,
+so each payment only scores the entries inside those bounds instead of all
+of them.
+"""
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import date
+from typing import Dict, Iterable, List, Optional, Tuple
+
+AMOUNT_WEIGHT = 0.4
+CATEGORY_WEIGHT = 0.3
+DATE_WEIGHT = 0.2
+NOTE_WEIGHT = 0.1
+MIN_LINK_SCORE = 0.6
+
+# An entry this many days from a due date earns the date score
+DUE_DATE_WINDOW_DAYS = 3
+
+# Largest relative amount difference that can still reach MIN_LINK_SCORE
+# (without a category match the date score is needed as well)
+AMOUNT_TOLERANCE_OTHER_CATEGORY = (AMOUNT_WEIGHT + DATE_WEIGHT + NOTE_WEIGHT - MIN_LINK_SCORE) / AMOUNT_WEIGHT
+AMOUNT_TOLERANCE_SAME_CATEGORY = (AMOUNT_WEIGHT + CATEGORY_WEIGHT + NOTE_WEIGHT - MIN_LINK_SCORE) / AMOUNT_WEIGHT
+
+# Slack for float rounding at the band edges (amounts are whole cents)
+_EDGE = 0.005
+
+
+class _AmountIndex:
+    """Rows sorted by amount for range lookups"""
+    __slots__ = ('amounts', 'rows')
+
+    def __init__(self, rows: List):
+        rows = sorted(rows, key=lambda row: row.amount)
+        self.amounts = [float(row.amount) for row in rows]
+        self.rows = rows
+
+    def between(self, low: float, high: float) -> List:
+        return self.rows[bisect_left(self.amounts, low):bisect_right(self.amounts, high)]
+
+
+class EntryIndex:
+    """
+    Unlinked entries indexed for payment matching
+
+    Rows need id, amount, category_id and date attributes.
+    """
+
+    def __init__(self, rows: Iterable):
+        rows = list(rows)
+        by_category: Dict[Optional[int], List] = defaultdict(list)
+        by_date: Dict[date, List] = defaultdict(list)
+        self._by_category_date: Dict[Tuple[Optional[int], date], List] = defaultdict(list)
+        for row in rows:
+            by_category[row.category_id].append(row)
+            by_date[row.date].append(row)
+            self._by_category_date[(row.category_id, row.date)].append(row)
+
+        self._by_category = {category_id: _AmountIndex(members) for category_id, members in by_category.items()}
+        self._by_date = {day: _AmountIndex(members) for day, members in by_date.items()}
+        self.dates = sorted(by_date)
+        self.size = len(rows)
+
+    def __len__(self) -> int:
+        return self.size
+
+    def candidates(self, amount: float, category_id: Optional[int], due_dates: Iterable[date]) -> List:
+        """
+        Entries that can reach MIN_LINK_SCORE for a payment
+
+        Args:
+            amount: Payment amount (positive)
+            category_id: Payment category
+            due_dates: Indexed entry dates within DUE_DATE_WINDOW_DAYS of the
+                payment's next due date
+
+        Returns:
+            Candidate rows, each once
+        """
+        found = {}
+        near_low, near_high = self._band(amount, AMOUNT_TOLERANCE_OTHER_CATEGORY)
+        for day in due_dates:
+            for row in self._by_date[day].between(near_low, near_high):
+                found[row.id] = row
+            for row in self._by_category_date.get((category_id, day), ()):
+                found[row.id] = row
+
+        same_category = self._by_category.get(category_id)
+        if same_category is not None:
+            low, high = self._band(amount, AMOUNT_TOLERANCE_SAME_CATEGORY)
+            for row in same_category.between(low, high):
+                found[row.id] = row
+
+        return list(found.values())
+
+    @staticmethod
+    def _band(amount: float, tolerance: float) -> Tuple[float, float]:
+        return amount * (1 - tolerance) - _EDGE, amount * (1 + tolerance) + _EDGE
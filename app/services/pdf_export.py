@@ -1,26 +1,31 @@
 """
 PDF Export Service for generating visual financial reports with charts
 """
+import asyncio
 import io
-import base64
 from datetime import date, datetime
 from typing import List, Optional, Dict, Any
-import matplotlib.pyplot as plt
-import matplotlib.dates as mdates
-import seaborn as sns
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
+from sqlalchemy import Select, func, select
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 import pandas as pd
 
 from app.models.entry import Entry
 from app.models.category import Category
 from app.core.currency import CurrencyService
 from app.services.user_preferences import UserPreferencesService
+from app.services.report_charts import (
+    render_charts,
+    render_category_chart,
+    render_income_expense_chart,
+    render_monthly_trend_chart,
+)
 
 
 class PDFExportService:
@@ -28,9 +33,51 @@ class PDFExportService:
         self.currency_service = CurrencyService()
         self.user_preferences_service = UserPreferencesService()
         
-        # Set matplotlib style
-        plt.style.use('seaborn-v0_8')
-        sns.set_palette("husl")
+    def _build_query(
+        self,
+        columns: List[Any],
+        user_id: int,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        category_id: Optional[int] = None,
+        report_type: str = "all"
+    ) -> Select:
+        """SELECT of columns over the report's entries (categorized entries only)"""
+        query = (
+            select(*columns)
+            .select_from(Entry)
+            .join(Category, Entry.category_id == Category.id)
+            .where(Entry.user_id == user_id)
+        )
+
+        # Apply date filters
+        if start_date:
+            query = query.where(Entry.date >= start_date)
+        if end_date:
+            query = query.where(Entry.date <= end_date)
+
+        # Apply category filter
+        if category_id:
+            query = query.where(Entry.category_id == category_id)
+
+        # Apply type filter
+        if report_type in ["income", "expense"]:
+            query = query.where(Entry.type == report_type)
+
+        return query
+
+    def count_report_entries(
+        self,
+        db: Session,
+        user_id: int,
+        start_date: Optional[date] = None,
+        end_date: Optional[date] = None,
+        category_id: Optional[int] = None,
+        report_type: str = "all"
+    ) -> int:
+        """Number of entries a report with these filters would list"""
+        query = self._build_query([func.count(Entry.id)], user_id, start_date, end_date, category_id, report_type)
+        return db.execute(query).scalar() or 0
     
     async def export_financial_report_to_pdf(
         self,
@@ -43,6 +90,10 @@ class PDFExportService:
     ) -> io.BytesIO:
         """
         Export comprehensive financial report to PDF with charts
+
+        Entries are converted to the user's currency in one pass, the charts render
+        concurrently in the chart worker pool and the document is laid out in a
+        worker thread, so the event loop is never blocked by the report.
         
         Args:
             db: Database session
@@ -57,26 +108,74 @@ class PDFExportService:
         """
         # Get user currency
         user_currency = self.user_preferences_service.get_user_currency(db, user_id)
-        
-        # Build query
-        query = db.query(Entry).filter(Entry.user_id == user_id)
-        
-        # Apply date filters
-        if start_date:
-            query = query.filter(Entry.date >= start_date)
-        if end_date:
-            query = query.filter(Entry.date <= end_date)
-        
-        # Apply category filter
-        if category_id:
-            query = query.filter(Entry.category_id == category_id)
-        
-        # Apply type filter
-        if report_type in ["income", "expense"]:
-            query = query.filter(Entry.type == report_type)
+        category_name = self._get_category_name(db, category_id)
         
         # Get entries with category information
-        entries = query.join(Category, Entry.category_id == Category.id).order_by(Entry.date.asc()).all()
+        query = self._build_query(
+            [Entry.date, Entry.type, Category.name.label('category_name'), Entry.description, Entry.amount, Entry.currency_code],
+            user_id, start_date, end_date, category_id, report_type
+        ).order_by(Entry.date.asc())
+        entries = (await run_in_threadpool(db.execute, query)).all()
+
+        # Convert every amount once, fetching exchange rates at most once
+        converted = await self.currency_service.convert_amounts(
+            [entry.amount for entry in entries],
+            [entry.currency_code for entry in entries],
+            user_currency
+        )
+
+        # Calculate totals
+        total_income, total_expense, category_totals = self._calculate_totals(entries, converted)
+
+        # Generate charts in parallel
+        charts = []
+        if entries:
+            # Income vs Expense chart
+            if report_type in ["all", "income", "expense"]:
+                charts.append(("Income vs Expense Overview",
+                               render_income_expense_chart, (total_income, total_expense, user_currency)))
+
+            # Category distribution chart
+            if len(category_totals) > 1:
+                charts.append(("Category Distribution",
+                               render_category_chart, (category_totals, user_currency)))
+
+            # Monthly trend chart
+            if len(entries) > 1:
+                charts.append(("Monthly Trend",
+                               render_monthly_trend_chart, self._monthly_trend(entries, converted) + (user_currency,)))
+
+        images = await render_charts([(fn, args) for _, fn, args in charts])
+        chart_images = [(title, image) for (title, _, _), image in zip(charts, images) if image]
+
+        # Build PDF
+        pdf_buffer = await asyncio.get_running_loop().run_in_executor(
+            None, self._build_document,
+            {
+                "start_date": start_date,
+                "end_date": end_date,
+                "category_name": category_name,
+                "report_type": report_type,
+                "user_currency": user_currency,
+            },
+            entries, converted, total_income, total_expense, category_totals, chart_images
+        )
+
+        return pdf_buffer
+
+    def _build_document(
+        self,
+        report: Dict[str, Any],
+        entries: List[Any],
+        converted: List[float],
+        total_income: float,
+        total_expense: float,
+        category_totals: Dict[str, Dict[str, float]],
+        chart_images: List[tuple]
+    ) -> io.BytesIO:
+        """Lay out and render the PDF (CPU bound, runs in a worker thread)"""
+        user_currency = report["user_currency"]
+        report_type = report["report_type"]
         
         # Create PDF buffer
         pdf_buffer = io.BytesIO()
@@ -101,8 +200,6 @@ class PDFExportService:
             textColor=colors.darkblue
         )
         
-        normal_style = styles['Normal']
-        
         # Build story (content)
         story = []
         
@@ -113,8 +210,8 @@ class PDFExportService:
         # Report metadata
         metadata_data = [
             ["Report Generated:", datetime.now().strftime("%Y-%m-%d %H:%M:%S")],
-            ["Date Range:", self._format_date_range(start_date, end_date)],
-            ["Category:", self._get_category_name(db, category_id)],
+            ["Date Range:", self._format_date_range(report["start_date"], report["end_date"])],
+            ["Category:", report["category_name"]],
             ["Type:", report_type.title() if report_type != "all" else "All Types"],
             ["Currency:", user_currency]
         ]
@@ -137,8 +234,6 @@ class PDFExportService:
         # Summary section
         story.append(Paragraph("Summary", heading_style))
         
-        # Calculate totals
-        total_income, total_expense, category_totals = await self._calculate_totals(entries, user_currency)
         net_balance = total_income - total_expense
         
         summary_data = [
@@ -170,11 +265,7 @@ class PDFExportService:
             transaction_data = [["Date", "Category", "Description", "Amount"]]
             running_total = 0
 
-            for entry in entries:
-                converted_amount = await self.currency_service.convert_amount(
-                    entry.amount, entry.currency_code, user_currency
-                )
-
+            for entry, converted_amount in zip(entries, converted):
                 # Apply sign based on entry type
                 if entry.type.lower() == "expense":
                     amount_value = -converted_amount
@@ -185,7 +276,7 @@ class PDFExportService:
 
                 transaction_data.append([
                     entry.date.strftime('%Y-%m-%d'),
-                    entry.category.name,
+                    entry.category_name,
                     entry.description or "-",
                     f"{user_currency} {abs(converted_amount):,.2f}"
                 ])
@@ -246,33 +337,12 @@ class PDFExportService:
             story.append(category_table)
             story.append(Spacer(1, 20))
         
-        # Generate and add charts
-        if entries:
-            # Income vs Expense chart
-            if report_type in ["all", "income", "expense"]:
-                chart_img = await self._create_income_expense_chart(entries, user_currency)
-                if chart_img:
-                    story.append(Paragraph("Income vs Expense Overview", heading_style))
-                    story.append(Image(chart_img, width=6*inch, height=4*inch))
-                    story.append(Spacer(1, 20))
-            
-            # Category distribution chart
-            if len(category_totals) > 1:
-                chart_img = self._create_category_chart(category_totals, user_currency)
-                if chart_img:
-                    story.append(Paragraph("Category Distribution", heading_style))
-                    story.append(Image(chart_img, width=6*inch, height=4*inch))
-                    story.append(Spacer(1, 20))
+        # Add charts
+        for title, image in chart_images:
+            story.append(Paragraph(title, heading_style))
+            story.append(Image(io.BytesIO(image), width=6*inch, height=4*inch))
+            story.append(Spacer(1, 20))
             
-            # Monthly trend chart
-            if len(entries) > 1:
-                chart_img = await self._create_monthly_trend_chart(entries, user_currency)
-                if chart_img:
-                    story.append(Paragraph("Monthly Trend", heading_style))
-                    story.append(Image(chart_img, width=6*inch, height=4*inch))
-                    story.append(Spacer(1, 20))
-        
-        # Build PDF
         doc.build(story)
         pdf_buffer.seek(0)
         
@@ -296,18 +366,14 @@ class PDFExportService:
             return category.name if category else "Unknown"
         return "All Categories"
     
-    async def _calculate_totals(self, entries: List[Entry], user_currency: str) -> tuple:
-        """Calculate totals from entries"""
+    def _calculate_totals(self, entries: List[Any], converted: List[float]) -> tuple:
+        """Calculate totals from entries and their converted amounts"""
         total_income = 0
         total_expense = 0
         category_totals = {}
         
-        for entry in entries:
-            converted_amount = await self.currency_service.convert_amount(
-                entry.amount, entry.currency_code, user_currency
-            )
-            
-            category_name = entry.category.name
+        for entry, converted_amount in zip(entries, converted):
+            category_name = entry.category_name
             if category_name not in category_totals:
                 category_totals[category_name] = {"income": 0, "expense": 0}
             
@@ -320,176 +386,20 @@ class PDFExportService:
         
         return total_income, total_expense, category_totals
     
-    async def _create_income_expense_chart(self, entries: List[Entry], user_currency: str) -> Optional[io.BytesIO]:
-        """Create income vs expense pie chart"""
-        try:
-            total_income = 0
-            total_expense = 0
-            
-            for entry in entries:
-                converted_amount = await self.currency_service.convert_amount(
-                    entry.amount, entry.currency_code, user_currency
-                )
+    def _monthly_trend(self, entries: List[Any], converted: List[float]) -> tuple:
+        """(months, income, expense) series for the trend chart; a series is None if the type is absent"""
+        df = pd.DataFrame({
+            'date': pd.to_datetime([entry.date for entry in entries]),
+            'type': [entry.type for entry in entries],
+            'amount': converted
+        })
+        df['month'] = df['date'].dt.to_period('M')
+            
+        # Group by month and type
+        monthly_data = df.groupby(['month', 'type'])['amount'].sum().unstack(fill_value=0)
                 
-                if entry.type.lower() == "income":
-                    total_income += converted_amount
-                else:
-                    total_expense += converted_amount
-            
-            if total_income == 0 and total_expense == 0:
-                return None
-            
-            # Create pie chart
-            fig, ax = plt.subplots(figsize=(8, 6))
-            
-            labels = []
-            sizes = []
-            colors_list = []
-            
-            if total_income > 0:
-                labels.append(f"Income\n({user_currency} {total_income:,.2f})")
-                sizes.append(total_income)
-                colors_list.append('#2E8B57')  # Sea Green
-            
-            if total_expense > 0:
-                labels.append(f"Expense\n({user_currency} {total_expense:,.2f})")
-                sizes.append(total_expense)
-                colors_list.append('#DC143C')  # Crimson
-            
-            ax.pie(sizes, labels=labels, colors=colors_list, autopct='%1.1f%%', startangle=90)
-            ax.set_title('Income vs Expense Distribution', fontsize=14, fontweight='bold')
-            
-            # Save to BytesIO
-            img_buffer = io.BytesIO()
-            plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-            img_buffer.seek(0)
-            plt.close()
-            
-            return img_buffer
-            
-        except Exception as e:
-            print(f"Error creating income/expense chart: {e}")
-            return None
-    
-    def _create_category_chart(self, category_totals: Dict[str, Dict[str, float]], user_currency: str) -> Optional[io.BytesIO]:
-        """Create category distribution chart"""
-        try:
-            if not category_totals:
-                return None
-            
-            # Prepare data
-            categories = list(category_totals.keys())
-            income_values = [category_totals[cat]["income"] for cat in categories]
-            expense_values = [category_totals[cat]["expense"] for cat in categories]
-            
-            # Create bar chart
-            fig, ax = plt.subplots(figsize=(10, 6))
-            
-            x = range(len(categories))
-            width = 0.35
-            
-            bars1 = ax.bar([i - width/2 for i in x], income_values, width, label='Income', color='#2E8B57')
-            bars2 = ax.bar([i + width/2 for i in x], expense_values, width, label='Expense', color='#DC143C')
-            
-            ax.set_xlabel('Categories')
-            ax.set_ylabel(f'Amount ({user_currency})')
-            ax.set_title('Income and Expense by Category', fontsize=14, fontweight='bold')
-            ax.set_xticks(x)
-            ax.set_xticklabels(categories, rotation=45, ha='right')
-            ax.legend()
-            ax.grid(True, alpha=0.3)
-            
-            # Add value labels on bars
-            for bar in bars1:
-                height = bar.get_height()
-                if height > 0:
-                    ax.annotate(f'{height:,.0f}',
-                              xy=(bar.get_x() + bar.get_width() / 2, height),
-                              xytext=(0, 3),
-                              textcoords="offset points",
-                              ha='center', va='bottom', fontsize=8)
-            
-            for bar in bars2:
-                height = bar.get_height()
-                if height > 0:
-                    ax.annotate(f'{height:,.0f}',
-                              xy=(bar.get_x() + bar.get_width() / 2, height),
-                              xytext=(0, 3),
-                              textcoords="offset points",
-                              ha='center', va='bottom', fontsize=8)
-            
-            plt.tight_layout()
-            
-            # Save to BytesIO
-            img_buffer = io.BytesIO()
-            plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-            img_buffer.seek(0)
-            plt.close()
-            
-            return img_buffer
-            
-        except Exception as e:
-            print(f"Error creating category chart: {e}")
-            return None
-    
-    async def _create_monthly_trend_chart(self, entries: List[Entry], user_currency: str) -> Optional[io.BytesIO]:
-        """Create monthly trend chart"""
-        try:
-            if len(entries) < 2:
-                return None
-            
-            # Prepare data
-            df_data = []
-            for entry in entries:
-                converted_amount = await self.currency_service.convert_amount(
-                    entry.amount, entry.currency_code, user_currency
-                )
-                df_data.append({
-                    'date': entry.date,
-                    'type': entry.type,
-                    'amount': converted_amount
-                })
-            
-            df = pd.DataFrame(df_data)
-            # Ensure date column is datetime
-            df['date'] = pd.to_datetime(df['date'])
-            df['month'] = df['date'].dt.to_period('M')
-            
-            # Group by month and type
-            monthly_data = df.groupby(['month', 'type'])['amount'].sum().unstack(fill_value=0)
-            
-            if monthly_data.empty:
-                return None
-            
-            # Create line chart
-            fig, ax = plt.subplots(figsize=(12, 6))
-            
-            if 'income' in monthly_data.columns:
-                ax.plot(monthly_data.index.astype(str), monthly_data['income'], 
-                       marker='o', linewidth=2, label='Income', color='#2E8B57')
-            
-            if 'expense' in monthly_data.columns:
-                ax.plot(monthly_data.index.astype(str), monthly_data['expense'], 
-                       marker='s', linewidth=2, label='Expense', color='#DC143C')
-            
-            ax.set_xlabel('Month')
-            ax.set_ylabel(f'Amount ({user_currency})')
-            ax.set_title('Monthly Income and Expense Trend', fontsize=14, fontweight='bold')
-            ax.legend()
-            ax.grid(True, alpha=0.3)
-            
-            # Rotate x-axis labels
-            plt.xticks(rotation=45)
-            plt.tight_layout()
-            
-            # Save to BytesIO
-            img_buffer = io.BytesIO()
-            plt.savefig(img_buffer, format='png', dpi=300, bbox_inches='tight')
-            img_buffer.seek(0)
-            plt.close()
-            
-            return img_buffer
+        months = monthly_data.index.astype(str).tolist()
+        income = monthly_data['income'].tolist() if 'income' in monthly_data.columns else None
+        expense = monthly_data['expense'].tolist() if 'expense' in monthly_data.columns else None
             
-        except Exception as e:
-            print(f"Error creating monthly trend chart: {e}")
-            return None
+        return months, income, expense
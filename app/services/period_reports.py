@@ -0,0 +1,219 @@
+"""
+Period Report Engine
+Shared aggregation behind the weekly, monthly and annual reports. Entries are
+fetched once per report (grouped by day, type and category in SQL) and bucketed
+into days, weeks, months or seasons with numpy.
+"""
+
+import numpy as np
+from datetime import date
+from decimal import Decimal
+from typing import Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from app.models.entry import Entry, EntryType
+from app.models.category import Category
+
+
+DAY = 'day'
+WEEK = 'week'  # Monday to Sunday
+MONTH = 'month'
+SEASON = 'season'  # calendar quarters
+
+SEASONS = {
+    'Q1': {'months': [1, 2, 3], 'name': 'Q1 (Jan-Mar)'},
+    'Q2': {'months': [4, 5, 6], 'name': 'Q2 (Apr-Jun)'},
+    'Q3': {'months': [7, 8, 9], 'name': 'Q3 (Jul-Sep)'},
+    'Q4': {'months': [10, 11, 12], 'name': 'Q4 (Oct-Dec)'}
+}
+
+
+def _bucket_ordinals(days: np.ndarray, unit: str) -> np.ndarray:
+    """Map datetime64[D] values to consecutive bucket numbers for ``unit``"""
+    if unit == DAY:
+        return days.astype(np.int64)
+    if unit == WEEK:
+        # 1970-01-01 was a Thursday; shift so buckets start on Mondays
+        return (days.astype(np.int64) + 3) // 7
+    months = days.astype('datetime64[M]').astype(np.int64)
+    if unit == MONTH:
+        return months
+    if unit == SEASON:
+        return months // 3
+    raise ValueError(f"Unknown bucket unit: {unit}")
+
+
+def _bucket_start(ordinal: int, unit: str) -> date:
+    """First day of the bucket numbered ``ordinal``"""
+    if unit == DAY:
+        return np.datetime64(ordinal, 'D').item()
+    if unit == WEEK:
+        return np.datetime64(ordinal * 7 - 3, 'D').item()
+    months = ordinal * 3 if unit == SEASON else ordinal
+    return np.datetime64(months, 'M').astype('datetime64[D]').item()
+
+
+class PeriodFrame:
+    """
+    Columnar rows for a date window, bucketed on demand
+
+    Rows are either individual entries (count 1) or per day/type/category
+    groups from load_period_frame. Sums run left to right in row order.
+    """
+
+    def __init__(self, start: date, end: date, rows: Iterable):
+        """
+        Args:
+            start: First day of the window
+            end: Last day of the window
+            rows: Objects with date, type, amount, category_id, category_name
+                (None when the entry has no category) and entry_count
+                (1 when missing, i.e. one row per entry)
+        """
+        rows = list(rows)
+        self.start = start
+        self.end = end
+        self.dates = [row.date for row in rows]
+        self.days = np.array(self.dates, dtype='datetime64[D]')
+        types = np.array([row.type for row in rows], dtype=object)
+        self.is_income = types == EntryType.INCOME
+        self.is_expense = types == EntryType.EXPENSE
+        self.decimals = [row.amount for row in rows]
+        self.amounts = np.array([float(amount) for amount in self.decimals], dtype=float)
+        self.counts = np.array([getattr(row, 'entry_count', 1) for row in rows], dtype=np.int64)
+        self.category_ids = [row.category_id for row in rows]
+        self.category_names = [row.category_name for row in rows]
+        self.has_category = np.array([name is not None for name in self.category_names], dtype=bool)
+
+    def mask(self, start: Optional[date] = None, end: Optional[date] = None,
+             entry_type: Optional[str] = None) -> np.ndarray:
+        """Rows dated within [start, end], optionally of one entry type"""
+        selected = np.ones(len(self.days), dtype=bool)
+        if start is not None:
+            selected &= self.days >= np.datetime64(start)
+        if end is not None:
+            selected &= self.days <= np.datetime64(end)
+        if entry_type == EntryType.INCOME:
+            selected &= self.is_income
+        elif entry_type == EntryType.EXPENSE:
+            selected &= self.is_expense
+        return selected
+
+    def total(self, mask: np.ndarray):
+        """Sum of the masked amounts (int 0 when nothing matches, like sum())"""
+        return sum(self.amounts[mask].tolist())
+
+    def count(self, mask: np.ndarray) -> int:
+        """Number of entries behind the masked rows"""
+        return int(self.counts[mask].sum())
+
+    def totals(self, unit: str, start: Optional[date] = None, end: Optional[date] = None) -> Dict:
+        """
+        Income, expense and entry counts per bucket
+
+        Args:
+            unit: DAY, WEEK, MONTH or SEASON
+            start: First day to include (defaults to the window start)
+            end: Last day to include (defaults to the window end)
+
+        Returns:
+            Dict of bucket 'starts' (dates) and aligned arrays 'income',
+            'expense', 'income_count', 'expense_count' and 'count', with a
+            slot for every bucket between start and end
+        """
+        start = start or self.start
+        end = end or self.end
+        first, last = _bucket_ordinals(np.array([start, end], dtype='datetime64[D]'), unit).tolist()
+        size = last - first + 1
+        labels = _bucket_ordinals(self.days, unit) - first
+        in_range = self.mask(start, end)
+
+        buckets = {'starts': [_bucket_start(first + i, unit) for i in range(size)]}
+        for kind, type_mask in (('income', self.is_income), ('expense', self.is_expense)):
+            selected = in_range & type_mask
+            buckets[kind] = np.bincount(labels[selected], weights=self.amounts[selected], minlength=size)
+            buckets[f'{kind}_count'] = np.bincount(
+                labels[selected], weights=self.counts[selected], minlength=size
+            ).astype(np.int64)
+        buckets['count'] = np.bincount(
+            labels[in_range], weights=self.counts[in_range], minlength=size
+        ).astype(np.int64)
+        return buckets
+
+    def daily_breakdown(self, start: date, end: date) -> List[Dict]:
+        """Per-day income, expenses and transaction counts, as shown in weekly and monthly reports"""
+        buckets = self.totals(DAY, start, end)
+        daily_data = []
+
+        for i, day in enumerate(buckets['starts']):
+            expenses = buckets['expense'][i].item() if buckets['expense_count'][i] else 0
+            income = buckets['income'][i].item() if buckets['income_count'][i] else 0
+
+            daily_data.append({
+                'date': day.isoformat(),
+                'day_name': day.strftime('%A'),
+                'expenses': expenses,
+                'income': income,
+                'net': income - expenses,
+                'transaction_count': int(buckets['count'][i]),
+                'is_weekend': day.weekday() >= 5
+            })
+
+        return daily_data
+
+    def category_totals(self, start: Optional[date] = None, end: Optional[date] = None) -> List[Tuple[str, Decimal, int]]:
+        """
+        Expense totals per category name, ordered by name
+
+        Totals are summed as Decimals, matching SUM() over the Numeric column.
+
+        Returns:
+            List of (name, total, count) tuples
+        """
+        totals = {}
+        counts = {}
+        for i in np.flatnonzero(self.mask(start, end, EntryType.EXPENSE) & self.has_category):
+            name = self.category_names[i]
+            totals[name] = totals.get(name, Decimal('0')) + self.decimals[i]
+            counts[name] = counts.get(name, 0) + int(self.counts[i])
+        return [(name, totals[name], counts[name]) for name in sorted(totals)]
+
+    def days_with_entries(self, start: Optional[date] = None, end: Optional[date] = None) -> int:
+        """Number of distinct days with at least one entry"""
+        return len(np.unique(self.days[self.mask(start, end)]))
+
+
+def load_period_frame(db: Session, user_id: int, start: date, end: date) -> PeriodFrame:
+    """
+    Fetch a user's entries for [start, end] in one GROUP BY date statement
+
+    Args:
+        db: Database session
+        user_id: User ID
+        start: First day of the window
+        end: Last day of the window
+
+    Returns:
+        PeriodFrame with one row per (date, type, category)
+    """
+    rows = db.query(
+        Entry.date,
+        Entry.type,
+        func.sum(Entry.amount).label('amount'),
+        func.count(Entry.id).label('entry_count'),
+        Entry.category_id,
+        Category.name.label('category_name')
+    ).outerjoin(
+        Category, Entry.category_id == Category.id
+    ).filter(
+        Entry.user_id == user_id,
+        Entry.date >= start,
+        Entry.date <= end
+    ).group_by(
+        Entry.date, Entry.type, Entry.category_id, Category.name
+    ).order_by(
+        Entry.date, Entry.type, Entry.category_id
+    ).all()
+
+    return PeriodFrame(start, end, rows)
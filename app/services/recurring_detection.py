@@ -0,0 +1,187 @@
+"""
+Recurring bill detection
+
+Expenses are loaded once as a DataFrame and grouped by normalized merchant key
+(or category, for entries without a note) plus a logarithmic amount band.
+Interval statistics come from ``groupby().diff()`` in one vectorized pass, and
+each candidate group's period is found by autocorrelating its daily
+occurrence series at the weekly, biweekly, monthly, quarterly and annual lags.
+Groups with irregular gaps, or that are only a slice of a merchant's frequent
+purchases, are not bills however well their mean interval fits a period.
+"""
+
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from app.services.duplicate_detection import merchant_key
+
+# Expected gap in days and matching tolerance for each period
+PERIODS = {
+    'weekly': (7.0, 1),
+    'biweekly': (14.0, 2),
+    'monthly': (30.44, 3),
+    'quarterly': (91.31, 7),
+    'annual': (365.25, 15),
+}
+PERIODS_PER_YEAR = {'weekly': 52, 'biweekly': 26, 'monthly': 12, 'quarterly': 4, 'annual': 1}
+
+# Long enough for three annual occurrences
+LOOKBACK_DAYS = 800
+MIN_OCCURRENCES = 3
+
+# Amounts within about 15% of each other share a band
+AMOUNT_BAND_RATIO = 1.15
+
+# Share of occurrences followed by another one a period later
+MIN_PERIODIC_SCORE = 0.6
+
+# Bills arrive at steady intervals; frequent purchases only average out to a period
+# (daily coffee split into amount bands has gaps of 1-15 days around a weekly mean)
+MAX_INTERVAL_CV = 0.4
+
+# A merchant's band must hold this share of its purchases over the band's span,
+# or it is a slice of frequent buying that happens to line up with a period
+MIN_BAND_SHARE = 1 / 3
+
+# A pattern whose last occurrence is older than this many periods has ended
+ACTIVE_PERIODS = 1.5
+
+
+def amount_bands(amounts: pd.Series) -> pd.Series:
+    """Logarithmic amount band of each amount"""
+    return np.floor(np.log(amounts.clip(lower=0.01)) / np.log(AMOUNT_BAND_RATIO)).astype('int64')
+
+
+def periodicity_scores(day_offsets: np.ndarray) -> Dict[str, float]:
+    """
+    Autocorrelation of an occurrence series at each period's lag
+
+    Args:
+        day_offsets: Sorted day numbers of the occurrences, starting at 0
+
+    Returns:
+        Per period, the share of occurrences with another occurrence one period
+        later (within the period's tolerance); 1.0 is perfectly periodic
+    """
+    series = np.zeros(int(day_offsets[-1]) + 1)
+    series[day_offsets] = 1.0
+    pairs = len(day_offsets) - 1
+
+    scores = {}
+    for name, (period, tolerance) in PERIODS.items():
+        lag = int(round(period))
+        if lag >= len(series):
+            scores[name] = 0.0
+            continue
+        # Widen each occurrence by the tolerance so lags of 28-31 days all match
+        widened = np.minimum(np.convolve(series, np.ones(2 * tolerance + 1), mode='same'), 1.0)
+        scores[name] = float(series[:-lag] @ widened[lag:]) / pairs
+    return scores
+
+
+def detect_periodicity(day_offsets: np.ndarray, mean_interval: float) -> Optional[tuple]:
+    """
+    Period of an occurrence series, if it has one
+
+    The shortest period whose autocorrelation clears MIN_PERIODIC_SCORE and whose
+    expected gap is close to the mean interval wins (a weekly series also
+    correlates at 14 days; daily purchases correlate at every lag).
+
+    Returns:
+        (period name, score) or None
+    """
+    scores = periodicity_scores(day_offsets)
+    for name, (period, tolerance) in PERIODS.items():
+        if scores[name] >= MIN_PERIODIC_SCORE and abs(mean_interval - period) <= 0.25 * period + tolerance:
+            return name, scores[name]
+    return None
+
+
+def detect_recurring(df: pd.DataFrame, today: date) -> List[Dict]:
+    """
+    Recurring expenses in an entries frame
+
+    Args:
+        df: Expenses with date, amount, category_id, category_name and note columns
+        today: Reference date for activity and days until due
+
+    Returns:
+        Detected recurring bills, soonest due first
+    """
+    if df.empty:
+        return []
+
+    df = df.copy()
+    df['merchant'] = df['note'].map(merchant_key)
+    df['group'] = np.where(df['merchant'] != '', 'note:' + df['merchant'], 'category:' + df['category_id'].astype(str))
+    df['band'] = amount_bands(df['amount'])
+    df['day'] = (pd.to_datetime(df['date']) - pd.Timestamp(today)).dt.days
+    df = df.sort_values(['group', 'band', 'day'], kind='stable')
+
+    keys = ['group', 'band']
+    df['interval'] = df.groupby(keys, sort=False)['day'].diff()
+    grouped = df.groupby(keys, sort=False)
+
+    stats = grouped.agg(
+        occurrences=('day', 'size'),
+        first_day=('day', 'first'),
+        last_day=('day', 'last'),
+        avg_amount=('amount', 'mean'),
+        avg_interval=('interval', 'mean'),
+        std_interval=('interval', 'std'),
+        category_id=('category_id', 'first'),
+        category_name=('category_name', 'last'),
+        description=('note', 'first'),
+    )
+    stats = stats[(stats['occurrences'] >= MIN_OCCURRENCES) & (stats['avg_interval'] > 0)]
+    # Interval consistency gate: coefficient of variation of the gaps
+    stats = stats[stats['std_interval'].fillna(0.0) <= MAX_INTERVAL_CV * stats['avg_interval']]
+
+    merchant_days = {
+        group: np.sort(days.to_numpy())
+        for group, days in df[df['merchant'] != ''].groupby('group', sort=False)['day']
+    }
+
+    bills = []
+    for key, row in stats.iterrows():
+        all_days = merchant_days.get(key[0])
+        if all_days is not None:
+            in_span = np.searchsorted(all_days, row['last_day'], side='right') - \
+                np.searchsorted(all_days, row['first_day'])
+            if row['occurrences'] < MIN_BAND_SHARE * in_span:
+                continue
+
+        days = grouped.get_group(key)['day'].to_numpy()
+        detected = detect_periodicity(days - days[0], row['avg_interval'])
+        if detected is None:
+            continue
+        frequency, score = detected
+        period = PERIODS[frequency][0]
+        if -row['last_day'] > ACTIVE_PERIODS * period:
+            continue
+
+        std_interval = 0.0 if pd.isna(row['std_interval']) else float(row['std_interval'])
+        last_date = today + timedelta(days=int(row['last_day']))
+        next_due_date = last_date + timedelta(days=int(row['avg_interval']))
+        category_id = int(row['category_id']) or None
+        bills.append({
+            'description': row['description'] or row['category_name'],
+            'category_id': category_id,
+            'category_name': row['category_name'] if category_id else 'Uncategorized',
+            'avg_amount': round(float(row['avg_amount']), 2),
+            'frequency': frequency,
+            'avg_interval_days': round(float(row['avg_interval']), 1),
+            'occurrences': int(row['occurrences']),
+            'first_date': (today + timedelta(days=int(row['first_day']))).isoformat(),
+            'last_date': last_date.isoformat(),
+            'predicted_next_date': next_due_date.isoformat(),
+            'days_until_due': (next_due_date - today).days,
+            'periodicity_score': round(score, 2),
+            'confidence': 'high' if score >= 0.9 and std_interval < max(3.0, 0.1 * period) else 'medium'
+        })
+
+    bills.sort(key=lambda bill: bill['days_until_due'])
+    return bills
@@ -9,15 +9,99 @@ This replaces the AI-detected recurring bills with a user-managed system where:
 
 from datetime import datetime, date, timedelta
 from typing import List, Dict, Optional
-from sqlalchemy.orm import Session
-from sqlalchemy import and_, or_
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy import and_, or_, exists, extract, false, func, insert, select, update
 
 from app.models.recurring_payment import RecurringPayment, PaymentReminder, RecurrenceFrequency
+from app.models.payment_history import PaymentOccurrence
+from app.models.entry import Entry
 from app.models.category import Category
 from app.core.logging_config import get_logger
+from app.services.budget_intelligence_service import BudgetIntelligenceService
+from app.services.data_version import bump_data_version
+from app.services.duplicate_detection import merchant_key
 
 logger = get_logger(__name__)
 
+# Detected frequency -> RecurringPayment frequency
+DETECTED_FREQUENCIES = {
+    'weekly': RecurrenceFrequency.WEEKLY,
+    'biweekly': RecurrenceFrequency.BIWEEKLY,
+    'monthly': RecurrenceFrequency.MONTHLY,
+    'quarterly': RecurrenceFrequency.QUARTERLY,
+    'annual': RecurrenceFrequency.ANNUALLY,
+}
+
+# A recurring payment within this share of a detected amount already covers it
+SUGGESTION_AMOUNT_TOLERANCE = 0.15
+
+# Due auto-add payments processed (and committed) per transaction
+AUTO_ADD_CHUNK_SIZE = 500
+
+# Postgres advisory lock serializing auto-add chunks across workers
+AUTO_ADD_LOCK_KEY = 29_001
+
+# Payments whose next due date the nightly refresh recomputes per batch
+DUE_DATE_REFRESH_CHUNK_SIZE = 1000
+
+# Fields that change when a payment falls due
+SCHEDULE_FIELDS = ('frequency', 'due_day', 'start_date', 'end_date')
+
+QUARTER_MONTHS = (1, 4, 7, 10)
+
+
+def is_due_on(payment, day: date) -> bool:
+    """
+    Whether a recurring payment falls due on a day
+
+    Args:
+        payment: RecurringPayment (or a row with its schedule columns)
+        day: Date to check
+
+    Returns:
+        True if the payment is due on that day
+    """
+    if payment.end_date and day > payment.end_date:
+        return False
+    if day < payment.start_date:
+        return False
+
+    if payment.frequency == RecurrenceFrequency.WEEKLY:
+        # due_day is day of week (0 = Monday, 6 = Sunday)
+        return day.weekday() == payment.due_day
+    if payment.frequency == RecurrenceFrequency.BIWEEKLY:
+        # Every other week counted from start_date
+        return day.weekday() == payment.due_day and ((day - payment.start_date).days // 7) % 2 == 0
+    if payment.frequency == RecurrenceFrequency.MONTHLY:
+        return day.day == payment.due_day
+    if payment.frequency == RecurrenceFrequency.QUARTERLY:
+        return day.month in QUARTER_MONTHS and day.day == payment.due_day
+    if payment.frequency == RecurrenceFrequency.ANNUALLY:
+        return day.month == payment.start_date.month and day.day == payment.due_day
+    return False
+
+
+def due_on_clause(day: date):
+    """
+    SQL filter matching the payments is_due_on() accepts for a day
+
+    Biweekly payments are matched on their weekday only; their every-other-week
+    parity is left to is_due_on().
+    """
+    return and_(
+        RecurringPayment.start_date <= day,
+        or_(RecurringPayment.end_date.is_(None), RecurringPayment.end_date >= day),
+        or_(
+            and_(RecurringPayment.frequency.in_([RecurrenceFrequency.WEEKLY, RecurrenceFrequency.BIWEEKLY]),
+                 RecurringPayment.due_day == day.weekday()),
+            and_(RecurringPayment.frequency == RecurrenceFrequency.MONTHLY, RecurringPayment.due_day == day.day),
+            and_(RecurringPayment.frequency == RecurrenceFrequency.QUARTERLY, RecurringPayment.due_day == day.day)
+            if day.month in QUARTER_MONTHS else false(),
+            and_(RecurringPayment.frequency == RecurrenceFrequency.ANNUALLY, RecurringPayment.due_day == day.day,
+                 extract('month', RecurringPayment.start_date) == day.month),
+        )
+    )
+
 
 class RecurringPaymentService:
     """Service for managing recurring payments and reminders"""
@@ -78,6 +162,7 @@ class RecurringPaymentService:
             created_at=datetime.utcnow(),
             updated_at=datetime.utcnow()
         )
+        payment.next_due_date = self.calculate_next_due_date(payment)
 
         self.db.add(payment)
         self.db.commit()
@@ -141,6 +226,9 @@ class RecurringPaymentService:
             if hasattr(payment, key):
                 setattr(payment, key, value)
 
+        if any(key in updates for key in SCHEDULE_FIELDS):
+            payment.next_due_date = self.calculate_next_due_date(payment)
+
         payment.updated_at = datetime.utcnow()
         self.db.commit()
         self.db.refresh(payment)
@@ -205,6 +293,8 @@ class RecurringPaymentService:
             return None
 
         payment.is_active = not payment.is_active
+        if payment.is_active:
+            payment.next_due_date = self.calculate_next_due_date(payment)
         payment.updated_at = datetime.utcnow()
         self.db.commit()
         self.db.refresh(payment)
@@ -212,6 +302,59 @@ class RecurringPaymentService:
         logger.info(f"Toggled payment {payment_id} active status to {payment.is_active}")
         return payment
 
+    # ==================== SUGGESTIONS ====================
+
+    def suggest_recurring_payments(self, user_id: int) -> List[Dict]:
+        """
+        Suggest recurring payments from detected spending patterns
+
+        Detected recurring bills that already match one of the user's recurring
+        payments (same frequency and category at a similar amount, or the same
+        merchant name) are left out, as are bills without a category.
+
+        Args:
+            user_id: User ID
+
+        Returns:
+            List of suggestions with the fields create_recurring_payment takes
+            (frequency as its value) plus detection details
+        """
+        detected = BudgetIntelligenceService(self.db).detect_recurring_bills(user_id)
+        existing = self.db.query(
+            RecurringPayment.category_id, RecurringPayment.name, RecurringPayment.amount, RecurringPayment.frequency
+        ).filter(RecurringPayment.user_id == user_id).all()
+        existing_merchants = {merchant_key(row.name) for row in existing} - {''}
+
+        suggestions = []
+        for bill in detected:
+            frequency = DETECTED_FREQUENCIES[bill['frequency']]
+            amount = bill['avg_amount']
+            if bill['category_id'] is None or merchant_key(bill['description']) in existing_merchants:
+                continue
+            if any(
+                row.category_id == bill['category_id'] and row.frequency == frequency
+                and abs(float(row.amount) - amount) <= SUGGESTION_AMOUNT_TOLERANCE * amount
+                for row in existing
+            ):
+                continue
+
+            last_date = date.fromisoformat(bill['last_date'])
+            weekly = frequency in (RecurrenceFrequency.WEEKLY, RecurrenceFrequency.BIWEEKLY)
+            suggestions.append({
+                'name': bill['description'][:255],
+                'category_id': bill['category_id'],
+                'category_name': bill['category_name'],
+                'amount': amount,
+                'frequency': frequency.value,
+                'due_day': last_date.weekday() if weekly else last_date.day,
+                'start_date': bill['first_date'],
+                'next_due_date': bill['predicted_next_date'],
+                'occurrences': bill['occurrences'],
+                'confidence': bill['confidence']
+            })
+
+        return suggestions
+
     # ==================== NEXT DUE DATE CALCULATION ====================
 
     def calculate_next_due_date(
@@ -254,6 +397,120 @@ class RecurringPaymentService:
 
         return None
 
+    def get_next_due_date(self, payment: RecurringPayment, today: Optional[date] = None) -> Optional[date]:
+        """
+        Next due date of a payment, from its persisted next_due_date while current
+
+        Args:
+            payment: RecurringPayment object
+            today: Reference date (default: today)
+
+        Returns:
+            Next due date or None if payment has ended
+        """
+        today = today or date.today()
+        if payment.next_due_date and payment.next_due_date > today:
+            return payment.next_due_date
+        return self.calculate_next_due_date(payment, today)
+
+    def settle_next_due_date(self, payment: RecurringPayment, scheduled_date: date):
+        """
+        Move next_due_date past a paid or skipped occurrence
+
+        Settling an older occurrence leaves it alone; settling the upcoming one
+        (or a later one) makes the following due date the next one.
+        Commit happens in calling function.
+
+        Args:
+            payment: RecurringPayment object
+            scheduled_date: Scheduled date of the settled occurrence
+        """
+        current = self.get_next_due_date(payment)
+        if current is None or scheduled_date >= current:
+            payment.next_due_date = self.calculate_next_due_date(payment, max(scheduled_date, date.today()))
+        else:
+            payment.next_due_date = current
+
+    def refresh_next_due_dates(
+        self,
+        today: Optional[date] = None,
+        user_id: Optional[int] = None,
+        chunk_size: int = DUE_DATE_REFRESH_CHUNK_SIZE
+    ) -> int:
+        """
+        Recompute next_due_date for active payments whose due date has passed
+
+        Payments not yet computed (NULL) are included unless they have ended.
+
+        Args:
+            today: Reference date (default: today)
+            user_id: Only refresh this user's payments (default: all users)
+            chunk_size: Payments updated (and committed) per batch
+
+        Returns:
+            Number of payments refreshed
+        """
+        today = today or date.today()
+        refreshed = 0
+        last_id = 0
+
+        while True:
+            query = self.db.query(
+                RecurringPayment.id, RecurringPayment.frequency, RecurringPayment.due_day,
+                RecurringPayment.start_date, RecurringPayment.end_date
+            ).filter(
+                RecurringPayment.id > last_id,
+                RecurringPayment.is_active == True,
+                or_(RecurringPayment.next_due_date <= today,
+                    and_(RecurringPayment.next_due_date.is_(None),
+                         or_(RecurringPayment.end_date.is_(None), RecurringPayment.end_date >= today)))
+            )
+            if user_id is not None:
+                query = query.filter(RecurringPayment.user_id == user_id)
+            payments = query.order_by(RecurringPayment.id).limit(chunk_size).all()
+            if not payments:
+                break
+
+            self.db.execute(update(RecurringPayment), [
+                {'id': payment.id, 'next_due_date': self.calculate_next_due_date(payment, today)}
+                for payment in payments
+            ])
+            self.db.commit()
+
+            refreshed += len(payments)
+            last_id = payments[-1].id
+
+        return refreshed
+
+    def get_upcoming_payments(
+        self,
+        days_ahead: int = 7,
+        user_id: Optional[int] = None,
+        today: Optional[date] = None
+    ) -> List[RecurringPayment]:
+        """
+        Active payments due within the next days_ahead days, soonest first
+
+        A range scan over next_due_date, for one user or all users.
+
+        Args:
+            days_ahead: How many days ahead to look
+            user_id: Only this user's payments (default: all users)
+            today: Reference date (default: today)
+
+        Returns:
+            List of RecurringPayment objects
+        """
+        today = today or date.today()
+        query = self.db.query(RecurringPayment).options(joinedload(RecurringPayment.category)).filter(
+            RecurringPayment.is_active == True,
+            RecurringPayment.next_due_date > today,
+            RecurringPayment.next_due_date <= today + timedelta(days=days_ahead)
+        )
+        if user_id is not None:
+            query = query.filter(RecurringPayment.user_id == user_id)
+        return query.order_by(RecurringPayment.next_due_date, RecurringPayment.id).all()
+
     def _calculate_first_due_date(self, payment: RecurringPayment) -> date:
         """Calculate the first due date based on start_date and due_day"""
         if payment.frequency == RecurrenceFrequency.WEEKLY:
@@ -387,6 +644,150 @@ class RecurringPaymentService:
         else:
             return date(year, month + 1, 1) - timedelta(days=1)
 
+    # ==================== SCHEDULED AUTO-ADD ====================
+
+    def auto_add_due_payments(
+        self,
+        today: Optional[date] = None,
+        chunk_size: int = AUTO_ADD_CHUNK_SIZE
+    ) -> Dict[str, int]:
+        """
+        Add an expense and a paid occurrence for every auto-add payment due today
+
+        Due payments without an occurrence for today are selected in SQL, a
+        chunk at a time, and their entries and occurrences bulk-inserted in one
+        transaction per chunk. On Postgres each chunk holds an advisory lock,
+        so workers running this concurrently never add the same bill twice.
+
+        Args:
+            today: Date to process (default: today)
+            chunk_size: Payments per transaction
+
+        Returns:
+            Counts of created entries, chunks and payments that could not be added
+        """
+        today = today or date.today()
+        totals = {'created': 0, 'chunks': 0, 'errors': 0}
+        last_id = 0
+
+        while True:
+            try:
+                last_id, created, failed = self._auto_add_chunk(today, last_id, chunk_size)
+            except Exception as e:
+                logger.error(f"Auto-add chunk after payment {last_id} failed: {e}")
+                self.db.rollback()
+                totals['errors'] += 1
+                break
+
+            if last_id is None:
+                break
+            totals['created'] += created
+            totals['errors'] += failed
+            totals['chunks'] += 1
+
+        return totals
+
+    def _auto_add_chunk(self, today: date, after_id: int, chunk_size: int):
+        """
+        Process the next chunk of due payments with ids above after_id
+
+        If the chunk's inserts fail, it is rolled back and its payments are
+        retried one per transaction, so a single bad payment is skipped
+        without losing the rest of the chunk.
+
+        Returns:
+            (last payment id seen, entries created, payments that failed),
+            or (None, 0, 0) when done
+        """
+        payments = self._select_due_chunk(today, after_id, chunk_size)
+        if not payments:
+            self.db.rollback()
+            return None, 0, 0
+
+        due = [payment for payment in payments if is_due_on(payment, today)]
+        try:
+            self._insert_auto_added(today, due)
+            return payments[-1].id, len(due), 0
+        except Exception as e:
+            logger.warning(f"Auto-add chunk after payment {after_id} failed, retrying one payment at a time: {e}")
+            self.db.rollback()
+
+        created = failed = 0
+        for payment in due:
+            try:
+                # Relock and recheck: another worker may have added it meanwhile
+                selected = self._select_due_chunk(today, payment.id - 1, 1)
+                if selected and selected[0].id == payment.id:
+                    self._insert_auto_added(today, selected)
+                    created += 1
+                else:
+                    self.db.rollback()
+            except Exception as e:
+                logger.error(f"Auto-add of recurring payment {payment.id} failed: {e}")
+                self.db.rollback()
+                failed += 1
+        return payments[-1].id, created, failed
+
+    def _select_due_chunk(self, today: date, after_id: int, chunk_size: int) -> List:
+        """Due auto-add payments with ids above after_id not yet added today, in id order"""
+        if self.db.get_bind().dialect.name == 'postgresql':
+            # Released on commit; another worker's chunk is committed (and
+            # visible to the anti-join below) before this one selects
+            self.db.execute(select(func.pg_advisory_xact_lock(AUTO_ADD_LOCK_KEY)))
+
+        already_added = exists().where(
+            PaymentOccurrence.recurring_payment_id == RecurringPayment.id,
+            PaymentOccurrence.scheduled_date == today
+        )
+        return self.db.query(
+            RecurringPayment.id, RecurringPayment.user_id, RecurringPayment.category_id, RecurringPayment.name,
+            RecurringPayment.amount, RecurringPayment.currency_code, RecurringPayment.frequency,
+            RecurringPayment.due_day, RecurringPayment.start_date, RecurringPayment.end_date
+        ).filter(
+            RecurringPayment.id > after_id,
+            RecurringPayment.is_active == True,
+            RecurringPayment.auto_add_to_expenses == True,
+            due_on_clause(today),
+            ~already_added
+        ).order_by(RecurringPayment.id).limit(chunk_size).all()
+
+    def _insert_auto_added(self, today: date, due: List) -> None:
+        """Bulk-insert entries and paid occurrences for due payments and commit"""
+        if due:
+            entry_ids = self.db.execute(
+                insert(Entry).returning(Entry.id, sort_by_parameter_order=True),
+                [{
+                    'user_id': payment.user_id,
+                    'category_id': payment.category_id,
+                    'type': "expense",
+                    'amount': payment.amount,
+                    'currency_code': payment.currency_code,
+                    'date': today,
+                    'description': f"{payment.name} (Auto-added)",
+                } for payment in due]
+            ).scalars().all()
+
+            now = datetime.utcnow()
+            self.db.execute(insert(PaymentOccurrence), [{
+                'user_id': payment.user_id,
+                'recurring_payment_id': payment.id,
+                'scheduled_date': today,
+                'actual_date': today,
+                'amount': payment.amount,
+                'currency_code': payment.currency_code,
+                'is_paid': True,
+                'linked_entry_id': entry_id,
+                'note': "Auto-added by scheduler",
+                'created_at': now,
+                'updated_at': now,
+                'paid_at': now,
+            } for payment, entry_id in zip(due, entry_ids)])
+
+            # Bulk inserts skip the flush hook that versions entry writes
+            bump_data_version(self.db, {payment.user_id for payment in due})
+
+        self.db.commit()
+
     # ==================== REMINDERS ====================
 
     def generate_reminders(self, user_id: int) -> int:
@@ -402,51 +803,82 @@ class RecurringPaymentService:
         Returns:
             Number of reminders created
         """
-        payments = self.get_user_recurring_payments(user_id, include_inactive=False)
-        reminders_created = 0
         today = date.today()
+        self.refresh_next_due_dates(today, user_id=user_id)
+        reminders_created = self._create_reminders(today, user_id)
 
-        for payment in payments:
-            next_due = self.calculate_next_due_date(payment, today)
+        if reminders_created > 0:
+            logger.info(f"Generated {reminders_created} reminders for user {user_id}")
 
-            if not next_due:
-                continue
+        return reminders_created
 
-            # Calculate reminder date
-            reminder_date = next_due - timedelta(days=payment.remind_days_before)
+    def generate_all_reminders(self, today: Optional[date] = None) -> int:
+        """
+        Generate reminders for every user's upcoming payments in one pass
 
-            # Only create reminder if it should show today or later
-            if reminder_date <= today:
-                # Check if reminder already exists for this due date
-                existing = self.db.query(PaymentReminder).filter(
-                    and_(
-                        PaymentReminder.user_id == user_id,
-                        PaymentReminder.recurring_payment_id == payment.id,
-                        PaymentReminder.due_date == next_due,
-                        PaymentReminder.is_dismissed == False
-                    )
-                ).first()
-
-                if not existing:
-                    reminder = PaymentReminder(
-                        user_id=user_id,
-                        recurring_payment_id=payment.id,
-                        reminder_date=reminder_date,
-                        due_date=next_due,
-                        amount=payment.amount,
-                        is_dismissed=False,
-                        is_paid=False,
-                        created_at=datetime.utcnow()
-                    )
-                    self.db.add(reminder)
-                    reminders_created += 1
+        Expects next_due_date to be current (see refresh_next_due_dates).
 
-        if reminders_created > 0:
-            self.db.commit()
-            logger.info(f"Generated {reminders_created} reminders for user {user_id}")
+        Args:
+            today: Reference date (default: today)
 
+        Returns:
+            Number of reminders created
+        """
+        reminders_created = self._create_reminders(today or date.today())
+        logger.info(f"Generated {reminders_created} reminders")
         return reminders_created
 
+    def _create_reminders(self, today: date, user_id: Optional[int] = None) -> int:
+        """Bulk-insert reminders that are due to show, skipping existing ones"""
+        query = self.db.query(func.max(RecurringPayment.remind_days_before)).filter(
+            RecurringPayment.is_active == True
+        )
+        if user_id is not None:
+            query = query.filter(RecurringPayment.user_id == user_id)
+        horizon = query.scalar()
+        if horizon is None:
+            return 0
+
+        already_reminded = exists().where(
+            PaymentReminder.recurring_payment_id == RecurringPayment.id,
+            PaymentReminder.due_date == RecurringPayment.next_due_date,
+            PaymentReminder.is_dismissed == False
+        )
+        query = self.db.query(
+            RecurringPayment.id, RecurringPayment.user_id, RecurringPayment.amount,
+            RecurringPayment.next_due_date, RecurringPayment.remind_days_before
+        ).filter(
+            RecurringPayment.is_active == True,
+            RecurringPayment.next_due_date > today,
+            RecurringPayment.next_due_date <= today + timedelta(days=horizon),
+            ~already_reminded
+        )
+        if user_id is not None:
+            query = query.filter(RecurringPayment.user_id == user_id)
+
+        now = datetime.utcnow()
+        reminders = []
+        for payment in query:
+            # Only create reminder if it should show today or earlier
+            reminder_date = payment.next_due_date - timedelta(days=payment.remind_days_before)
+            if reminder_date <= today:
+                reminders.append({
+                    'user_id': payment.user_id,
+                    'recurring_payment_id': payment.id,
+                    'reminder_date': reminder_date,
+                    'due_date': payment.next_due_date,
+                    'amount': payment.amount,
+                    'is_dismissed': False,
+                    'is_paid': False,
+                    'created_at': now,
+                })
+
+        if reminders:
+            self.db.execute(insert(PaymentReminder), reminders)
+            self.db.commit()
+
+        return len(reminders)
+
     def get_active_reminders(
         self,
         user_id: int,
@@ -605,9 +1037,9 @@ class RecurringPaymentService:
                     'currency_code': p.currency_code,
                     'frequency': p.frequency.value,
                     'category_name': p.category.name if p.category else 'Uncategorized',
-                    'next_due_date': self.calculate_next_due_date(p).isoformat() if self.calculate_next_due_date(p) else None,
+                    'next_due_date': next_due.isoformat() if next_due else None,
                     'is_active': p.is_active
                 }
-                for p in payments
+                for p, next_due in ((p, self.get_next_due_date(p)) for p in payments)
             ]
         }
@@ -0,0 +1,199 @@
+"""
+Chart rendering for PDF reports
+
+Charts are drawn with the object-oriented Figure API on the Agg backend (no pyplot
+global state), so each render function is self-contained, picklable and safe to run
+in a worker process or thread. render_charts fans a report's charts out over a
+process pool and falls back to threads if worker processes are unavailable.
+"""
+import asyncio
+import io
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import matplotlib
+matplotlib.use('Agg')
+from matplotlib import style as mpl_style
+from matplotlib.figure import Figure
+
+logger = logging.getLogger(__name__)
+
+CHART_STYLE = 'seaborn-v0_8'
+CHART_DPI = 300
+
+# A report renders at most three charts
+CHART_WORKERS = min(3, os.cpu_count() or 1)
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+
+
+def _save_png(fig: Figure) -> bytes:
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='png', dpi=CHART_DPI, bbox_inches='tight')
+    return buffer.getvalue()
+
+
+def render_income_expense_chart(total_income: float, total_expense: float, user_currency: str) -> Optional[bytes]:
+    """Income vs expense pie chart as PNG bytes"""
+    try:
+        if total_income == 0 and total_expense == 0:
+            return None
+
+        with mpl_style.context(CHART_STYLE):
+            fig = Figure(figsize=(8, 6))
+            ax = fig.subplots()
+
+            labels = []
+            sizes = []
+            colors_list = []
+
+            if total_income > 0:
+                labels.append(f"Income\n({user_currency} {total_income:,.2f})")
+                sizes.append(total_income)
+                colors_list.append('#2E8B57')  # Sea Green
+
+            if total_expense > 0:
+                labels.append(f"Expense\n({user_currency} {total_expense:,.2f})")
+                sizes.append(total_expense)
+                colors_list.append('#DC143C')  # Crimson
+
+            ax.pie(sizes, labels=labels, colors=colors_list, autopct='%1.1f%%', startangle=90)
+            ax.set_title('Income vs Expense Distribution', fontsize=14, fontweight='bold')
+
+            return _save_png(fig)
+
+    except Exception as e:
+        print(f"Error creating income/expense chart: {e}")
+        return None
+
+
+def render_category_chart(category_totals: Dict[str, Dict[str, float]], user_currency: str) -> Optional[bytes]:
+    """Income and expense per category bar chart as PNG bytes"""
+    try:
+        if not category_totals:
+            return None
+
+        categories = list(category_totals.keys())
+        income_values = [category_totals[cat]["income"] for cat in categories]
+        expense_values = [category_totals[cat]["expense"] for cat in categories]
+
+        with mpl_style.context(CHART_STYLE):
+            fig = Figure(figsize=(10, 6))
+            ax = fig.subplots()
+
+            x = range(len(categories))
+            width = 0.35
+
+            bars1 = ax.bar([i - width/2 for i in x], income_values, width, label='Income', color='#2E8B57')
+            bars2 = ax.bar([i + width/2 for i in x], expense_values, width, label='Expense', color='#DC143C')
+
+            ax.set_xlabel('Categories')
+            ax.set_ylabel(f'Amount ({user_currency})')
+            ax.set_title('Income and Expense by Category', fontsize=14, fontweight='bold')
+            ax.set_xticks(x)
+            ax.set_xticklabels(categories, rotation=45, ha='right')
+            ax.legend()
+            ax.grid(True, alpha=0.3)
+
+            # Add value labels on bars
+            for bar in list(bars1) + list(bars2):
+                height = bar.get_height()
+                if height > 0:
+                    ax.annotate(f'{height:,.0f}',
+                                xy=(bar.get_x() + bar.get_width() / 2, height),
+                                xytext=(0, 3),
+                                textcoords="offset points",
+                                ha='center', va='bottom', fontsize=8)
+
+            fig.tight_layout()
+            return _save_png(fig)
+
+    except Exception as e:
+        print(f"Error creating category chart: {e}")
+        return None
+
+
+def render_monthly_trend_chart(
+    months: Sequence[str],
+    income: Optional[Sequence[float]],
+    expense: Optional[Sequence[float]],
+    user_currency: str
+) -> Optional[bytes]:
+    """Monthly income / expense line chart as PNG bytes (a series is None when absent)"""
+    try:
+        if not months:
+            return None
+
+        with mpl_style.context(CHART_STYLE):
+            fig = Figure(figsize=(12, 6))
+            ax = fig.subplots()
+
+            if income is not None:
+                ax.plot(months, income, marker='o', linewidth=2, label='Income', color='#2E8B57')
+
+            if expense is not None:
+                ax.plot(months, expense, marker='s', linewidth=2, label='Expense', color='#DC143C')
+
+            ax.set_xlabel('Month')
+            ax.set_ylabel(f'Amount ({user_currency})')
+            ax.set_title('Monthly Income and Expense Trend', fontsize=14, fontweight='bold')
+            ax.legend()
+            ax.grid(True, alpha=0.3)
+            ax.tick_params(axis='x', labelrotation=45)
+
+            fig.tight_layout()
+            return _save_png(fig)
+
+    except Exception as e:
+        print(f"Error creating monthly trend chart: {e}")
+        return None
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    """Lazily start the shared chart worker pool (spawned, so no threads are forked)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(
+                max_workers=CHART_WORKERS,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _pool
+
+
+def shutdown_chart_pool() -> None:
+    """Stop the chart worker processes (called on application shutdown)"""
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = None
+
+
+async def render_charts(charts: List[Tuple[Callable[..., Optional[bytes]], Tuple[Any, ...]]]) -> List[Optional[bytes]]:
+    """
+    Render charts concurrently in the worker pool
+
+    Args:
+        charts: (render function, args) pairs
+
+    Returns:
+        PNG bytes (or None) per chart, in order
+    """
+    if not charts:
+        return []
+
+    loop = asyncio.get_running_loop()
+    try:
+        pool = _get_pool()
+        return list(await asyncio.gather(*[loop.run_in_executor(pool, fn, *args) for fn, args in charts]))
+    except (BrokenProcessPool, OSError, RuntimeError) as e:
+        logger.warning(f"Chart worker pool unavailable ({e}); rendering charts in threads")
+        shutdown_chart_pool()
+        return list(await asyncio.gather(*[loop.run_in_executor(None, fn, *args) for fn, args in charts]))
@@ -0,0 +1,581 @@
+"""
+Scheduled bulk report dispatch
+
+The weekly and monthly report jobs hand their recipients to a ReportDispatcher:
+
+- Reports are generated in a bounded thread pool, each worker with its own
+  session, so one slow report or SMTP call no longer holds up everyone else.
+- Deliveries run with bounded concurrency behind one global rate limit shared
+  by every sender, and failed sends are retried with exponential backoff.
+- Every recipient is checkpointed in report_dispatch_items. A run interrupted
+  by a restart resumes with the recipients not yet processed, and a completed
+  run is never sent twice.
+- Each item is claimed ('pending' -> 'sending') with a conditional UPDATE
+  before it is generated, so processes resuming the same run never send to a
+  recipient twice. Claims older than CLAIM_LEASE are requeued.
+- Emails are rendered from the precompiled templates; runs with many
+  recipients render them in a pool of worker processes.
+- Each run records throughput metrics on report_dispatch_runs.
+"""
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from sqlalchemy import exists, func, insert, literal, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from app.db.session import SessionLocal
+from app.models.report_dispatch import ReportDispatchItem, ReportDispatchRun
+from app.models.user import User
+from app.models.weekly_report import UserReportPreferences, WeeklyReport
+from app.services.email_templates import build_report_email
+
+logger = logging.getLogger(__name__)
+
+# Report generation threads
+DISPATCH_WORKERS = 4
+
+# Deliveries in flight at once
+SEND_CONCURRENCY = 8
+
+# Global cap on deliveries per second, across all senders
+SEND_RATE_PER_SECOND = 10.0
+
+MAX_SEND_ATTEMPTS = 3
+RETRY_BASE_DELAY = 2.0  # seconds, doubled after every failed attempt
+
+# An item claimed longer ago than this was abandoned by a stopped process
+CLAIM_LEASE = timedelta(minutes=15)
+
+# Runs with at least this many pending recipients render emails in worker processes
+RENDER_PROCESS_THRESHOLD = 500
+RENDER_PROCESSES = min(4, os.cpu_count() or 1)
+
+_render_pool: Optional[ProcessPoolExecutor] = None
+_render_pool_lock = threading.Lock()
+
+
+def _get_render_pool() -> ProcessPoolExecutor:
+    """Lazily start the email render worker pool (spawned, so no threads are forked)"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = ProcessPoolExecutor(
+                max_workers=RENDER_PROCESSES,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+        return _render_pool
+
+
+def shutdown_render_pool() -> None:
+    """Stop the email render worker processes (called on application shutdown)"""
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is not None:
+            _render_pool.shutdown(wait=False, cancel_futures=True)
+            _render_pool = None
+
+
+class RateLimiter:
+    """Token bucket shared by every sender of a dispatcher"""
+
+    def __init__(self, rate: float, burst: Optional[int] = None):
+        self.rate = rate
+        self.capacity = burst or max(1, int(rate))
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """Wait until a delivery may start"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+# ---------------------------------------------------------------------------
+# Report kinds
+#
+# Each kind defines its period, its recipients (a SELECT of user ids), how to
+# generate a user's report in a worker thread, which email it is rendered as,
+# and what to record once it was delivered.
+# ---------------------------------------------------------------------------
+
+def _weekly_period(today: date) -> date:
+    """End (Sunday) of the previous Monday-Sunday week"""
+    return today - timedelta(days=today.weekday() + 1)
+
+
+def _weekly_key(week_end: date) -> str:
+    iso_year, iso_week, _ = week_end.isocalendar()
+    return f"{iso_year}-W{iso_week:02d}"
+
+
+def _monthly_period(today: date) -> date:
+    """First day of the previous calendar month"""
+    return (today.replace(day=1) - timedelta(days=1)).replace(day=1)
+
+
+def _monthly_key(month_start: date) -> str:
+    return month_start.strftime('%Y-%m')
+
+
+def _preference_recipients(frequency: str):
+    return select(UserReportPreferences.user_id.label('user_id')).where(
+        UserReportPreferences.frequency == frequency,
+        UserReportPreferences.send_email == True
+    ).distinct()
+
+
+def _weekly_recipients(db: Session):
+    return _preference_recipients("weekly")
+
+
+def _monthly_recipients(db: Session):
+    recipients = _preference_recipients("monthly")
+    if db.execute(select(recipients.exists())).scalar():
+        return recipients
+    # Nobody opted in explicitly: every user gets the monthly report
+    return select(User.id.label('user_id'))
+
+
+def _generate_weekly(db: Session, user_id: int, week_end: date) -> Dict[str, Any]:
+    from app.services.weekly_report_service import WeeklyReportService
+
+    report = WeeklyReportService(db).generate_weekly_report(user_id, week_end_date=week_end)
+    week_start = date.fromisoformat(report['period']['start'])
+
+    record = db.query(WeeklyReport).filter(
+        WeeklyReport.user_id == user_id,
+        WeeklyReport.week_start == week_start
+    ).first()
+
+    if not record:
+        record = WeeklyReport(
+            user_id=user_id,
+            week_start=week_start,
+            week_end=date.fromisoformat(report['period']['end']),
+            week_number=report['period']['week_number'],
+            year=report['period']['year'],
+            report_data=json.dumps(report),
+            total_expenses=report['summary']['total_expenses'],
+            total_income=report['summary']['total_income'],
+            net_savings=report['summary']['net_savings'],
+            transaction_count=report['summary']['transaction_count']
+        )
+        db.add(record)
+        db.commit()
+
+    return {'report': report, 'weekly_report_id': record.id}
+
+
+def _generate_monthly(db: Session, user_id: int, month_start: date) -> Dict[str, Any]:
+    from app.services.monthly_report_service import MonthlyReportService
+
+    return {'report': MonthlyReportService(db).generate_monthly_report(user_id, month_start)}
+
+
+async def _send(payload: Dict[str, Any]) -> bool:
+    from app.services.email import email_service
+
+    subject, html_content, text_content = payload['message']
+    return await email_service.send_email(payload['email'], subject, html_content, text_content)
+
+
+def _weekly_sent(db: Session, payload: Dict[str, Any]):
+    db.query(WeeklyReport).filter(WeeklyReport.id == payload['weekly_report_id']).update(
+        {'is_sent_via_email': True, 'email_sent_at': datetime.utcnow()},
+        synchronize_session=False
+    )
+
+
+DISPATCH_KINDS: Dict[str, Dict[str, Callable]] = {
+    'weekly': {
+        'period': _weekly_period,
+        'key': _weekly_key,
+        'recipients': _weekly_recipients,
+        'generate': _generate_weekly,
+        'email': 'weekly',
+        'on_sent': _weekly_sent,
+    },
+    'monthly': {
+        'period': _monthly_period,
+        'key': _monthly_key,
+        'recipients': _monthly_recipients,
+        'generate': _generate_monthly,
+        'email': 'monthly',
+        'on_sent': None,
+    },
+}
+
+
+class ReportDispatcher:
+    """Concurrent, rate-limited and checkpointed bulk report delivery"""
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        workers: int = DISPATCH_WORKERS,
+        send_concurrency: int = SEND_CONCURRENCY,
+        rate_per_second: float = SEND_RATE_PER_SECOND,
+        max_attempts: int = MAX_SEND_ATTEMPTS,
+        retry_delay: float = RETRY_BASE_DELAY,
+        render_process_threshold: int = RENDER_PROCESS_THRESHOLD
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self.send_concurrency = send_concurrency
+        self.rate_per_second = rate_per_second
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.render_process_threshold = render_process_threshold
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    async def dispatch(self, kind: str, period: Optional[date] = None) -> Dict[str, Any]:
+        """
+        Send one report kind to all its recipients, resuming an interrupted run
+
+        Args:
+            kind: 'weekly' or 'monthly'
+            period: Week end (weekly) or month start (monthly); defaults to the
+                period before today
+
+        Returns:
+            Run metrics: run_id, kind, period, total, sent, failed, skipped
+            (delivered by an earlier attempt at the run), retries,
+            duration_seconds, throughput_per_minute, resumed, avg_render_ms
+            and render_processes (whether emails were rendered in worker
+            processes). When another process started the run first, its
+            current metrics are returned with running_elsewhere set.
+        """
+        spec = DISPATCH_KINDS[kind]
+        period_date = period or spec['period'](date.today())
+        period_key = spec['key'](period_date)
+
+        state, run_id, resumed, already_sent = await self._in_worker(self._prepare_run, kind, period_key,
+                                                                     period_date)
+        if state == 'completed':
+            logger.info("Report dispatch %s %s already completed", kind, period_key)
+            return await self._in_worker(self._metrics, kind, period_key)
+        if state == 'running_elsewhere':
+            logger.info("Report dispatch %s %s was started by another process", kind, period_key)
+            metrics = await self._in_worker(self._metrics, kind, period_key)
+            metrics.update({'skipped': 0, 'running_elsewhere': True})
+            return metrics
+
+        pending = await self._in_worker(self._pending_user_ids, run_id)
+        counters = {'sent': 0, 'failed': 0, 'retries': 0, 'rendered': 0, 'render_seconds': 0.0}
+        render_processes = len(pending) >= self.render_process_threshold
+        limiter = RateLimiter(self.rate_per_second)
+        send_slots = asyncio.Semaphore(self.send_concurrency)
+        queue: asyncio.Queue = asyncio.Queue()
+        for user_id in pending:
+            queue.put_nowait(user_id)
+
+        async def consume():
+            while True:
+                try:
+                    user_id = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                await self._deliver(spec, run_id, user_id, period_date, limiter, send_slots, counters,
+                                    render_processes)
+
+        started = time.perf_counter()
+        consumers = min(len(pending), self.workers + self.send_concurrency)
+        await asyncio.gather(*[consume() for _ in range(consumers)])
+        elapsed = time.perf_counter() - started
+
+        metrics = await self._in_worker(self._finish_run, run_id, elapsed, counters)
+        metrics.update({
+            'skipped': already_sent,
+            'resumed': resumed,
+            'running_elsewhere': False,
+            'avg_render_ms': round(counters['render_seconds'] / counters['rendered'] * 1000, 3)
+            if counters['rendered'] else 0.0,
+            'render_processes': render_processes,
+        })
+        logger.info(
+            "Report dispatch %s %s: %d/%d sent, %d failed, %d retries, %d skipped in %.1fs (%.1f/min, %.2fms/render)",
+            kind, period_key, metrics['sent'], metrics['total'], metrics['failed'], metrics['retries'],
+            already_sent, elapsed, metrics['throughput_per_minute'], metrics['avg_render_ms']
+        )
+        return metrics
+
+    async def resume_incomplete(self) -> List[Dict[str, Any]]:
+        """Finish runs left running by a previous process"""
+        runs = await self._in_worker(self._incomplete_runs)
+        results = []
+        for kind, period_date in runs:
+            results.append(await self.dispatch(kind, period_date))
+        return results
+
+    def shutdown(self):
+        """Stop the generation threads"""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    # -- delivery -----------------------------------------------------------
+
+    async def _deliver(self, spec: Dict[str, Callable], run_id: int, user_id: int, period_date: date,
+                       limiter: RateLimiter, send_slots: asyncio.Semaphore, counters: Dict[str, Any],
+                       render_processes: bool):
+        """Claim, generate, render, send (with retries) and checkpoint one recipient"""
+        if not await self._in_worker(self._claim, run_id, user_id):
+            # Another process resuming this run took the recipient
+            return
+
+        try:
+            payload = await self._in_worker(self._generate, spec, user_id, period_date, not render_processes)
+            if payload is not None:
+                if render_processes:
+                    started = time.perf_counter()
+                    payload['message'] = await self._render_in_process(spec['email'], payload)
+                    payload['render_seconds'] = time.perf_counter() - started
+                counters['rendered'] += 1
+                counters['render_seconds'] += payload['render_seconds']
+        except Exception as e:
+            logger.error("Report generation failed for user %s: %s", user_id, e)
+            counters['failed'] += 1
+            await self._in_worker(self._checkpoint, spec, run_id, user_id, None, False, 0, f"Generation failed: {e}")
+            return
+
+        if payload is None:
+            counters['failed'] += 1
+            await self._in_worker(self._checkpoint, spec, run_id, user_id, None, False, 0, "User not found")
+            return
+
+        attempts = 0
+        delivered = False
+        error = None
+        while attempts < self.max_attempts and not delivered:
+            attempts += 1
+            await limiter.acquire()
+            try:
+                async with send_slots:
+                    delivered = bool(await _send(payload))
+                error = None if delivered else "Email delivery failed"
+            except Exception as e:
+                error = str(e)
+
+            if not delivered and attempts < self.max_attempts:
+                counters['retries'] += 1
+                await asyncio.sleep(self.retry_delay * 2 ** (attempts - 1))
+
+        counters['sent' if delivered else 'failed'] += 1
+        await self._in_worker(self._checkpoint, spec, run_id, user_id, payload, delivered, attempts, error)
+
+    async def _render_in_process(self, email: str, payload: Dict[str, Any]):
+        loop = asyncio.get_running_loop()
+        try:
+            return await loop.run_in_executor(_get_render_pool(), build_report_email, email, payload['name'],
+                                              payload['report'])
+        except (BrokenProcessPool, OSError, RuntimeError) as e:
+            logger.warning("Email render pool unavailable (%s); rendering in threads", e)
+            shutdown_render_pool()
+            return await self._in_worker(build_report_email, email, payload['name'], payload['report'])
+
+    async def _in_worker(self, func: Callable, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="report-dispatch")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, func, *args)
+
+    # -- worker thread helpers (each opens its own session) ------------------
+
+    def _prepare_run(self, kind: str, period_key: str,
+                     period_date: date) -> Tuple[str, Optional[int], bool, int]:
+        """
+        Get or create the run and checkpoint any recipient not yet recorded
+
+        Returns:
+            (state, run_id, resumed, already_sent); state is 'ready', 'completed'
+            or 'running_elsewhere' (another process just created the run)
+        """
+        db = self.session_factory()
+        try:
+            run = db.query(ReportDispatchRun).filter(
+                ReportDispatchRun.kind == kind,
+                ReportDispatchRun.period_key == period_key
+            ).first()
+            if run and run.status == 'completed':
+                return 'completed', run.id, False, 0
+
+            resumed = run is not None
+            if resumed:
+                # Requeue recipients claimed by a process that stopped mid-send
+                db.execute(update(ReportDispatchItem).where(
+                    ReportDispatchItem.run_id == run.id,
+                    ReportDispatchItem.status == 'sending',
+                    ReportDispatchItem.claimed_at < datetime.utcnow() - CLAIM_LEASE
+                ).values(status='pending', claimed_at=None))
+            else:
+                run = ReportDispatchRun(kind=kind, period_key=period_key, period_date=period_date, status='running')
+                db.add(run)
+                try:
+                    db.commit()
+                except IntegrityError:
+                    # Another process started the same run
+                    db.rollback()
+                    return 'running_elsewhere', None, False, 0
+
+            # Set-based: add every recipient without an item yet
+            recipients = DISPATCH_KINDS[kind]['recipients'](db).subquery()
+            db.execute(insert(ReportDispatchItem).from_select(
+                ['run_id', 'user_id', 'status', 'attempts'],
+                select(literal(run.id), recipients.c.user_id, literal('pending'), literal(0)).where(
+                    ~exists().where(
+                        ReportDispatchItem.run_id == run.id,
+                        ReportDispatchItem.user_id == recipients.c.user_id
+                    )
+                )
+            ))
+            run.total = db.query(func.count(ReportDispatchItem.id)).filter(ReportDispatchItem.run_id == run.id).scalar()
+            already_sent = db.query(func.count(ReportDispatchItem.id)).filter(
+                ReportDispatchItem.run_id == run.id,
+                ReportDispatchItem.status == 'sent'
+            ).scalar()
+            db.commit()
+            return 'ready', run.id, resumed, already_sent
+        finally:
+            db.close()
+
+    def _pending_user_ids(self, run_id: int) -> List[int]:
+        db = self.session_factory()
+        try:
+            return list(db.execute(
+                select(ReportDispatchItem.user_id).where(
+                    ReportDispatchItem.run_id == run_id,
+                    ReportDispatchItem.status == 'pending'
+                ).order_by(ReportDispatchItem.user_id)
+            ).scalars())
+        finally:
+            db.close()
+
+    def _claim(self, run_id: int, user_id: int) -> bool:
+        """Atomically move a pending item to 'sending'; False if someone else has it"""
+        db = self.session_factory()
+        try:
+            result = db.execute(update(ReportDispatchItem).where(
+                ReportDispatchItem.run_id == run_id,
+                ReportDispatchItem.user_id == user_id,
+                ReportDispatchItem.status == 'pending'
+            ).values(status='sending', claimed_at=datetime.utcnow()))
+            db.commit()
+            return result.rowcount == 1
+        finally:
+            db.close()
+
+    def _generate(self, spec: Dict[str, Callable], user_id: int, period_date: date,
+                  render: bool) -> Optional[Dict[str, Any]]:
+        db = self.session_factory()
+        try:
+            user = db.get(User, user_id)
+            if not user:
+                return None
+            payload = spec['generate'](db, user_id, period_date)
+            payload.update({'email': user.email, 'name': user.full_name or user.email})
+        finally:
+            db.close()
+
+        if render:
+            started = time.perf_counter()
+            payload['message'] = build_report_email(spec['email'], payload['name'], payload['report'])
+            payload['render_seconds'] = time.perf_counter() - started
+        return payload
+
+    def _checkpoint(self, spec: Dict[str, Callable], run_id: int, user_id: int, payload: Optional[Dict[str, Any]],
+                    delivered: bool, attempts: int, error: Optional[str]):
+        db = self.session_factory()
+        try:
+            db.query(ReportDispatchItem).filter(
+                ReportDispatchItem.run_id == run_id,
+                ReportDispatchItem.user_id == user_id
+            ).update({
+                'status': 'sent' if delivered else 'failed',
+                'attempts': ReportDispatchItem.attempts + attempts,
+                'error': error,
+                'sent_at': datetime.utcnow() if delivered else None,
+            }, synchronize_session=False)
+            if delivered and spec['on_sent']:
+                spec['on_sent'](db, payload)
+            db.commit()
+        finally:
+            db.close()
+
+    def _finish_run(self, run_id: int, elapsed: float, counters: Dict[str, int]) -> Dict[str, Any]:
+        db = self.session_factory()
+        try:
+            run = db.get(ReportDispatchRun, run_id)
+            statuses = dict(db.query(ReportDispatchItem.status, func.count(ReportDispatchItem.id)).filter(
+                ReportDispatchItem.run_id == run_id
+            ).group_by(ReportDispatchItem.status).all())
+
+            run.sent = statuses.get('sent', 0)
+            run.failed = statuses.get('failed', 0)
+            run.retries = (run.retries or 0) + counters['retries']
+            run.duration_seconds = (run.duration_seconds or 0) + elapsed
+            run.throughput_per_minute = counters['sent'] / elapsed * 60 if elapsed > 0 else 0.0
+            if not statuses.get('pending') and not statuses.get('sending'):
+                run.status = 'completed'
+                run.completed_at = datetime.utcnow()
+            db.commit()
+            return self._run_metrics(run)
+        finally:
+            db.close()
+
+    def _metrics(self, kind: str, period_key: str) -> Dict[str, Any]:
+        db = self.session_factory()
+        try:
+            run = db.query(ReportDispatchRun).filter(
+                ReportDispatchRun.kind == kind,
+                ReportDispatchRun.period_key == period_key
+            ).first()
+            metrics = self._run_metrics(run)
+            metrics.update({'skipped': run.sent, 'resumed': False, 'running_elsewhere': False})
+            return metrics
+        finally:
+            db.close()
+
+    def _incomplete_runs(self) -> List[Tuple[str, date]]:
+        db = self.session_factory()
+        try:
+            return [tuple(row) for row in db.query(ReportDispatchRun.kind, ReportDispatchRun.period_date).filter(
+                ReportDispatchRun.status == 'running'
+            ).order_by(ReportDispatchRun.started_at).all()]
+        finally:
+            db.close()
+
+    @staticmethod
+    def _run_metrics(run: ReportDispatchRun) -> Dict[str, Any]:
+        return {
+            'run_id': run.id,
+            'kind': run.kind,
+            'period': run.period_key,
+            'status': run.status,
+            'total': run.total,
+            'sent': run.sent,
+            'failed': run.failed,
+            'retries': run.retries,
+            'duration_seconds': round(run.duration_seconds or 0.0, 3),
+            'throughput_per_minute': round(run.throughput_per_minute or 0.0, 1),
+        }
+
+
+# Global dispatcher instance
+report_dispatcher = ReportDispatcher()
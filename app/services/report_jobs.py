@@ -0,0 +1,483 @@
+"""
+Background report jobs
+
+Reports too large or slow to build inside a request are generated as jobs:
+submit() records a ReportJob and returns its ID immediately, and worker threads
+generate the report and store the result.
+
+- Queue: a Redis list when Redis is reachable, so any app process can pick up a
+  job, otherwise an in-process queue. Job state lives in the report_jobs table
+  either way, so status polling works from every process.
+- Results: files (PDF / Excel) are stored gzip-compressed on the job row, so
+  any process can serve the download; weekly / monthly / annual reports are
+  saved to historical_reports.
+- Dedup: a request identical to one of the user's queued or running jobs
+  (same report type and parameter hash) returns that job instead of a new one.
+- Limits: a user can have at most MAX_ACTIVE_JOBS_PER_USER queued or running jobs.
+  Running jobs older than JOB_TIMEOUT belonged to a worker that died; they are
+  failed before each submit, so they neither dedupe nor count against the limit.
+"""
+import asyncio
+import gzip
+import hashlib
+import io
+import json
+import logging
+import queue
+import threading
+import uuid
+from datetime import date, datetime, timedelta
+from typing import Any, Callable, Dict, Iterator, Optional
+
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.orm import Session
+
+from app.core.cache import get_cache
+from app.db.engine import SessionLocal
+from app.models.report_job import ReportJob
+from app.services.data_version import get_data_version
+
+logger = logging.getLogger(__name__)
+
+# Worker threads per process (CPU-heavy chart rendering has its own process pool)
+REPORT_JOB_WORKERS = 2
+
+# Queued + running jobs allowed per user
+MAX_ACTIVE_JOBS_PER_USER = 3
+
+# Finished jobs and their results are kept this long
+RESULT_TTL = timedelta(hours=24)
+
+# Jobs still running after this long belonged to a worker that died
+JOB_TIMEOUT = timedelta(minutes=30)
+
+REDIS_QUEUE_KEY = "report_jobs:queue"
+RESULT_BLOCK_SIZE = 64 * 1024
+PURGE_INTERVAL = timedelta(minutes=10)
+
+ACTIVE_STATUSES = ('queued', 'running')
+FINISHED_STATUSES = ('completed', 'failed')
+
+
+# ---------------------------------------------------------------------------
+# Report generators
+#
+# Each takes (db, user_id, params, progress) and returns either
+# {'content': bytes, 'filename': str, 'media_type': str} for a file, or
+# {'historical_report_id': int} for a report saved to historical_reports.
+# progress(percent, message) records how far along the job is.
+# ---------------------------------------------------------------------------
+
+def _entry_filters(params: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        'start_date': date.fromisoformat(params['start']) if params.get('start') else None,
+        'end_date': date.fromisoformat(params['end']) if params.get('end') else None,
+        'category_id': params.get('category_id'),
+        'report_type': params.get('report_type') or 'all',
+    }
+
+
+def report_filename(prefix: str, params: Dict[str, Any], extension: str) -> str:
+    """Download filename of an entries report ('financial_report_from_20240101_expense.pdf')"""
+    filters = _entry_filters(params)
+    filename_parts = [prefix]
+    if filters['start_date']:
+        filename_parts.append(f"from_{filters['start_date'].strftime('%Y%m%d')}")
+    if filters['end_date']:
+        filename_parts.append(f"to_{filters['end_date'].strftime('%Y%m%d')}")
+    if filters['category_id']:
+        filename_parts.append(f"category_{filters['category_id']}")
+    if filters['report_type'] != "all":
+        filename_parts.append(filters['report_type'])
+
+    return "_".join(filename_parts) + extension
+
+
+def _generate_pdf(db: Session, user_id: int, params: Dict[str, Any], progress: Callable) -> Dict[str, Any]:
+    from app.services.pdf_export import PDFExportService
+
+    progress(10, "Rendering PDF report")
+    pdf_buffer = asyncio.run(
+        PDFExportService().export_financial_report_to_pdf(db=db, user_id=user_id, **_entry_filters(params))
+    )
+    return {
+        'content': pdf_buffer.getvalue(),
+        'filename': report_filename("financial_report", params, ".pdf"),
+        'media_type': "application/pdf",
+    }
+
+
+def _generate_excel(db: Session, user_id: int, params: Dict[str, Any], progress: Callable) -> Dict[str, Any]:
+    from app.services.excel_export import ExcelExportService
+
+    progress(10, "Writing Excel workbook")
+    excel_buffer = asyncio.run(
+        ExcelExportService().export_entries_to_excel(db=db, user_id=user_id, **_entry_filters(params))
+    )
+    return {
+        'content': excel_buffer.getvalue(),
+        'filename': report_filename("financial_report", params, ".xlsx"),
+        'media_type': "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    }
+
+
+def _generate_weekly(db: Session, user_id: int, params: Dict[str, Any], progress: Callable) -> Dict[str, Any]:
+    from app.services.historical_report_service import HistoricalReportService
+    from app.services.weekly_report_service import WeeklyReportService
+
+    progress(10, "Analyzing the week")
+    # Read before generating, so a write racing the generation leaves a stale stamp
+    data_version = get_data_version(db, user_id)
+    week_end = date.fromisoformat(params['week_end']) if params.get('week_end') else None
+    report = WeeklyReportService(db).generate_weekly_report(
+        user_id, week_end_date=week_end, show_income=bool(params.get('show_income', False))
+    )
+
+    progress(90, "Saving report")
+    saved = HistoricalReportService(db).save_generated_report(
+        user_id, 'weekly', report, data_version=data_version
+    )
+    return {'historical_report_id': saved.id}
+
+
+def _generate_monthly(db: Session, user_id: int, params: Dict[str, Any], progress: Callable) -> Dict[str, Any]:
+    from app.services.historical_report_service import HistoricalReportService
+    from app.services.monthly_report_service import MonthlyReportService
+
+    progress(10, "Analyzing the month")
+    # Read before generating, so a write racing the generation leaves a stale stamp
+    data_version = get_data_version(db, user_id)
+    month_date = date.fromisoformat(params['month']) if params.get('month') else None
+    report = MonthlyReportService(db).generate_monthly_report(user_id, month_date)
+
+    progress(90, "Saving report")
+    saved = HistoricalReportService(db).save_generated_report(
+        user_id, 'monthly', report, data_version=data_version
+    )
+    return {'historical_report_id': saved.id}
+
+
+def _generate_annual(db: Session, user_id: int, params: Dict[str, Any], progress: Callable) -> Dict[str, Any]:
+    from app.services.annual_reports import build_annual_report
+    from app.services.historical_report_service import HistoricalReportService
+    from app.services.user_preferences import user_preferences_service
+
+    progress(10, "Analyzing the year")
+    # Read before generating, so a write racing the generation leaves a stale stamp
+    data_version = get_data_version(db, user_id)
+    year = int(params.get('year') or date.today().year)
+    currency_code = user_preferences_service.get_user_currency(db, user_id)
+    report = build_annual_report(db, user_id, year, currency_code)
+
+    progress(90, "Saving report")
+    saved = HistoricalReportService(db).save_generated_report(
+        user_id, 'annual', report, data_version=data_version
+    )
+    return {'historical_report_id': saved.id}
+
+
+REPORT_GENERATORS: Dict[str, Callable[..., Dict[str, Any]]] = {
+    'pdf': _generate_pdf,
+    'excel': _generate_excel,
+    'weekly': _generate_weekly,
+    'monthly': _generate_monthly,
+    'annual': _generate_annual,
+}
+
+
+# ---------------------------------------------------------------------------
+# Queues
+# ---------------------------------------------------------------------------
+
+class _LocalQueue:
+    """In-process job queue (fallback when Redis is unavailable)"""
+
+    durable = False
+
+    def __init__(self):
+        self._queue = queue.Queue()
+
+    def put(self, job_id: str) -> None:
+        self._queue.put(job_id)
+
+    def get(self, timeout: float) -> Optional[str]:
+        try:
+            return self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class _RedisQueue:
+    """Job queue shared by every app process through a Redis list"""
+
+    durable = True
+
+    def __init__(self, redis_client):
+        self._redis = redis_client
+
+    def put(self, job_id: str) -> None:
+        self._redis.rpush(REDIS_QUEUE_KEY, job_id)
+
+    def get(self, timeout: float) -> Optional[str]:
+        item = self._redis.blpop(REDIS_QUEUE_KEY, timeout=max(1, int(timeout)))
+        return item[1] if item else None
+
+
+# ---------------------------------------------------------------------------
+# Service
+# ---------------------------------------------------------------------------
+
+class ReportJobService:
+    def __init__(
+        self,
+        session_factory: Callable[[], Session] = SessionLocal,
+        workers: int = REPORT_JOB_WORKERS
+    ):
+        self.session_factory = session_factory
+        self.workers = workers
+        self._queue = None
+        self._threads = []
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+        self._last_purge = datetime.min
+
+    def params_hash(self, report_type: str, params: Dict[str, Any]) -> str:
+        """Stable hash of a report request (parameter order does not matter)"""
+        canonical = json.dumps({'report_type': report_type, 'params': params}, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()
+
+    def submit(self, db: Session, user_id: int, report_type: str, params: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Queue a report for background generation
+
+        Args:
+            db: Database session
+            user_id: Owner of the job (only they can poll or download it)
+            report_type: One of REPORT_GENERATORS ('pdf', 'excel', 'weekly', 'monthly', 'annual')
+            params: JSON-serializable report parameters
+
+        Returns:
+            Dict with success, the job and whether it deduplicated an identical active job,
+            or success False with an error and a reason ('invalid' or 'limit')
+        """
+        if report_type not in REPORT_GENERATORS:
+            return {'success': False, 'reason': 'invalid', 'error': f"Unknown report type '{report_type}'"}
+
+        self._purge_expired(db)
+        self._expire_stale(db, user_id)
+        params_hash = self.params_hash(report_type, params)
+
+        existing = db.execute(
+            select(ReportJob).where(
+                ReportJob.user_id == user_id,
+                ReportJob.status.in_(ACTIVE_STATUSES),
+                ReportJob.params_hash == params_hash
+            ).order_by(ReportJob.created_at.desc()).limit(1)
+        ).scalar_one_or_none()
+        if existing:
+            return {'success': True, 'job': existing, 'deduplicated': True}
+
+        active = db.execute(
+            select(func.count(ReportJob.id)).where(
+                ReportJob.user_id == user_id,
+                ReportJob.status.in_(ACTIVE_STATUSES)
+            )
+        ).scalar()
+        if active >= MAX_ACTIVE_JOBS_PER_USER:
+            return {
+                'success': False,
+                'reason': 'limit',
+                'error': f"You already have {active} reports being generated; please wait for one to finish"
+            }
+
+        job = ReportJob(
+            id=uuid.uuid4().hex,
+            user_id=user_id,
+            report_type=report_type,
+            params=json.dumps(params, sort_keys=True, default=str),
+            params_hash=params_hash,
+            status='queued',
+            progress=0,
+            created_at=datetime.utcnow()
+        )
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        self._ensure_workers()
+        self._queue.put(job.id)
+
+        return {'success': True, 'job': job, 'deduplicated': False}
+
+    def get_job(self, db: Session, job_id: str, user_id: int) -> Optional[ReportJob]:
+        """Job if it exists and belongs to the user"""
+        job = db.get(ReportJob, job_id)
+        if job is None or job.user_id != user_id:
+            return None
+        return job
+
+    def describe(self, job: ReportJob) -> Dict[str, Any]:
+        """Public view of a job with its status, progress and links"""
+        return {
+            'job_id': job.id,
+            'report_type': job.report_type,
+            'status': job.status,
+            'progress': job.progress,
+            'message': job.message,
+            'error': job.error,
+            'created_at': job.created_at.isoformat() if job.created_at else None,
+            'started_at': job.started_at.isoformat() if job.started_at else None,
+            'completed_at': job.completed_at.isoformat() if job.completed_at else None,
+            'status_url': f"/reports/jobs/{job.id}",
+            'events_url': f"/reports/jobs/{job.id}/events",
+            'download_url': f"/reports/jobs/{job.id}/download" if job.status == 'completed' else None,
+        }
+
+    def iter_result_file(self, job: ReportJob) -> Iterator[bytes]:
+        """Decompressed content of a completed file job, in blocks"""
+        with gzip.GzipFile(fileobj=io.BytesIO(job.result_data), mode='rb') as f:
+            while True:
+                block = f.read(RESULT_BLOCK_SIZE)
+                if not block:
+                    break
+                yield block
+
+    def recover(self) -> int:
+        """
+        Requeue jobs left queued by a restart and fail jobs whose worker died
+
+        With the in-process queue every queued job needs requeueing; the Redis
+        queue survives restarts on its own. Returns the number of jobs requeued.
+        """
+        with self.session_factory() as db:
+            self._expire_stale(db)
+
+            job_ids = db.execute(
+                select(ReportJob.id).where(ReportJob.status == 'queued').order_by(ReportJob.created_at)
+            ).scalars().all()
+
+        if self._get_queue().durable:
+            # Jobs may arrive from any process, so always consume
+            self._ensure_workers()
+            return 0
+
+        if job_ids:
+            self._ensure_workers()
+            for job_id in job_ids:
+                self._queue.put(job_id)
+        return len(job_ids)
+
+    def shutdown(self) -> None:
+        """Stop the worker threads (each exits after its current job)"""
+        with self._lock:
+            self._stop.set()
+            self._threads = []
+            self._stop = threading.Event()
+
+    # -- workers ------------------------------------------------------------
+
+    def _get_queue(self):
+        with self._lock:
+            if self._queue is None:
+                cache = get_cache()
+                if cache.enabled and cache.redis_client:
+                    self._queue = _RedisQueue(cache.redis_client)
+                else:
+                    self._queue = _LocalQueue()
+            return self._queue
+
+    def _ensure_workers(self) -> None:
+        self._get_queue()
+        with self._lock:
+            if not self._threads:
+                for i in range(self.workers):
+                    thread = threading.Thread(
+                        target=self._worker, args=(self._stop,), name=f"report-job-{i}", daemon=True
+                    )
+                    thread.start()
+                    self._threads.append(thread)
+
+    def _worker(self, stop: threading.Event) -> None:
+        while not stop.is_set():
+            try:
+                job_id = self._queue.get(timeout=1)
+            except Exception as e:
+                logger.error(f"Report job queue error: {e}")
+                stop.wait(1)
+                continue
+            if job_id:
+                self._run(job_id)
+
+    def _update(self, job_id: str, **values) -> None:
+        with self.session_factory() as db:
+            db.execute(update(ReportJob).where(ReportJob.id == job_id).values(**values))
+            db.commit()
+
+    def _run(self, job_id: str) -> None:
+        with self.session_factory() as db:
+            # Claim the job; another worker may have taken it already
+            claimed = db.execute(
+                update(ReportJob)
+                .where(ReportJob.id == job_id, ReportJob.status == 'queued')
+                .values(status='running', started_at=datetime.utcnow(), progress=0)
+            ).rowcount
+            db.commit()
+            if not claimed:
+                return
+
+            job = db.get(ReportJob, job_id)
+            user_id, report_type, params = job.user_id, job.report_type, json.loads(job.params)
+
+            def progress(percent: int, message: str) -> None:
+                self._update(job_id, progress=percent, message=message)
+
+            try:
+                result = REPORT_GENERATORS[report_type](db, user_id, params, progress)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Report job {job_id} ({report_type}) failed: {e}", exc_info=True)
+                self._update(job_id, status='failed', error=str(e), completed_at=datetime.utcnow())
+                return
+
+        values = {'status': 'completed', 'progress': 100, 'message': None, 'completed_at': datetime.utcnow()}
+        if 'content' in result:
+            values['result_data'] = gzip.compress(result['content'], compresslevel=6)
+            values['filename'] = result['filename']
+            values['media_type'] = result['media_type']
+        else:
+            values['historical_report_id'] = result['historical_report_id']
+            values['media_type'] = "application/json"
+
+        try:
+            self._update(job_id, **values)
+        except Exception as e:
+            logger.error(f"Report job {job_id} result could not be stored: {e}")
+            self._update(job_id, status='failed', error="Report could not be stored",
+                         completed_at=datetime.utcnow())
+
+    def _expire_stale(self, db: Session, user_id: Optional[int] = None) -> None:
+        """Fail running jobs older than JOB_TIMEOUT (their worker died), optionally for one user"""
+        condition = (ReportJob.status == 'running') & (ReportJob.started_at < datetime.utcnow() - JOB_TIMEOUT)
+        if user_id is not None:
+            condition &= ReportJob.user_id == user_id
+        db.execute(
+            update(ReportJob)
+            .where(condition)
+            .values(status='failed', error='Report generation was interrupted', completed_at=datetime.utcnow())
+        )
+        db.commit()
+
+    def _purge_expired(self, db: Session) -> None:
+        """Delete finished jobs older than RESULT_TTL with their results (at most every PURGE_INTERVAL)"""
+        now = datetime.utcnow()
+        if now - self._last_purge < PURGE_INTERVAL:
+            return
+        self._last_purge = now
+
+        condition = (ReportJob.status.in_(FINISHED_STATUSES)) & (ReportJob.completed_at < now - RESULT_TTL)
+        db.execute(delete(ReportJob).where(condition))
+        db.commit()
+
+
+# Global instance
+report_job_service = ReportJobService()
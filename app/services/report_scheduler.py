@@ -9,13 +9,13 @@ import json
 
 from app.db.session import SessionLocal
 from app.services.weekly_report_service import WeeklyReportService
-from app.services.monthly_report_service import MonthlyReportService
+from app.services.report_dispatch import report_dispatcher
 from app.services.email import email_service
+from app.services.goal_service import GoalService
+from app.services.recurring_payment_service import RecurringPaymentService, is_due_on
 from app.models.weekly_report import UserReportPreferences, WeeklyReport
 from app.models.user import User
-from app.models.recurring_payment import RecurringPayment, RecurrenceFrequency
-from app.models.payment_history import PaymentOccurrence
-from app.models.entry import Entry
+from app.models.recurring_payment import RecurringPayment
 
 
 class ReportScheduler:
@@ -57,6 +57,15 @@ class ReportScheduler:
             replace_existing=True
         )
 
+        # Schedule due date refresh and payment reminders - Every day at 12:30 AM
+        self.scheduler.add_job(
+            self.refresh_payment_due_dates,
+            CronTrigger(hour=0, minute=30),
+            id='refresh_payment_due_dates',
+            name='Refresh Recurring Payment Due Dates and Reminders',
+            replace_existing=True
+        )
+
         # Schedule daily recurring payment processing - Every day at 1 AM
         self.scheduler.add_job(
             self.process_recurring_payments,
@@ -75,6 +84,32 @@ class ReportScheduler:
             replace_existing=True
         )
 
+        # Schedule anomaly model refresh - Every day at 3 AM
+        self.scheduler.add_job(
+            self.refresh_anomaly_models,
+            CronTrigger(hour=3, minute=0),
+            id='refresh_anomaly_models',
+            name='Refresh Anomaly Detection Models',
+            replace_existing=True
+        )
+
+        # Schedule goal progress refresh - Every day at 4 AM
+        self.scheduler.add_job(
+            self.refresh_goal_progress,
+            CronTrigger(hour=4, minute=0),
+            id='refresh_goal_progress',
+            name='Refresh Financial Goal Progress',
+            replace_existing=True
+        )
+
+        # Resume dispatch runs a previous process left unfinished
+        self.scheduler.add_job(
+            self.resume_report_dispatch,
+            id='resume_report_dispatch',
+            name='Resume Interrupted Report Dispatch',
+            replace_existing=True
+        )
+
         self.scheduler.start()
         self.is_started = True
         print("📅 Report scheduler started successfully")
@@ -90,67 +125,37 @@ class ReportScheduler:
         """Send weekly reports to all users who have it enabled"""
         print(f"📊 Starting weekly report generation at {datetime.now()}")
 
-        db = SessionLocal()
         try:
-            # Get all users with weekly reports enabled
-            preferences = db.query(UserReportPreferences).filter(
-                UserReportPreferences.frequency == "weekly",
-                UserReportPreferences.send_email == True
-            ).all()
-
-            print(f"📧 Found {len(preferences)} users to send reports to")
-
-            for pref in preferences:
-                try:
-                    await self._send_report_to_user(db, pref.user_id)
-                except Exception as e:
-                    print(f"❌ Error sending report to user {pref.user_id}: {e}")
-
-            print(f"✅ Weekly reports sent successfully")
-
+            metrics = await report_dispatcher.dispatch('weekly')
+            self._print_dispatch_metrics(metrics)
         except Exception as e:
             print(f"❌ Error in weekly report job: {e}")
-        finally:
-            db.close()
 
     async def send_monthly_reports(self):
-        """Send monthly reports to all users on the 1st day of the month"""
+        """Send monthly reports to opted-in users, or to every user when nobody opted in"""
         print(f"📊 Starting monthly report generation at {datetime.now()}")
 
-        db = SessionLocal()
         try:
-            # Get all users with monthly reports enabled
-            preferences = db.query(UserReportPreferences).filter(
-                UserReportPreferences.frequency == "monthly",
-                UserReportPreferences.send_email == True
-            ).all()
-
-            # Also send to all active users (fallback)
-            if not preferences:
-                # Get all users who have entries in the last 30 days
-                all_users = db.query(User).all()
-                print(f"📧 Sending monthly reports to all {len(all_users)} active users")
-
-                for user in all_users:
-                    try:
-                        await self._send_monthly_report_to_user(db, user.id)
-                    except Exception as e:
-                        print(f"❌ Error sending monthly report to user {user.id}: {e}")
-            else:
-                print(f"📧 Found {len(preferences)} users to send monthly reports to")
-
-                for pref in preferences:
-                    try:
-                        await self._send_monthly_report_to_user(db, pref.user_id)
-                    except Exception as e:
-                        print(f"❌ Error sending monthly report to user {pref.user_id}: {e}")
-
-            print(f"✅ Monthly reports sent successfully")
-
+            metrics = await report_dispatcher.dispatch('monthly')
+            self._print_dispatch_metrics(metrics)
         except Exception as e:
             print(f"❌ Error in monthly report job: {e}")
-        finally:
-            db.close()
+
+    async def resume_report_dispatch(self):
+        """Finish weekly/monthly dispatch runs interrupted by a restart"""
+        try:
+            for metrics in await report_dispatcher.resume_incomplete():
+                self._print_dispatch_metrics(metrics)
+        except Exception as e:
+            print(f"❌ Error resuming report dispatch: {e}")
+
+    def _print_dispatch_metrics(self, metrics: dict):
+        print(
+            f"✅ {metrics['kind'].capitalize()} reports {metrics['period']}: "
+            f"{metrics['sent']}/{metrics['total']} sent, {metrics['failed']} failed, "
+            f"{metrics['retries']} retries, {metrics['skipped']} already sent "
+            f"({metrics['duration_seconds']}s, {metrics['throughput_per_minute']}/min)"
+        )
 
     async def send_custom_reports(self):
         """Send reports based on custom user preferences"""
@@ -244,38 +249,6 @@ class ReportScheduler:
         except Exception as e:
             print(f"❌ Failed to send email to {user.email}: {e}")
     
-    async def _send_monthly_report_to_user(self, db: Session, user_id: int):
-        """Generate and send monthly report to a specific user"""
-        # Get user
-        user = db.query(User).filter(User.id == user_id).first()
-        if not user:
-            print(f"⚠️  User {user_id} not found")
-            return
-
-        # Generate monthly report for previous month
-        today = datetime.now()
-        if today.month == 1:
-            prev_month = date(today.year - 1, 12, 1)
-        else:
-            prev_month = date(today.year, today.month - 1, 1)
-
-        # Generate report
-        report_service = MonthlyReportService(db)
-        report = report_service.generate_monthly_report(user_id, prev_month)
-
-        # Send email
-        try:
-            await email_service.send_monthly_report_email(
-                user.email,
-                user.full_name or user.email,
-                report
-            )
-
-            print(f"✅ Sent monthly report to {user.email}")
-
-        except Exception as e:
-            print(f"❌ Failed to send monthly report email to {user.email}: {e}")
-
     async def _should_send_report(self, db: Session, pref: UserReportPreferences) -> bool:
         """Check if report should be sent based on frequency"""
         # Get last sent report
@@ -302,127 +275,42 @@ class ReportScheduler:
     async def process_recurring_payments(self):
         """Process recurring payments and auto-add to expenses if due today.
 
-        Duplicate prevention: checks PaymentOccurrence for (recurring_payment_id, scheduled_date)
-        before creating a new entry so we never double-post the same bill on the same day.
+        Duplicate prevention: payments that already have a PaymentOccurrence for
+        today are excluded in SQL, so we never double-post the same bill on the
+        same day, even with several workers running this job.
         """
         print(f"💰 Processing recurring payments at {datetime.now()}")
 
         db = SessionLocal()
         try:
-            today = date.today()
+            totals = RecurringPaymentService(db).auto_add_due_payments(date.today())
+            print(f"✅ Recurring payments done: {totals['created']} created in {totals['chunks']} chunks, "
+                  f"{totals['errors']} errors")
 
-            # Get all active recurring payments with auto-add enabled
-            payments = db.query(RecurringPayment).filter(
-                RecurringPayment.is_active == True,
-                RecurringPayment.auto_add_to_expenses == True
-            ).all()
-
-            print(f"📋 Found {len(payments)} payments with auto-add enabled")
-            created = skipped = errors = 0
-
-            for payment in payments:
-                try:
-                    # Check if payment is due today
-                    if not self._is_payment_due_today(payment, today):
-                        continue
-
-                    # Duplicate check via PaymentOccurrence (source of truth)
-                    already_processed = db.query(PaymentOccurrence).filter(
-                        PaymentOccurrence.recurring_payment_id == payment.id,
-                        PaymentOccurrence.scheduled_date == today
-                    ).first()
-
-                    if already_processed:
-                        print(f"⏭️  Skipping '{payment.name}' - PaymentOccurrence already exists for {today}")
-                        skipped += 1
-                        continue
-
-                    # Create the expense entry
-                    new_entry = Entry(
-                        user_id=payment.user_id,
-                        category_id=payment.category_id,
-                        type="expense",
-                        amount=payment.amount,
-                        currency_code=payment.currency_code,
-                        date=today,
-                        description=f"{payment.name} (Auto-added)"
-                    )
-                    db.add(new_entry)
-                    db.flush()  # Get new_entry.id before creating occurrence
-
-                    # Record the occurrence so we never re-process this bill today
-                    occurrence = PaymentOccurrence(
-                        user_id=payment.user_id,
-                        recurring_payment_id=payment.id,
-                        scheduled_date=today,
-                        actual_date=today,
-                        amount=payment.amount,
-                        currency_code=payment.currency_code,
-                        is_paid=True,
-                        linked_entry_id=new_entry.id,
-                        note="Auto-added by scheduler",
-                        created_at=datetime.utcnow(),
-                        updated_at=datetime.utcnow(),
-                        paid_at=datetime.utcnow()
-                    )
-                    db.add(occurrence)
-                    db.commit()
-
-                    print(f"✅ Auto-added '{payment.name}' — {payment.currency_code} {payment.amount} (entry #{new_entry.id})")
-                    created += 1
+        except Exception as e:
+            print(f"❌ Error in recurring payments job: {e}")
+        finally:
+            db.close()
 
-                except Exception as e:
-                    print(f"❌ Error processing payment '{payment.name}': {e}")
-                    db.rollback()
-                    errors += 1
+    async def refresh_payment_due_dates(self):
+        """Advance passed next due dates, then create reminders for all users in bulk"""
+        print(f"🔔 Refreshing recurring payment due dates at {datetime.now()}")
 
-            print(f"✅ Recurring payments done: {created} created, {skipped} skipped, {errors} errors")
+        db = SessionLocal()
+        try:
+            service = RecurringPaymentService(db)
+            refreshed = service.refresh_next_due_dates(date.today())
+            reminders = service.generate_all_reminders(date.today())
+            print(f"✅ Due dates refreshed for {refreshed} payments, {reminders} reminders created")
 
         except Exception as e:
-            print(f"❌ Error in recurring payments job: {e}")
+            print(f"❌ Error in payment due date job: {e}")
         finally:
             db.close()
 
     def _is_payment_due_today(self, payment: RecurringPayment, today: date) -> bool:
         """Check if a recurring payment is due today"""
-        # Check if payment has ended
-        if payment.end_date and today > payment.end_date:
-            return False
-
-        # Check if payment hasn't started yet
-        if today < payment.start_date:
-            return False
-
-        # Check based on frequency
-        if payment.frequency == RecurrenceFrequency.WEEKLY:
-            # due_day is day of week (0 = Monday, 6 = Sunday)
-            return today.weekday() == payment.due_day
-
-        elif payment.frequency == RecurrenceFrequency.BIWEEKLY:
-            # Check if today is the due day of week
-            if today.weekday() != payment.due_day:
-                return False
-            # Check if it's been 2 weeks since start_date
-            days_since_start = (today - payment.start_date).days
-            weeks_since_start = days_since_start // 7
-            return weeks_since_start % 2 == 0
-
-        elif payment.frequency == RecurrenceFrequency.MONTHLY:
-            # due_day is day of month (1-31)
-            return today.day == payment.due_day
-
-        elif payment.frequency == RecurrenceFrequency.QUARTERLY:
-            # Check if this month is a quarter month (1, 4, 7, 10)
-            # and today is the due day
-            quarter_months = [1, 4, 7, 10]
-            return today.month in quarter_months and today.day == payment.due_day
-
-        elif payment.frequency == RecurrenceFrequency.ANNUALLY:
-            # Check if today matches the start date's month and day
-            return (today.month == payment.start_date.month and
-                   today.day == payment.due_day)
-
-        return False
+        return is_due_on(payment, today)
 
     async def auto_retrain_models(self):
         """
@@ -440,8 +328,10 @@ class ReportScheduler:
             from app.services.ai_service import AICategorizationService
             from app.models.ai_model import AIModel
 
-            # Get all users who have trained models
-            ai_models = db.query(AIModel).all()
+            # Get all users who have trained categorization models
+            ai_models = db.query(AIModel).filter(
+                AIModel.model_name == "categorization_v1"
+            ).all()
 
             retrained_count = 0
             skipped_count = 0
@@ -486,6 +376,64 @@ class ReportScheduler:
         finally:
             db.close()
 
+    async def refresh_anomaly_models(self):
+        """
+        Refit stale per-user anomaly models
+
+        Runs daily at 3 AM so online anomaly requests rarely have to refit.
+        A model is stale once it is older than the user's retrain frequency
+        or enough new expenses were added since it was trained.
+        """
+        print("🔍 Starting anomaly model refresh...")
+
+        db = SessionLocal()
+        try:
+            from app.ai.services.anomaly_detection import AnomalyDetectionService
+            from app.ai.models.anomaly_model import ANOMALY_MODEL_NAME
+            from app.models.ai_model import AIModel
+
+            models = db.query(AIModel.user_id, AIModel.last_trained, AIModel.model_parameters).filter(
+                AIModel.model_name == ANOMALY_MODEL_NAME,
+                AIModel.is_active == True
+            ).all()
+
+            refreshed_count = 0
+            for metadata in models:
+                try:
+                    anomaly_service = AnomalyDetectionService(db)
+                    if anomaly_service.is_model_stale(metadata.user_id, metadata):
+                        anomaly_service.refresh_user_model(metadata.user_id)
+                        refreshed_count += 1
+                except Exception as e:
+                    print(f"  ❌ Error refreshing anomaly model for user {metadata.user_id}: {e}")
+                    db.rollback()
+
+            print(f"🎯 Anomaly model refresh completed: {refreshed_count} refreshed, {len(models) - refreshed_count} up to date")
+
+        except Exception as e:
+            print(f"❌ Error in refresh_anomaly_models: {e}")
+        finally:
+            db.close()
+
+    async def refresh_goal_progress(self):
+        """
+        Recompute spending limit goals and fail overdue goals for all users
+
+        Runs daily at 4 AM, a chunk of users at a time, so goal pages and
+        the dashboard start from current progress.
+        """
+        print("🎯 Starting goal progress refresh...")
+
+        db = SessionLocal()
+        try:
+            totals = GoalService(db).refresh_all_goals()
+            print(f"🎯 Goal progress refresh completed: {totals['users']} users, {totals['updated']} updated, "
+                  f"{totals['failed']} failed, {totals['errors']} batch errors")
+        except Exception as e:
+            print(f"❌ Error in refresh_goal_progress: {e}")
+        finally:
+            db.close()
+
 
 # Global scheduler instance
 report_scheduler = ReportScheduler()
@@ -2,14 +2,26 @@ from datetime import datetime
 from sqlalchemy.orm import Session
 from sqlalchemy import and_
 from app.models.report_status import ReportStatus
+from app.services.data_version import bump_data_version, get_data_version
+
+REPORT_TYPES = ["weekly", "monthly", "annual"]
 
 
 class ReportStatusService:
+    """
+    Report "new" badges
+
+    A report is new when the user's data version has moved past the version
+    recorded when they last viewed it, so data writes never touch report_status.
+    Rows without a recorded version (older rows, or explicitly marked new) fall
+    back to their stored is_new flag.
+    """
+
     def __init__(self, db: Session):
         self.db = db
-    
+
     def mark_report_as_new(self, user_id: int, report_type: str, report_period: str = "current"):
-        """Mark a report as new (when expenses are added)"""
+        """Mark a report as new regardless of the data version"""
         existing = self.db.query(ReportStatus).filter(
             and_(
                 ReportStatus.user_id == user_id,
@@ -17,9 +29,10 @@ class ReportStatusService:
                 ReportStatus.report_period == report_period
             )
         ).first()
-        
+
         if existing:
             existing.is_new = True
+            existing.seen_version = None
             existing.last_updated = datetime.utcnow()
         else:
             new_status = ReportStatus(
@@ -29,11 +42,12 @@ class ReportStatusService:
                 is_new=True
             )
             self.db.add(new_status)
-        
+
         self.db.commit()
-    
+
     def mark_report_as_viewed(self, user_id: int, report_type: str, report_period: str = "current"):
-        """Mark a report as viewed"""
+        """Mark a report as viewed at the user's current data version"""
+        data_version = get_data_version(self.db, user_id)
         existing = self.db.query(ReportStatus).filter(
             and_(
                 ReportStatus.user_id == user_id,
@@ -41,9 +55,10 @@ class ReportStatusService:
                 ReportStatus.report_period == report_period
             )
         ).first()
-        
+
         if existing:
             existing.is_new = False
+            existing.seen_version = data_version
             existing.last_viewed = datetime.utcnow()
             existing.last_updated = datetime.utcnow()
         else:
@@ -52,12 +67,34 @@ class ReportStatusService:
                 report_type=report_type,
                 report_period=report_period,
                 is_new=False,
+                seen_version=data_version,
                 last_viewed=datetime.utcnow()
             )
             self.db.add(new_status)
-        
+
         self.db.commit()
-    
+
+    @staticmethod
+    def _status_dict(status, data_version: int) -> dict:
+        if status is None:
+            # If no status exists, consider it new
+            return {
+                "is_new": True,
+                "last_viewed": None,
+                "last_updated": None
+            }
+
+        if status.seen_version is None:
+            is_new = status.is_new
+        else:
+            is_new = data_version > status.seen_version
+
+        return {
+            "is_new": is_new,
+            "last_viewed": status.last_viewed,
+            "last_updated": status.last_updated
+        }
+
     def get_report_status(self, user_id: int, report_type: str, report_period: str = "current") -> dict:
         """Get the status of a specific report"""
         status = self.db.query(ReportStatus).filter(
@@ -67,33 +104,27 @@ class ReportStatusService:
                 ReportStatus.report_period == report_period
             )
         ).first()
-        
-        if status:
-            return {
-                "is_new": status.is_new,
-                "last_viewed": status.last_viewed,
-                "last_updated": status.last_updated
-            }
-        else:
-            # If no status exists, consider it new
-            return {
-                "is_new": True,
-                "last_viewed": None,
-                "last_updated": None
-            }
-    
+
+        return self._status_dict(status, get_data_version(self.db, user_id))
+
     def get_all_report_statuses(self, user_id: int) -> dict:
         """Get status for all report types"""
-        statuses = {}
-        report_types = ["weekly", "monthly", "annual"]
-        
-        for report_type in report_types:
-            statuses[report_type] = self.get_report_status(user_id, report_type)
-        
-        return statuses
-    
+        data_version = get_data_version(self.db, user_id)
+        rows = self.db.query(ReportStatus).filter(
+            and_(
+                ReportStatus.user_id == user_id,
+                ReportStatus.report_type.in_(REPORT_TYPES),
+                ReportStatus.report_period == "current"
+            )
+        ).all()
+        by_type = {row.report_type: row for row in rows}
+
+        return {
+            report_type: self._status_dict(by_type.get(report_type), data_version)
+            for report_type in REPORT_TYPES
+        }
+
     def mark_all_reports_as_new(self, user_id: int):
-        """Mark all reports as new (when new expenses are added)"""
-        report_types = ["weekly", "monthly", "annual"]
-        for report_type in report_types:
-            self.mark_report_as_new(user_id, report_type)
+        """Mark all reports as new by bumping the user's data version"""
+        bump_data_version(self.db, [user_id])
+        self.db.commit()
@@ -6,7 +6,7 @@ Integrates with Prophet forecasts for accurate projections.
 """
 
 from typing import Dict, List, Optional, Any
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 from sqlalchemy.orm import Session
 from sqlalchemy import func, and_, desc
 
@@ -14,20 +14,31 @@ from app.models.scenario import Scenario, ScenarioComparison
 from app.models.entry import Entry
 from app.models.category import Category
 from app.models.user import User
+from app.ai.data.entry_frames import fetch_entries_frame
 from app.ai.services.prophet_forecast_service import ProphetForecastService
+from app.core.cache import CacheService, get_cache
+from app.services.data_version import get_data_version
+from app.services.scenario_simulation import (
+    MonthlyHistory, ScenarioEffect, simulate, HISTORY_MONTHS, HORIZON_MONTHS, SIMULATION_PATHS
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Baselines cover a rolling window, so a cached snapshot is useful for a day at most
+BASELINE_CACHE_TTL = 24 * 3600
+
 
 class ScenarioService:
     """
     Service for creating and analyzing financial scenarios
     """
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, cache: Optional[CacheService] = None):
         self.db = db
         self.prophet_service = ProphetForecastService(db)
+        self.cache = cache or get_cache()
+        self._snapshots: Dict[str, Dict] = {}
 
     def create_scenario(
         self,
@@ -68,19 +79,11 @@ class ScenarioService:
                 }
 
             # Get baseline data (current financial state)
-            baseline_data = self._get_baseline_data(user_id)
+            snapshot = self._get_baseline_snapshot(user_id)
+            baseline_data = snapshot['baseline']
 
             # Calculate projected outcome based on scenario type
-            if scenario_type == 'spending_reduction':
-                projected_outcome = self._calculate_spending_reduction_outcome(user_id, parameters, baseline_data)
-            elif scenario_type == 'income_increase':
-                projected_outcome = self._calculate_income_increase_outcome(user_id, parameters, baseline_data)
-            elif scenario_type == 'goal_based':
-                projected_outcome = self._calculate_goal_based_outcome(user_id, parameters, baseline_data)
-            elif scenario_type == 'category_adjustment':
-                projected_outcome = self._calculate_category_adjustment_outcome(user_id, parameters, baseline_data)
-            else:
-                return {'success': False, 'error': 'Unsupported scenario type'}
+            projected_outcome = self._project_outcome(user_id, scenario_type, parameters, snapshot)
 
             # Create scenario in database
             scenario = Scenario(
@@ -91,6 +94,7 @@ class ScenarioService:
                 parameters=parameters,
                 projected_outcome=projected_outcome,
                 baseline_data=baseline_data,
+                baseline_version=snapshot['version'],
                 is_active=True,
                 is_favorite=False
             )
@@ -152,6 +156,73 @@ class ScenarioService:
         except Exception as e:
             return {'valid': False, 'error': str(e)}
 
+    def _get_baseline_snapshot(self, user_id: int) -> Dict:
+        """
+        Baseline and monthly history for the user's current data version
+
+        Snapshots are keyed by user, window end day (UTC, as the 90-day window
+        in _get_baseline_data) and data version, memoized on the service and
+        cached, so creating, updating and comparing several scenarios in a row
+        computes them once.
+
+        Returns:
+            Dict with the data 'version', the 90-day 'baseline' and the
+            MonthlyHistory 'history' used for simulation
+        """
+        version = get_data_version(self.db, user_id)
+        cache_key = f"scenario_baseline:{user_id}:{datetime.utcnow().date().isoformat()}:v{version}"
+        snapshot = self._snapshots.get(cache_key)
+        if snapshot is not None:
+            return snapshot
+
+        cached = self.cache.get(cache_key)
+        if cached is not None:
+            baseline = cached['baseline']
+            # JSON object keys come back as strings
+            baseline['category_spending'] = {
+                int(cat_id): data for cat_id, data in baseline['category_spending'].items()
+            }
+            snapshot = {'version': version, 'baseline': baseline,
+                        'history': MonthlyHistory.from_dict(cached['history'])}
+        else:
+            snapshot = {'version': version, 'baseline': self._get_baseline_data(user_id),
+                        'history': self._get_monthly_history(user_id)}
+            if 'error' not in snapshot['baseline']:
+                self.cache.set(cache_key, {'baseline': snapshot['baseline'], 'history': snapshot['history'].to_dict()},
+                               ttl=BASELINE_CACHE_TTL)
+
+        self._snapshots[cache_key] = snapshot
+        return snapshot
+
+    @staticmethod
+    def _is_stale(scenario: Scenario, snapshot: Dict) -> bool:
+        """Whether a scenario was projected from older data or a 90-day window that has since moved"""
+        baseline_day = (scenario.baseline_data or {}).get('baseline_date', '')[:10]
+        return (scenario.baseline_version != snapshot['version']
+                or baseline_day != snapshot['baseline'].get('baseline_date', '')[:10])
+
+    def _calculate_outcome(self, user_id: int, scenario_type: str, parameters: Dict, baseline_data: Dict) -> Dict:
+        """Deterministic projected outcome of a scenario"""
+        if scenario_type == 'spending_reduction':
+            return self._calculate_spending_reduction_outcome(user_id, parameters, baseline_data)
+        elif scenario_type == 'income_increase':
+            return self._calculate_income_increase_outcome(user_id, parameters, baseline_data)
+        elif scenario_type == 'goal_based':
+            return self._calculate_goal_based_outcome(user_id, parameters, baseline_data)
+        elif scenario_type == 'category_adjustment':
+            return self._calculate_category_adjustment_outcome(user_id, parameters, baseline_data)
+        raise ValueError('Unsupported scenario type')
+
+    def _project_outcome(self, user_id: int, scenario_type: str, parameters: Dict, snapshot: Dict) -> Dict:
+        """Deterministic outcome plus its stochastic projection from the user's monthly history"""
+        projected_outcome = self._calculate_outcome(user_id, scenario_type, parameters, snapshot['baseline'])
+        if 'error' not in projected_outcome:
+            simulation = self.simulate_scenarios(user_id, [(scenario_type, parameters, projected_outcome)],
+                                                 history=snapshot['history'])
+            if simulation:
+                projected_outcome['simulation'] = self._scenario_simulation(simulation, 0)
+        return projected_outcome
+
     def _get_baseline_data(self, user_id: int) -> Dict:
         """
         Get current financial baseline for comparison
@@ -191,7 +262,7 @@ class ScenarioService:
                 Entry.category_id,
                 Category.name,
                 func.sum(Entry.amount).label('total')
-            ).join(Category).filter(
+            ).join(Category, Entry.category_id == Category.id).filter(
                 and_(
                     Entry.user_id == user_id,
                     Entry.type == 'expense',
@@ -225,6 +296,76 @@ class ScenarioService:
                 'error': str(e)
             }
 
+    def _get_monthly_history(self, user_id: int) -> MonthlyHistory:
+        """Monthly income, expense and category totals over the last HISTORY_MONTHS full months"""
+        today = date.today()
+        month_index = today.year * 12 + today.month - 1 - HISTORY_MONTHS
+        start_date = date(month_index // 12, month_index % 12 + 1, 1)
+        df = fetch_entries_frame(self.db, user_id, ('date', 'type', 'amount', 'category_id'), start_date=start_date)
+        return MonthlyHistory.from_frame(df, today)
+
+    def simulate_scenarios(
+        self,
+        user_id: int,
+        scenarios: List[tuple],
+        paths: int = SIMULATION_PATHS,
+        months: int = HORIZON_MONTHS,
+        history: Optional[MonthlyHistory] = None
+    ) -> Optional[Dict]:
+        """
+        Monte Carlo projection of several scenarios in one batched pass
+
+        Args:
+            user_id: User ID
+            scenarios: (scenario_type, parameters, projected_outcome) tuples
+            paths: Number of simulated paths
+            months: Months to project
+            history: Monthly history to bootstrap from (default: the current snapshot's)
+
+        Returns:
+            Simulation result (see scenario_simulation.simulate), or None without
+            enough monthly history
+        """
+        try:
+            if history is None:
+                history = self._get_baseline_snapshot(user_id)['history']
+            effects = [
+                ScenarioEffect.from_parameters(
+                    history, scenario_type, self._simulation_parameters(scenario_type, parameters, outcome)
+                )
+                for scenario_type, parameters, outcome in scenarios
+            ]
+            return simulate(history, effects, paths=paths, months=months)
+
+        except Exception as e:
+            logger.error(f"Error simulating scenarios: {str(e)}")
+            return None
+
+    @staticmethod
+    def _simulation_parameters(scenario_type: str, parameters: Dict, outcome: Optional[Dict]) -> Dict:
+        """Goal-based scenarios are simulated with the adjustments their outcome settled on"""
+        if scenario_type != 'goal_based' or not outcome:
+            return parameters
+        return {
+            **parameters,
+            'category_adjustments': [
+                {'category_id': adj['category_id'], 'reduction_percent': adj['reduction_percent']}
+                for adj in outcome.get('adjustments', [])
+            ]
+        }
+
+    @staticmethod
+    def _scenario_simulation(simulation: Dict, index: int) -> Dict:
+        """One scenario's share of a batched simulation, with the no-change baseline bands"""
+        return {
+            'paths': simulation['paths'],
+            'months': simulation['months'],
+            'history_months': simulation['history_months'],
+            'percentiles': simulation['percentiles'],
+            'baseline_cumulative_savings': simulation['baseline']['cumulative_savings'],
+            **simulation['scenarios'][index]
+        }
+
     def _calculate_spending_reduction_outcome(
         self,
         user_id: int,
@@ -766,7 +907,11 @@ class ScenarioService:
             return None
 
     def update_scenario(self, scenario_id: int, user_id: int, updates: Dict) -> Dict:
-        """Update scenario (name, description, is_favorite, is_active)"""
+        """
+        Update scenario (name, description, is_favorite, is_active, parameters)
+
+        New parameters are re-projected against the current baseline snapshot.
+        """
         try:
             scenario = self.db.query(Scenario).filter(
                 and_(
@@ -778,6 +923,19 @@ class ScenarioService:
             if not scenario:
                 return {'success': False, 'error': 'Scenario not found'}
 
+            if 'parameters' in updates:
+                validation_result = self._validate_parameters(scenario.scenario_type, updates['parameters'])
+                if not validation_result['valid']:
+                    return {'success': False, 'error': validation_result['error']}
+
+                snapshot = self._get_baseline_snapshot(user_id)
+                scenario.parameters = updates['parameters']
+                scenario.projected_outcome = self._project_outcome(
+                    user_id, scenario.scenario_type, updates['parameters'], snapshot
+                )
+                scenario.baseline_data = snapshot['baseline']
+                scenario.baseline_version = snapshot['version']
+
             # Update allowed fields
             allowed_updates = ['name', 'description', 'is_favorite', 'is_active']
             for key, value in updates.items():
@@ -859,11 +1017,36 @@ class ScenarioService:
             if len(scenarios) != len(scenario_ids):
                 return {'success': False, 'error': 'Some scenarios not found'}
 
+            # Recompute outcomes computed against older data or an earlier baseline window
+            snapshot = self._get_baseline_snapshot(user_id)
+            stale = [scenario for scenario in scenarios if self._is_stale(scenario, snapshot)]
+            for scenario in stale:
+                scenario.projected_outcome = self._calculate_outcome(
+                    user_id, scenario.scenario_type, scenario.parameters, snapshot['baseline']
+                )
+                scenario.baseline_data = snapshot['baseline']
+                scenario.baseline_version = snapshot['version']
+
+            # Project every scenario on the same simulated paths
+            simulation = self.simulate_scenarios(user_id, [
+                (scenario.scenario_type, scenario.parameters, scenario.projected_outcome) for scenario in scenarios
+            ], history=snapshot['history'])
+
+            if stale:
+                for index, scenario in enumerate(scenarios):
+                    if scenario in stale and simulation and 'error' not in scenario.projected_outcome:
+                        scenario.projected_outcome = {
+                            **scenario.projected_outcome,
+                            'simulation': self._scenario_simulation(simulation, index)
+                        }
+                self.db.commit()
+
             # Compare scenarios
             comparison_data = []
 
-            for scenario in scenarios:
+            for index, scenario in enumerate(scenarios):
                 outcome = scenario.projected_outcome or {}
+                simulated = simulation['scenarios'][index] if simulation else None
 
                 comparison_data.append({
                     'id': scenario.id,
@@ -873,7 +1056,9 @@ class ScenarioService:
                     'total_impact': outcome.get('total_savings') or outcome.get('total_increase', 0),
                     'achievable': outcome.get('goal_achievable', True),
                     'months_to_goal': outcome.get('months_to_goal'),
-                    'insights': outcome.get('insights', [])
+                    'insights': outcome.get('insights', []),
+                    'simulated_impact': simulated['total_impact'] if simulated else None,
+                    'goal_probability': simulated['goal_probability'] if simulated else None
                 })
 
             # Determine winner (highest total impact)
@@ -884,6 +1069,7 @@ class ScenarioService:
 
             result = {
                 'success': True,
+                'recomputed_scenario_ids': [scenario.id for scenario in stale],
                 'scenarios': comparison_data,
                 'winner': {
                     'scenario_id': winner['id'],
@@ -892,6 +1078,17 @@ class ScenarioService:
                 },
                 'insights': insights
             }
+            if simulation:
+                result['simulation'] = {
+                    'paths': simulation['paths'],
+                    'months': simulation['months'],
+                    'percentiles': simulation['percentiles'],
+                    'baseline_cumulative_savings': simulation['baseline']['cumulative_savings'],
+                    'scenarios': {
+                        scenario.id: simulation['scenarios'][index]['cumulative_savings']
+                        for index, scenario in enumerate(scenarios)
+                    }
+                }
 
             # Save comparison if requested
             if save_comparison:
@@ -938,6 +1135,11 @@ class ScenarioService:
             fastest = min(goals_with_timeline, key=lambda x: x['months_to_goal'])
             insights.append(f"Fastest path to goal: {fastest['name']} in {fastest['months_to_goal']:.1f} months")
 
+        # Simulated chance of reaching each goal
+        for s in scenarios:
+            if s.get('goal_probability') is not None:
+                insights.append(f"{s['name']}: {s['goal_probability']:.0%} chance of reaching the goal in simulation")
+
         return insights
 
     def get_saved_comparisons(self, user_id: int) -> List[Dict]:
@@ -0,0 +1,237 @@
+"""
+Monte Carlo projections for what-if scenarios
+
+A user's history is reduced to monthly income, expense and per-category
+expense totals. Future months are simulated by bootstrapping whole historical
+months (so income, spending and categories stay correlated), thousands of
+paths at a time as numpy arrays. Each scenario becomes a per-month savings
+change applied to the same draws, so several scenarios are projected in one
+batched pass and compared on common random numbers.
+"""
+
+from datetime import date
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+SIMULATION_PATHS = 10_000
+HORIZON_MONTHS = 36
+PERCENTILES = (10, 25, 50, 75, 90)
+
+# Full calendar months of history to bootstrap from
+HISTORY_MONTHS = 24
+MIN_HISTORY_MONTHS = 3
+
+# Fixed seed so a projection is reproducible for the same history
+SIMULATION_SEED = 20261022
+
+INCOME_FREQUENCY_PER_MONTH = {
+    'monthly': 1,
+    'biweekly': 26 / 12,
+    'weekly': 52 / 12,
+}
+
+
+class MonthlyHistory:
+    """Monthly income, expense and per-category expense totals, oldest month first"""
+    __slots__ = ('months', 'income', 'expenses', 'category_ids', 'categories')
+
+    def __init__(self, months: List[str], income: np.ndarray, expenses: np.ndarray,
+                 category_ids: List[int], categories: np.ndarray):
+        self.months = months
+        self.income = income
+        self.expenses = expenses
+        self.category_ids = category_ids
+        self.categories = categories
+
+    def __len__(self) -> int:
+        return len(self.months)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, today: date) -> 'MonthlyHistory':
+        """
+        Monthly totals of an entries frame
+
+        Args:
+            df: Entries with date, type, amount and category_id columns
+            today: Reference date; its (incomplete) month is left out
+
+        Returns:
+            History from the first month with entries to the last full month
+        """
+        current = pd.Period(today, freq='M')
+        if df.empty:
+            return cls([], np.zeros(0), np.zeros(0), [], np.zeros((0, 0)))
+
+        df = df.assign(month=pd.PeriodIndex(pd.to_datetime(df['date']), freq='M'))
+        df = df[df['month'] < current]
+        if df.empty:
+            return cls([], np.zeros(0), np.zeros(0), [], np.zeros((0, 0)))
+
+        months = pd.period_range(df['month'].min(), current - 1, freq='M')
+        totals = df.pivot_table(index='month', columns='type', values='amount', aggfunc='sum')
+        totals = totals.reindex(index=months, columns=['income', 'expense'], fill_value=0.0).fillna(0.0)
+
+        expenses = df[df['type'] == 'expense']
+        by_category = expenses.pivot_table(index='month', columns='category_id', values='amount', aggfunc='sum')
+        by_category = by_category.reindex(index=months, fill_value=0.0).fillna(0.0)
+
+        return cls(
+            [str(month) for month in months],
+            totals['income'].to_numpy(dtype=float),
+            totals['expense'].to_numpy(dtype=float),
+            [int(category_id) for category_id in by_category.columns],
+            by_category.to_numpy(dtype=float),
+        )
+
+    def to_dict(self) -> Dict:
+        """JSON-serializable form, for caching"""
+        return {
+            'months': self.months,
+            'income': self.income.tolist(),
+            'expenses': self.expenses.tolist(),
+            'category_ids': self.category_ids,
+            'categories': self.categories.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'MonthlyHistory':
+        return cls(data['months'], np.array(data['income'], dtype=float), np.array(data['expenses'], dtype=float),
+                   data['category_ids'],
+                   # Explicit shape: an empty history (or one with no expenses) has zero-sized rows
+                   np.array(data['categories'], dtype=float).reshape(len(data['months']), len(data['category_ids'])))
+
+    def category_column(self, category_id) -> Optional[np.ndarray]:
+        """Monthly spending of one category, or None if it has none"""
+        try:
+            return self.categories[:, self.category_ids.index(int(category_id))]
+        except (ValueError, TypeError):
+            return None
+
+
+class ScenarioEffect:
+    """
+    How a scenario changes monthly savings
+
+    Savings change by per_month[h] in a month bootstrapped from history month h,
+    plus monthly_amount, for the first duration_months; one_time_amount is
+    added in the first month.
+    """
+    __slots__ = ('per_month', 'monthly_amount', 'one_time_amount', 'duration_months', 'target_amount',
+                 'goal_months')
+
+    def __init__(self, per_month: np.ndarray, monthly_amount: float = 0.0, one_time_amount: float = 0.0,
+                 duration_months: int = HORIZON_MONTHS, target_amount: Optional[float] = None,
+                 goal_months: Optional[int] = None):
+        self.per_month = per_month
+        self.monthly_amount = monthly_amount
+        self.one_time_amount = one_time_amount
+        self.duration_months = duration_months
+        self.target_amount = target_amount
+        self.goal_months = goal_months
+
+    @classmethod
+    def from_parameters(cls, history: MonthlyHistory, scenario_type: str, parameters: Dict) -> 'ScenarioEffect':
+        """
+        Effect of a scenario, from the same parameters ScenarioService validates
+
+        Goal-based scenarios apply their 'category_adjustments' reductions.
+        """
+        none = np.zeros(len(history))
+
+        def category_change(adjustments, percent_key):
+            change = none.copy()
+            for adjustment in adjustments:
+                column = history.category_column(adjustment['category_id'])
+                if column is not None:
+                    change += column * (adjustment[percent_key] / 100)
+            return change
+
+        if scenario_type == 'spending_reduction':
+            return cls(category_change([parameters], 'reduction_percent'),
+                       duration_months=parameters.get('duration_months', 6))
+
+        if scenario_type == 'income_increase':
+            duration_months = parameters.get('duration_months', 12)
+            if parameters['frequency'] == 'one_time':
+                return cls(none, one_time_amount=parameters['amount'], duration_months=duration_months)
+            return cls(none, monthly_amount=parameters['amount'] * INCOME_FREQUENCY_PER_MONTH[parameters['frequency']],
+                       duration_months=duration_months)
+
+        if scenario_type == 'category_adjustment':
+            # Positive adjustments spend more, so savings fall
+            return cls(-category_change(parameters.get('adjustments', []), 'adjustment_percent'),
+                       duration_months=parameters.get('duration_months', 6))
+
+        if scenario_type == 'goal_based':
+            timeframe = parameters['timeframe_months']
+            return cls(category_change(parameters.get('category_adjustments', []), 'reduction_percent'),
+                       duration_months=timeframe, target_amount=parameters['target_amount'],
+                       goal_months=timeframe)
+
+        raise ValueError(f"Unsupported scenario type: {scenario_type}")
+
+
+def _bands(values: np.ndarray) -> Dict[str, List[float]]:
+    """Percentile bands over the path axis (axis 0) of a paths x months array"""
+    bands = np.percentile(values, PERCENTILES, axis=0)
+    return {f"p{p}": np.round(band, 2).tolist() for p, band in zip(PERCENTILES, bands)}
+
+
+def simulate(history: MonthlyHistory, effects: Sequence[ScenarioEffect], paths: int = SIMULATION_PATHS,
+             months: int = HORIZON_MONTHS, seed: int = SIMULATION_SEED) -> Optional[Dict]:
+    """
+    Project cumulative savings without and with each scenario
+
+    Every scenario is applied to the same bootstrapped months, so their
+    differences come from the scenarios rather than from sampling noise.
+
+    Args:
+        history: Monthly totals to bootstrap from
+        effects: Scenarios to project
+        paths: Number of simulated paths
+        months: Months to project (extended to cover each goal's timeframe)
+        seed: Random seed
+
+    Returns:
+        Dict with the no-change 'baseline' and one result per effect in
+        'scenarios', or None when there are fewer than MIN_HISTORY_MONTHS of history
+    """
+    if len(history) < MIN_HISTORY_MONTHS:
+        return None
+
+    months = max([months] + [effect.goal_months or 0 for effect in effects])
+    draws = np.random.default_rng(seed).integers(0, len(history), size=(paths, months))
+    base_savings = (history.income - history.expenses)[draws]
+    base_cumulative = np.cumsum(base_savings, axis=1)
+    month_numbers = np.arange(months)
+
+    results = []
+    for effect in effects:
+        active = month_numbers < effect.duration_months
+        change = (effect.per_month[draws] + effect.monthly_amount) * active
+        change[:, 0] += effect.one_time_amount
+        impact = np.cumsum(change, axis=1)
+        cumulative = base_cumulative + impact
+
+        final_impact = np.percentile(impact[:, -1], PERCENTILES)
+        result = {
+            'cumulative_savings': _bands(cumulative),
+            'total_impact': {f"p{p}": round(float(value), 2) for p, value in zip(PERCENTILES, final_impact)},
+            'probability_positive_savings': round(float(np.mean(cumulative[:, -1] > 0)), 4),
+            'goal_probability': None,
+        }
+        if effect.target_amount is not None:
+            at_deadline = cumulative[:, effect.goal_months - 1]
+            result['goal_probability'] = round(float(np.mean(at_deadline >= effect.target_amount)), 4)
+        results.append(result)
+
+    return {
+        'paths': paths,
+        'months': months,
+        'history_months': len(history),
+        'percentiles': list(PERCENTILES),
+        'baseline': {'cumulative_savings': _bands(base_cumulative)},
+        'scenarios': results,
+    }
@@ -0,0 +1,147 @@
+"""
+Pooled async SMTP delivery
+
+Keeps a small set of connected, authenticated aiosmtplib clients per SMTP
+server and sends many messages over each one, so bulk sends pay the TCP/TLS
+handshake and login once per connection instead of once per email.
+"""
+import asyncio
+import time
+from email.message import Message
+from typing import Dict, List, Optional
+
+import aiosmtplib
+
+from app.core.logging_config import get_logger
+
+logger = get_logger(__name__)
+
+# Errors that mean the connection itself is gone (server timeout, restart, ...)
+_DISCONNECT_ERRORS = (aiosmtplib.SMTPServerDisconnected, ConnectionError)
+
+
+class _PooledConnection:
+    def __init__(self, smtp: aiosmtplib.SMTP):
+        self.smtp = smtp
+        self.messages = 0
+        self.last_used = time.monotonic()
+
+
+class SMTPConnectionPool:
+    """Bounded pool of persistent SMTP connections to one server"""
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = False,
+        start_tls: Optional[bool] = True,
+        size: int = 4,
+        max_messages_per_connection: int = 100,
+        idle_timeout: float = 60.0,
+        timeout: float = 30.0
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.start_tls = None if use_tls else start_tls
+        self.size = size
+        self.max_messages_per_connection = max_messages_per_connection
+        self.idle_timeout = idle_timeout
+        self.timeout = timeout
+
+        self.stats: Dict[str, int] = {'connections_opened': 0, 'messages_sent': 0, 'reconnects': 0}
+        self._idle: List[_PooledConnection] = []
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    async def send_message(self, message: Message):
+        """
+        Send a message over a pooled connection
+
+        A connection the server has dropped is replaced once; any other SMTP
+        error is raised to the caller.
+
+        Args:
+            message: Complete email message with From/To headers
+        """
+        self._bind_loop()
+        async with self._slots:
+            conn = await self._acquire()
+            try:
+                try:
+                    await conn.smtp.send_message(message)
+                except _DISCONNECT_ERRORS:
+                    self._discard(conn)
+                    self.stats['reconnects'] += 1
+                    conn = await self._connect()
+                    await conn.smtp.send_message(message)
+            except Exception:
+                self._discard(conn)
+                raise
+
+            conn.messages += 1
+            conn.last_used = time.monotonic()
+            self.stats['messages_sent'] += 1
+            await self._release(conn)
+
+    async def close(self):
+        """Quit every idle connection"""
+        idle, self._idle = self._idle, []
+        for conn in idle:
+            await self._quit(conn)
+
+    def _bind_loop(self):
+        # aiosmtplib connections belong to the loop that opened them
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            for conn in self._idle:
+                conn.smtp.close()
+            self._idle = []
+            self._slots = asyncio.Semaphore(self.size)
+            self._loop = loop
+
+    async def _acquire(self) -> _PooledConnection:
+        while self._idle:
+            conn = self._idle.pop()
+            if conn.smtp.is_connected and time.monotonic() - conn.last_used < self.idle_timeout:
+                return conn
+            await self._quit(conn)
+        return await self._connect()
+
+    async def _release(self, conn: _PooledConnection):
+        if conn.messages >= self.max_messages_per_connection:
+            await self._quit(conn)
+        else:
+            self._idle.append(conn)
+
+    async def _connect(self) -> _PooledConnection:
+        smtp = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username or None,
+            password=self.password or None,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls,
+            timeout=self.timeout
+        )
+        await smtp.connect()
+        self.stats['connections_opened'] += 1
+        logger.debug(f"Opened pooled SMTP connection to {self.hostname}:{self.port}")
+        return _PooledConnection(smtp)
+
+    @staticmethod
+    def _discard(conn: _PooledConnection):
+        conn.smtp.close()
+
+    @staticmethod
+    async def _quit(conn: _PooledConnection):
+        try:
+            if conn.smtp.is_connected:
+                await conn.smtp.quit()
+        except Exception:
+            conn.smtp.close()
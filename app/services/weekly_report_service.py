@@ -1,17 +1,17 @@
 """Automated Weekly Financial Report Service"""
 
+import numpy as np
 import pandas as pd
 from datetime import datetime, timedelta, date
 from typing import Dict, List, Optional
 from sqlalchemy.orm import Session
-from sqlalchemy import func
 from decimal import Decimal
 
 from app.models.entry import Entry
 from app.models.category import Category
-from app.models.user import User
 from app.models.user_preferences import UserPreferences
 from app.core.currency import CurrencyService
+from app.services.period_reports import PeriodFrame
 
 
 class WeeklyReportService:
@@ -25,6 +25,9 @@ class WeeklyReportService:
     def generate_weekly_report(self, user_id: int, week_end_date: Optional[date] = None, show_income: bool = False) -> Dict:
         """
         Generate comprehensive weekly financial report
+
+        Every section is derived from a single fetch of the current week, the
+        previous week and the 90-day baseline (see ``_load_week_data``).
         
         Args:
             user_id: User ID
@@ -38,27 +41,17 @@ class WeeklyReportService:
             week_end_date = date.today()
         
         # Calculate week boundaries (Monday to Sunday)
-        # If week_end_date is provided, use it; otherwise use today
-        if week_end_date:
-            week_start = week_end_date - timedelta(days=week_end_date.weekday())  # Monday
-            week_end = week_start + timedelta(days=6)  # Sunday
-        else:
-            # Use current week based on today
-            today = date.today()
-            week_start = today - timedelta(days=today.weekday())  # Monday
-            week_end = week_start + timedelta(days=6)  # Sunday
-        
-        # Get previous week for comparison
-        prev_week_start = week_start - timedelta(days=7)
-        prev_week_end = week_start - timedelta(days=1)
-        
-        # Get user and preferences for currency
-        user = self.db.query(User).filter(User.id == user_id).first()
-        user_prefs = self.db.query(UserPreferences).filter(UserPreferences.user_id == user_id).first()
+        week_start = week_end_date - timedelta(days=week_end_date.weekday())  # Monday
+        week_end = week_start + timedelta(days=6)  # Sunday
         
         # Get user's preferred currency
+        user_prefs = self.db.query(UserPreferences).filter(UserPreferences.user_id == user_id).first()
         user_currency = user_prefs.currency_code if user_prefs and user_prefs.currency_code else 'USD'
         
+        data = self._load_week_data(user_id, week_start, week_end)
+        summary = self._generate_summary(data, show_income)
+        category_analysis = self._analyze_categories(data)
+        
         # Generate all report sections
         report = {
             'period': {
@@ -68,40 +61,109 @@ class WeeklyReportService:
                 'year': week_start.year
             },
             'currency': user_currency,
-            'summary': self._generate_summary(user_id, week_start, week_end, prev_week_start, prev_week_end, show_income),
-            'category_analysis': self._analyze_categories(user_id, week_start, week_end, prev_week_start, prev_week_end),
-            'daily_breakdown': self._daily_breakdown(user_id, week_start, week_end),
-            'insights': self._generate_insights(user_id, week_start, week_end, prev_week_start, prev_week_end, show_income),
-            'achievements': self._detect_achievements(user_id, week_start, week_end, user_currency),
-            'recommendations': self._generate_recommendations(user_id, week_start, week_end, user_currency, show_income),
-            'anomalies': self._detect_anomalies(user_id, week_start, week_end, user_currency),
+            'summary': summary,
+            'category_analysis': category_analysis,
+            'daily_breakdown': self._daily_breakdown(data),
+            'insights': self._generate_insights(summary, category_analysis, show_income),
+            'achievements': self._detect_achievements(data),
+            'recommendations': self._generate_recommendations(summary, category_analysis, show_income),
+            'anomalies': self._detect_anomalies(data),
             'show_income': show_income,  # Flag to control income display in templates
             'generated_at': datetime.utcnow().isoformat()
         }
         
         return report
     
-    def _calculate_weekly_income_from_monthly(self, user_id: int, week_entries: List[Entry]) -> float:
+    def _load_week_data(self, user_id: int, week_start: date, week_end: date) -> Dict:
+        """
+        Fetch every entry the report needs in one statement, as columnar arrays
+
+        The window runs from the start of the 90-day anomaly baseline to the end
+        of the month containing ``week_end`` so the monthly income estimate can
+        be answered from the same rows. Rows are ordered by (date, id), which is
+        the order the per-section queries used to return them in.
+
+        Args:
+            user_id: User ID
+            week_start: Monday of the reported week
+            week_end: Sunday of the reported week
+
+        Returns:
+            Dictionary of week boundaries, per-row columns and row masks
+        """
+        window_start = week_start - timedelta(days=90)
+        window_end = self._month_bounds(week_end)[1]
+        
+        rows = self.db.query(
+            Entry.id,
+            Entry.date,
+            Entry.type,
+            Entry.amount,
+            Entry.category_id,
+            Category.name.label('category_name'),
+            Entry.note
+        ).outerjoin(
+            Category, Entry.category_id == Category.id
+        ).filter(
+            Entry.user_id == user_id,
+            Entry.date >= window_start,
+            Entry.date <= window_end
+        ).order_by(Entry.date, Entry.id).all()
+        
+        frame = PeriodFrame(window_start, window_end, rows)
+        
+        data = {
+            'user_id': user_id,
+            'week_start': week_start,
+            'week_end': week_end,
+            'prev_week_start': week_start - timedelta(days=7),
+            'prev_week_end': week_start - timedelta(days=1),
+            'frame': frame,
+            'ids': [row.id for row in rows],
+            'notes': [row.note for row in rows],
+            'dates': frame.dates,
+            'amounts': frame.amounts,
+            'category_ids': frame.category_ids,
+            'category_names': frame.category_names,
+            'has_category': frame.has_category,
+            'is_expense': frame.is_expense,
+            'is_income': frame.is_income,
+        }
+        data['current'] = frame.mask(week_start, week_end)
+        data['previous'] = frame.mask(data['prev_week_start'], data['prev_week_end'])
+        return data
+    
+    @staticmethod
+    def _month_bounds(day: date):
+        """Return the first and last day of the month containing ``day``"""
+        month_start = day.replace(day=1)
+        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
+        return month_start, month_end
+    
+    def _calculate_weekly_income_from_monthly(self, data: Dict, week_mask: np.ndarray) -> float:
         """Calculate weekly income based on monthly income patterns"""
         # Use the date from the first entry or current date
-        if week_entries:
-            reference_date = week_entries[0].date
+        week_rows = np.flatnonzero(week_mask)
+        if week_rows.size:
+            reference_date = data['dates'][week_rows[0]]
         else:
             reference_date = date.today()
         
         # Get all income entries for the current month
-        month_start = reference_date.replace(day=1)
-        month_end = (month_start + timedelta(days=32)).replace(day=1) - timedelta(days=1)
-        
-        # Get monthly income
-        monthly_income_entries = self.db.query(Entry).filter(
-            Entry.user_id == user_id,
-            Entry.type == 'income',
-            Entry.date >= month_start,
-            Entry.date <= month_end
-        ).all()
+        month_start, month_end = self._month_bounds(reference_date)
         
-        total_monthly_income = sum(float(e.amount) for e in monthly_income_entries)
+        if month_start >= data['frame'].start and month_end <= data['frame'].end:
+            month_mask = data['is_income'] & data['frame'].mask(month_start, month_end)
+            total_monthly_income = data['frame'].total(month_mask)
+        else:
+            # Only reachable for an empty week in a past report: fall back to today's month
+            monthly_income_entries = self.db.query(Entry.amount).filter(
+                Entry.user_id == data['user_id'],
+                Entry.type == 'income',
+                Entry.date >= month_start,
+                Entry.date <= month_end
+            ).all()
+            total_monthly_income = sum(float(amount) for (amount,) in monthly_income_entries)
         
         if total_monthly_income > 0:
             # Calculate weekly income as monthly income / 4.33 (average weeks per month)
@@ -109,38 +171,25 @@ class WeeklyReportService:
             return weekly_income
         
         # Fallback: if no monthly income data, use actual weekly income
-        weekly_income_entries = [e for e in week_entries if e.type == 'income']
-        return sum(float(e.amount) for e in weekly_income_entries)
+        return data['frame'].total(week_mask & data['is_income'])
     
-    def _generate_summary(self, user_id: int, week_start: date, week_end: date,
-                         prev_week_start: date, prev_week_end: date, show_income: bool = False) -> Dict:
+    def _generate_summary(self, data: Dict, show_income: bool = False) -> Dict:
         """Generate week summary with comparisons"""
-        # Current week data
-        current_week = self.db.query(Entry).filter(
-            Entry.user_id == user_id,
-            Entry.date >= week_start,
-            Entry.date <= week_end
-        ).all()
-        
-        # Previous week data
-        previous_week = self.db.query(Entry).filter(
-            Entry.user_id == user_id,
-            Entry.date >= prev_week_start,
-            Entry.date <= prev_week_end
-        ).all()
+        current_week = data['current']
+        previous_week = data['previous']
         
         # Calculate totals
-        current_expenses = sum(float(e.amount) for e in current_week if e.type == 'expense')
-        current_income = sum(float(e.amount) for e in current_week if e.type == 'income')
+        current_expenses = data['frame'].total(current_week & data['is_expense'])
+        current_income = data['frame'].total(current_week & data['is_income'])
         
-        prev_expenses = sum(float(e.amount) for e in previous_week if e.type == 'expense')
-        prev_income = sum(float(e.amount) for e in previous_week if e.type == 'income')
+        prev_expenses = data['frame'].total(previous_week & data['is_expense'])
+        prev_income = data['frame'].total(previous_week & data['is_income'])
         
         # For weekly reports, if income is 0, try to estimate from monthly income
         if current_income == 0:
-            current_income = self._calculate_weekly_income_from_monthly(user_id, current_week)
+            current_income = self._calculate_weekly_income_from_monthly(data, current_week)
         if prev_income == 0:
-            prev_income = self._calculate_weekly_income_from_monthly(user_id, previous_week)
+            prev_income = self._calculate_weekly_income_from_monthly(data, previous_week)
         
         # Calculate changes
         expense_change = ((current_expenses - prev_expenses) / prev_expenses * 100) if prev_expenses > 0 else 0
@@ -160,12 +209,14 @@ class WeeklyReportService:
             net_change = current_net - prev_net
             income_change = 0
         
+        expense_count = int(np.count_nonzero(current_week & data['is_expense']))
+        
         return {
             'total_expenses': current_expenses,
             'total_income': current_income,
             'net_savings': current_net,
-            'transaction_count': len(current_week),
-            'avg_transaction': current_expenses / len([e for e in current_week if e.type == 'expense']) if any(e.type == 'expense' for e in current_week) else 0,
+            'transaction_count': int(np.count_nonzero(current_week)),
+            'avg_transaction': current_expenses / expense_count if expense_count else 0,
             'show_income': show_income,
             'comparison': {
                 'expense_change_pct': expense_change,
@@ -178,38 +229,13 @@ class WeeklyReportService:
             }
         }
     
-    def _analyze_categories(self, user_id: int, week_start: date, week_end: date,
-                           prev_week_start: date, prev_week_end: date) -> Dict:
+    def _analyze_categories(self, data: Dict) -> Dict:
         """Analyze spending by category with comparisons"""
-        # Current week by category
-        current_week = self.db.query(
-            Category.name,
-            func.sum(Entry.amount).label('total'),
-            func.count(Entry.id).label('count')
-        ).join(
-            Entry, Entry.category_id == Category.id
-        ).filter(
-            Entry.user_id == user_id,
-            Entry.type == 'expense',
-            Entry.date >= week_start,
-            Entry.date <= week_end
-        ).group_by(Category.name).all()
-        
-        # Previous week by category
-        previous_week = self.db.query(
-            Category.name,
-            func.sum(Entry.amount).label('total')
-        ).join(
-            Entry, Entry.category_id == Category.id
-        ).filter(
-            Entry.user_id == user_id,
-            Entry.type == 'expense',
-            Entry.date >= prev_week_start,
-            Entry.date <= prev_week_end
-        ).group_by(Category.name).all()
+        current_week = data['frame'].category_totals(data['week_start'], data['week_end'])
+        previous_week = data['frame'].category_totals(data['prev_week_start'], data['prev_week_end'])
         
         # Build category map for previous week
-        prev_category_map = {name: float(total) for name, total in previous_week}
+        prev_category_map = {name: float(total) for name, total, _ in previous_week}
         
         # Analyze each category
         categories = []
@@ -252,15 +278,16 @@ class WeeklyReportService:
                 decreased.append(category_data)
         
         # Find categories with no spending this week (but had spending before)
-        all_categories = self.db.query(Category.name).filter(Category.user_id == user_id).all()
         current_category_names = {name for name, _, _ in current_week}
-        
-        for (cat_name,) in all_categories:
-            if cat_name not in current_category_names and cat_name in prev_category_map:
-                no_spending.append({
-                    'category': cat_name,
-                    'prev_amount': prev_category_map[cat_name]
-                })
+        if any(name not in current_category_names for name in prev_category_map):
+            all_categories = self.db.query(Category.name).filter(Category.user_id == data['user_id']).all()
+            
+            for (cat_name,) in all_categories:
+                if cat_name not in current_category_names and cat_name in prev_category_map:
+                    no_spending.append({
+                        'category': cat_name,
+                        'prev_amount': prev_category_map[cat_name]
+                    })
         
         # Sort by amount
         categories.sort(key=lambda x: x['amount'], reverse=True)
@@ -277,46 +304,14 @@ class WeeklyReportService:
             'total_categories_used': len(categories)
         }
     
-    def _daily_breakdown(self, user_id: int, week_start: date, week_end: date) -> List[Dict]:
+    def _daily_breakdown(self, data: Dict) -> List[Dict]:
         """Daily breakdown of the week"""
-        daily_data = []
-        
-        for i in range(7):
-            day = week_start + timedelta(days=i)
-            day_name = day.strftime('%A')
-            
-            day_entries = self.db.query(Entry).filter(
-                Entry.user_id == user_id,
-                Entry.date == day
-            ).all()
-            
-            expenses = sum(float(e.amount) for e in day_entries if e.type == 'expense')
-            income = sum(float(e.amount) for e in day_entries if e.type == 'income')
-            
-            daily_data.append({
-                'date': day.isoformat(),
-                'day_name': day_name,
-                'expenses': expenses,
-                'income': income,
-                'net': income - expenses,
-                'transaction_count': len(day_entries),
-                'is_weekend': day.weekday() >= 5
-            })
-        
-        return daily_data
+        return data['frame'].daily_breakdown(data['week_start'], data['week_end'])
     
-    def _generate_insights(self, user_id: int, week_start: date, week_end: date,
-                          prev_week_start: date, prev_week_end: date, show_income: bool = False) -> List[str]:
+    def _generate_insights(self, summary: Dict, category_analysis: Dict, show_income: bool = False) -> List[str]:
         """Generate natural language insights"""
         insights = []
         
-        summary = self._generate_summary(user_id, week_start, week_end, prev_week_start, prev_week_end, show_income)
-        category_analysis = self._analyze_categories(user_id, week_start, week_end, prev_week_start, prev_week_end)
-        
-        # Get user's currency symbol
-        user_prefs = self.db.query(UserPreferences).filter(UserPreferences.user_id == user_id).first()
-        user_currency = user_prefs.currency_code if user_prefs and user_prefs.currency_code else 'USD'
-        
         # Expense trend insight
         expense_change = summary['comparison']['expense_change_pct']
         if abs(expense_change) >= 10:
@@ -377,29 +372,23 @@ class WeeklyReportService:
         
         return insights
     
-    def _detect_achievements(self, user_id: int, week_start: date, week_end: date, user_currency: str = 'USD') -> List[Dict]:
+    def _detect_achievements(self, data: Dict) -> List[Dict]:
         """Detect positive achievements and milestones"""
         achievements = []
+        week_start = data['week_start']
         
-        # Get current week data
-        current_week = self.db.query(Entry).filter(
-            Entry.user_id == user_id,
-            Entry.date >= week_start,
-            Entry.date <= week_end
-        ).all()
-        
-        expenses = [e for e in current_week if e.type == 'expense']
+        expenses = np.flatnonzero(data['current'] & data['is_expense'])
         
         # Achievement 1: Low spending streak
         daily_expenses = {}
-        for e in expenses:
-            day_str = e.date.isoformat()
+        for i in expenses:
+            day_str = data['dates'][i].isoformat()
             if day_str not in daily_expenses:
                 daily_expenses[day_str] = 0
-            daily_expenses[day_str] += float(e.amount)
+            daily_expenses[day_str] += data['amounts'][i].item()
         
         # Count days with no expenses or low expenses
-        no_expense_days = sum(1 for day in self._get_week_days(week_start, week_end) 
+        no_expense_days = sum(1 for day in self._get_week_days(week_start, data['week_end']) 
                              if day.isoformat() not in daily_expenses)
         
         if no_expense_days >= 2:
@@ -415,15 +404,10 @@ class WeeklyReportService:
         
         # Get historical average
         thirty_days_ago = week_start - timedelta(days=30)
-        historical = self.db.query(Entry).filter(
-            Entry.user_id == user_id,
-            Entry.type == 'expense',
-            Entry.date >= thirty_days_ago,
-            Entry.date < week_start
-        ).all()
+        historical = data['is_expense'] & data['frame'].mask(thirty_days_ago, week_start - timedelta(days=1))
         
-        if historical:
-            hist_avg = sum(float(e.amount) for e in historical) / 30
+        if historical.any():
+            hist_avg = data['frame'].total(historical) / 30
             if avg_daily_expense < hist_avg * 0.8:
                 savings = (hist_avg - avg_daily_expense) * 7
                 achievements.append({
@@ -434,7 +418,7 @@ class WeeklyReportService:
                 })
         
         # Achievement 3: Consistent tracking
-        if len(current_week) >= 7:
+        if np.count_nonzero(data['current']) >= 7:
             achievements.append({
                 'type': 'consistent_tracking',
                 'title': 'Consistent Tracker',
@@ -443,7 +427,7 @@ class WeeklyReportService:
             })
         
         # Achievement 4: Category diversity (balanced spending)
-        categories_used = set(e.category_id for e in expenses if e.category_id)
+        categories_used = set(data['category_ids'][i] for i in expenses if data['category_ids'][i])
         if len(categories_used) >= 5:
             achievements.append({
                 'type': 'balanced_spending',
@@ -454,14 +438,10 @@ class WeeklyReportService:
         
         return achievements
     
-    def _generate_recommendations(self, user_id: int, week_start: date, week_end: date, user_currency: str = 'USD', show_income: bool = False) -> List[Dict]:
+    def _generate_recommendations(self, summary: Dict, category_analysis: Dict, show_income: bool = False) -> List[Dict]:
         """Generate actionable recommendations"""
         recommendations = []
         
-        category_analysis = self._analyze_categories(user_id, week_start, week_end, 
-                                                     week_start - timedelta(days=7), 
-                                                     week_start - timedelta(days=1))
-        
         # Recommendation 1: High spending category
         if category_analysis['top_category']:
             top_cat = category_analysis['top_category']
@@ -489,10 +469,6 @@ class WeeklyReportService:
         
         # Recommendation 3: Savings opportunity (only show if income is displayed)
         if show_income:
-            summary = self._generate_summary(user_id, week_start, week_end, 
-                                            week_start - timedelta(days=7), 
-                                            week_start - timedelta(days=1), show_income)
-            
             if summary['net_savings'] < 0:
                 recommendations.append({
                     'type': 'increase_savings',
@@ -528,81 +504,71 @@ class WeeklyReportService:
         
         return recommendations
     
-    def _detect_anomalies(self, user_id: int, week_start: date, week_end: date, user_currency: str = 'USD') -> List[Dict]:
+    def _detect_anomalies(self, data: Dict) -> List[Dict]:
         """Detect unusual transactions"""
         anomalies = []
+        week_start = data['week_start']
         
-        # Get current week transactions
-        current_week = self.db.query(Entry).filter(
-            Entry.user_id == user_id,
-            Entry.type == 'expense',
-            Entry.date >= week_start,
-            Entry.date <= week_end
-        ).all()
-        
-        if not current_week:
+        current_week = np.flatnonzero(data['current'] & data['is_expense'])
+        if not current_week.size:
             return anomalies
         
-        # Get historical data for comparison (last 90 days)
+        # Historical data for comparison (last 90 days)
         ninety_days_ago = week_start - timedelta(days=90)
-        historical = self.db.query(Entry).filter(
-            Entry.user_id == user_id,
-            Entry.type == 'expense',
-            Entry.date >= ninety_days_ago,
-            Entry.date < week_start
-        ).all()
-        
-        if not historical:
+        historical = data['is_expense'] & data['frame'].mask(ninety_days_ago, week_start - timedelta(days=1))
+        if not historical.any():
             return anomalies
         
         # Calculate statistical thresholds (simplified to avoid numpy dependency issues)
-        hist_amounts = [float(e.amount) for e in historical]
-        if not hist_amounts:
-            return anomalies
-            
+        hist_amounts = data['amounts'][historical].tolist()
         mean_amount = sum(hist_amounts) / len(hist_amounts)
         # Simple standard deviation calculation
         variance = sum((x - mean_amount) ** 2 for x in hist_amounts) / len(hist_amounts)
         std_amount = variance ** 0.5
         threshold = mean_amount + (2 * std_amount)  # 2 standard deviations
         
+        hist_category_ids = [data['category_ids'][i] for i in np.flatnonzero(historical)]
+        category_means = {}
+        
         # Detect anomalies
-        for entry in current_week:
-            amount = float(entry.amount)
+        for i in current_week:
+            amount = data['amounts'][i].item()
+            category_id = data['category_ids'][i]
+            category_name = data['category_names'][i]
             
             # Anomaly 1: Unusually large transaction
             if amount > threshold and amount > mean_amount * 2:
                 anomalies.append({
                     'type': 'large_transaction',
-                    'entry_id': entry.id,
-                    'date': entry.date.isoformat(),
+                    'entry_id': data['ids'][i],
+                    'date': data['dates'][i].isoformat(),
                     'amount': amount,
-                    'category': entry.category.name if entry.category else 'Uncategorized',
-                    'note': entry.note,
+                    'category': category_name if data['has_category'][i] else 'Uncategorized',
+                    'note': data['notes'][i],
                     'severity': 'high' if amount > mean_amount * 5 else 'medium',
                     'description': f"{amount:.2f} is {(amount/mean_amount):.1f}x your average transaction.",
                     'comparison': f"Your typical transaction: {mean_amount:.2f}"
                 })
             
             # Anomaly 2: Unusual category for amount
-            if entry.category_id:
-                category_hist = [e for e in historical if e.category_id == entry.category_id]
-                if category_hist:
-                    cat_amounts = [float(e.amount) for e in category_hist]
-                    cat_mean = sum(cat_amounts) / len(cat_amounts)
-                    
-                    if amount > cat_mean * 3:
-                        anomalies.append({
-                            'type': 'unusual_category_amount',
-                            'entry_id': entry.id,
-                            'date': entry.date.isoformat(),
-                            'amount': amount,
-                            'category': entry.category.name,
-                            'note': entry.note,
-                            'severity': 'medium',
-                            'description': f"{amount:.2f} is unusually high for {entry.category.name}.",
-                            'comparison': f"Typical {entry.category.name}: {cat_mean:.2f}"
-                        })
+            if category_id:
+                if category_id not in category_means:
+                    cat_amounts = [x for x, cid in zip(hist_amounts, hist_category_ids) if cid == category_id]
+                    category_means[category_id] = sum(cat_amounts) / len(cat_amounts) if cat_amounts else None
+                cat_mean = category_means[category_id]
+                
+                if cat_mean is not None and amount > cat_mean * 3:
+                    anomalies.append({
+                        'type': 'unusual_category_amount',
+                        'entry_id': data['ids'][i],
+                        'date': data['dates'][i].isoformat(),
+                        'amount': amount,
+                        'category': category_name,
+                        'note': data['notes'][i],
+                        'severity': 'medium',
+                        'description': f"{amount:.2f} is unusually high for {category_name}.",
+                        'comparison': f"Typical {category_name}: {cat_mean:.2f}"
+                    })
         
         return anomalies
     
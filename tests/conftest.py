@@ -7,7 +7,8 @@ import os
 from datetime import datetime, timedelta
 from decimal import Decimal
 from unittest.mock import Mock, patch
-from sqlalchemy import create_engine
+from contextlib import contextmanager
+from sqlalchemy import create_engine, event
 from sqlalchemy.orm import sessionmaker, Session
 from fastapi.testclient import TestClient
 
@@ -281,6 +282,82 @@ def authenticated_client_2(client, test_user_2, db_session):
     client.cookies.clear()
 
 
+@pytest.fixture
+def smtp_stub():
+    """Local SMTP server that records delivered messages"""
+    from tests.smtp_stub import SMTPStub
+    stub = SMTPStub().start()
+
+    yield stub
+
+    stub.stop()
+
+
+@pytest.fixture
+def query_counter(db_session):
+    """
+    Record the SQL statements run on the test engine inside a with block
+
+        with query_counter() as statements:
+            service.do_work()
+        assert len(statements) == 1
+
+    With parameters=True each item is a (statement, parameters) pair.
+    """
+    engine = db_session.get_bind()
+
+    @contextmanager
+    def count(parameters: bool = False):
+        statements = []
+
+        def record(conn, cursor, statement, params, *args):
+            statements.append((statement, params) if parameters else statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            yield statements
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+    return count
+
+
+class DictRedis:
+    """Minimal in-memory stand-in for the redis client calls CacheService makes"""
+
+    def __init__(self):
+        self.store = {}
+
+    def get(self, key):
+        return self.store.get(key)
+
+    def mget(self, keys):
+        return [self.store.get(key) for key in keys]
+
+    def set(self, key, value):
+        self.store[key] = value
+
+    def setex(self, key, ttl, value):
+        self.store[key] = value
+
+    def incr(self, key):
+        self.store[key] = str(int(self.store.get(key, 0)) + 1)
+        return int(self.store[key])
+
+    def delete(self, *keys):
+        return sum(1 for key in keys if self.store.pop(key, None) is not None)
+
+
+@pytest.fixture
+def dict_cache():
+    """Enabled CacheService backed by a DictRedis (its store is cache.redis_client.store)"""
+    from app.core.cache import CacheService
+    cache = CacheService.__new__(CacheService)
+    cache.enabled = True
+    cache.redis_client = DictRedis()
+    return cache
+
+
 # Performance testing fixtures
 @pytest.fixture
 def performance_test_data():
@@ -0,0 +1,127 @@
+"""
+Performance Benchmarks for Duplicate Transaction Detection
+
+Duplicates are found by bucketing entries on (type, category, amount in cents)
+and sliding a ±2 day window over each date-sorted bucket, compared with the
+previous pairwise scan of every entry against every later one.
+"""
+
+import random
+import time
+import pytest
+from datetime import date, timedelta
+from sqlalchemy import insert
+
+from app.models.entry import Entry
+from app.services.budget_intelligence_service import BudgetIntelligenceService
+from app.services.duplicate_detection import EntryRow, group_duplicates
+
+
+ENTRIES = 50_000
+DAYS = 365
+MERCHANTS = ["Grocer", "Coffee House", "Fuel Stop", "Pharmacy", "Cinema", "Book Store", "Bakery", "Taxi"]
+
+
+def _rows(count: int, category_ids):
+    """Seeded random history; every 25th entry repeats the one before it (a double import)"""
+    rng = random.Random(41)
+    end = date.today()
+    rows = []
+    for i in range(count):
+        if i % 25 == 24:
+            rows.append(dict(rows[-1]))
+            continue
+        rows.append({
+            "type": "income" if rng.random() < 0.05 else "expense",
+            "amount": round(rng.randint(200, 2200) / 10, 2),
+            "category_id": rng.choice(category_ids),
+            "date": end - timedelta(days=rng.randrange(DAYS)),
+            "note": f"{rng.choice(MERCHANTS)} #{rng.randrange(1000)}",
+        })
+    return rows
+
+
+def _pairwise_groups(rows):
+    """The previous detector: every entry against every later one"""
+    rows = sorted(rows, key=lambda r: (r.date, r.id), reverse=True)
+    groups, checked = [], set()
+    for i, a in enumerate(rows):
+        if a.id in checked:
+            continue
+        members = []
+        for b in rows[i + 1:]:
+            if b.id in checked:
+                continue
+            if (abs(a.amount - b.amount) < 0.01 and a.category_id == b.category_id and a.type == b.type
+                    and abs((a.date - b.date).days) <= 2):
+                members.append(b.id)
+                checked.add(b.id)
+        if members:
+            groups.append([a.id] + members)
+            checked.add(a.id)
+    return groups
+
+
+@pytest.fixture
+def fifty_thousand_entries(db_session, test_user, test_categories):
+    user_id = test_user.id
+    category_ids = [category.id for category in test_categories] + [None]
+    db_session.execute(insert(Entry), [
+        {**row, "user_id": user_id, "currency_code": "USD"} for row in _rows(ENTRIES, category_ids)
+    ])
+    db_session.commit()
+    return user_id
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestDuplicateDetectionPerformance:
+    def test_fifty_thousand_entries(self, db_session, fifty_thousand_entries):
+        service = BudgetIntelligenceService(db_session)
+
+        start = time.perf_counter()
+        groups = service.find_duplicate_transactions(fifty_thousand_entries, days_window=DAYS)
+        exact = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fuzzy_groups = service.find_duplicate_transactions(fifty_thousand_entries, days_window=DAYS,
+                                                           fuzzy_notes=True)
+        fuzzy = time.perf_counter() - start
+
+        assert len(groups) > 1000
+        assert len(fuzzy_groups) >= len(groups)
+        assert exact < 3.0, f"Duplicate scan of {ENTRIES} entries took {exact:.2f}s"
+        assert fuzzy < 6.0, f"Fuzzy duplicate scan of {ENTRIES} entries took {fuzzy:.2f}s"
+        print(f"✓ {ENTRIES} entries: {len(groups)} groups in {exact * 1000:.0f}ms, "
+              f"{len(fuzzy_groups)} with fuzzy notes in {fuzzy * 1000:.0f}ms")
+
+    def test_buckets_match_and_outpace_pairwise_scan(self):
+        rows = [EntryRow(i, r["type"], r["amount"], r["category_id"], r["date"], r["note"])
+                for i, r in enumerate(_rows(4000, [1, 2, 3, 4, 5, None]), start=1)]
+
+        start = time.perf_counter()
+        expected = _pairwise_groups(rows)
+        pairwise = time.perf_counter() - start
+
+        start = time.perf_counter()
+        groups = group_duplicates(rows)
+        bucketed = time.perf_counter() - start
+
+        assert sorted(sorted(e["id"] for e in g["entries"]) for g in groups) == sorted(map(sorted, expected))
+        assert bucketed * 10 < pairwise
+        print(f"✓ 4000 entries: pairwise {pairwise * 1000:.0f}ms, bucketed {bucketed * 1000:.1f}ms "
+              f"({pairwise / bucketed:.0f}x)")
+
+    def test_import_check_of_five_hundred_candidates(self, db_session, fifty_thousand_entries, test_categories):
+        service = BudgetIntelligenceService(db_session)
+        category_ids = [category.id for category in test_categories] + [None]
+        candidates = _rows(500, category_ids)
+
+        start = time.perf_counter()
+        matches = service.find_import_duplicates(fifty_thousand_entries, candidates)
+        duration = time.perf_counter() - start
+
+        # The candidates repeat the first 500 stored rows exactly
+        assert all(match is not None for match in matches)
+        assert duration < 1.0, f"Import check took {duration:.2f}s"
+        print(f"✓ 500 import candidates checked against {ENTRIES} entries in {duration * 1000:.0f}ms")
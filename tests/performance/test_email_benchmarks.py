@@ -0,0 +1,107 @@
+"""
+Performance Benchmarks for Email Delivery
+
+Bulk sends through the pooled SMTP client against a local stub server with a
+small per-reply latency, compared with the previous pattern of a fresh,
+authenticated connection per message.
+"""
+
+import asyncio
+import time
+import pytest
+from email.message import EmailMessage
+
+import aiosmtplib
+
+from app.services.smtp_pool import SMTPConnectionPool
+from tests.smtp_stub import SMTPStub
+
+
+MESSAGES = 200
+CONCURRENCY = 4
+REPLY_LATENCY = 0.002  # seconds per server reply
+
+
+def _message(i: int) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = "reports@example.com"
+    msg["To"] = f"user{i}@example.com"
+    msg["Subject"] = f"Weekly report {i}"
+    msg.set_content("Your weekly financial report" * 20)
+    return msg
+
+
+@pytest.fixture
+def slow_smtp_stub():
+    stub = SMTPStub(latency=REPLY_LATENCY).start()
+    yield stub
+    stub.stop()
+
+
+async def _bounded(send, concurrency: int):
+    slots = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        async with slots:
+            await send(_message(i))
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one(i) for i in range(MESSAGES)])
+    return time.perf_counter() - start
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestEmailDeliveryThroughput:
+    @pytest.mark.asyncio
+    async def test_pooled_delivery_outpaces_connection_per_message(self, slow_smtp_stub):
+        stub = slow_smtp_stub
+
+        async def connection_per_message(msg):
+            await aiosmtplib.send(msg, hostname=stub.host, port=stub.port, username="user", password="secret",
+                                  start_tls=False)
+
+        per_message = await _bounded(connection_per_message, CONCURRENCY)
+        per_message_connections = stub.connections
+
+        pool = SMTPConnectionPool(stub.host, stub.port, username="user", password="secret", start_tls=False,
+                                  size=CONCURRENCY)
+        pooled = await _bounded(pool.send_message, CONCURRENCY)
+        await pool.close()
+        pooled_connections = stub.connections - per_message_connections
+
+        assert len(stub.messages) == 2 * MESSAGES
+        assert per_message_connections == MESSAGES
+        assert pooled_connections <= CONCURRENCY
+        assert pooled < per_message / 1.3, f"pooled {pooled:.2f}s vs per-message {per_message:.2f}s"
+        print(f"✓ {MESSAGES} emails: pooled {MESSAGES / pooled:.0f}/s over {pooled_connections} connections, "
+              f"connection-per-message {MESSAGES / per_message:.0f}/s")
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestEmailRenderTime:
+    def test_weekly_report_render_time(self):
+        from app.services.email_templates import build_report_email, get_email_renderer
+
+        report = {
+            "period": {"start": "2024-03-04", "end": "2024-03-10"},
+            "currency": "EUR",
+            "summary": {"total_expenses": 812.4, "total_income": 2500.0, "net_savings": 1687.6,
+                        "transaction_count": 42},
+            "insights": [f"Insight {i}: spending on category {i} changed by {i * 3}%" for i in range(6)],
+            "achievements": [{"title": f"Achievement {i}", "description": "Well done"} for i in range(3)],
+            "recommendations": [{"title": f"Tip {i}", "description": "Try this", "priority": "medium"}
+                                for i in range(5)],
+        }
+        build_report_email("weekly", "Warm Up", report)
+
+        renders = 1000
+        start = time.perf_counter()
+        for i in range(renders):
+            build_report_email("weekly", f"User {i}", report)
+        per_email_ms = (time.perf_counter() - start) / renders * 1000
+
+        stats = get_email_renderer().render_stats()["weekly_report.html"]
+        assert per_email_ms < 5, f"{per_email_ms:.2f}ms per email"
+        print(f"✓ Weekly report email: {per_email_ms:.3f}ms per email (template avg {stats['avg_ms']}ms)")
@@ -0,0 +1,216 @@
+"""
+Performance Benchmarks for Report Exports
+
+Measures peak resident memory growth and wall time of streaming exports over a
+large entry history. Exports read the database in chunks and write through
+write-only/streaming writers, so peak memory should stay flat as rows grow.
+"""
+
+import asyncio
+import threading
+import time
+import psutil
+import pytest
+from contextlib import contextmanager
+from datetime import date, timedelta
+from sqlalchemy import insert
+
+from app.models.entry import Entry
+from app.services.bulk_export import BulkExportService, PYARROW_AVAILABLE
+from app.services.excel_export import ExcelExportService
+from app.services.pdf_export import PDFExportService
+from app.services.report_charts import shutdown_chart_pool
+
+
+LARGE_EXPORT_ROWS = 500_000
+THROUGHPUT_ROWS = 200_000
+PDF_REPORT_ROWS = 2_000
+INSERT_BATCH = 50_000
+
+
+def _insert_history(db_session, user_id, category_ids, rows):
+    """Bulk insert rows entries spread over ~8 years, 5% of them in EUR"""
+    today = date.today()
+    notes = ["Coffee", "Groceries at the market", None, "Monthly subscription"]
+
+    for batch_start in range(0, rows, INSERT_BATCH):
+        db_session.execute(insert(Entry), [
+            {
+                "user_id": user_id,
+                "type": "income" if i % 10 == 0 else "expense",
+                "amount": round(5 + (i * 7919) % 50000 / 100, 2),
+                "category_id": category_ids[i % len(category_ids)],
+                "note": notes[i % len(notes)],
+                "currency_code": "EUR" if i % 20 == 0 else "USD",
+                "date": today - timedelta(days=i % 3000),
+            }
+            for i in range(batch_start, min(batch_start + INSERT_BATCH, rows))
+        ])
+    db_session.commit()
+
+
+@pytest.fixture
+def large_export_history(db_session, test_user, test_categories):
+    """500k entries"""
+    user_id = test_user.id
+    _insert_history(db_session, user_id, [category.id for category in test_categories], LARGE_EXPORT_ROWS)
+    return user_id
+
+
+@pytest.fixture
+def throughput_history(db_session, test_user, test_categories):
+    """200k entries"""
+    user_id = test_user.id
+    _insert_history(db_session, user_id, [category.id for category in test_categories], THROUGHPUT_ROWS)
+    return user_id
+
+
+@pytest.fixture
+def pdf_report_history(db_session, test_user, test_categories):
+    """2k entries (the background-job threshold of the PDF endpoint)"""
+    user_id = test_user.id
+    _insert_history(db_session, user_id, [category.id for category in test_categories], PDF_REPORT_ROWS)
+    return user_id
+
+
+async def _consume(stream):
+    """Drain an export stream; returns (time to first byte, total time, bytes)"""
+    start_time = time.time()
+    first_byte = None
+    size = 0
+    async for block in stream:
+        if first_byte is None and block:
+            first_byte = time.time() - start_time
+        size += len(block)
+    return first_byte, time.time() - start_time, size
+
+
+@contextmanager
+def _peak_rss_growth(interval: float = 0.05):
+    """Sample process RSS in a background thread; yields a dict filled with the peak growth in bytes"""
+    process = psutil.Process()
+    baseline = process.memory_info().rss
+    peak = baseline
+    done = threading.Event()
+    result = {}
+
+    def sample():
+        nonlocal peak
+        while not done.wait(interval):
+            peak = max(peak, process.memory_info().rss)
+
+    sampler = threading.Thread(target=sample, daemon=True)
+    sampler.start()
+    try:
+        yield result
+    finally:
+        done.set()
+        sampler.join()
+        result['growth'] = max(peak, process.memory_info().rss) - baseline
+
+
+class TestExportMemory:
+    """Peak memory of large exports"""
+
+    @pytest.mark.asyncio
+    @pytest.mark.performance
+    @pytest.mark.slow
+    async def test_excel_export_memory_500k_rows(self, db_session, large_export_history):
+        """A 500k-row Excel export should grow resident memory by less than 64MB"""
+        db_session.expunge_all()
+
+        with _peak_rss_growth() as memory:
+            start_time = time.time()
+            stream = await ExcelExportService().stream_entries_to_excel(db=db_session, user_id=large_export_history)
+            size = sum(len(block) for block in stream)
+            duration = time.time() - start_time
+
+        assert size > 0
+        assert memory['growth'] < 64 * 1024 * 1024, f"Excel export grew RSS by {memory['growth'] / 1e6:.1f}MB"
+        print(f"✓ Excel export ({LARGE_EXPORT_ROWS} rows): {duration:.1f}s, "
+              f"+{memory['growth'] / 1e6:.1f}MB RSS, {size / 1e6:.1f}MB file")
+
+
+class TestBulkExportThroughput:
+    """Rows per second and time-to-first-byte of the CSV / Parquet exports"""
+
+    @pytest.fixture(autouse=True)
+    def fixed_rates(self, monkeypatch):
+        async def rates(self):
+            return {"USD": 1.0, "EUR": 0.85}
+
+        monkeypatch.setattr("app.core.currency.CurrencyService.get_exchange_rates", rates)
+
+    @pytest.mark.asyncio
+    @pytest.mark.performance
+    @pytest.mark.slow
+    async def test_csv_export_throughput(self, db_session, throughput_history):
+        """CSV export should start within 200ms and sustain > 5k rows/s"""
+        service = BulkExportService()
+        query = service.build_query(throughput_history)
+
+        first_byte, duration, size = await _consume(service.stream_csv(db_session, query, "USD"))
+        rows_per_second = THROUGHPUT_ROWS / duration
+
+        assert first_byte < 0.2, f"CSV first byte after {first_byte * 1000:.0f}ms"
+        assert rows_per_second > 5000, f"CSV export ran at {rows_per_second:,.0f} rows/s"
+        print(f"✓ CSV export ({THROUGHPUT_ROWS} rows): {rows_per_second:,.0f} rows/s, "
+              f"first byte {first_byte * 1000:.1f}ms, {size / 1e6:.1f}MB")
+
+    @pytest.mark.asyncio
+    @pytest.mark.performance
+    @pytest.mark.slow
+    @pytest.mark.skipif(not PYARROW_AVAILABLE, reason="pyarrow not installed")
+    async def test_parquet_export_throughput(self, db_session, throughput_history):
+        """Parquet export should start within 200ms and sustain > 5k rows/s"""
+        service = BulkExportService()
+        query = service.build_query(throughput_history)
+
+        first_byte, duration, size = await _consume(service.stream_parquet(db_session, query, "USD"))
+        rows_per_second = THROUGHPUT_ROWS / duration
+
+        assert first_byte < 0.2, f"Parquet first byte after {first_byte * 1000:.0f}ms"
+        assert rows_per_second > 5000, f"Parquet export ran at {rows_per_second:,.0f} rows/s"
+        print(f"✓ Parquet export ({THROUGHPUT_ROWS} rows): {rows_per_second:,.0f} rows/s, "
+              f"first byte {first_byte * 1000:.1f}ms, {size / 1e6:.1f}MB")
+
+
+class TestPDFReportGeneration:
+    """Event loop responsiveness while a PDF report is generated"""
+
+    @pytest.fixture(autouse=True)
+    def fixed_rates(self, monkeypatch):
+        async def rates(self):
+            return {"USD": 1.0, "EUR": 0.85}
+
+        monkeypatch.setattr("app.core.currency.CurrencyService.get_exchange_rates", rates)
+
+    @pytest.mark.asyncio
+    @pytest.mark.performance
+    @pytest.mark.slow
+    async def test_pdf_report_keeps_event_loop_responsive(self, db_session, pdf_report_history):
+        """Generating a 2k-entry PDF should never stall the event loop for more than 250ms"""
+        stalls = []
+        done = asyncio.Event()
+
+        async def probe(interval: float = 0.01):
+            while not done.is_set():
+                tick = time.perf_counter()
+                await asyncio.sleep(interval)
+                stalls.append(time.perf_counter() - tick - interval)
+
+        probe_task = asyncio.create_task(probe())
+        try:
+            start_time = time.time()
+            buffer = await PDFExportService().export_financial_report_to_pdf(db=db_session, user_id=pdf_report_history)
+            duration = time.time() - start_time
+        finally:
+            done.set()
+            await probe_task
+            shutdown_chart_pool()
+
+        worst_stall = max(stalls)
+        assert buffer.getvalue().startswith(b"%PDF")
+        assert worst_stall < 0.25, f"Event loop stalled for {worst_stall * 1000:.0f}ms"
+        print(f"✓ PDF report ({PDF_REPORT_ROWS} rows): {duration:.2f}s, "
+              f"worst event loop stall {worst_stall * 1000:.0f}ms")
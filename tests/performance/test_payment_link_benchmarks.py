@@ -0,0 +1,89 @@
+"""
+Performance Benchmarks for Payment Link Suggestions
+
+Unlinked entries are indexed by amount, category and date, so each recurring
+payment only scores the entries that can reach the confidence threshold;
+existing suggestion pairs are loaded once and new ones are bulk-inserted.
+Previously every payment x entry pair was scored and checked with its own query.
+"""
+
+import random
+import time
+import pytest
+from datetime import date, timedelta
+from sqlalchemy import insert
+
+from app.models.entry import Entry
+from app.models.recurring_payment import RecurringPayment, RecurrenceFrequency
+from app.services.entries import entries_service
+from app.services.payment_history_service import PaymentHistoryService
+
+
+BILLS = 100
+ENTRIES = 5_000
+DAYS = 30
+
+
+@pytest.fixture
+def bills_and_entries(db_session, test_user, test_categories):
+    rng = random.Random(43)
+    user_id = test_user.id
+    category_ids = [category.id for category in test_categories]
+    today = date.today()
+
+    db_session.execute(insert(RecurringPayment), [{
+        "user_id": user_id,
+        "category_id": rng.choice(category_ids),
+        "name": f"Bill {i}",
+        "amount": round(rng.uniform(5, 500), 2),
+        "currency_code": "USD",
+        "frequency": rng.choice([RecurrenceFrequency.WEEKLY, RecurrenceFrequency.MONTHLY]),
+        "due_day": rng.randrange(1, 28),
+        "start_date": today - timedelta(days=365),
+        "is_active": True,
+    } for i in range(BILLS)])
+    db_session.execute(insert(Entry), [{
+        "user_id": user_id,
+        "type": "expense",
+        "amount": round(rng.lognormvariate(3.2, 0.9), 2),
+        "category_id": rng.choice(category_ids),
+        "date": today - timedelta(days=rng.randrange(DAYS)),
+        "note": f"Bill {rng.randrange(BILLS)}" if rng.random() < 0.05 else "Card purchase",
+        "currency_code": "USD",
+    } for _ in range(ENTRIES)])
+    db_session.commit()
+    return user_id
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestPaymentLinkPerformance:
+    def test_hundred_bills_against_five_thousand_entries(self, db_session, bills_and_entries, query_counter):
+        service = PaymentHistoryService(db_session)
+        with query_counter() as statements:
+            start = time.perf_counter()
+            created = service.generate_link_suggestions(bills_and_entries, days_back=DAYS)
+            duration = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rerun = service.generate_link_suggestions(bills_and_entries, days_back=DAYS)
+        rerun_duration = time.perf_counter() - start
+
+        assert created > 0 and rerun == 0
+        assert len(statements) <= 6
+        assert duration < 2.0, f"Matching {BILLS} bills x {ENTRIES} entries took {duration:.2f}s"
+        print(f"✓ {BILLS} bills x {ENTRIES} entries: {created} suggestions in {duration * 1000:.0f}ms "
+              f"({len(statements)} statements), rerun in {rerun_duration * 1000:.0f}ms")
+
+    def test_new_entry_is_matched_incrementally(self, db_session, bills_and_entries, test_categories):
+        service = PaymentHistoryService(db_session)
+        service.generate_link_suggestions(bills_and_entries, days_back=DAYS)
+        entry = entries_service.create_entry(db_session, bills_and_entries, "expense", 42.0, date.today(),
+                                             test_categories[0].id, "Card purchase")
+
+        start = time.perf_counter()
+        service.match_new_entry(entry)
+        duration = time.perf_counter() - start
+
+        assert duration < 0.2, f"Matching one new entry took {duration * 1000:.0f}ms"
+        print(f"✓ One new entry matched against {BILLS} bills in {duration * 1000:.1f}ms")
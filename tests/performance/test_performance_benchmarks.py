@@ -12,6 +12,8 @@ Tests performance requirements:
 import pytest
 import time
 import asyncio
+import numpy as np
+import pandas as pd
 from datetime import date, timedelta
 from sqlalchemy.orm import Session
 from app.services.ai_service import AICategorizationService
@@ -19,6 +21,8 @@ from app.services.weekly_report_service import WeeklyReportService
 from app.services.monthly_report_service import MonthlyReportService
 from app.services.excel_export import ExcelExportService
 from app.services.pdf_export import PDFExportService
+from app.ai.services.anomaly_detection import AnomalyDetectionService
+from app.ai.models.anomaly_model import AnomalyModel
 from app.models.entry import Entry
 from app.models.category import Category
 from app.models.user import User
@@ -316,6 +320,55 @@ class TestConcurrency:
         print(f"✓ {len(multiple_users)} concurrent reports: {duration:.3f}s")
 
 
+class TestAnomalyPerformance:
+    """Test anomaly detection performance on large transaction histories"""
+
+    @staticmethod
+    def _transactions(n: int):
+        rng = np.random.default_rng(42)
+        start = date.today() - timedelta(days=365)
+        df = pd.DataFrame({
+            'id': np.arange(1, n + 1),
+            'date': [start + timedelta(days=int(d)) for d in rng.integers(0, 365, n)],
+            'amount': rng.gamma(2.0, 20.0, n).round(2),
+            'category_id': rng.integers(0, 8, n),
+        })
+        df['category_name'] = 'Category ' + df['category_id'].astype(str)
+        df['note'] = ''
+        df['weekday'] = [d.weekday() for d in df['date']]
+        df['day_of_month'] = [d.day for d in df['date']]
+        return df
+
+    @pytest.mark.performance
+    def test_anomaly_explanations_10k_transactions(self):
+        """Explaining a 5% anomaly rate over 10k transactions should take well under a second"""
+        df = self._transactions(10_000)
+        anomalies = df.sample(frac=0.05, random_state=1)
+        service = AnomalyDetectionService(None)
+
+        start_time = time.time()
+        explanations = service._explain_anomalies(anomalies, df)
+        duration = time.time() - start_time
+
+        assert len(explanations) == 500
+        assert duration < 1.0, f"Explaining 500 anomalies took {duration:.2f}s, should be < 1.0s"
+        print(f"✓ Anomaly explanations (10k transactions, 500 anomalies): {duration:.3f}s")
+
+    @pytest.mark.performance
+    def test_streaming_anomaly_score(self):
+        """Scoring a new entry against a persisted model should take < 5ms"""
+        model = AnomalyModel()
+        model.train(self._transactions(2_000), contamination=0.1)
+
+        start_time = time.time()
+        for _ in range(100):
+            model.score_transaction(date.today(), 250.0, 3)
+        avg_time = (time.time() - start_time) / 100
+
+        assert avg_time < 0.005, f"Streaming score took {avg_time * 1000:.2f}ms, should be < 5ms"
+        print(f"✓ Streaming anomaly score: {avg_time * 1000:.3f}ms")
+
+
 # Fixtures
 
 @pytest.fixture
@@ -0,0 +1,79 @@
+"""
+Performance Benchmarks for Period Reports
+
+Annual, monthly and weekly reports share one grouped fetch per report
+(app.services.period_reports), so generation time and statement count stay
+flat as the entry history grows.
+"""
+
+import time
+import pytest
+from datetime import date, timedelta
+from sqlalchemy import insert
+
+from app.models.entry import Entry
+from app.services.annual_reports import build_annual_report
+from app.services.monthly_report_service import MonthlyReportService
+
+
+HISTORY_YEARS = 5
+ENTRIES_PER_DAY = 12
+
+
+@pytest.fixture
+def five_year_history(db_session, test_user, test_categories):
+    """~22k entries spread evenly over five years"""
+    user_id = test_user.id
+    category_ids = [category.id for category in test_categories] + [None]
+    end = date(date.today().year, 12, 31)
+    days = (end - date(end.year - HISTORY_YEARS + 1, 1, 1)).days + 1
+
+    db_session.execute(insert(Entry), [
+        {
+            "user_id": user_id,
+            "type": "income" if i % 15 == 0 else "expense",
+            "amount": round(3 + (i * 7919) % 40000 / 100, 2),
+            "category_id": category_ids[i % len(category_ids)],
+            "currency_code": "USD",
+            "date": end - timedelta(days=i // ENTRIES_PER_DAY),
+        }
+        for i in range(days * ENTRIES_PER_DAY)
+    ])
+    db_session.commit()
+    return user_id
+
+
+@pytest.mark.performance
+@pytest.mark.slow
+class TestPeriodReportGeneration:
+    def _run_counted(self, query_counter, func):
+        with query_counter() as statements:
+            start = time.perf_counter()
+            result = func()
+            duration = time.perf_counter() - start
+        return result, duration, len(statements)
+
+    def test_annual_report_on_five_year_history(self, db_session, five_year_history, query_counter):
+        year = date.today().year
+
+        report, duration, statements = self._run_counted(
+            query_counter, lambda: build_annual_report(db_session, five_year_history, year, "USD")
+        )
+
+        assert report["summary"]["entry_count"] > 4000
+        assert sum(m["entry_count"] for m in report["monthly_breakdown"].values()) == report["summary"]["entry_count"]
+        assert statements <= 2, statements  # grouped entry fetch + completed goals
+        assert duration < 2.0, f"Annual report took {duration:.2f}s"
+        print(f"✓ Annual report over {HISTORY_YEARS} years: {duration * 1000:.0f}ms, {statements} statements")
+
+    def test_monthly_report_on_five_year_history(self, db_session, five_year_history, query_counter):
+        service = MonthlyReportService(db_session)
+
+        report, duration, statements = self._run_counted(
+            query_counter, lambda: service.generate_monthly_report(five_year_history, date.today())
+        )
+
+        assert len(report["daily_breakdown"]) >= 28
+        assert statements <= 2, statements  # preferences + grouped entry fetch
+        assert duration < 1.0, f"Monthly report took {duration:.2f}s"
+        print(f"✓ Monthly report with {HISTORY_YEARS} years of history: {duration * 1000:.0f}ms, {statements} statements")
@@ -0,0 +1,111 @@
+"""
+Local SMTP server stub for email delivery tests
+
+Speaks just enough ESMTP (EHLO, AUTH PLAIN/LOGIN, MAIL, RCPT, DATA, RSET,
+NOOP, QUIT) for aiosmtplib, records every message and counts connections and
+logins. It runs its own event loop in a background thread, so it serves
+clients on any loop. An optional per-reply latency simulates a remote server.
+"""
+import asyncio
+import threading
+from email import message_from_bytes
+from typing import List, Optional
+
+
+class SMTPStub:
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.host = "127.0.0.1"
+        self.port: Optional[int] = None
+        self.messages: List = []
+        self.connections = 0
+        self.logins = 0
+        self._writers = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._server = None
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self) -> "SMTPStub":
+        ready = threading.Event()
+
+        def run():
+            self._loop = asyncio.new_event_loop()
+            self._server = self._loop.run_until_complete(
+                asyncio.start_server(self._handle, self.host, 0)
+            )
+            self.port = self._server.sockets[0].getsockname()[1]
+            ready.set()
+            self._loop.run_forever()
+
+        self._thread = threading.Thread(target=run, daemon=True)
+        self._thread.start()
+        ready.wait(5)
+        return self
+
+    def stop(self):
+        async def shutdown():
+            self._server.close()
+            for writer in list(self._writers):
+                writer.close()
+            await self._server.wait_closed()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self._loop).result(5)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(5)
+
+    def drop_connections(self):
+        """Close every client connection, as a server-side idle timeout would"""
+        def close_all():
+            for writer in list(self._writers):
+                writer.close()
+
+        self._loop.call_soon_threadsafe(close_all)
+
+    async def _reply(self, writer, line: str):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        writer.write(line.encode() + b"\r\n")
+        await writer.drain()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        self._writers.add(writer)
+        try:
+            await self._reply(writer, "220 stub ESMTP ready")
+            while True:
+                line = await reader.readline()
+                if not line:
+                    return
+                command = line.decode().strip()
+                verb = command.split(" ", 1)[0].upper()
+
+                if verb in ("EHLO", "HELO"):
+                    await self._reply(writer, "250-stub\r\n250-AUTH PLAIN LOGIN\r\n250 8BITMIME")
+                elif verb == "AUTH":
+                    if command.upper().startswith("AUTH LOGIN"):
+                        await self._reply(writer, "334 VXNlcm5hbWU6")
+                        await reader.readline()
+                        await self._reply(writer, "334 UGFzc3dvcmQ6")
+                        await reader.readline()
+                    self.logins += 1
+                    await self._reply(writer, "235 Authentication successful")
+                elif verb == "DATA":
+                    await self._reply(writer, "354 End data with <CR><LF>.<CR><LF>")
+                    data = []
+                    while True:
+                        chunk = await reader.readline()
+                        if chunk in (b".\r\n", b".\n", b""):
+                            break
+                        data.append(chunk[1:] if chunk.startswith(b"..") else chunk)
+                    self.messages.append(message_from_bytes(b"".join(data)))
+                    await self._reply(writer, "250 OK queued")
+                elif verb == "QUIT":
+                    await self._reply(writer, "221 Bye")
+                    return
+                else:  # MAIL, RCPT, RSET, NOOP
+                    await self._reply(writer, "250 OK")
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._writers.discard(writer)
+            writer.close()
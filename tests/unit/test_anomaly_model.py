@@ -0,0 +1,151 @@
+"""Unit tests for the persisted per-user anomaly model"""
+import time
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from app.ai.models.anomaly_model import AnomalyModel, ANOMALY_MODEL_NAME
+from app.ai.services import anomaly_detection
+from app.ai.services.anomaly_detection import AnomalyDetectionService, _loaded_models
+from app.models.ai_model import AIModel, AISuggestion
+from app.models.entry import Entry
+from app.services.entries import entries_service
+
+
+def _history(n=200, seed=0):
+    rng = np.random.default_rng(seed)
+    start = date.today() - timedelta(days=180)
+    return pd.DataFrame({
+        'id': np.arange(1, n + 1),
+        'date': [start + timedelta(days=int(d)) for d in rng.integers(0, 180, n)],
+        'amount': rng.gamma(2.0, 20.0, n).round(2),
+        'category_id': rng.integers(0, 5, n),
+    })
+
+
+@pytest.fixture
+def expense_history(db_session, test_user, test_categories):
+    """60 ordinary expenses spread over the last 90 days"""
+    rng = np.random.default_rng(1)
+    for i in range(60):
+        db_session.add(Entry(
+            user_id=test_user.id,
+            type="expense",
+            amount=round(float(rng.uniform(10, 40)), 2),
+            category_id=test_categories[i % 3].id,
+            note="Regular purchase",
+            date=date.today() - timedelta(days=int(i * 1.5)),
+        ))
+    db_session.commit()
+    _loaded_models.clear()
+    yield
+    _loaded_models.clear()
+
+
+@pytest.mark.unit
+class TestAnomalyModel:
+    def test_compiled_scores_match_isolation_forest(self):
+        df = _history()
+        model = AnomalyModel()
+        model.train(df, contamination=0.1)
+
+        features = model.extract_features(df, model.baselines)
+        expected = model.model.decision_function(model.scaler.transform(features))
+        np.testing.assert_allclose(model.decision_function(features), expected, atol=1e-12)
+
+    def test_single_transaction_matches_batch_scoring(self):
+        model = AnomalyModel()
+        model.train(_history(), contamination=0.1)
+
+        new = pd.DataFrame({'id': [10_001], 'date': [date.today()], 'amount': [480.0], 'category_id': [2]})
+        batch_score = model.score_entries(new)[0]
+        assert model.score_transaction(date.today(), 480.0, 2) == pytest.approx(batch_score)
+
+    def test_training_scores_are_reused(self):
+        df = _history()
+        model = AnomalyModel()
+        model.train(df, contamination=0.1)
+
+        with patch.object(model, 'decision_function') as decision_function:
+            scores = model.score_entries(df)
+        decision_function.assert_not_called()
+        assert (scores < 0).sum() == pytest.approx(len(df) * 0.1, abs=2)
+
+    def test_edited_training_entries_are_rescored(self):
+        df = _history()
+        model = AnomalyModel()
+        model.train(df, contamination=0.1)
+        before = model.score_entries(df)
+
+        edited = df.copy()
+        edited.loc[0, 'amount'] = 5000.0
+        after = model.score_entries(edited)
+
+        assert after[0] < before[0] and after[0] < 0
+        np.testing.assert_array_equal(after[1:], before[1:])
+
+    def test_streaming_score_is_fast(self):
+        model = AnomalyModel()
+        model.train(_history(), contamination=0.1)
+
+        start = time.perf_counter()
+        for _ in range(50):
+            model.score_transaction(date.today(), 75.0, 1)
+        assert (time.perf_counter() - start) / 50 < 0.005
+
+
+@pytest.mark.unit
+class TestPersistedAnomalyModels:
+    def test_model_is_persisted_and_not_refitted(self, db_session, test_user, expense_history):
+        service = AnomalyDetectionService(db_session)
+        first = service.detect_spending_anomalies(test_user.id)
+        assert first['success']
+
+        stored = db_session.query(AIModel).filter(
+            AIModel.user_id == test_user.id,
+            AIModel.model_name == ANOMALY_MODEL_NAME
+        ).one()
+        assert stored.model_blob
+
+        with patch.object(AnomalyModel, 'train') as train:
+            second = AnomalyDetectionService(db_session).detect_spending_anomalies(test_user.id)
+        train.assert_not_called()
+        assert second['anomalies_detected'] == first['anomalies_detected']
+
+    def test_model_refreshes_after_new_entries(self, db_session, test_user, test_categories, expense_history):
+        service = AnomalyDetectionService(db_session)
+        service.detect_spending_anomalies(test_user.id)
+
+        for _ in range(25):
+            db_session.add(Entry(user_id=test_user.id, type="expense", amount=20,
+                                 category_id=test_categories[0].id, date=date.today()))
+        db_session.commit()
+
+        with patch.object(AnomalyDetectionService, 'refresh_user_model') as refresh:
+            service.get_user_model(test_user.id)
+        refresh.assert_called_once_with(test_user.id)
+
+    def test_loaded_models_are_bounded(self, monkeypatch):
+        monkeypatch.setattr(anomaly_detection, 'MAX_LOADED_MODELS', 2)
+        for user_id in (1, 2, 3):
+            anomaly_detection._cache_model(user_id, AnomalyModel())
+            anomaly_detection._cached_model(1)
+
+        assert list(_loaded_models) == [3, 1]
+        _loaded_models.clear()
+
+    def test_entry_creation_flags_anomaly(self, db_session, test_user, test_categories, expense_history):
+        AnomalyDetectionService(db_session).refresh_user_model(test_user.id)
+
+        entry = entries_service.create_entry(
+            db_session, test_user.id, "expense", 5000.0, date.today(),
+            category_id=test_categories[0].id, note="Huge purchase"
+        )
+
+        suggestion = db_session.query(AISuggestion).filter(
+            AISuggestion.entry_id == entry.id,
+            AISuggestion.suggestion_type == 'anomaly'
+        ).first()
+        assert suggestion is not None
@@ -0,0 +1,118 @@
+"""Unit tests for the streamed CSV / Parquet entry exports"""
+import io
+import pytest
+import pandas as pd
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app.main import app
+from app.deps import current_user
+from app.core.currency import CurrencyService
+from app.models.entry import Entry
+from app.services import bulk_export
+from app.services.bulk_export import BulkExportService
+
+
+@pytest.fixture
+def export_entries(db_session, test_user, test_categories):
+    today = date.today()
+    db_session.add_all([
+        Entry(user_id=test_user.id, type="income", amount=Decimal("2500.00"), category_id=test_categories[4].id,
+              note="Salary", currency_code="USD", date=today - timedelta(days=5)),
+        Entry(user_id=test_user.id, type="expense", amount=Decimal("12.50"), category_id=test_categories[0].id,
+              note="Lunch, with team", description="Team lunch", currency_code="USD", date=today),
+        Entry(user_id=test_user.id, type="expense", amount=Decimal("85.00"), category_id=test_categories[1].id,
+              note=None, currency_code="EUR", date=today - timedelta(days=2)),
+        Entry(user_id=test_user.id, type="expense", amount=Decimal("99.00"), category_id=None,
+              note="No category", currency_code="USD", date=today - timedelta(days=1)),
+    ])
+    db_session.commit()
+
+
+@pytest.fixture
+def export_client(client, test_user, monkeypatch):
+    async def fixed_rates(self):
+        return {"USD": 1.0, "EUR": 0.85, "TRY": 8.5}
+
+    monkeypatch.setattr(CurrencyService, "get_exchange_rates", fixed_rates)
+    app.dependency_overrides[current_user] = lambda: test_user
+    yield client
+    app.dependency_overrides.pop(current_user, None)
+
+
+@pytest.mark.unit
+class TestBulkExport:
+    def test_csv_export_streams_all_entries(self, export_client, test_user, export_entries):
+        response = export_client.get("/reports/export.csv")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert "entries.csv" in response.headers["content-disposition"]
+
+        df = pd.read_csv(io.StringIO(response.text), keep_default_na=False)
+        assert list(df.columns) == bulk_export.EXPORT_COLUMNS
+        assert df["date"].is_monotonic_increasing
+        assert len(df) == 4
+
+        uncategorized = df[df["note"] == "No category"].iloc[0]
+        assert uncategorized["category"] == ""
+        assert df[df["description"] == "Team lunch"]["note"].iat[0] == "Lunch, with team"
+
+        eur = df[df["currency_code"] == "EUR"].iloc[0]
+        assert eur["amount"] == 85.0
+        assert eur["amount_converted"] == 100.0
+
+    def test_csv_export_filters(self, export_client, test_user, test_categories, export_entries):
+        since = (date.today() - timedelta(days=3)).isoformat()
+        response = export_client.get(f"/reports/export.csv?start={since}&report_type=expense")
+
+        df = pd.read_csv(io.StringIO(response.text), keep_default_na=False)
+        assert sorted(df["amount"]) == [12.5, 85.0, 99.0]
+        assert "expense" in response.headers["content-disposition"]
+
+        response = export_client.get(f"/reports/export.csv?category={test_categories[0].id}")
+        df = pd.read_csv(io.StringIO(response.text), keep_default_na=False)
+        assert df["amount"].tolist() == [12.5]
+
+    def test_parquet_export_writes_row_group_per_chunk(self, export_client, test_user, export_entries, monkeypatch):
+        pq = pytest.importorskip("pyarrow.parquet")
+        monkeypatch.setattr(bulk_export, "EXPORT_CHUNK_SIZE", 2)
+
+        response = export_client.get("/reports/export.parquet")
+
+        assert response.status_code == 200
+        parquet_file = pq.ParquetFile(io.BytesIO(response.content))
+        assert parquet_file.metadata.num_rows == 4
+        assert parquet_file.metadata.num_row_groups == 2
+
+        df = parquet_file.read().to_pandas()
+        assert list(df.columns) == bulk_export.EXPORT_COLUMNS
+        assert isinstance(df["date"].iat[0], date)
+        assert df.loc[df["currency_code"] == "EUR", "amount_converted"].iat[0] == 100.0
+
+    @pytest.mark.asyncio
+    async def test_chunk_conversion_matches_convert_amount(self, monkeypatch):
+        fetches = []
+
+        async def fixed_rates(self):
+            fetches.append(1)
+            return {"USD": 1.0, "EUR": 0.85, "TRY": 8.5}
+
+        monkeypatch.setattr(CurrencyService, "get_exchange_rates", fixed_rates)
+        service = BulkExportService()
+        frame = pd.DataFrame({
+            "amount": [10.0, 85.0, 123.45, 7.0],
+            "currency_code": ["TRY", "EUR", "USD", "XXX"],
+        })
+
+        rates = {}
+        converted = await service._convert(frame, "TRY", rates)
+        await service._convert(frame.copy(), "TRY", rates)
+        assert len(fetches) == 1  # shared across the export's chunks
+
+        expected = [
+            await service.currency_service.convert_amount(amount, code, "TRY")
+            for amount, code in zip(frame["amount"], frame["currency_code"])
+        ]
+        # Rounded to cents; numpy may round a half-cent either way
+        assert converted["amount_converted"].tolist() == pytest.approx(expected, abs=0.01)
@@ -0,0 +1,105 @@
+"""Unit tests for the calendar month view built from day-level aggregates"""
+import json
+import pytest
+from datetime import date
+
+from app.models.entry import Entry
+from app.models.recurring_payment import RecurringPayment, RecurrenceFrequency
+from app.services import calendar_service
+
+
+@pytest.fixture
+def month(db_session, test_user, test_categories):
+    """Entries in March 2026 plus a few in February and April, and two bills"""
+    food, bills = test_categories[0], test_categories[1]
+    rows = [
+        ("income", 3000, None, date(2026, 3, 1)),
+        ("expense", 40, food, date(2026, 3, 1)),
+        ("expense", 60, food, date(2026, 3, 1)),
+        ("expense", 900, bills, date(2026, 3, 1)),
+        ("expense", 25.5, food, date(2026, 3, 17)),
+        ("expense", 12, None, date(2026, 3, 31)),
+        ("expense", 70, food, date(2026, 2, 27)),
+        ("income", 100, None, date(2026, 4, 2)),
+    ]
+    for entry_type, amount, category, day in rows:
+        db_session.add(Entry(user_id=test_user.id, type=entry_type, amount=amount, date=day, currency_code="USD",
+                             category_id=category.id if category else None))
+    db_session.add_all([
+        RecurringPayment(user_id=test_user.id, category_id=bills.id, name="Rent", amount=900, currency_code="USD",
+                         frequency=RecurrenceFrequency.MONTHLY, due_day=1, start_date=date(2025, 1, 1),
+                         is_active=True),
+        RecurringPayment(user_id=test_user.id, category_id=food.id, name="Veg box", amount=15, currency_code="USD",
+                         frequency=RecurrenceFrequency.WEEKLY, due_day=0, start_date=date(2025, 1, 1),
+                         is_active=True),
+    ])
+    db_session.commit()
+    return test_user.id
+
+
+def _entry_selects(query_counter, call):
+    with query_counter() as statements:
+        result = call()
+    return result, [statement for statement in statements if "FROM entries" in statement]
+
+
+@pytest.mark.unit
+class TestCalendarService:
+    def test_day_cells_aggregate_by_type_and_category(self, db_session, month, test_categories):
+        data = calendar_service.get_calendar_data(db_session, month, 2026, 3)
+
+        first = data['dates']['2026-03-01']
+        assert (first['income_total'], first['expense_total'], first['net'], first['entry_count']) == \
+            (3000.0, 1000.0, 2000.0, 4)
+        items = [(i['type'], i['category_name'], i['amount'], i.get('count')) for i in first['entries']]
+        assert items == [
+            ('income', 'Uncategorized', 3000.0, 1),
+            ('expense', test_categories[1].name, 900.0, 1),
+            ('expense', test_categories[0].name, 100.0, 2),
+            ('bill', test_categories[1].name, 900.0, None),
+        ]
+        assert data['dates']['2026-03-31']['entries'][0]['category_name'] == 'Uncategorized'
+        assert data['summary'] == {'total_income': 3000.0, 'total_expense': 1037.5, 'net': 1962.5, 'entry_count': 6}
+        assert calendar_service.get_month_summary(db_session, month, 2026, 3) == data['summary']
+
+        # Every Monday of the month carries the weekly bill, the 1st the monthly one
+        mondays = {day for day, cell in data['dates'].items()
+                   if any(item.get('note') == "Veg box" for item in cell['entries'])}
+        assert mondays == {'2026-03-02', '2026-03-09', '2026-03-16', '2026-03-23', '2026-03-30'}
+        assert data['dates']['2026-03-09']['entry_count'] == 0
+
+    def test_adjacent_months_are_prefetched_into_the_cache(self, db_session, month, test_categories, dict_cache,
+                                                           query_counter):
+        march, statements = _entry_selects(
+            query_counter, lambda: calendar_service.get_calendar_data(db_session, month, 2026, 3, cache=dict_cache))
+        assert len(statements) == 1
+
+        april, statements = _entry_selects(
+            query_counter, lambda: calendar_service.get_calendar_data(db_session, month, 2026, 4, cache=dict_cache))
+        february, more = _entry_selects(
+            query_counter, lambda: calendar_service.get_calendar_data(db_session, month, 2026, 2, cache=dict_cache))
+        assert statements == [] and more == []
+        assert april['summary']['total_income'] == 100.0
+        assert february['dates']['2026-02-27']['expense_total'] == 70.0
+        # Bills are overlaid per request and never stored with the cached cells
+        assert all(item['type'] != 'bill' for cells in dict_cache.redis_client.store.values()
+                   for cell in json.loads(cells).values() for item in cell['entries'])
+
+        # A new entry changes the data version, so the month is aggregated again
+        db_session.add(Entry(user_id=month, type="expense", amount=5, category_id=test_categories[0].id,
+                             date=date(2026, 3, 17), currency_code="USD"))
+        db_session.commit()
+        march, statements = _entry_selects(
+            query_counter, lambda: calendar_service.get_calendar_data(db_session, month, 2026, 3, cache=dict_cache))
+        assert len(statements) == 1
+        assert march['dates']['2026-03-17']['expense_total'] == 30.5
+
+    def test_day_entries_load_in_one_query(self, db_session, month, test_categories, query_counter):
+        day, statements = _entry_selects(
+            query_counter, lambda: calendar_service.get_date_entries(db_session, month, date(2026, 3, 1)))
+
+        assert len(statements) == 1
+        assert (day['total_income'], day['total_expense'], day['entry_count']) == (3000.0, 1000.0, 4)
+        assert {e['category_name'] for e in day['entries']} == \
+            {'Uncategorized', test_categories[0].name, test_categories[1].name}
+        print(f"✓ Day detail for {day['date']} loaded {day['entry_count']} entries in one query")
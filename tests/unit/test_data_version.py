@@ -0,0 +1,107 @@
+"""Unit tests for the per-user data version and versioned report snapshots"""
+import pytest
+from datetime import date
+
+from app.models.entry import Entry
+from app.models.historical_report import HistoricalReport
+from app.services.data_version import get_data_version
+from app.services.entries import entries_service
+from app.services.historical_report_service import HistoricalReportService
+from app.services.report_status_service import ReportStatusService
+from app.services.weekly_report_service import WeeklyReportService
+
+
+def _add_expense(db_session, user_id, category_id, amount=25.0):
+    return entries_service.create_entry(db_session, user_id, "expense", amount, date.today(), category_id,
+                                        "Lunch", "USD")
+
+
+@pytest.mark.unit
+class TestDataVersion:
+    def test_entry_writes_bump_only_the_owners_version(self, db_session, test_user, test_user_2, test_categories):
+        start = get_data_version(db_session, test_user.id)
+        other = get_data_version(db_session, test_user_2.id)
+
+        entry = _add_expense(db_session, test_user.id, test_categories[0].id)
+        assert get_data_version(db_session, test_user.id) == start + 1
+
+        entry.amount = 30.0
+        db_session.commit()
+        assert get_data_version(db_session, test_user.id) == start + 2
+
+        db_session.delete(entry)
+        db_session.commit()
+        assert test_user.data_version == start + 3
+        assert get_data_version(db_session, test_user_2.id) == other
+        print("✓ Create, update and delete each bump the owner's data version")
+
+    def test_rolled_back_writes_leave_the_version_unchanged(self, db_session, test_user, test_categories):
+        start = get_data_version(db_session, test_user.id)
+
+        db_session.add(Entry(user_id=test_user.id, type="expense", amount=10.0, date=date.today(),
+                             category_id=test_categories[0].id, currency_code="USD"))
+        db_session.flush()
+        db_session.rollback()
+
+        assert get_data_version(db_session, test_user.id) == start
+
+    def test_unchanged_period_is_served_from_snapshot(self, db_session, test_user, test_categories,
+                                                      query_counter):
+        _add_expense(db_session, test_user.id, test_categories[0].id)
+        service = HistoricalReportService(db_session)
+        report_service = WeeklyReportService(db_session)
+        generated = []
+
+        def generate():
+            generated.append(1)
+            return report_service.generate_weekly_report(test_user.id, show_income=False)
+
+        user_id = test_user.id
+        first = service.get_or_generate_current(user_id, "weekly", generate)
+        with query_counter() as statements:
+            second = service.get_or_generate_current(user_id, "weekly", generate)
+
+        assert len(generated) == 1
+        assert second["summary"] == first["summary"]
+        assert len(statements) == 2  # version + snapshot lookup
+        stored = db_session.query(HistoricalReport).one()
+        assert stored.data_version == get_data_version(db_session, test_user.id)
+
+        _add_expense(db_session, test_user.id, test_categories[0].id, amount=75.0)
+        third = service.get_or_generate_current(test_user.id, "weekly", generate)
+
+        assert len(generated) == 2
+        assert third["summary"]["total_expenses"] == first["summary"]["total_expenses"] + 75.0
+        print("✓ Revisit served from snapshot in 2 statements; regenerated after a write")
+
+    def test_snapshot_with_other_options_is_not_served(self, db_session, test_user, test_categories):
+        entries_service.create_entry(db_session, test_user.id, "income", 900.0, date.today(), None, "Pay", "USD")
+        _add_expense(db_session, test_user.id, test_categories[0].id)
+        service = HistoricalReportService(db_session)
+        report_service = WeeklyReportService(db_session)
+
+        # A background job stores the same period's report with income shown
+        with_income = report_service.generate_weekly_report(test_user.id, show_income=True)
+        service.save_generated_report(test_user.id, "weekly", with_income)
+
+        page = service.get_or_generate_current(
+            test_user.id, "weekly", lambda: report_service.generate_weekly_report(test_user.id, show_income=False),
+            params={'show_income': False}
+        )
+
+        assert page["show_income"] is False
+        assert page["summary"]["total_income"] != with_income["summary"]["total_income"]
+
+    def test_report_status_is_derived_from_versions(self, db_session, test_user, test_categories,
+                                                    query_counter):
+        service = ReportStatusService(db_session)
+        service.mark_report_as_viewed(test_user.id, "weekly")
+        assert service.get_all_report_statuses(test_user.id)["weekly"]["is_new"] is False
+
+        with query_counter() as statements:
+            _add_expense(db_session, test_user.id, test_categories[0].id)
+        assert not any("report_status" in s for s in statements)
+
+        statuses = service.get_all_report_statuses(test_user.id)
+        assert statuses["weekly"]["is_new"] is True
+        assert statuses["monthly"]["is_new"] is True
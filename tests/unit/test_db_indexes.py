@@ -151,6 +151,10 @@ class TestIndexColumnComposition:
         cols = self._get_index_columns(RecurringPayment, 'ix_recurring_payments_user_active')
         assert cols == ['user_id', 'is_active']
 
+    def test_recurring_payments_user_active_due_columns(self):
+        cols = self._get_index_columns(RecurringPayment, 'ix_recurring_payments_user_active_due')
+        assert cols == ['user_id', 'is_active', 'next_due_date']
+
 
 # ---------------------------------------------------------------------------
 # Database-level checks — indexes actually created in SQLite
@@ -180,6 +184,7 @@ class TestIndexesInDatabase:
     def test_recurring_payments_composite_index_in_db(self, db_engine):
         names = _index_names_for_table('recurring_payments', db_engine)
         assert 'ix_recurring_payments_user_active' in names
+        assert 'ix_recurring_payments_user_active_due' in names
 
     def test_total_seven_composite_indexes_exist_in_db(self, db_engine):
         expected = {
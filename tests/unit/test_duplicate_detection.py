@@ -0,0 +1,120 @@
+"""Unit tests for bucketed duplicate transaction detection"""
+import pytest
+from datetime import date, timedelta
+
+from app.deps import current_user
+from app.main import app
+from app.models.entry import Entry
+from app.services.budget_intelligence_service import BudgetIntelligenceService
+from app.services.duplicate_detection import (
+    EntryRow, merchant_key, minhash_signature, note_similarity, group_duplicates
+)
+
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def add_entry(db_session, test_user):
+    def add(amount, category, days_ago=0, note=None, type="expense"):
+        entry = Entry(user_id=test_user.id, type=type, amount=amount, category_id=category.id if category else None,
+                      date=TODAY - timedelta(days=days_ago), note=note, currency_code="USD")
+        db_session.add(entry)
+        db_session.commit()
+        return entry.id
+    return add
+
+
+@pytest.mark.unit
+class TestDuplicateDetection:
+    def test_groups_same_bucket_entries_within_two_days(self, db_session, test_user, test_categories, add_entry,
+                                                        query_counter):
+        food, transport = test_categories[0], test_categories[1]
+        newest = add_entry(12.50, food, 0, "Lunch")
+        same_day = add_entry(12.50, food, 0, "lunch ")
+        add_entry(12.50, food, 5, "Lunch")            # outside the window
+        add_entry(12.50, transport, 0, "Lunch")       # other category
+        add_entry(12.51, food, 0, "Lunch")            # other amount
+        bus = add_entry(30.00, transport, 1, "Bus pass")
+        bus_again = add_entry(30.00, transport, 3, "Monthly pass")
+        user_id = test_user.id
+
+        with query_counter() as statements:
+            groups = BudgetIntelligenceService(db_session).find_duplicate_transactions(user_id)
+
+        assert len(statements) == 1  # category names are joined in, no lazy loads
+        by_anchor = {g["entries"][0]["id"]: g for g in groups}
+        assert set(by_anchor) == {same_day, bus}
+        lunch = by_anchor[same_day]
+        assert [e["id"] for e in lunch["entries"]] == [same_day, newest]
+        assert lunch["confidence"] == "high" and lunch["entries"][0]["category"] == food.name
+        assert lunch["total_amount"] == pytest.approx(25.0)
+        assert [e["id"] for e in by_anchor[bus]["entries"]] == [bus, bus_again]
+        assert by_anchor[bus]["confidence"] == "medium"
+        print(f"✓ {len(groups)} duplicate groups found in one statement")
+
+    def test_fuzzy_notes_match_the_same_merchant_across_categories(self, db_session, test_user, test_categories,
+                                                                   add_entry):
+        first = add_entry(4.75, test_categories[0], 0, "STARBUCKS #1234 POS PURCHASE")
+        second = add_entry(4.75, test_categories[2], 1, "Starbucks 5678")
+        add_entry(4.75, test_categories[3], 1, "Parking meter")
+        service = BudgetIntelligenceService(db_session)
+
+        assert service.find_duplicate_transactions(test_user.id) == []
+        groups = service.find_duplicate_transactions(test_user.id, fuzzy_notes=True)
+
+        assert len(groups) == 1
+        assert [e["id"] for e in groups[0]["entries"]] == [first, second]
+        assert groups[0]["confidence"] == "low"
+
+    def test_import_candidates_are_checked_before_insert(self, db_session, test_user, test_categories, add_entry):
+        food = test_categories[0]
+        existing = add_entry(8.20, food, 1, "Corner Bakery")
+
+        matches = BudgetIntelligenceService(db_session).find_import_duplicates(test_user.id, [
+            {"type": "expense", "amount": 8.20, "category_id": food.id, "date": TODAY, "note": "CORNER BAKERY 0042"},
+            {"type": "expense", "amount": 8.20, "category_id": food.id, "date": TODAY, "note": "Bookshop"},
+            {"type": "expense", "amount": 8.20, "category_id": food.id, "date": TODAY + timedelta(days=4),
+             "note": "Corner Bakery"},
+        ])
+
+        assert matches == [existing, None, None]
+
+    def test_receipt_split_reports_skipped_duplicates(self, client, db_session, test_user, test_categories,
+                                                      add_entry):
+        food = test_categories[0]
+        existing = add_entry(4.50, food, 0, "Croissant")
+        body = {"date": TODAY.isoformat(), "currency_code": "USD",
+                "items": [{"description": "Croissant", "amount": 4.50, "category_id": food.id}]}
+
+        app.dependency_overrides[current_user] = lambda: test_user
+        try:
+            skipped = client.post("/receipts/split", json={**body, "skip_duplicates": True})
+            forced = client.post("/receipts/split", json=body)
+        finally:
+            app.dependency_overrides.pop(current_user, None)
+
+        assert skipped.status_code == 409
+        assert skipped.json()["skipped_duplicates"] == [
+            {"description": "Croissant", "amount": 4.50, "category_id": food.id, "duplicate_of": existing}
+        ]
+        # Without the flag nothing is dropped
+        assert forced.status_code == 200 and forced.json()["created"] == 1
+
+    def test_merchant_keys_and_signatures(self):
+        assert merchant_key("POS PURCHASE  Amazon.com*2K4 #991") == "amazon"
+        assert merchant_key(None) == ""
+
+        same = note_similarity(minhash_signature("whole foods market"), minhash_signature("whole foods mkt"))
+        different = note_similarity(minhash_signature("whole foods market"), minhash_signature("shell station"))
+        assert same > 0.5 > different
+        assert note_similarity(minhash_signature(""), minhash_signature("shell")) == 0.0
+
+    def test_grouping_scans_each_bucket_once(self):
+        # 2,000 identical entries a day apart: sliding window, not all pairs
+        rows = [EntryRow(i, "expense", 9.99, 1, TODAY - timedelta(days=i), "Gym") for i in range(2000)]
+
+        groups = group_duplicates(rows)
+
+        assert sum(g["count"] for g in groups) == 2000
+        assert all(g["count"] == 3 for g in groups[:-1])
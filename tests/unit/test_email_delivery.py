@@ -0,0 +1,182 @@
+"""Unit tests for pooled SMTP delivery and the email outbox"""
+import asyncio
+import threading
+import pytest
+from datetime import datetime, timedelta
+from email.message import EmailMessage
+from sqlalchemy.orm import sessionmaker
+
+from app.models.email_outbox import EmailOutbox
+from app.services.email import EmailService
+from app.services.email_outbox import EmailOutboxSender, enqueue_email
+from app.services.smtp_pool import SMTPConnectionPool
+
+
+def _message(i: int) -> EmailMessage:
+    msg = EmailMessage()
+    msg["From"] = "reports@example.com"
+    msg["To"] = f"user{i}@example.com"
+    msg["Subject"] = f"Report {i}"
+    msg.set_content("Your report")
+    return msg
+
+
+def _pool(stub, **kwargs) -> SMTPConnectionPool:
+    return SMTPConnectionPool(stub.host, stub.port, username="user", password="secret", start_tls=False, **kwargs)
+
+
+@pytest.fixture
+def stub_email_service(smtp_stub, monkeypatch):
+    service = EmailService()
+    monkeypatch.setattr(service, "resend_api_key", None)
+    monkeypatch.setattr(service, "username", "user")
+    monkeypatch.setattr(service, "password", "secret")
+    monkeypatch.setattr(service, "smtp_server", smtp_stub.host)
+    monkeypatch.setattr(service, "smtp_port", smtp_stub.port)
+    monkeypatch.setattr(service, "smtp_start_tls", False)
+    return service
+
+
+@pytest.mark.unit
+class TestSMTPConnectionPool:
+    @pytest.mark.asyncio
+    async def test_connections_are_reused_across_messages(self, smtp_stub):
+        pool = _pool(smtp_stub, size=2)
+
+        await asyncio.gather(*[pool.send_message(_message(i)) for i in range(20)])
+        await pool.close()
+
+        assert len(smtp_stub.messages) == 20
+        assert smtp_stub.connections <= 2
+        assert smtp_stub.logins == smtp_stub.connections
+        assert pool.stats["messages_sent"] == 20
+        print(f"✓ 20 messages over {smtp_stub.connections} connections")
+
+    @pytest.mark.asyncio
+    async def test_connections_rotate_after_message_limit(self, smtp_stub):
+        pool = _pool(smtp_stub, size=1, max_messages_per_connection=5)
+
+        for i in range(12):
+            await pool.send_message(_message(i))
+        await pool.close()
+
+        assert len(smtp_stub.messages) == 12
+        assert smtp_stub.connections == 3
+
+    @pytest.mark.asyncio
+    async def test_dropped_connection_is_replaced(self, smtp_stub):
+        pool = _pool(smtp_stub, size=1)
+        await pool.send_message(_message(0))
+
+        smtp_stub.drop_connections()
+        await asyncio.sleep(0.05)
+        await pool.send_message(_message(1))
+        await pool.close()
+
+        assert len(smtp_stub.messages) == 2
+        assert smtp_stub.connections == 2
+
+    @pytest.mark.asyncio
+    async def test_email_service_sends_through_pool(self, smtp_stub, stub_email_service):
+        for i in range(3):
+            assert await stub_email_service.send_email(f"user{i}@example.com", f"Hello {i}", "<p>Hi</p>", "Hi")
+        await stub_email_service.close()
+
+        assert [m["Subject"] for m in smtp_stub.messages] == ["Hello 0", "Hello 1", "Hello 2"]
+        assert smtp_stub.connections == 1
+
+
+@pytest.mark.unit
+class TestEmailOutbox:
+    @pytest.fixture
+    def sender_for(self, db_session):
+        def build(send, **kwargs):
+            return EmailOutboxSender(
+                session_factory=sessionmaker(bind=db_session.get_bind()),
+                send=send,
+                **kwargs
+            )
+        return build
+
+    @pytest.mark.asyncio
+    async def test_queued_emails_are_delivered_in_background(self, db_session, sender_for, smtp_stub,
+                                                             stub_email_service):
+        for i in range(5):
+            stub_email_service.queue_email(db_session, f"user{i}@example.com", f"Queued {i}", "<p>Hi</p>")
+
+        async def send(item):
+            return await stub_email_service.send_email(item["to_email"], item["subject"], item["html_content"],
+                                                       item["text_content"])
+
+        totals = await sender_for(send, batch_size=2).drain()
+        await stub_email_service.close()
+
+        assert (totals["claimed"], totals["sent"]) == (5, 5)
+        assert sorted(m["Subject"] for m in smtp_stub.messages) == [f"Queued {i}" for i in range(5)]
+        assert smtp_stub.connections <= 2  # one per concurrent send in a batch, reused across batches
+        db_session.expire_all()
+        assert {row.status for row in db_session.query(EmailOutbox).all()} == {"sent"}
+
+    @pytest.mark.asyncio
+    async def test_failed_delivery_is_retried_then_marked_failed(self, db_session, sender_for):
+        item = enqueue_email(db_session, "user@example.com", "Retry me", "<p>Hi</p>")
+
+        async def send(item):
+            raise ConnectionError("SMTP unavailable")
+
+        sender = sender_for(send, max_attempts=2, retry_delay=0)
+        first = await sender.run_once()
+        db_session.refresh(item)
+        assert first["retrying"] == 1
+        assert (item.status, item.attempts, item.last_error) == ("pending", 1, "SMTP unavailable")
+
+        second = await sender.run_once()
+        db_session.refresh(item)
+        assert second["failed"] == 1
+        assert (item.status, item.attempts) == ("failed", 2)
+
+    @pytest.mark.asyncio
+    async def test_emails_mid_send_at_restart_are_requeued(self, db_session, sender_for):
+        now = datetime.utcnow()
+        db_session.add_all([
+            EmailOutbox(to_email="user@example.com", subject="Interrupted", html_content="<p>Hi</p>",
+                        status="sending", attempts=1, next_attempt_at=now, claimed_at=now - timedelta(hours=1)),
+            # Still being delivered by another running process
+            EmailOutbox(to_email="other@example.com", subject="In flight", html_content="<p>Hi</p>",
+                        status="sending", attempts=1, next_attempt_at=now, claimed_at=now),
+        ])
+        db_session.commit()
+        delivered = []
+
+        async def send(item):
+            delivered.append(item["subject"])
+            return True
+
+        sender = sender_for(send)
+        assert sender.recover() == 1
+        await sender.drain()
+
+        assert delivered == ["Interrupted"]
+
+    @pytest.mark.asyncio
+    async def test_outbox_queries_run_off_the_event_loop(self, db_session, sender_for, monkeypatch):
+        enqueue_email(db_session, "user@example.com", "Threaded", "<p>Hi</p>")
+        threads = []
+
+        async def send(item):
+            return True
+
+        sender = sender_for(send)
+        for name in ("_claim_batch", "_record_results"):
+            method = getattr(sender, name)
+
+            def record(*args, method=method):
+                threads.append(threading.current_thread())
+                return method(*args)
+
+            monkeypatch.setattr(sender, name, record)
+
+        counts = await sender.run_once()
+
+        assert counts["sent"] == 1
+        assert len(threads) == 2 and threading.main_thread() not in threads
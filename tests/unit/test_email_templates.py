@@ -0,0 +1,65 @@
+"""Unit tests for precompiled email templates"""
+import os
+import pytest
+
+from app.services.email_templates import EmailTemplateRenderer, build_report_email, get_email_renderer
+
+
+WEEKLY_REPORT = {
+    "period": {"start": "2024-03-04", "end": "2024-03-10"},
+    "currency": "EUR",
+    "summary": {"total_expenses": 123.456, "total_income": 1000, "net_savings": 876.544, "transaction_count": 7},
+    "insights": ["<b>Dining</b> & groceries were your top categories"],
+    "achievements": [{"title": "Saver", "description": "Saved 80% of income"}],
+    "recommendations": [{"title": "Cut dining", "description": "Cook at home", "priority": "high"}],
+}
+
+
+@pytest.mark.unit
+class TestEmailTemplates:
+    def test_weekly_report_email(self):
+        subject, html, text = build_report_email("weekly", "Test User", WEEKLY_REPORT)
+
+        assert subject == "Your Weekly Financial Report - Week of 2024-03-04"
+        assert "123.46€" in html and "876.54€" in html
+        assert "&lt;b&gt;Dining&lt;/b&gt; &amp; groceries" in html  # report content is escaped
+        assert "border-left: 4px solid #ef4444" in html  # high priority recommendation
+        assert "View Full Dashboard" in html
+        assert text == "View your weekly report online."
+
+    def test_monthly_and_annual_report_emails(self):
+        monthly = dict(WEEKLY_REPORT, currency="USD", period={"month_name": "March", "year": 2024},
+                       summary=dict(WEEKLY_REPORT["summary"], savings_rate=87.654))
+        subject, html, text = build_report_email("monthly", "Test User", monthly)
+        assert subject == "Your Monthly Financial Report - March 2024"
+        assert "$1000.00" in html and "87.7%" in html
+        assert "Savings Rate: 87.7%" in text
+
+        annual = {"period": {"year": 2024}, "currency": "TRY",
+                  "summary": {"income": 5000.0, "expense": 6000.5, "balance": -1000.5}}
+        subject, html, text = build_report_email("annual", "Test User", annual)
+        assert subject == "Your Annual Financial Report - 2024"
+        assert "₺5000.00" in html and "summary-card negative" in html
+        assert "Net Balance: ₺-1000.50" in text
+
+    def test_static_fragments_are_cached_per_locale_and_currency(self, tmp_path):
+        renderer = EmailTemplateRenderer(bytecode_cache_dir=str(tmp_path))
+        context = {key: WEEKLY_REPORT[key] for key in ("period", "summary", "insights", "achievements",
+                                                         "recommendations")}
+
+        first = renderer.render("weekly_report.html", context, currency="EUR")
+        second = renderer.render("weekly_report.html", context, currency="EUR")
+        renderer.render("weekly_report.html", context, currency="USD")
+        renderer.render("weekly_report.html", context, locale="tr", currency="USD")
+
+        assert first == second
+        # head + footer, for (en, EUR), (en, USD) and (tr, USD)
+        assert len(renderer._fragments) == 6
+        assert renderer.render_stats()["weekly_report.html"]["count"] == 4
+        assert os.listdir(tmp_path), "compiled templates are written to the bytecode cache"
+
+    def test_templates_are_compiled_once_per_process(self):
+        renderer = get_email_renderer()
+
+        assert renderer is get_email_renderer()
+        assert {"weekly_report.html", "fragments/report_footer.html"} <= set(renderer._templates)
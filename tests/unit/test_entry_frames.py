@@ -0,0 +1,81 @@
+"""Unit tests for the columnar entry fetch helpers"""
+import pytest
+import pandas as pd
+from datetime import date, timedelta
+
+from app.ai.data.entry_frames import add_calendar_columns, fetch_entries_frame
+from app.models.entry import Entry
+
+
+@pytest.fixture
+def mixed_entries(db_session, test_user, test_categories):
+    today = date.today()
+    db_session.add_all([
+        Entry(user_id=test_user.id, type="expense", amount=12.5, category_id=test_categories[0].id,
+              note="Lunch", date=today - timedelta(days=1)),
+        Entry(user_id=test_user.id, type="expense", amount=40, category_id=None,
+              note=None, date=today - timedelta(days=3)),
+        Entry(user_id=test_user.id, type="income", amount=2500, category_id=None,
+              note="Salary", date=today - timedelta(days=2)),
+        Entry(user_id=test_user.id, type="expense", amount=99.99, category_id=test_categories[1].id,
+              note="Train", date=today - timedelta(days=60)),
+    ])
+    db_session.commit()
+
+
+@pytest.mark.unit
+class TestEntryFrames:
+    def test_fetches_typed_columns_with_category_names(self, db_session, test_user, test_categories, mixed_entries):
+        df = fetch_entries_frame(db_session, test_user.id)
+
+        assert list(df.columns) == ['id', 'date', 'type', 'amount', 'category_id', 'category_name', 'note']
+        assert str(df['amount'].dtype) == 'float64'
+        assert str(df['category_id'].dtype) == 'int64'
+        assert df['date'].is_monotonic_increasing
+        assert isinstance(df['date'].iat[0], date)
+
+        uncategorized = df[df['amount'] == 40].iloc[0]
+        assert uncategorized['category_id'] == 0
+        assert uncategorized['category_name'] == 'Uncategorized'
+        assert uncategorized['note'] == ''
+        assert df[df['amount'] == 12.5]['category_name'].iat[0] == test_categories[0].name
+
+    def test_filters(self, db_session, test_user, test_categories, mixed_entries):
+        since = date.today() - timedelta(days=30)
+
+        expenses = fetch_entries_frame(db_session, test_user.id, ('amount',),
+                                       start_date=since, entry_type='expense')
+        assert sorted(expenses['amount']) == [12.5, 40.0]
+
+        categorized = fetch_entries_frame(db_session, test_user.id, ('amount',), categorized_only=True)
+        assert sorted(categorized['amount']) == [12.5, 99.99]
+
+        one_category = fetch_entries_frame(db_session, test_user.id, ('amount',),
+                                           category_id=test_categories[1].id)
+        assert one_category['amount'].tolist() == [99.99]
+
+    def test_single_statement_without_orm_objects(self, db_session, test_user, mixed_entries, query_counter):
+        user_id = test_user.id
+        db_session.expunge_all()
+        with query_counter() as statements:
+            df = fetch_entries_frame(db_session, user_id)
+
+        assert len(df) == 4
+        assert len(statements) == 1
+        assert not any(isinstance(obj, Entry) for obj in db_session.identity_map.values())
+
+    def test_empty_result_keeps_columns(self, db_session, test_user):
+        df = fetch_entries_frame(db_session, test_user.id, ('date', 'amount'))
+        assert df.empty
+        assert list(df.columns) == ['date', 'amount']
+        assert list(add_calendar_columns(df, 'year_month').columns) == ['date', 'amount', 'year_month']
+
+    def test_calendar_columns(self):
+        df = pd.DataFrame({'date': [date(2024, 12, 30), date(2025, 3, 1)]})
+        add_calendar_columns(df, 'weekday', 'day_of_month', 'year', 'month', 'quarter', 'week', 'year_month')
+
+        assert df['weekday'].tolist() == [0, 5]
+        assert df['week'].tolist() == [1, 9]
+        assert df['quarter'].tolist() == [4, 1]
+        assert df['year_month'].tolist() == ['2024-12', '2025-03']
+        assert str(df['week'].dtype) == 'int64'
@@ -0,0 +1,108 @@
+"""Unit tests for the streaming entries Excel export"""
+import io
+import threading
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from openpyxl import load_workbook
+
+from app.models.entry import Entry
+from app.services import excel_export
+from app.services.excel_export import ExcelExportService
+
+
+@pytest.fixture
+def export_entries(db_session, test_user, test_categories):
+    today = date.today()
+    db_session.add_all([
+        Entry(user_id=test_user.id, type="income", amount=Decimal("2500.00"), category_id=test_categories[4].id,
+              note="Salary", currency_code="USD", date=today - timedelta(days=5)),
+        Entry(user_id=test_user.id, type="expense", amount=Decimal("12.50"), category_id=test_categories[0].id,
+              note="Lunch", description="Team lunch", currency_code="USD", date=today),
+        Entry(user_id=test_user.id, type="expense", amount=Decimal("40.00"), category_id=test_categories[1].id,
+              note=None, currency_code="USD", date=today - timedelta(days=2)),
+        Entry(user_id=test_user.id, type="expense", amount=Decimal("99.00"), category_id=None,
+              note="Uncategorized", currency_code="USD", date=today - timedelta(days=1)),
+    ])
+    db_session.commit()
+
+
+def _sheet_values(buffer):
+    ws = load_workbook(buffer).active
+    return ws, [list(row) for row in ws.iter_rows(values_only=True)]
+
+
+@pytest.mark.unit
+class TestExcelExport:
+    @pytest.mark.asyncio
+    async def test_workbook_rows_and_summary(self, db_session, test_user, test_categories, export_entries):
+        buffer = await ExcelExportService().export_entries_to_excel(db=db_session, user_id=test_user.id)
+        ws, rows = _sheet_values(buffer)
+
+        assert rows[0][0] == "Financial Report"
+        assert [str(r) for r in ws.merged_cells.ranges] == ["A1:H1"]
+        assert rows[8] == ["Date", "Type", "Category", "Description",
+                           "Amount (Original)", "Currency", "Amount (Converted)", "Notes"]
+
+        data = rows[9:12]
+        today = date.today()
+        assert [row[0] for row in data] == [today.isoformat(), (today - timedelta(days=2)).isoformat(),
+                                             (today - timedelta(days=5)).isoformat()]
+        assert data[0] == [today.isoformat(), "Expense", "Food & Dining", "Team lunch", 12.5, "USD", 12.5, "Lunch"]
+        assert data[1][7] is None or data[1][7] == ""
+
+        summary = {row[0]: row[1] for row in rows[13:] if row and row[0]}
+        assert summary["Total Income:"] == 2500
+        assert summary["Total Expense:"] == 52.5
+        assert summary["Net Balance:"] == 2447.5
+
+        assert ws["A9"].font.b and ws["A9"].fill.fgColor.rgb == "00366092"
+        assert ws["B10"].border.left.style == "thin"
+        assert ws.column_dimensions["C"].width == len("Transportation") + 2
+
+    @pytest.mark.asyncio
+    async def test_filters_and_currency_conversion(self, db_session, test_user, test_categories, export_entries):
+        db_session.add(Entry(user_id=test_user.id, type="expense", amount=Decimal("85.00"),
+                             category_id=test_categories[0].id, currency_code="EUR", date=date.today()))
+        db_session.commit()
+
+        service = ExcelExportService()
+        service.currency_service._exchange_rates = {"USD": 1.0, "EUR": 0.85}
+        buffer = await service.export_entries_to_excel(
+            db=db_session, user_id=test_user.id, category_id=test_categories[0].id, report_type="expense"
+        )
+        _, rows = _sheet_values(buffer)
+
+        assert rows[4][1] == "Food & Dining"
+        data = [row for row in rows[9:] if row and row[1] == "Expense"]
+        assert sorted((row[5], row[6]) for row in data) == [("EUR", 100.0), ("USD", 12.5)]
+
+    @pytest.mark.asyncio
+    async def test_stream_reads_cursor_in_chunks(self, db_session, test_user, test_categories, export_entries, monkeypatch):
+        monkeypatch.setattr(excel_export, "EXPORT_CHUNK_SIZE", 2)
+        monkeypatch.setattr(excel_export, "STREAM_BLOCK_SIZE", 1024)
+
+        stream = await ExcelExportService().stream_entries_to_excel(db=db_session, user_id=test_user.id)
+        blocks = list(stream)
+
+        assert len(blocks) > 1
+        assert all(len(block) <= 1024 for block in blocks)
+        _, rows = _sheet_values(io.BytesIO(b"".join(blocks)))
+        assert len([row for row in rows[9:] if row and row[1] in ("Income", "Expense")]) == 3
+
+    @pytest.mark.asyncio
+    async def test_workbook_is_written_off_the_event_loop(self, db_session, test_user, export_entries, monkeypatch):
+        service = ExcelExportService()
+        write = service.write_entries_workbook
+        threads = []
+
+        def record_thread(*args):
+            threads.append(threading.current_thread())
+            write(*args)
+
+        monkeypatch.setattr(service, "write_entries_workbook", record_thread)
+        buffer = await service.export_entries_to_excel(db=db_session, user_id=test_user.id)
+
+        assert threads and threads[0] is not threading.main_thread()
+        _, rows = _sheet_values(buffer)
+        assert rows[0][0] == "Financial Report"
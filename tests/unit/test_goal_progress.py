@@ -0,0 +1,117 @@
+"""Unit tests for batched goal progress recomputation"""
+import pytest
+from datetime import date, datetime, timedelta
+
+from app.models.entry import Entry
+from app.models.financial_goal import FinancialGoal, GoalProgressLog, GoalStatus, GoalType
+from app.services.goal_service import GoalService
+
+
+TODAY = date.today()
+
+
+def _add_goal(db_session, user_id, name, target, goal_type=GoalType.SPENDING_LIMIT, category=None,
+              start_days_ago=30, target_in_days=30, current=0):
+    goal = FinancialGoal(user_id=user_id, name=name, goal_type=goal_type, target_amount=target,
+                         current_amount=current, category_id=category.id if category else None,
+                         start_date=datetime.utcnow() - timedelta(days=start_days_ago),
+                         target_date=datetime.utcnow() + timedelta(days=target_in_days),
+                         status=GoalStatus.ACTIVE)
+    db_session.add(goal)
+    return goal
+
+
+def _add_expense(db_session, user_id, category, amount, days_ago):
+    db_session.add(Entry(user_id=user_id, type="expense", amount=amount, category_id=category.id,
+                         date=TODAY - timedelta(days=days_ago), currency_code="USD"))
+
+
+@pytest.fixture
+def goals(db_session, test_user, test_categories):
+    food, bills = test_categories[0], test_categories[1]
+    _add_expense(db_session, test_user.id, food, 120, 2)
+    _add_expense(db_session, test_user.id, food, 80, 10)
+    _add_expense(db_session, test_user.id, food, 500, 60)      # before every goal window
+    _add_expense(db_session, test_user.id, bills, 300, 5)
+    _add_expense(db_session, test_user.id, food, 40, 0)        # on the start day of "Food this week"
+
+    goals = {
+        'food': _add_goal(db_session, test_user.id, "Food", 250, category=food),
+        'food_week': _add_goal(db_session, test_user.id, "Food this week", 500, category=food, start_days_ago=0),
+        'everything': _add_goal(db_session, test_user.id, "Everything", 400),
+        'bills': _add_goal(db_session, test_user.id, "Bills", 1000, category=bills, current=300),
+        'savings': _add_goal(db_session, test_user.id, "Savings", 1000, goal_type=GoalType.SAVINGS,
+                             target_in_days=-1, current=200),
+    }
+    db_session.commit()
+    return goals
+
+
+def _per_goal_spending(db_session, goal):
+    """The per-goal SUM the grouped query replaces"""
+    total = 0.0
+    for entry in db_session.query(Entry).filter(Entry.user_id == goal.user_id, Entry.type == "expense"):
+        if goal.category_id and entry.category_id != goal.category_id:
+            continue
+        if goal.start_date.date() <= entry.date <= goal.target_date.date():
+            total += float(entry.amount)
+    return total
+
+
+@pytest.mark.unit
+class TestGoalProgressRefresh:
+    def test_refresh_matches_per_goal_sums_and_fails_overdue(self, db_session, goals, test_user):
+        expected = {key: _per_goal_spending(db_session, goal) for key, goal in goals.items() if key != 'savings'}
+        assert expected == {'food': 240.0, 'food_week': 40.0, 'everything': 540.0, 'bills': 300.0}
+
+        result = GoalService(db_session).refresh_goals([test_user.id])
+
+        assert {g.name for g in result['updated']} == {"Food", "Food this week", "Everything"}
+        assert {g.name for g in result['failed']} == {"Everything", "Savings"}
+        assert {g.name for g in result['active']} == {"Food", "Food this week", "Bills"}
+        for key, spending in expected.items():
+            assert float(goals[key].current_amount) == pytest.approx(spending)
+        assert float(goals['food'].progress_percentage) == pytest.approx(96.0)
+
+        logs = db_session.query(GoalProgressLog).order_by(GoalProgressLog.id).all()
+        assert len(logs) == 4
+        assert {log.goal_id for log in logs} == {goals[k].id for k in ('food', 'food_week', 'everything', 'savings')}
+        assert all(not log.is_manual for log in logs)
+
+        # Nothing changed since, so a second refresh writes nothing
+        again = GoalService(db_session).refresh_goals([test_user.id])
+        assert again['updated'] == [] and again['failed'] == []
+        assert db_session.query(GoalProgressLog).count() == 4
+
+    def test_refresh_uses_one_grouped_spending_query(self, db_session, goals, test_user, test_categories,
+                                                     query_counter):
+        user_id = test_user.id
+        for i in range(20):
+            _add_goal(db_session, user_id, f"Limit {i}", 100 + i, category=test_categories[i % 5])
+        db_session.commit()
+
+        with query_counter() as statements:
+            result = GoalService(db_session).refresh_goals([user_id])
+
+        selects = [s for s in statements if s.lstrip().upper().startswith("SELECT")]
+        inserts = [s for s in statements if "INSERT INTO goal_progress_logs" in s]
+        # Active goals, then one grouped spending query for all of them
+        assert len(selects) == 2
+        assert len(inserts) == 1
+        assert len(result['updated']) == 11
+        print(f"✓ Refreshed {len(result['updated'])} goals with {len(selects)} selects and one bulk log insert")
+
+    def test_nightly_refresh_processes_users_in_chunks(self, db_session, goals, test_user, test_user_2,
+                                                       test_categories):
+        food = test_categories[0]
+        _add_expense(db_session, test_user_2.id, food, 75, 1)
+        other = _add_goal(db_session, test_user_2.id, "Other user's limit", 100)
+        db_session.commit()
+        other_id = other.id
+
+        totals = GoalService(db_session).refresh_all_goals(chunk_size=1)
+
+        assert totals == {'users': 2, 'updated': 4, 'failed': 2, 'errors': 0}
+        other = db_session.get(FinancialGoal, other_id)
+        assert float(other.current_amount) == pytest.approx(75.0)
+        assert other.status == GoalStatus.ACTIVE
@@ -0,0 +1,116 @@
+"""Unit tests for payment analytics computed from one shared occurrence dataset"""
+import pytest
+from datetime import date, timedelta
+from sqlalchemy import func
+
+from app.models.entry import Entry
+from app.models.payment_history import PaymentOccurrence
+from app.models.recurring_payment import RecurringPayment, RecurrenceFrequency
+from app.services.payment_analytics_service import PaymentAnalyticsService
+
+
+TODAY = date.today()
+
+
+def _add_bill(db_session, user_id, category, name, amount, frequency):
+    payment = RecurringPayment(user_id=user_id, category_id=category.id, name=name, amount=amount,
+                               currency_code="USD", frequency=frequency, due_day=1,
+                               start_date=TODAY - timedelta(days=120), is_active=True)
+    db_session.add(payment)
+    db_session.flush()
+    return payment
+
+
+def _add_occurrence(db_session, payment, days_ago, paid_days_ago=None, skipped=False, amount=None):
+    """An occurrence scheduled days_ago; paid (with a linked expense) paid_days_ago"""
+    entry = None
+    if paid_days_ago is not None:
+        entry = Entry(user_id=payment.user_id, type="expense", amount=amount or payment.amount,
+                      category_id=payment.category_id, date=TODAY - timedelta(days=paid_days_ago),
+                      note=payment.name, currency_code="USD")
+        db_session.add(entry)
+        db_session.flush()
+    db_session.add(PaymentOccurrence(
+        user_id=payment.user_id, recurring_payment_id=payment.id,
+        scheduled_date=TODAY - timedelta(days=days_ago),
+        actual_date=TODAY - timedelta(days=paid_days_ago) if entry else None,
+        amount=payment.amount, currency_code="USD",
+        is_paid=entry is not None, is_skipped=skipped,
+        is_late=entry is not None and paid_days_ago < days_ago,
+        linked_entry_id=entry.id if entry else None,
+    ))
+
+
+@pytest.fixture
+def bills(db_session, test_user, test_categories):
+    rent = _add_bill(db_session, test_user.id, test_categories[1], "Rent", 1000, RecurrenceFrequency.MONTHLY)
+    gym = _add_bill(db_session, test_user.id, test_categories[3], "Gym", 25, RecurrenceFrequency.WEEKLY)
+    _add_occurrence(db_session, rent, 60, paid_days_ago=60)
+    _add_occurrence(db_session, rent, 30, paid_days_ago=27)          # 3 days late
+    _add_occurrence(db_session, rent, 5)                             # missed
+    _add_occurrence(db_session, gym, 14, paid_days_ago=14)
+    _add_occurrence(db_session, gym, 7, skipped=True)
+    _add_occurrence(db_session, gym, -3)                             # pending
+    db_session.add(Entry(user_id=test_user.id, type="expense", amount=40, category_id=test_categories[0].id,
+                         date=TODAY - timedelta(days=10), note="Groceries", currency_code="USD"))
+    db_session.commit()
+    return test_user.id
+
+
+def _dashboard_statements(db_session, query_counter, user_id):
+    with query_counter() as statements:
+        dashboard = PaymentAnalyticsService(db_session).get_dashboard(
+            user_id, TODAY - timedelta(days=365), TODAY
+        )
+    return dashboard, statements
+
+
+@pytest.mark.unit
+class TestPaymentAnalytics:
+    def test_dashboard_sections(self, db_session, bills, test_categories, query_counter):
+        dashboard, _ = _dashboard_statements(db_session, query_counter, bills)
+
+        stats = dashboard['payment_statistics']
+        assert (stats['total_occurrences'], stats['on_time_count'], stats['late_count'], stats['missed_count']) == \
+            (6, 2, 1, 2)
+        assert stats['total_paid'] == pytest.approx(2025.0)
+        assert stats['average_days_late'] == 3
+
+        trends = dashboard['payment_trends']
+        assert sum(t['occurrence_count'] for t in trends) == 6
+        assert sum(t['total_paid'] for t in trends) == pytest.approx(2025.0)
+        assert [(t['year'], t['month']) for t in trends] == sorted((t['year'], t['month']) for t in trends)
+
+        expenses = db_session.query(func.sum(Entry.amount)).filter(
+            Entry.user_id == bills, Entry.type == "expense", Entry.date >= TODAY - timedelta(days=365),
+            Entry.date <= TODAY
+        ).scalar()
+        split = dashboard['recurring_vs_onetime']
+        assert split['recurring_total'] == pytest.approx(2025.0)
+        assert split['onetime_total'] == pytest.approx(float(expenses) - 2025.0)
+
+        assert [(b['name'], b['total_occurrences'], b['on_time_count']) for b in dashboard['payment_reliability']] \
+            == [("Rent", 3, 1), ("Gym", 3, 1)]
+        assert dashboard['cost_projection']['monthly_projection'] == pytest.approx(1000 + 25 * 4.33)
+        assert [(c['category_name'], c['total_spent']) for c in dashboard['category_breakdown']] == [
+            (test_categories[1].name, 2000.0), (test_categories[3].name, 25.0)
+        ]
+
+    def test_dashboard_query_count_is_constant(self, db_session, bills, test_user, test_categories, query_counter):
+        user_id = test_user.id
+        _, statements = _dashboard_statements(db_session, query_counter, user_id)
+        # Occurrence dataset, bills with categories, one-time expense total
+        assert len(statements) == 3
+
+        for i in range(10):
+            bill = _add_bill(db_session, user_id, test_categories[i % 5], f"Bill {i}", 10 + i,
+                             RecurrenceFrequency.MONTHLY)
+            for month in range(6):
+                _add_occurrence(db_session, bill, 30 * month + 2, paid_days_ago=30 * month + 2 - month % 2)
+        db_session.commit()
+
+        dashboard, statements = _dashboard_statements(db_session, query_counter, user_id)
+
+        assert len(statements) == 3
+        assert dashboard['payment_statistics']['total_occurrences'] == 66
+        print(f"✓ Payment analytics dashboard for 12 bills / 66 occurrences in {len(statements)} queries")
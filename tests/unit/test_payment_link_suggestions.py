@@ -0,0 +1,102 @@
+"""Unit tests for indexed payment link suggestions"""
+import random
+import pytest
+from datetime import date, timedelta
+from sqlalchemy import insert
+
+from app.models.entry import Entry
+from app.models.payment_history import PaymentLinkSuggestion
+from app.models.recurring_payment import RecurrenceFrequency
+from app.services.entries import entries_service
+from app.services.payment_history_service import PaymentHistoryService
+from app.services.payment_matching import EntryIndex, MIN_LINK_SCORE
+from app.services.recurring_payment_service import RecurringPaymentService
+
+
+TODAY = date.today()
+
+
+class _Row:
+    def __init__(self, id, amount, category_id, date, note=None):
+        self.id, self.amount, self.category_id, self.date, self.note = id, amount, category_id, date, note
+
+
+def _add_payment(db_session, user_id, category, name, amount, frequency=RecurrenceFrequency.MONTHLY, due_day=None):
+    due_day = TODAY.day if due_day is None else due_day
+    return RecurringPaymentService(db_session).create_recurring_payment(
+        user_id, category.id, name, amount, frequency, due_day, TODAY - timedelta(days=365)
+    )
+
+
+@pytest.mark.unit
+class TestPaymentLinkSuggestions:
+    def test_index_finds_every_pair_the_full_scan_would(self, db_session, test_user, test_categories, query_counter):
+        user_id = test_user.id
+        rng = random.Random(43)
+        payments = [
+            _add_payment(db_session, user_id, rng.choice(test_categories), f"Bill {i}",
+                         rng.choice([9.99, 15.49, 49.0, 120.0, 310.0]) + i,
+                         rng.choice([RecurrenceFrequency.WEEKLY, RecurrenceFrequency.MONTHLY]),
+                         rng.randrange(0, 7))
+            for i in range(8)
+        ]
+        db_session.execute(insert(Entry), [{
+            "user_id": user_id, "type": "expense", "currency_code": "USD",
+            "amount": round(rng.uniform(5, 400), 2),
+            "category_id": rng.choice(test_categories).id,
+            "date": TODAY - timedelta(days=rng.randrange(30)),
+            "note": rng.choice([None, "Bill 3 autopay", "Groceries"]),
+        } for _ in range(400)])
+        db_session.commit()
+
+        service = PaymentHistoryService(db_session)
+        entries = db_session.query(Entry).filter(Entry.user_id == user_id).all()
+        expected = {
+            (payment.id, entry.id): service._calculate_match_score(payment, entry)[0]
+            for payment in payments for entry in entries
+        }
+        expected = {pair: score for pair, score in expected.items() if score >= MIN_LINK_SCORE}
+
+        with query_counter() as statements:
+            created = service.generate_link_suggestions(user_id)
+
+        stored = {
+            (s.recurring_payment_id, s.entry_id): float(s.confidence_score)
+            for s in db_session.query(PaymentLinkSuggestion).filter(PaymentLinkSuggestion.user_id == user_id)
+        }
+        assert created == len(expected) > 0
+        assert stored == pytest.approx(expected, abs=1e-4)
+        # Payments, entries, existing pairs and one bulk insert; not one query per pair
+        assert len(statements) <= 6
+        assert service.generate_link_suggestions(user_id) == 0
+        print(f"✓ {created} suggestions for 8 payments x 400 entries in {len(statements)} statements")
+
+    def test_new_entries_are_matched_incrementally(self, db_session, test_user, test_categories):
+        internet = _add_payment(db_session, test_user.id, test_categories[1], "Internet", 59.99)
+        entries_service.create_entry(db_session, test_user.id, "expense", 54.99, TODAY - timedelta(days=40),
+                                     test_categories[1].id, "Internet")   # outside the window
+        entries_service.create_entry(db_session, test_user.id, "income", 59.99, TODAY, test_categories[1].id)
+        assert db_session.query(PaymentLinkSuggestion).count() == 0
+
+        entry = entries_service.create_entry(db_session, test_user.id, "expense", 59.99, TODAY,
+                                             test_categories[1].id, "Internet July")
+
+        suggestion = db_session.query(PaymentLinkSuggestion).one()
+        assert (suggestion.recurring_payment_id, suggestion.entry_id) == (internet.id, entry.id)
+        assert float(suggestion.confidence_score) == pytest.approx(0.8)  # amount, category and name
+
+    def test_candidates_respect_the_score_bounds(self):
+        due = TODAY
+        index = EntryIndex([
+            _Row(1, 100.0, 2, due),                        # other category, 0% off, on the due date
+            _Row(6, 100.0, 2, due - timedelta(days=10)),   # other category, 0% off, far from due
+            _Row(2, 74.0, 2, due - timedelta(days=10)),    # other category, 26% off
+            _Row(3, 55.0, 1, due - timedelta(days=10)),    # same category, 45% off
+            _Row(4, 40.0, 1, due - timedelta(days=10)),    # same category, 60% off, far from due
+            _Row(5, 5.0, 1, due),                          # same category, on the due date
+        ])
+
+        candidates = index.candidates(100.0, 1, [due])
+
+        assert sorted(row.id for row in candidates) == [1, 3, 5]
+        assert sorted(row.id for row in index.candidates(100.0, 2, [])) == [1, 2, 6]  # category 2, within 50%
@@ -0,0 +1,113 @@
+"""Unit tests for PDF report generation"""
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+
+from app.main import app
+from app.deps import current_user
+from app.core.currency import CurrencyService
+from app.models.entry import Entry
+from app.services import report_charts
+from app.services.pdf_export import PDFExportService
+
+
+@pytest.fixture
+def fixed_rates(monkeypatch):
+    calls = []
+
+    async def rates(self):
+        calls.append(1)
+        return {"USD": 1.0, "EUR": 0.85, "TRY": 8.5}
+
+    monkeypatch.setattr(CurrencyService, "get_exchange_rates", rates)
+    return calls
+
+
+@pytest.fixture
+def report_entries(db_session, test_user, test_categories):
+    today = date.today()
+    db_session.add_all([
+        Entry(user_id=test_user.id, type="income", amount=Decimal("2500.00"), category_id=test_categories[4].id,
+              note="Salary", currency_code="USD", date=today - timedelta(days=40)),
+        Entry(user_id=test_user.id, type="expense", amount=Decimal("12.50"), category_id=test_categories[0].id,
+              description="Team lunch", currency_code="USD", date=today),
+        Entry(user_id=test_user.id, type="expense", amount=Decimal("85.00"), category_id=test_categories[1].id,
+              currency_code="EUR", date=today - timedelta(days=2)),
+        Entry(user_id=test_user.id, type="expense", amount=Decimal("340.00"), category_id=test_categories[0].id,
+              currency_code="TRY", date=today - timedelta(days=1)),
+        Entry(user_id=test_user.id, type="expense", amount=Decimal("99.00"), category_id=None,
+              note="No category", currency_code="USD", date=today - timedelta(days=1)),
+    ])
+    db_session.commit()
+
+
+@pytest.fixture
+def pdf_client(client, test_user, fixed_rates):
+    app.dependency_overrides[current_user] = lambda: test_user
+    yield client
+    app.dependency_overrides.pop(current_user, None)
+
+
+@pytest.mark.unit
+class TestPDFExport:
+    @pytest.mark.asyncio
+    async def test_convert_amounts_matches_convert_amount(self, fixed_rates):
+        service = CurrencyService()
+        amounts = [Decimal("10.00"), 85.0, None, "abc", 7, Decimal("123.45")]
+        codes = ["TRY", "EUR", "USD", "USD", "XXX", "USD"]
+
+        converted = await service.convert_amounts(amounts, codes, "TRY")
+
+        expected = [await service.convert_amount(amount, code, "TRY") for amount, code in zip(amounts, codes)]
+        assert converted == expected
+        assert len(fixed_rates) == 1 + 3  # one fetch for the batch, one per foreign convert_amount call
+
+    @pytest.mark.asyncio
+    async def test_report_converts_once_and_totals_categorized_entries(self, db_session, test_user,
+                                                                       report_entries, fixed_rates, monkeypatch):
+        rendered = {}
+
+        async def capture_charts(charts):
+            rendered.update({fn.__name__: args for fn, args in charts})
+            return [None] * len(charts)
+
+        monkeypatch.setattr("app.services.pdf_export.render_charts", capture_charts)
+
+        buffer = await PDFExportService().export_financial_report_to_pdf(db=db_session, user_id=test_user.id)
+
+        assert buffer.getvalue().startswith(b"%PDF")
+        assert len(fixed_rates) == 1
+
+        total_income, total_expense, user_currency = rendered["render_income_expense_chart"]
+        assert user_currency == "USD"
+        assert total_income == 2500.0
+        assert total_expense == pytest.approx(12.5 + 100.0 + 40.0)  # uncategorized entry is excluded
+
+        category_totals, _ = rendered["render_category_chart"]
+        assert category_totals["Food & Dining"]["expense"] == pytest.approx(52.5)
+
+        months, income, expense, _ = rendered["render_monthly_trend_chart"]
+        assert len(months) in (2, 3)
+        assert sum(income) == 2500.0
+        assert sum(expense) == pytest.approx(152.5)
+
+    @pytest.mark.asyncio
+    async def test_charts_render_in_worker_pool(self):
+        try:
+            images = await report_charts.render_charts([
+                (report_charts.render_income_expense_chart, (100.0, 40.0, "USD")),
+                (report_charts.render_category_chart, ({"Food": {"income": 0, "expense": 40.0}}, "USD")),
+                (report_charts.render_monthly_trend_chart, (["2024-01", "2024-02"], None, [10.0, 30.0], "USD")),
+            ])
+        finally:
+            report_charts.shutdown_chart_pool()
+
+        assert all(image.startswith(b"\x89PNG") for image in images)
+
+    def test_small_report_downloads_directly(self, pdf_client, test_user, report_entries):
+        response = pdf_client.get("/reports/pdf/financial?report_type=expense")
+
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/pdf"
+        assert "financial_report_expense.pdf" in response.headers["content-disposition"]
+        assert response.content.startswith(b"%PDF")
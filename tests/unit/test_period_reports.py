@@ -0,0 +1,67 @@
+"""Unit tests for the shared period report engine"""
+import pytest
+from datetime import date
+from decimal import Decimal
+
+from app.models.entry import Entry
+from app.services.period_reports import DAY, MONTH, SEASON, WEEK, load_period_frame
+
+
+@pytest.fixture
+def period_entries(db_session, test_user, test_categories):
+    food, transport = test_categories[0], test_categories[1]
+    rows = [
+        (date(2024, 3, 31), "expense", "10.10", food),   # Sunday, end of Q1
+        (date(2024, 4, 1), "expense", "20.20", food),    # Monday, start of Q2
+        (date(2024, 4, 1), "expense", "5.00", transport),
+        (date(2024, 4, 1), "income", "1000.00", None),
+        (date(2024, 4, 3), "expense", "7.70", None),
+        (date(2024, 5, 15), "expense", "30.00", transport),
+    ]
+    db_session.add_all([
+        Entry(user_id=test_user.id, type=entry_type, amount=Decimal(amount), date=entry_date,
+              category_id=category.id if category else None, currency_code="USD")
+        for entry_date, entry_type, amount, category in rows
+    ])
+    db_session.commit()
+    return load_period_frame(db_session, test_user.id, date(2024, 3, 1), date(2024, 5, 31))
+
+
+@pytest.mark.unit
+class TestPeriodReports:
+    def test_days_are_grouped_in_sql(self, period_entries):
+        # Two food/transport expenses on 2024-04-01 stay separate groups, income is its own group
+        assert len(period_entries.days) == 6
+        assert period_entries.count(period_entries.mask()) == 6
+
+    def test_buckets_cover_every_period_in_range(self, period_entries):
+        weeks = period_entries.totals(WEEK, date(2024, 3, 25), date(2024, 4, 14))
+        assert weeks["starts"] == [date(2024, 3, 25), date(2024, 4, 1), date(2024, 4, 8)]
+        assert weeks["expense"].tolist() == [10.1, 32.9, 0.0]
+        assert weeks["count"].tolist() == [1, 4, 0]
+
+        months = period_entries.totals(MONTH)
+        assert months["starts"] == [date(2024, 3, 1), date(2024, 4, 1), date(2024, 5, 1)]
+        assert months["income"].tolist() == [0.0, 1000.0, 0.0]
+        assert months["expense_count"].tolist() == [1, 3, 1]
+
+        seasons = period_entries.totals(SEASON)
+        assert seasons["starts"] == [date(2024, 1, 1), date(2024, 4, 1)]
+        assert seasons["count"].tolist() == [1, 5]
+
+    def test_daily_breakdown(self, period_entries):
+        days = period_entries.daily_breakdown(date(2024, 4, 1), date(2024, 4, 3))
+
+        assert [d["date"] for d in days] == ["2024-04-01", "2024-04-02", "2024-04-03"]
+        assert days[0] == {
+            "date": "2024-04-01", "day_name": "Monday", "expenses": 25.2, "income": 1000.0,
+            "net": 974.8, "transaction_count": 3, "is_weekend": False
+        }
+        assert days[1]["expenses"] == 0 and days[1]["transaction_count"] == 0
+        assert period_entries.totals(DAY, date(2024, 4, 1), date(2024, 4, 3))["expense"].tolist() == [25.2, 0.0, 7.7]
+
+    def test_category_totals_skip_uncategorized_and_income(self, period_entries):
+        totals = period_entries.category_totals(date(2024, 4, 1), date(2024, 5, 31))
+
+        assert totals == [("Food & Dining", Decimal("20.20"), 1), ("Transportation", Decimal("35.00"), 2)]
+        assert period_entries.days_with_entries(date(2024, 4, 1), date(2024, 5, 31)) == 3
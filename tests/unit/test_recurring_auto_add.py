@@ -0,0 +1,122 @@
+"""Unit tests for set-based auto-add of due recurring payments"""
+import pytest
+from datetime import date, timedelta
+
+from app.models.entry import Entry
+from app.models.payment_history import PaymentOccurrence
+from app.models.recurring_payment import RecurringPayment, RecurrenceFrequency
+from app.services.data_version import get_data_version
+from app.services.recurring_payment_service import RecurringPaymentService, due_on_clause, is_due_on
+
+
+# A quarter month, so every frequency can be due
+TODAY = date(2026, 10, 14)
+
+
+def _add_payment(db_session, user_id, category, name, frequency, due_day, start_date, auto_add=True,
+                 is_active=True, end_date=None):
+    payment = RecurringPayment(user_id=user_id, category_id=category.id, name=name, amount=10 + len(name),
+                               currency_code="USD", frequency=frequency, due_day=due_day, start_date=start_date,
+                               end_date=end_date, is_active=is_active, auto_add_to_expenses=auto_add)
+    db_session.add(payment)
+    return payment
+
+
+@pytest.fixture
+def schedules(db_session, test_user, test_categories):
+    """Payments covering every frequency, start and end date case"""
+    category = test_categories[1]
+    user_id = test_user.id
+    start = date(2025, 10, 1)
+    for frequency in RecurrenceFrequency:
+        for due_day in (0, 1, 2, 13, 14, 15, 28, 31):
+            _add_payment(db_session, user_id, category, f"{frequency.value} {due_day}", frequency, due_day, start)
+    for offset in range(14):
+        _add_payment(db_session, user_id, category, f"biweekly from +{offset}", RecurrenceFrequency.BIWEEKLY,
+                     TODAY.weekday(), start + timedelta(days=offset))
+    _add_payment(db_session, user_id, category, "Not started", RecurrenceFrequency.MONTHLY, 14, TODAY + timedelta(days=1))
+    _add_payment(db_session, user_id, category, "Ended", RecurrenceFrequency.MONTHLY, 14, start,
+                 end_date=TODAY - timedelta(days=1))
+    _add_payment(db_session, user_id, category, "Ends today", RecurrenceFrequency.MONTHLY, 14, start, end_date=TODAY)
+    db_session.commit()
+    return user_id
+
+
+@pytest.mark.unit
+class TestRecurringAutoAdd:
+    def test_sql_due_filter_agrees_with_python_check(self, db_session, schedules):
+        payments = db_session.query(RecurringPayment).all()
+
+        for day in (TODAY + timedelta(days=n) for n in range(-40, 330, 3)):
+            selected = {p.id for p in db_session.query(RecurringPayment).filter(due_on_clause(day))}
+            due = {p.id for p in payments if is_due_on(p, day)}
+            # The SQL filter leaves biweekly parity to is_due_on
+            assert due <= selected
+            assert {p.id for p in payments if p.id in selected and not is_due_on(p, day)} <= \
+                {p.id for p in payments if p.frequency == RecurrenceFrequency.BIWEEKLY}
+
+    def test_due_payments_added_once_in_chunks(self, db_session, test_user, test_user_2, test_categories):
+        category = test_categories[1]
+        user_id, other_id = test_user.id, test_user_2.id
+        rent = _add_payment(db_session, user_id, category, "Rent", RecurrenceFrequency.MONTHLY, 14, date(2026, 1, 1))
+        gym = _add_payment(db_session, other_id, category, "Gym", RecurrenceFrequency.WEEKLY, TODAY.weekday(),
+                           date(2026, 1, 1))
+        _add_payment(db_session, user_id, category, "Paused", RecurrenceFrequency.MONTHLY, 14, date(2026, 1, 1),
+                     is_active=False)
+        _add_payment(db_session, user_id, category, "Manual", RecurrenceFrequency.MONTHLY, 14, date(2026, 1, 1),
+                     auto_add=False)
+        _add_payment(db_session, user_id, category, "Next week", RecurrenceFrequency.MONTHLY, 21, date(2026, 1, 1))
+        paid = _add_payment(db_session, user_id, category, "Already paid", RecurrenceFrequency.MONTHLY, 14,
+                            date(2026, 1, 1))
+        streaming = [_add_payment(db_session, user_id, category, f"Streaming {i}", RecurrenceFrequency.MONTHLY, 14,
+                                  date(2026, 1, 1)) for i in range(3)]
+        db_session.flush()
+        db_session.add(PaymentOccurrence(user_id=user_id, recurring_payment_id=paid.id, scheduled_date=TODAY,
+                                         amount=paid.amount, currency_code="USD", is_paid=True))
+        db_session.commit()
+        expected = {rent.id, gym.id} | {payment.id for payment in streaming}
+        versions = get_data_version(db_session, user_id), get_data_version(db_session, other_id)
+
+        totals = RecurringPaymentService(db_session).auto_add_due_payments(TODAY, chunk_size=2)
+
+        assert totals == {'created': 5, 'chunks': 3, 'errors': 0}
+        occurrences = db_session.query(PaymentOccurrence).filter(PaymentOccurrence.scheduled_date == TODAY,
+                                                                 PaymentOccurrence.recurring_payment_id != paid.id).all()
+        assert {o.recurring_payment_id for o in occurrences} == expected
+        for occurrence in occurrences:
+            entry = db_session.get(Entry, occurrence.linked_entry_id)
+            payment = db_session.get(RecurringPayment, occurrence.recurring_payment_id)
+            assert (entry.user_id, entry.amount, entry.date, entry.description) == \
+                (payment.user_id, payment.amount, TODAY, f"{payment.name} (Auto-added)")
+            assert occurrence.is_paid and occurrence.user_id == payment.user_id
+        assert get_data_version(db_session, user_id) > versions[0]
+        assert get_data_version(db_session, other_id) > versions[1]
+
+        # A second run (or another worker) finds nothing left to add
+        again = RecurringPaymentService(db_session).auto_add_due_payments(TODAY, chunk_size=2)
+        assert again == {'created': 0, 'chunks': 0, 'errors': 0}
+        assert db_session.query(Entry).filter(Entry.date == TODAY).count() == 5
+        print(f"✓ Auto-added {totals['created']} due payments in {totals['chunks']} chunks, idempotently")
+
+    def test_failing_payment_is_skipped_without_losing_its_chunk(self, db_session, test_user, test_categories,
+                                                                 monkeypatch):
+        names = ["Rent", "Broken", "Gym", "Phone", "Water"]
+        for name in names:
+            _add_payment(db_session, test_user.id, test_categories[1], name, RecurrenceFrequency.MONTHLY, 14,
+                         date(2026, 1, 1))
+        db_session.commit()
+
+        service = RecurringPaymentService(db_session)
+        insert_auto_added = service._insert_auto_added
+
+        def insert_unless_broken(today, due):
+            if any(payment.name == "Broken" for payment in due):
+                raise ValueError("bad payment")
+            insert_auto_added(today, due)
+
+        monkeypatch.setattr(service, "_insert_auto_added", insert_unless_broken)
+        totals = service.auto_add_due_payments(TODAY, chunk_size=2)
+
+        assert totals == {'created': 4, 'chunks': 3, 'errors': 1}
+        added = {entry.description for entry in db_session.query(Entry).filter(Entry.date == TODAY)}
+        assert added == {f"{name} (Auto-added)" for name in names if name != "Broken"}
@@ -0,0 +1,129 @@
+"""Unit tests for vectorized recurring bill detection and recurring payment suggestions"""
+import pytest
+import numpy as np
+from datetime import date, timedelta
+
+from app.models.entry import Entry
+from app.models.recurring_payment import RecurrenceFrequency
+from app.services.budget_intelligence_service import BudgetIntelligenceService
+from app.services.recurring_detection import detect_periodicity, periodicity_scores
+from app.services.recurring_payment_service import RecurringPaymentService
+
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def bill_history(db_session, test_user, test_categories):
+    """Monthly streaming, weekly gym, quarterly insurance, annual domain, daily coffee, a cancelled plan"""
+    bills, fun, health, other = test_categories[1], test_categories[2], test_categories[3], test_categories[4]
+    rows = []
+    for i in range(8):
+        day = TODAY - timedelta(days=3 + 30 * i + (i % 2))
+        rows.append((15.49, fun, day, f"NETFLIX.COM {1000 + i}"))
+    for i in range(12):
+        rows.append((25.00, health, TODAY - timedelta(days=2 + 7 * i), "City Gym"))
+    for i in range(4):
+        rows.append((310.00 + i, bills, TODAY - timedelta(days=20 + 91 * i), "Home insurance premium"))
+    for i in range(3):
+        rows.append((12.99, other, TODAY - timedelta(days=40 + 365 * i), "Domain renewal"))
+    for i in range(60):
+        rows.append((4.50, fun, TODAY - timedelta(days=i), "Corner coffee"))
+    for i in range(6):
+        rows.append((9.99, fun, TODAY - timedelta(days=200 + 30 * i), "Old music plan"))
+
+    for amount, category, day, note in rows:
+        db_session.add(Entry(user_id=test_user.id, type="expense", amount=amount, category_id=category.id,
+                             date=day, note=note, currency_code="USD"))
+    db_session.commit()
+    return test_user.id
+
+
+@pytest.mark.unit
+class TestRecurringDetection:
+    def test_periods_are_detected_by_autocorrelation(self, db_session, bill_history):
+        bills = BudgetIntelligenceService(db_session).detect_recurring_bills(bill_history)
+
+        by_description = {bill["description"]: bill for bill in bills}
+        assert {b["description"]: b["frequency"] for b in bills} == {
+            "NETFLIX.COM 1007": "monthly",
+            "City Gym": "weekly",
+            "Home insurance premium": "quarterly",
+            "Domain renewal": "annual",
+        }
+        netflix = by_description["NETFLIX.COM 1007"]
+        assert netflix["occurrences"] == 8 and netflix["avg_amount"] == 15.49
+        assert netflix["confidence"] == "high"
+        assert by_description["City Gym"]["predicted_next_date"] == (TODAY + timedelta(days=5)).isoformat()
+        assert [b["days_until_due"] for b in bills] == sorted(b["days_until_due"] for b in bills)
+        print(f"✓ Detected {len(bills)} recurring bills: " + ", ".join(b["frequency"] for b in bills))
+
+    def test_results_are_cached_until_entries_change(self, db_session, bill_history, test_categories, dict_cache,
+                                                     query_counter):
+        service = BudgetIntelligenceService(db_session, cache=dict_cache)
+        first = service.detect_recurring_bills(bill_history)
+
+        with query_counter() as statements:
+            second = service.detect_recurring_bills(bill_history)
+
+        assert second == first
+        assert len(statements) == 1  # the data version only
+
+        db_session.add(Entry(user_id=bill_history, type="expense", amount=15.49, category_id=test_categories[2].id,
+                             date=TODAY, note="NETFLIX.COM 2000", currency_code="USD"))
+        db_session.commit()
+        third = service.detect_recurring_bills(bill_history)
+
+        netflix = next(b for b in third if b["frequency"] == "monthly")
+        assert netflix["occurrences"] == 9
+
+    def test_suggestions_skip_bills_already_tracked(self, db_session, bill_history, test_categories):
+        service = RecurringPaymentService(db_session)
+        service.create_recurring_payment(bill_history, test_categories[3].id, "Gym membership", 25.00,
+                                         RecurrenceFrequency.WEEKLY, 0, TODAY - timedelta(days=90))
+
+        suggestions = service.suggest_recurring_payments(bill_history)
+
+        by_frequency = {s["frequency"]: s for s in suggestions}
+        assert set(by_frequency) == {"monthly", "quarterly", "annually"}
+        netflix = by_frequency["monthly"]
+        assert netflix["category_id"] == test_categories[2].id
+        assert netflix["due_day"] == (TODAY - timedelta(days=3)).day
+        assert netflix["start_date"] == (TODAY - timedelta(days=3 + 30 * 7 + 1)).isoformat()
+
+    def test_subscription_monthly_cost_follows_the_frequency(self, db_session, bill_history, test_categories):
+        for i in range(3):
+            db_session.add(Entry(user_id=bill_history, type="expense", amount=139.00, category_id=test_categories[2].id,
+                                 date=TODAY - timedelta(days=60 + 365 * i), note="Amazon Prime", currency_code="USD"))
+        db_session.commit()
+
+        summary = BudgetIntelligenceService(db_session).get_subscription_summary(bill_history)
+
+        monthly = {s["description"]: s["monthly_cost"] for s in summary["subscriptions"]}
+        assert monthly["Amazon Prime"] == round(139.00 / 12, 2)
+        assert monthly["NETFLIX.COM 1007"] == 15.49
+        assert monthly["City Gym"] == round(25.00 * 52 / 12, 2)
+        assert summary["total_monthly_cost"] == round(sum(monthly.values()), 2)
+
+    def test_daily_purchases_of_varying_amounts_are_not_bills(self, db_session, test_user, test_categories):
+        # $3-6 every day: each amount band sees gaps of 1-15 days averaging about a week
+        for i in range(90):
+            db_session.add(Entry(user_id=test_user.id, type="expense", amount=3 + (i * 37 % 31) / 10,
+                                 category_id=test_categories[2].id, date=TODAY - timedelta(days=i), note="Coffee",
+                                 currency_code="USD"))
+        db_session.commit()
+
+        assert BudgetIntelligenceService(db_session).detect_recurring_bills(test_user.id) == []
+        assert RecurringPaymentService(db_session).suggest_recurring_payments(test_user.id) == []
+
+    def test_periodicity_prefers_the_shortest_matching_period(self):
+        weekly = np.arange(0, 84, 7)
+        assert detect_periodicity(weekly, 7.0) == ("weekly", 1.0)
+
+        monthly = np.array([0, 31, 59, 90, 120, 151])
+        scores = periodicity_scores(monthly)
+        assert scores["monthly"] == 1.0 and scores["weekly"] == 0.0
+        assert detect_periodicity(monthly, 30.2)[0] == "monthly"
+
+        daily = np.arange(0, 60)
+        assert detect_periodicity(daily, 1.0) is None
@@ -0,0 +1,124 @@
+"""Unit tests for persisted recurring payment due dates and bulk reminders"""
+import pytest
+from datetime import date, timedelta
+
+from app.models.payment_history import PaymentOccurrence
+from app.models.recurring_payment import PaymentReminder, RecurringPayment, RecurrenceFrequency
+from app.services.budget_intelligence_service import BudgetIntelligenceService
+from app.services.payment_history_service import PaymentHistoryService
+from app.services.recurring_payment_service import RecurringPaymentService
+
+
+TODAY = date.today()
+
+
+def _create(service, user_id, category, name, frequency=RecurrenceFrequency.MONTHLY, due_day=None,
+            start_date=None, remind_days_before=3, **kwargs):
+    return service.create_recurring_payment(
+        user_id=user_id, category_id=category.id, name=name, amount=20, frequency=frequency,
+        due_day=due_day if due_day is not None else (TODAY + timedelta(days=2)).day,
+        start_date=start_date or TODAY - timedelta(days=90), remind_days_before=remind_days_before, **kwargs
+    )
+
+
+@pytest.mark.unit
+class TestNextDueDate:
+    def test_maintained_on_create_update_payment_and_skip(self, db_session, test_user, test_categories):
+        service = RecurringPaymentService(db_session)
+        payment = _create(service, test_user.id, test_categories[1], "Rent")
+        first_due = service.calculate_next_due_date(payment)
+        assert payment.next_due_date == first_due
+
+        service.update_recurring_payment(payment.id, test_user.id, name="Rent (flat)")
+        assert payment.next_due_date == first_due
+        service.update_recurring_payment(payment.id, test_user.id, frequency=RecurrenceFrequency.WEEKLY,
+                                         due_day=TODAY.weekday())
+        assert payment.next_due_date == TODAY + timedelta(days=7)
+
+        history = PaymentHistoryService(db_session)
+        # Settling an earlier occurrence leaves the upcoming one due
+        history.record_payment(test_user.id, payment.id, TODAY - timedelta(days=7), TODAY - timedelta(days=7),
+                               20, "USD")
+        assert payment.next_due_date == TODAY + timedelta(days=7)
+
+        # Paying the upcoming one early moves on to the following week, as does skipping that
+        history.record_payment(test_user.id, payment.id, TODAY + timedelta(days=7), TODAY, 20, "USD")
+        assert payment.next_due_date == TODAY + timedelta(days=14)
+        history.skip_payment(test_user.id, payment.id, TODAY + timedelta(days=14))
+        assert payment.next_due_date == TODAY + timedelta(days=21)
+        assert service.get_next_due_date(payment) == TODAY + timedelta(days=21)
+
+        service.toggle_active_status(payment.id, test_user.id)
+        service.toggle_active_status(payment.id, test_user.id)
+        assert payment.next_due_date == TODAY + timedelta(days=7)
+
+    def test_refresh_advances_passed_and_missing_due_dates(self, db_session, test_user, test_categories):
+        service = RecurringPaymentService(db_session)
+        category = test_categories[1]
+        stale = _create(service, test_user.id, category, "Stale", frequency=RecurrenceFrequency.WEEKLY,
+                        due_day=TODAY.weekday())
+        missing = _create(service, test_user.id, category, "Missing")
+        ended = _create(service, test_user.id, category, "Ended", end_date=TODAY - timedelta(days=1))
+        upcoming = _create(service, test_user.id, category, "Upcoming")
+        stale.next_due_date = TODAY - timedelta(days=7)
+        missing.next_due_date = None
+        db_session.commit()
+        expected = {payment.id: service.calculate_next_due_date(payment)
+                    for payment in (stale, missing, ended, upcoming)}
+
+        refreshed = service.refresh_next_due_dates(TODAY, chunk_size=1)
+
+        assert refreshed == 2
+        assert {p.id: p.next_due_date for p in db_session.query(RecurringPayment)} == expected
+        assert expected[ended.id] is None
+        assert service.refresh_next_due_dates(TODAY) == 0
+
+    def test_bulk_reminders_and_upcoming_range_scan(self, db_session, test_user, test_user_2, test_categories,
+                                                    query_counter):
+        service = RecurringPaymentService(db_session)
+        category = test_categories[1]
+        user_ids = test_user.id, test_user_2.id
+        soon = [_create(service, user_id, category, f"Soon {user_id}") for user_id in user_ids]
+        _create(service, test_user.id, category, "Later", remind_days_before=1)
+        far = _create(service, test_user.id, category, "Far", due_day=(TODAY + timedelta(days=20)).day,
+                      remind_days_before=1)
+        for i in range(10):
+            _create(service, test_user_2.id, category, f"Bill {i}")
+
+        with query_counter() as statements:
+            created = service.generate_all_reminders(TODAY)
+
+        # Reminder horizon, due payments without a reminder, one bulk insert
+        assert len(statements) == 3
+        assert created == 12
+        reminders = db_session.query(PaymentReminder).all()
+        assert {r.due_date for r in reminders} == {soon[0].next_due_date}
+        assert {r.user_id for r in reminders} == set(user_ids)
+        assert service.generate_all_reminders(TODAY) == 0
+
+        upcoming = service.get_upcoming_payments(days_ahead=7)
+        assert len(upcoming) == 13 and far not in upcoming
+        assert [p.name for p in service.get_upcoming_payments(days_ahead=7, user_id=test_user.id)] == \
+            [soon[0].name, "Later"]
+        print(f"✓ {created} reminders for 2 users in {len(statements)} statements")
+
+    def test_bill_reminders_come_from_persisted_due_dates(self, db_session, test_user, test_categories,
+                                                          query_counter):
+        service = RecurringPaymentService(db_session)
+        category = test_categories[1]
+        soon = _create(service, test_user.id, category, "Rent")
+        passed = _create(service, test_user.id, category, "Gym", frequency=RecurrenceFrequency.WEEKLY,
+                         due_day=(TODAY + timedelta(days=3)).weekday())
+        _create(service, test_user.id, category, "Far", due_day=(TODAY + timedelta(days=20)).day)
+        passed.next_due_date = TODAY - timedelta(days=4)
+        db_session.commit()
+        user_id = test_user.id
+
+        with query_counter() as statements:
+            reminders = BudgetIntelligenceService(db_session).get_upcoming_bill_reminders(user_id, 7)
+
+        assert [(r['description'], r['days_until_due']) for r in reminders] == [("Rent", 2), ("Gym", 3)]
+        assert reminders[0]['recurring_payment_id'] == soon.id
+        assert reminders[0]['category_name'] == category.name and reminders[0]['urgency'] == 'urgent'
+        # Passed due dates (updated in bulk, then none left), then the range scan joined to categories
+        assert len([s for s in statements if s.lstrip().upper().startswith("SELECT")]) == 3
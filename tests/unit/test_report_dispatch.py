@@ -0,0 +1,200 @@
+"""Unit tests for checkpointed bulk report dispatch"""
+import asyncio
+import time
+import pytest
+from datetime import date, datetime, timedelta
+from sqlalchemy.orm import Query, sessionmaker
+
+from app.models.report_dispatch import ReportDispatchItem, ReportDispatchRun
+from app.models.weekly_report import UserReportPreferences, WeeklyReport
+from app.services import email as email_module
+from app.services import report_dispatch
+from app.services.report_dispatch import RateLimiter, ReportDispatcher
+
+
+WEEK_END = date(2024, 3, 10)  # Sunday
+
+
+@pytest.fixture
+def weekly_recipients(db_session, test_user, test_user_2):
+    db_session.add_all([
+        UserReportPreferences(user_id=test_user.id, frequency="weekly", send_email=True),
+        UserReportPreferences(user_id=test_user_2.id, frequency="weekly", send_email=True),
+    ])
+    db_session.commit()
+    return [test_user.id, test_user_2.id]
+
+
+@pytest.fixture
+def sent_emails(monkeypatch):
+    """Records deliveries; addresses listed in `failures` fail that many times first"""
+    sent = []
+    failures = {}
+
+    async def send(to_email, subject, html_content, text_content=None):
+        if failures.get(to_email, 0) > 0:
+            failures[to_email] -= 1
+            return False
+        sent.append(to_email)
+        return True
+
+    monkeypatch.setattr(email_module.email_service, "send_email", send)
+    return sent, failures
+
+
+@pytest.fixture
+def dispatcher(db_session):
+    service = ReportDispatcher(
+        session_factory=sessionmaker(bind=db_session.get_bind()),
+        workers=2,
+        send_concurrency=2,
+        rate_per_second=1000,
+        max_attempts=3,
+        retry_delay=0
+    )
+    yield service
+    service.shutdown()
+
+
+@pytest.mark.unit
+class TestReportDispatch:
+    @pytest.mark.asyncio
+    async def test_weekly_dispatch_sends_everyone_and_retries(self, db_session, dispatcher, weekly_recipients,
+                                                              sent_emails):
+        sent, failures = sent_emails
+        failures["test2@example.com"] = 1
+
+        metrics = await dispatcher.dispatch("weekly", WEEK_END)
+
+        assert sorted(sent) == ["test2@example.com", "test@example.com"]
+        assert metrics["period"] == "2024-W10"
+        assert (metrics["total"], metrics["sent"], metrics["failed"], metrics["retries"]) == (2, 2, 0, 1)
+        assert metrics["status"] == "completed"
+        assert metrics["throughput_per_minute"] > 0
+
+        reports = db_session.query(WeeklyReport).all()
+        assert len(reports) == 2
+        assert all(r.is_sent_via_email and r.week_start == date(2024, 3, 4) for r in reports)
+        print(f"✓ Weekly dispatch: {metrics['sent']} sent at {metrics['throughput_per_minute']}/min")
+
+    @pytest.mark.asyncio
+    async def test_interrupted_run_resumes_with_pending_recipients(self, db_session, dispatcher, test_user,
+                                                                   weekly_recipients, sent_emails):
+        sent, _ = sent_emails
+        # A previous process delivered to test_user, then stopped
+        run = ReportDispatchRun(kind="weekly", period_key="2024-W10", period_date=WEEK_END, status="running")
+        db_session.add(run)
+        db_session.flush()
+        db_session.add(ReportDispatchItem(run_id=run.id, user_id=test_user.id, status="sent", attempts=1))
+        db_session.commit()
+
+        results = await dispatcher.resume_incomplete()
+
+        assert sent == ["test2@example.com"]
+        assert len(results) == 1
+        assert (results[0]["sent"], results[0]["skipped"], results[0]["resumed"]) == (2, 1, True)
+        assert results[0]["status"] == "completed"
+
+    @pytest.mark.asyncio
+    async def test_recipients_claimed_by_another_process_are_not_resent(self, db_session, dispatcher, test_user,
+                                                                        test_user_2, weekly_recipients, sent_emails):
+        sent, _ = sent_emails
+        # Another process is mid-send to test_user; test_user_2's claim was abandoned an hour ago
+        run = ReportDispatchRun(kind="weekly", period_key="2024-W10", period_date=WEEK_END, status="running")
+        db_session.add(run)
+        db_session.flush()
+        db_session.add_all([
+            ReportDispatchItem(run_id=run.id, user_id=test_user.id, status="sending", claimed_at=datetime.utcnow()),
+            ReportDispatchItem(run_id=run.id, user_id=test_user_2.id, status="sending",
+                               claimed_at=datetime.utcnow() - timedelta(hours=1)),
+        ])
+        db_session.commit()
+
+        metrics = await dispatcher.dispatch("weekly", WEEK_END)
+
+        assert sent == ["test2@example.com"]
+        assert (metrics["sent"], metrics["status"]) == (1, "running")
+        assert dispatcher._claim(run.id, test_user_2.id) is False
+
+    @pytest.mark.asyncio
+    async def test_run_started_concurrently_elsewhere_is_not_reported_completed(self, db_session, dispatcher,
+                                                                                weekly_recipients, sent_emails,
+                                                                                monkeypatch):
+        sent, _ = sent_emails
+        db_session.add(ReportDispatchRun(kind="weekly", period_key="2024-W10", period_date=WEEK_END,
+                                         status="running"))
+        db_session.commit()
+
+        # The other process inserts its run between our lookup and our insert
+        first = Query.first
+        missed = []
+
+        def first_missing_the_run(query):
+            if query.column_descriptions[0]['entity'] is ReportDispatchRun and not missed:
+                missed.append(True)
+                return None
+            return first(query)
+
+        monkeypatch.setattr(Query, "first", first_missing_the_run)
+        metrics = await dispatcher.dispatch("weekly", WEEK_END)
+
+        assert sent == []
+        assert (metrics["status"], metrics["running_elsewhere"]) == ("running", True)
+
+    @pytest.mark.asyncio
+    async def test_failures_are_recorded_and_completed_runs_are_not_resent(self, db_session, dispatcher,
+                                                                           weekly_recipients, sent_emails):
+        sent, failures = sent_emails
+        failures["test@example.com"] = 10
+
+        metrics = await dispatcher.dispatch("weekly", WEEK_END)
+        again = await dispatcher.dispatch("weekly", WEEK_END)
+
+        assert sent == ["test2@example.com"]
+        assert (metrics["sent"], metrics["failed"], metrics["retries"]) == (1, 1, 2)
+        failed = db_session.query(ReportDispatchItem).filter(ReportDispatchItem.status == "failed").one()
+        assert failed.attempts == 3 and failed.error == "Email delivery failed"
+        assert again["run_id"] == metrics["run_id"] and again["skipped"] == 1
+
+    @pytest.mark.asyncio
+    async def test_monthly_dispatch_falls_back_to_all_users(self, dispatcher, test_user, test_user_2, sent_emails):
+        sent, _ = sent_emails
+
+        metrics = await dispatcher.dispatch("monthly", date(2024, 2, 1))
+
+        assert sorted(sent) == ["test2@example.com", "test@example.com"]
+        assert (metrics["period"], metrics["total"], metrics["sent"]) == ("2024-02", 2, 2)
+
+    @pytest.mark.asyncio
+    async def test_large_runs_render_emails_in_worker_processes(self, db_session, weekly_recipients, monkeypatch):
+        subjects = []
+
+        async def send(to_email, subject, html_content, text_content=None):
+            subjects.append(subject)
+            return "Week of 2024-03-04" in html_content
+
+        monkeypatch.setattr(email_module.email_service, "send_email", send)
+        service = ReportDispatcher(session_factory=sessionmaker(bind=db_session.get_bind()), retry_delay=0,
+                                   rate_per_second=1000, render_process_threshold=2)
+        try:
+            metrics = await service.dispatch("weekly", WEEK_END)
+        finally:
+            service.shutdown()
+            report_dispatch.shutdown_render_pool()
+
+        assert metrics["render_processes"] is True
+        assert (metrics["sent"], metrics["failed"]) == (2, 0)
+        assert subjects == ["Your Weekly Financial Report - Week of 2024-03-04"] * 2
+        assert metrics["avg_render_ms"] > 0
+
+    @pytest.mark.asyncio
+    async def test_rate_limiter_caps_global_send_rate(self):
+        limiter = RateLimiter(rate=50, burst=5)
+
+        start = time.perf_counter()
+        await asyncio.gather(*[limiter.acquire() for _ in range(15)])
+        duration = time.perf_counter() - start
+
+        # 5 immediately from the burst, the other 10 at 50/s
+        assert duration >= 0.18, duration
+        print(f"✓ 15 acquisitions at 50/s with burst 5: {duration * 1000:.0f}ms")
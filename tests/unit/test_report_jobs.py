@@ -0,0 +1,216 @@
+"""Unit tests for background report jobs"""
+import gzip
+import json
+import time
+import pytest
+from datetime import date, datetime, timedelta
+from decimal import Decimal
+from sqlalchemy.orm import sessionmaker
+
+from app.main import app
+from app.deps import current_user
+from app.api.v1 import reports
+from app.core.currency import CurrencyService
+from app.models.entry import Entry
+from app.models.historical_report import HistoricalReport
+from app.models.report_job import ReportJob
+from app.services import report_jobs
+from app.services.report_jobs import ReportJobService
+
+
+@pytest.fixture
+def report_entries(db_session, test_user, test_categories):
+    today = date.today()
+    db_session.add_all([
+        Entry(user_id=test_user.id, type="income", amount=Decimal("2500.00"), category_id=test_categories[4].id,
+              note="Salary", currency_code="USD", date=today - timedelta(days=3)),
+        Entry(user_id=test_user.id, type="expense", amount=Decimal("12.50"), category_id=test_categories[0].id,
+              currency_code="USD", date=today),
+        Entry(user_id=test_user.id, type="expense", amount=Decimal("85.00"), category_id=test_categories[1].id,
+              currency_code="EUR", date=today - timedelta(days=1)),
+    ])
+    db_session.commit()
+
+
+def _job_service(db_session, workers=2):
+    return ReportJobService(session_factory=sessionmaker(bind=db_session.get_bind()), workers=workers)
+
+
+@pytest.fixture
+def job_service(db_session, monkeypatch):
+    async def fixed_rates(self):
+        return {"USD": 1.0, "EUR": 0.85}
+
+    monkeypatch.setattr(CurrencyService, "get_exchange_rates", fixed_rates)
+    service = _job_service(db_session)
+    monkeypatch.setattr(reports, "report_job_service", service)
+    yield service
+    service.shutdown()
+
+
+@pytest.fixture
+def jobs_client(client, test_user, job_service):
+    app.dependency_overrides[current_user] = lambda: test_user
+    yield client
+    app.dependency_overrides.pop(current_user, None)
+
+
+def _wait_for(client, job):
+    for _ in range(300):
+        status = client.get(job["status_url"]).json()
+        if status["status"] in ("completed", "failed"):
+            return status
+        time.sleep(0.05)
+    raise AssertionError(f"Job did not finish: {status}")
+
+
+@pytest.mark.unit
+class TestReportJobs:
+    def test_large_pdf_report_runs_as_background_job(self, jobs_client, test_user, test_user_2,
+                                                     report_entries, monkeypatch):
+        monkeypatch.setattr(reports, "PDF_BACKGROUND_THRESHOLD", 1)
+
+        response = jobs_client.get("/reports/pdf/financial?report_type=expense")
+
+        assert response.status_code == 202
+        job = response.json()
+        assert job["status_url"] == f"/reports/jobs/{job['job_id']}"
+
+        status = _wait_for(jobs_client, job)
+        assert status["status"] == "completed", status
+        assert status["progress"] == 100
+
+        download = jobs_client.get(status["download_url"])
+        assert download.status_code == 200
+        assert download.content.startswith(b"%PDF")
+        assert "financial_report_expense.pdf" in download.headers["content-disposition"]
+
+        # Jobs are private to their owner
+        app.dependency_overrides[current_user] = lambda: test_user_2
+        assert jobs_client.get(job["status_url"]).status_code == 404
+        assert jobs_client.get(status["download_url"]).status_code == 404
+
+    def test_file_results_are_stored_compressed(self, db_session, test_user, report_entries, job_service):
+        result = job_service.submit(db_session, test_user.id, "excel", {"report_type": "all"})
+        job_id = result["job"].id
+
+        for _ in range(300):
+            db_session.expire_all()
+            job = db_session.get(ReportJob, job_id)
+            if job.status in ("completed", "failed"):
+                break
+            time.sleep(0.05)
+
+        assert job.status == "completed", job.error
+        assert job.result_data[:2] == b"\x1f\x8b"
+        content = gzip.decompress(job.result_data)
+        assert content.startswith(b"PK")  # xlsx is a zip archive
+        assert b"".join(job_service.iter_result_file(job)) == content
+
+    def test_weekly_report_job_saves_historical_report(self, jobs_client, db_session, test_user, report_entries):
+        response = jobs_client.post("/reports/jobs", json={"report_type": "weekly", "params": {}})
+        assert response.status_code == 202
+
+        status = _wait_for(jobs_client, response.json())
+        assert status["status"] == "completed", status
+
+        report = jobs_client.get(status["download_url"]).json()
+        saved = db_session.query(HistoricalReport).filter(HistoricalReport.user_id == test_user.id).one()
+        assert saved.report_type == "weekly"
+        assert report["_metadata"]["report_id"] == saved.id
+        assert report["summary"]["total_expenses"] == saved.total_expenses / 100
+
+    def test_identical_requests_are_deduplicated(self, db_session, test_user):
+        service = _job_service(db_session, workers=0)  # jobs stay queued
+
+        first = service.submit(db_session, test_user.id, "pdf", {"start": "2024-01-01", "report_type": "all"})
+        second = service.submit(db_session, test_user.id, "pdf", {"report_type": "all", "start": "2024-01-01"})
+        other = service.submit(db_session, test_user.id, "pdf", {"start": "2024-02-01", "report_type": "all"})
+
+        assert first["deduplicated"] is False
+        assert second["deduplicated"] is True
+        assert second["job"].id == first["job"].id
+        assert other["job"].id != first["job"].id
+
+    def test_stale_running_jobs_expire_on_submit(self, db_session, test_user):
+        service = _job_service(db_session, workers=0)
+        params = {"report_type": "all"}
+        zombie = service.submit(db_session, test_user.id, "pdf", params)["job"]
+        zombie.status = "running"
+        zombie.started_at = datetime.utcnow() - report_jobs.JOB_TIMEOUT - timedelta(minutes=1)
+        db_session.commit()
+
+        result = service.submit(db_session, test_user.id, "pdf", params)
+
+        assert result["deduplicated"] is False
+        db_session.refresh(zombie)
+        assert zombie.status == "failed"
+        assert zombie.error == "Report generation was interrupted"
+
+    def test_active_jobs_per_user_are_limited(self, jobs_client, db_session, test_user, test_user_2,
+                                              monkeypatch):
+        monkeypatch.setattr(reports, "report_job_service", _job_service(db_session, workers=0))
+
+        for year in range(report_jobs.MAX_ACTIVE_JOBS_PER_USER):
+            response = jobs_client.post("/reports/jobs", json={"report_type": "annual", "params": {"year": 2020 + year}})
+            assert response.status_code == 202
+
+        response = jobs_client.post("/reports/jobs", json={"report_type": "annual", "params": {"year": 2019}})
+        assert response.status_code == 429
+
+        # Resubmitting an active job is still answered, and other users are unaffected
+        response = jobs_client.post("/reports/jobs", json={"report_type": "annual", "params": {"year": 2020}})
+        assert response.status_code == 202
+        assert response.json()["deduplicated"] is True
+
+        app.dependency_overrides[current_user] = lambda: test_user_2
+        response = jobs_client.post("/reports/jobs", json={"report_type": "annual", "params": {"year": 2019}})
+        assert response.status_code == 202
+
+        assert jobs_client.post("/reports/jobs", json={"report_type": "nope"}).status_code == 400
+
+    def test_events_stream_progress_until_finished(self, jobs_client, report_entries, monkeypatch):
+        monkeypatch.setattr(reports, "JOB_EVENTS_POLL_INTERVAL", 0.05)
+        job = jobs_client.post("/reports/jobs", json={"report_type": "monthly", "params": {}}).json()
+
+        events = []
+        with jobs_client.stream("GET", job["events_url"]) as response:
+            assert response.headers["content-type"].startswith("text/event-stream")
+            for line in response.iter_lines():
+                if line.startswith("event: "):
+                    events.append(line[len("event: "):])
+                elif line.startswith("data: "):
+                    data = json.loads(line[len("data: "):])
+
+        assert events[-1] == "completed"
+        assert data["download_url"] == f"/reports/jobs/{job['job_id']}/download"
+
+    def test_failed_job_records_error(self, jobs_client, monkeypatch):
+        def broken(db, user_id, params, progress):
+            progress(50, "Halfway")
+            raise ValueError("boom")
+
+        monkeypatch.setitem(report_jobs.REPORT_GENERATORS, "annual", broken)
+
+        job = jobs_client.post("/reports/jobs", json={"report_type": "annual", "params": {}}).json()
+        status = _wait_for(jobs_client, job)
+
+        assert status["status"] == "failed"
+        assert status["error"] == "boom"
+        assert status["progress"] == 50
+        assert jobs_client.get(f"/reports/jobs/{job['job_id']}/download").status_code == 409
+
+    def test_recover_requeues_jobs_queued_before_restart(self, db_session, test_user, report_entries,
+                                                         job_service):
+        stopped = _job_service(db_session, workers=0)
+        job_id = stopped.submit(db_session, test_user.id, "monthly", {})["job"].id
+
+        assert job_service.recover() == 1
+
+        for _ in range(300):
+            db_session.expire_all()
+            job = db_session.get(ReportJob, job_id)
+            if job.status == "completed":
+                break
+            time.sleep(0.05)
+        assert job.status == "completed"
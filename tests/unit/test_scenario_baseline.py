@@ -0,0 +1,132 @@
+"""Unit tests for the versioned scenario baseline snapshot"""
+import pytest
+from datetime import date, timedelta
+
+from app.models.entry import Entry
+from app.models.scenario import Scenario
+from app.services.scenario_service import ScenarioService
+
+
+TODAY = date.today()
+
+
+@pytest.fixture
+def history(db_session, test_user, test_categories):
+    for days_ago in range(0, 150, 10):
+        db_session.add_all([
+            Entry(user_id=test_user.id, type="income", amount=1500, date=TODAY - timedelta(days=days_ago),
+                  currency_code="USD"),
+            Entry(user_id=test_user.id, type="expense", amount=120 + days_ago, category_id=test_categories[0].id,
+                  date=TODAY - timedelta(days=days_ago), currency_code="USD"),
+        ])
+    db_session.commit()
+    return test_user.id
+
+
+def _entry_reads(statements):
+    """SELECTs that read the entries table"""
+    return [s for s in statements if s.lstrip().upper().startswith("SELECT") and "FROM entries" in s]
+
+
+@pytest.mark.unit
+class TestScenarioBaseline:
+    def test_baseline_is_computed_once_for_create_update_and_compare(self, db_session, history, test_categories,
+                                                                     query_counter):
+        service = ScenarioService(db_session)
+        food = test_categories[0].id
+
+        with query_counter() as statements:
+            first = service.create_scenario(history, "Cut food", 'spending_reduction',
+                                            {'category_id': food, 'reduction_percent': 20})
+        assert len(_entry_reads(statements)) == 4  # income, expenses, categories, monthly history
+        with query_counter() as statements:
+            second = service.create_scenario(history, "Side job", 'income_increase',
+                                             {'amount': 300, 'frequency': 'monthly'})
+            updated = service.update_scenario(first['scenario']['id'], history,
+                                              {'parameters': {'category_id': food, 'reduction_percent': 40}})
+            comparison = service.compare_scenarios(history, [first['scenario']['id'], second['scenario']['id']])
+
+        assert _entry_reads(statements) == []
+        assert updated['scenario']['projected_outcome']['monthly_savings'] == pytest.approx(
+            2 * first['scenario']['projected_outcome']['monthly_savings'])
+        assert comparison['success'] and comparison['recomputed_scenario_ids'] == []
+        print("✓ Two creates, an update and a compare read entries 4 times")
+
+    def test_snapshot_is_shared_through_the_cache(self, db_session, history, test_categories, dict_cache,
+                                                  query_counter):
+        parameters = {'category_id': test_categories[0].id, 'reduction_percent': 25}
+        first = ScenarioService(db_session, cache=dict_cache).create_scenario(
+            history, "Cut food", 'spending_reduction', parameters)
+
+        with query_counter() as statements:
+            second = ScenarioService(db_session, cache=dict_cache).create_scenario(
+                history, "Cut food again", 'spending_reduction', parameters)
+
+        assert _entry_reads(statements) == []
+        first_outcome, second_outcome = first['scenario']['projected_outcome'], second['scenario']['projected_outcome']
+        assert second_outcome['monthly_savings'] > 0  # category keys survive the JSON round trip
+        assert second_outcome['monthly_savings'] == pytest.approx(first_outcome['monthly_savings'])
+        assert second_outcome['simulation'] == first_outcome['simulation']
+
+    def test_compare_recomputes_only_stale_scenarios(self, db_session, history, test_categories):
+        service = ScenarioService(db_session)
+        food = test_categories[0].id
+        old = service.create_scenario(history, "Cut food", 'spending_reduction',
+                                      {'category_id': food, 'reduction_percent': 20})['scenario']
+
+        db_session.add(Entry(user_id=history, type="expense", amount=900, category_id=food, date=TODAY,
+                             currency_code="USD"))
+        db_session.commit()
+        service = ScenarioService(db_session)
+        new = service.create_scenario(history, "Cut food more", 'spending_reduction',
+                                      {'category_id': food, 'reduction_percent': 30})['scenario']
+        assert new['baseline_version'] > old['baseline_version']
+
+        comparison = service.compare_scenarios(history, [old['id'], new['id']])
+
+        assert comparison['recomputed_scenario_ids'] == [old['id']]
+        refreshed = db_session.get(Scenario, old['id'])
+        assert refreshed.baseline_version == new['baseline_version']
+        assert refreshed.projected_outcome['monthly_savings'] == pytest.approx(
+            new['projected_outcome']['monthly_savings'] * 20 / 30)
+        assert service.compare_scenarios(history, [old['id'], new['id']])['recomputed_scenario_ids'] == []
+
+    def test_compare_recomputes_scenarios_from_an_earlier_window(self, db_session, history, test_categories):
+        service = ScenarioService(db_session)
+        old = service.create_scenario(history, "Cut food", 'spending_reduction',
+                                      {'category_id': test_categories[0].id, 'reduction_percent': 20})['scenario']
+        other = service.create_scenario(history, "Side job", 'income_increase',
+                                        {'amount': 300, 'frequency': 'monthly'})['scenario']
+
+        # Same data version, but projected before the 90-day window moved on
+        scenario = db_session.get(Scenario, old['id'])
+        scenario.baseline_data = {**scenario.baseline_data,
+                                  'baseline_date': (TODAY - timedelta(days=1)).isoformat() + "T23:00:00"}
+        db_session.commit()
+
+        comparison = ScenarioService(db_session).compare_scenarios(history, [old['id'], other['id']])
+
+        assert comparison['recomputed_scenario_ids'] == [old['id']]
+        assert db_session.get(Scenario, old['id']).baseline_data['baseline_date'][:10] == \
+            other['baseline_data']['baseline_date'][:10]
+
+    def test_cached_snapshot_without_full_months_round_trips(self, db_session, test_user, test_categories,
+                                                             dict_cache):
+        # A new user: every entry is in the current, incomplete month
+        db_session.add_all([
+            Entry(user_id=test_user.id, type="income", amount=2000, date=TODAY, currency_code="USD"),
+            Entry(user_id=test_user.id, type="expense", amount=150, category_id=test_categories[0].id, date=TODAY,
+                  currency_code="USD"),
+        ])
+        db_session.commit()
+        parameters = {'amount': 300, 'frequency': 'monthly'}
+
+        first = ScenarioService(db_session, cache=dict_cache).create_scenario(
+            test_user.id, "Side job", 'income_increase', parameters)
+        second = ScenarioService(db_session, cache=dict_cache).create_scenario(
+            test_user.id, "Side job again", 'income_increase', parameters)
+
+        assert dict_cache.redis_client.store  # the empty history was cached
+        assert first['success'] and second['success']
+        assert second['scenario']['projected_outcome']['monthly_increase'] == \
+            first['scenario']['projected_outcome']['monthly_increase']
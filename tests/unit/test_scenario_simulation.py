@@ -0,0 +1,99 @@
+"""Unit tests for Monte Carlo scenario projections"""
+import pytest
+import numpy as np
+import pandas as pd
+from datetime import date
+
+from app.models.entry import Entry
+from app.services.scenario_service import ScenarioService
+from app.services.scenario_simulation import MonthlyHistory, ScenarioEffect, simulate
+
+
+TODAY = date.today()
+
+
+def _month_start(months_back: int) -> date:
+    index = TODAY.year * 12 + TODAY.month - 1 - months_back
+    return date(index // 12, index % 12 + 1, 1)
+
+
+@pytest.fixture
+def steady_history(db_session, test_user, test_categories):
+    """Six full months of identical income and spending, plus some of the current month"""
+    food, bills = test_categories[0], test_categories[1]
+    for months_back in range(0, 7):
+        day = _month_start(months_back).replace(day=5)
+        db_session.add_all([
+            Entry(user_id=test_user.id, type="income", amount=3000, date=day, currency_code="USD"),
+            Entry(user_id=test_user.id, type="expense", amount=500, category_id=food.id, date=day,
+                  currency_code="USD"),
+            Entry(user_id=test_user.id, type="expense", amount=300, category_id=bills.id, date=day,
+                  currency_code="USD"),
+        ])
+    db_session.commit()
+    return test_user.id
+
+
+@pytest.mark.unit
+class TestScenarioSimulation:
+    def test_history_covers_full_months_only(self):
+        df = pd.DataFrame({
+            'date': [_month_start(3), _month_start(3), _month_start(1), TODAY],
+            'type': ['income', 'expense', 'expense', 'expense'],
+            'amount': [1000.0, 200.0, 50.0, 999.0],
+            'category_id': [0, 7, 8, 7],
+        })
+
+        history = MonthlyHistory.from_frame(df, TODAY)
+
+        assert len(history) == 3  # the empty month in between is kept, the current one is not
+        assert history.income.tolist() == [1000.0, 0.0, 0.0]
+        assert history.expenses.tolist() == [200.0, 0.0, 50.0]
+        assert history.category_column(7).tolist() == [200.0, 0.0, 0.0]
+        assert history.category_column(99) is None
+
+    def test_paths_bootstrap_history_months(self):
+        history = MonthlyHistory([f"2026-0{i}" for i in range(1, 5)], np.array([1000.0, 1000, 1000, 1000]),
+                                 np.array([400.0, 600, 800, 1000]), [1], np.array([[400.0], [600], [800], [1000]]))
+        effects = [
+            ScenarioEffect.from_parameters(history, 'spending_reduction',
+                                           {'category_id': 1, 'reduction_percent': 50, 'duration_months': 12}),
+            ScenarioEffect.from_parameters(history, 'income_increase', {'amount': 100, 'frequency': 'one_time'}),
+        ]
+
+        result = simulate(history, effects, paths=4000, months=12)
+
+        baseline = result['baseline']['cumulative_savings']
+        assert baseline['p10'][-1] < baseline['p50'][-1] < baseline['p90'][-1]
+        assert baseline['p50'][-1] == pytest.approx(12 * 300, rel=0.1)
+        reduction, bonus = result['scenarios']
+        assert reduction['total_impact']['p50'] == pytest.approx(12 * 350, rel=0.1)
+        assert bonus['total_impact'] == {f"p{p}": 100.0 for p in (10, 25, 50, 75, 90)}
+        assert simulate(MonthlyHistory.from_frame(pd.DataFrame(), TODAY), effects) is None
+
+    def test_create_and_compare_project_percentiles_and_goal_odds(self, db_session, steady_history,
+                                                                  test_categories):
+        service = ScenarioService(db_session)
+        food = test_categories[0].id
+
+        cut = service.create_scenario(steady_history, "Cut food", 'spending_reduction',
+                                      {'category_id': food, 'reduction_percent': 20})
+        goal = service.create_scenario(steady_history, "Save 20k", 'goal_based',
+                                       {'target_amount': 20000, 'timeframe_months': 12})
+        stretch = service.create_scenario(steady_history, "Save 40k", 'goal_based',
+                                          {'target_amount': 40000, 'timeframe_months': 12})
+
+        simulation = cut['scenario']['projected_outcome']['simulation']
+        assert simulation['history_months'] == 6
+        # Every month of this history is the same, so all paths agree
+        assert simulation['total_impact']['p10'] == simulation['total_impact']['p90'] == pytest.approx(600.0)
+        assert simulation['baseline_cumulative_savings']['p50'][11] == pytest.approx(12 * 2200.0)
+
+        comparison = service.compare_scenarios(steady_history, [cut['scenario']['id'], goal['scenario']['id'],
+                                                                stretch['scenario']['id']])
+
+        assert comparison['success']
+        odds = {s['name']: s['goal_probability'] for s in comparison['scenarios']}
+        assert odds == {"Cut food": None, "Save 20k": 1.0, "Save 40k": 0.0}
+        assert set(comparison['simulation']['scenarios']) == {s['id'] for s in comparison['scenarios']}
+        print("✓ " + "; ".join(i for i in comparison['insights'] if 'chance' in i))
@@ -0,0 +1,124 @@
+"""Unit tests for period-level memoization in TimeSeriesAnalyzer"""
+import pytest
+import numpy as np
+from datetime import date, timedelta
+from unittest.mock import patch
+
+from app.ai.data.period_cache import PeriodSummaryCache, period_key, split_window
+from app.ai.data.time_series_analyzer import TimeSeriesAnalyzer
+from app.core.cache import CacheService
+from app.models.entry import Entry
+from app.services.data_version import get_data_version
+
+
+@pytest.fixture
+def period_cache(dict_cache):
+    with patch('app.ai.data.period_cache.get_cache', return_value=dict_cache):
+        yield dict_cache
+
+
+@pytest.fixture
+def spending_history(db_session, test_user, test_categories):
+    """Fourteen months of expenses and monthly income"""
+    rng = np.random.default_rng(11)
+    today = date.today()
+    for i in range(600):
+        db_session.add(Entry(
+            user_id=test_user.id,
+            type="expense",
+            amount=round(float(rng.gamma(2.0, 20.0)), 2),
+            category_id=test_categories[i % 5].id,
+            date=today - timedelta(days=int(rng.integers(0, 420))),
+        ))
+    for month in range(14):
+        db_session.add(Entry(user_id=test_user.id, type="income", amount=3000,
+                             date=today - timedelta(days=30 * month)))
+    db_session.commit()
+
+
+@pytest.mark.unit
+class TestPeriodWindows:
+    def test_split_window_marks_only_complete_past_periods_closed(self):
+        periods = split_window('month', date(2025, 1, 15), date(2025, 4, 10), date(2025, 4, 10))
+
+        assert [key for key, _, _, _ in periods] == ['month:2025-01', 'month:2025-02', 'month:2025-03', 'month:2025-04']
+        assert [closed for _, _, _, closed in periods] == [False, True, True, False]
+        assert periods[0][1] == date(2025, 1, 15)
+        assert periods[-1][2] == date(2025, 4, 10)
+
+    def test_iso_week_keys(self):
+        assert period_key('week', date(2024, 12, 30)) == 'week:2025-W01'
+        assert period_key('year', date(2024, 12, 30)) == 'year:2024'
+
+
+@pytest.mark.unit
+class TestTimeSeriesPeriodCache:
+    def test_cached_results_match_uncached(self, db_session, test_user, spending_history, period_cache):
+        no_cache = CacheService.__new__(CacheService)
+        no_cache.enabled = False
+        no_cache.redis_client = None
+        uncached = TimeSeriesAnalyzer(db_session, cache=no_cache)
+        cached = TimeSeriesAnalyzer(db_session, cache=period_cache)
+
+        for method in ('get_weekly_analysis', 'get_monthly_analysis', 'get_annual_analysis', 'detect_spending_patterns'):
+            expected = repr(getattr(uncached, method)(test_user.id))
+            cold = repr(getattr(cached, method)(test_user.id))
+            warm = repr(getattr(cached, method)(test_user.id))
+            assert cold == expected, method
+            assert warm == expected, method
+
+    def test_warm_call_only_reads_open_periods(self, db_session, test_user, spending_history, period_cache,
+                                               query_counter):
+        user_id = test_user.id
+        analyzer = TimeSeriesAnalyzer(db_session, cache=period_cache)
+        analyzer.get_monthly_analysis(user_id)
+
+        with query_counter(parameters=True) as statements:
+            analyzer.get_monthly_analysis(user_id)
+        scans = [params for statement, params in statements if 'FROM entries' in statement]
+
+        today = date.today()
+        open_periods = [(first, last) for _, first, last, closed
+                        in split_window('month', today - timedelta(days=360), today, today) if not closed]
+        assert len(scans) == 1
+        read_bounds = {str(p) for p in scans[0] if not isinstance(p, int) and p != 'Uncategorized'}
+        assert read_bounds == {str(day) for bounds in open_periods for day in bounds}
+        print(f"✓ Warm monthly analysis re-read {len(open_periods)} of 13 months")
+
+    def test_back_dated_entry_invalidates_cached_periods(self, db_session, test_user, test_categories,
+                                                         spending_history, period_cache):
+        user_id = test_user.id
+        analyzer = TimeSeriesAnalyzer(db_session, cache=period_cache)
+        before = analyzer.get_monthly_analysis(user_id)
+
+        back_dated = (date.today().replace(day=1) - timedelta(days=70)).replace(day=15)
+        other = (back_dated.replace(day=1) - timedelta(days=40)).replace(day=15)
+        keys = [period_key('month', back_dated), period_key('month', other)]
+        summaries = PeriodSummaryCache(period_cache)
+        version = get_data_version(db_session, user_id)
+        assert None not in summaries.get_many(user_id, keys, version)
+
+        db_session.add(Entry(user_id=user_id, type="expense", amount=500,
+                             category_id=test_categories[0].id, date=back_dated))
+        db_session.commit()
+
+        assert get_data_version(db_session, user_id) == version + 1
+        assert summaries.get_many(user_id, keys, version + 1) == [None, None]
+
+        after = analyzer.get_monthly_analysis(user_id)
+        label = back_dated.strftime('%Y-%m')
+        spent = {row[('year_month', '')]: row[('amount', 'sum')] for row in after['monthly_spending']}
+        previous = {row[('year_month', '')]: row[('amount', 'sum')] for row in before['monthly_spending']}
+        assert spent[label] == pytest.approx(previous[label] + 500)
+        assert spent[other.strftime('%Y-%m')] == previous[other.strftime('%Y-%m')]
+        assert None not in summaries.get_many(user_id, keys, version + 1)
+
+    def test_without_redis_everything_is_recomputed(self, db_session, test_user, spending_history):
+        cache = CacheService.__new__(CacheService)
+        cache.enabled = False
+        cache.redis_client = None
+        analyzer = TimeSeriesAnalyzer(db_session, cache=cache)
+
+        result = analyzer.get_annual_analysis(test_user.id)
+        assert result['total_years_analyzed'] >= 2
+        print(f"✓ Annual analysis without cache: {result['total_years_analyzed']} years")
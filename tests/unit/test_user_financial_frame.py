@@ -0,0 +1,97 @@
+"""Unit tests for the shared per-request entries frame behind financial insights"""
+import time
+import pytest
+import numpy as np
+from datetime import date, timedelta
+
+from app.ai.data.user_financial_frame import UserFinancialFrame
+from app.ai.services.anomaly_detection import _loaded_models
+from app.ai.services.financial_insights import FinancialInsightsService
+from app.models.entry import Entry
+
+
+@pytest.fixture
+def insight_history(db_session, test_user, test_categories):
+    """Half a year of expenses and monthly income, with a few uncategorized and old entries"""
+    rng = np.random.default_rng(3)
+    today = date.today()
+    for i in range(400):
+        db_session.add(Entry(
+            user_id=test_user.id,
+            type="expense",
+            amount=round(float(rng.gamma(2.0, 15.0)), 2),
+            category_id=test_categories[i % 5].id if i % 7 else None,
+            note=["Coffee", "Netflix", "Groceries", None][i % 4],
+            date=today - timedelta(days=int(rng.integers(0, 200))),
+        ))
+    for month in range(6):
+        db_session.add(Entry(user_id=test_user.id, type="income", amount=3000,
+                             date=today - timedelta(days=30 * month)))
+    db_session.add(Entry(user_id=test_user.id, type="expense", amount=10,
+                         date=today - timedelta(days=900)))
+    db_session.commit()
+    _loaded_models.clear()
+    yield
+    _loaded_models.clear()
+
+
+@pytest.mark.unit
+class TestUserFinancialFrame:
+    def test_loads_window_and_total_in_one_query(self, db_session, test_user, insight_history, query_counter):
+        user_id = test_user.id
+        with query_counter() as statements:
+            frame = UserFinancialFrame(db_session, user_id)
+            assert frame.total_entries == 407
+            assert frame.entries['date'].min() >= frame.start_date
+
+        assert len(statements) == 1
+
+    def test_views_are_memoized(self, db_session, test_user, insight_history):
+        frame = UserFinancialFrame(db_session, test_user.id)
+
+        assert frame.expenses(90) is frame.expenses(90)
+        assert frame.daily_totals(90) is frame.daily_totals(90)
+        assert frame.weekday_profile(90)['count'].sum() == len(frame.expenses(90))
+
+    def test_views_match_entries(self, db_session, test_user, insight_history):
+        frame = UserFinancialFrame(db_session, test_user.id)
+        start = date.today() - timedelta(days=90)
+        expenses = db_session.query(Entry).filter(
+            Entry.user_id == test_user.id, Entry.type == 'expense',
+            Entry.date >= start, Entry.date <= date.today()
+        ).all()
+
+        assert len(frame.expenses(90)) == len(expenses)
+        assert frame.daily_totals(90).sum() == pytest.approx(sum(float(e.amount) for e in expenses))
+        assert len(frame.expenses(90, categorized=True)) == sum(1 for e in expenses if e.category_id)
+
+        monthly = frame.monthly_by_category(180)
+        assert monthly.sum() == pytest.approx(frame.expenses(180, categorized=True)['amount'].sum())
+
+    def test_empty_window_still_counts_old_entries(self, db_session, test_user):
+        db_session.add(Entry(user_id=test_user.id, type="expense", amount=10,
+                             date=date.today() - timedelta(days=900)))
+        db_session.commit()
+
+        frame = UserFinancialFrame(db_session, test_user.id)
+        assert frame.entries.empty
+        assert frame.total_entries == 1
+
+
+@pytest.mark.performance
+class TestInsightsRoundTrips:
+    def test_comprehensive_insights_round_trips(self, db_session, test_user, insight_history, query_counter):
+        """Comprehensive insights should read entries once, not once per analyzer"""
+        user_id = test_user.id
+        FinancialInsightsService(db_session).get_comprehensive_insights(user_id)  # trains the anomaly model
+
+        with query_counter() as statements:
+            start_time = time.time()
+            result = FinancialInsightsService(db_session).get_comprehensive_insights(user_id)
+            duration = time.time() - start_time
+
+        assert result['success']
+        entry_scans = [s for s in statements if 'FROM entries' in s and 'ai_models' not in s]
+        assert len(entry_scans) <= 2, f"{len(entry_scans)} entry queries"
+        assert len(statements) <= 6, f"{len(statements)} SQL round trips"
+        print(f"✓ Comprehensive insights: {len(statements)} SQL round trips, {duration:.3f}s")
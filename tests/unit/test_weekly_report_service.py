@@ -0,0 +1,110 @@
+"""Unit tests for the single-pass weekly report service"""
+import json
+import random
+import pytest
+from datetime import date, timedelta
+from decimal import Decimal
+from pathlib import Path
+
+from app.models.category import Category
+from app.models.entry import Entry
+from app.models.user_preferences import UserPreferences
+from app.services.weekly_report_service import WeeklyReportService
+
+
+GOLDEN_PATH = Path(__file__).parent / "golden" / "weekly_report.json"
+WEEK_END = date(2024, 3, 14)  # week of Monday 2024-03-11
+
+
+@pytest.fixture
+def weekly_history(db_session, test_user, test_categories):
+    """Deterministic 90-day history plus a current week with every report feature"""
+    travel = Category(name="Travel", user_id=test_user.id)
+    db_session.add_all([travel, UserPreferences(user_id=test_user.id, currency_code="EUR")])
+    db_session.commit()
+    food, transport, shopping, entertainment, utilities = test_categories
+
+    rng = random.Random(35)
+    rows = []
+    day = WEEK_END - timedelta(days=WEEK_END.weekday() + 90)
+    while day < date(2024, 3, 4):
+        for _ in range(rng.randint(0, 3)):
+            category = rng.choice([food, food, transport, shopping, entertainment, None])
+            rows.append((day, "expense", f"{rng.randint(150, 9000) / 100:.2f}", category, None))
+        if day.day == 1:
+            rows.append((day, "income", "3250.75", utilities, "Salary"))
+        day += timedelta(days=1)
+
+    # Previous week: spending in four categories and a small refund
+    rows += [
+        (date(2024, 3, 4), "expense", "42.10", food, None),
+        (date(2024, 3, 5), "expense", "18.35", transport, None),
+        (date(2024, 3, 6), "expense", "120.00", entertainment, "Concert"),
+        (date(2024, 3, 7), "expense", "260.49", shopping, None),
+        (date(2024, 3, 8), "income", "15.00", shopping, "Refund"),
+        (date(2024, 3, 9), "expense", "9.99", travel, None),
+    ]
+    # Current week: food spikes, shopping drops, entertainment stops, a large uncategorized charge
+    rows += [
+        (date(2024, 3, 11), "expense", "88.40", food, "Groceries"),
+        (date(2024, 3, 11), "expense", "12.15", transport, None),
+        (date(2024, 3, 12), "expense", "410.00", food, "Dinner party"),
+        (date(2024, 3, 13), "expense", "75.25", shopping, None),
+        (date(2024, 3, 14), "expense", "1499.99", None, "Laptop"),
+        (date(2024, 3, 16), "expense", "64.80", utilities, None),
+        (date(2024, 3, 16), "expense", "5.01", travel, None),
+    ]
+    # Later in the month: only counts towards the monthly income estimate
+    rows.append((date(2024, 3, 25), "income", "410.20", utilities, "Freelance"))
+
+    db_session.add_all([
+        Entry(user_id=test_user.id, type=entry_type, amount=Decimal(amount), date=entry_date,
+              category_id=category.id if category else None, note=note, currency_code="EUR")
+        for entry_date, entry_type, amount, category, note in rows
+    ])
+    db_session.commit()
+    return test_user
+
+
+def _render(report):
+    report = dict(report)
+    report.pop("generated_at")
+    return json.dumps(report, indent=2)
+
+
+@pytest.mark.unit
+class TestWeeklyReportService:
+    @pytest.mark.parametrize("show_income", [False, True])
+    def test_report_matches_golden_output(self, db_session, weekly_history, show_income):
+        report = WeeklyReportService(db_session).generate_weekly_report(
+            weekly_history.id, week_end_date=WEEK_END, show_income=show_income
+        )
+
+        golden = json.loads(GOLDEN_PATH.read_text())[f"show_income={show_income}"]
+        assert _render(report) == json.dumps(golden, indent=2)
+        print(f"✓ Weekly report (show_income={show_income}) is byte-identical to the golden output")
+
+    def test_report_runs_a_constant_number_of_statements(self, db_session, weekly_history, query_counter):
+        user_id = weekly_history.id
+        with query_counter() as statements:
+            report = WeeklyReportService(db_session).generate_weekly_report(
+                user_id, week_end_date=WEEK_END, show_income=True
+            )
+
+        assert report["anomalies"]
+        assert len(statements) <= 3, statements
+        print(f"✓ Weekly report generated with {len(statements)} SQL statements")
+
+    def test_empty_week_uses_current_month_income(self, db_session, test_user):
+        today = date.today()
+        db_session.add(Entry(user_id=test_user.id, type="income", amount=Decimal("866.00"),
+                             date=today.replace(day=1), currency_code="USD"))
+        db_session.commit()
+
+        report = WeeklyReportService(db_session).generate_weekly_report(
+            test_user.id, week_end_date=date(2020, 6, 10), show_income=True
+        )
+
+        assert report["summary"]["total_expenses"] == 0
+        assert report["summary"]["total_income"] == 866.0 / 4.33
+        assert report["anomalies"] == []